@@ -0,0 +1,261 @@
+"""
+🗂️ Shared Bar Store - Multi-timeframe OHLCV in shared memory
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+The brain writes its TimeframeBuffer straight into one shared memory segment;
+trade, virtual monitor and API processes attach and read recent bars as NumPy
+arrays without a Postgres/Redis round trip.
+
+Layout (all sections 64-byte aligned):
+- header:     int64[8]   magic, version, n_symbols, n_timeframes, capacity
+- symbols:    S32[n_symbols]
+- timeframes: S16[n_timeframes] + int64[n_timeframes] (seconds)
+- seqlocks:   int64[n_symbols, n_timeframes, 8]   seq, total (one cache line each)
+- bars:       float64[n_symbols, n_timeframes, 6, 2 * capacity]  (mirrored BarRing)
+
+Single writer, many readers. The writer bumps seq to odd before and back to
+even after every write; read() retries until it copies a stable snapshot.
+"""
+
+import logging
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.data_formats import CANDLE_IDX_CLOSE
+from src.mark_to_market import normalize_symbol
+from src.timeframe_buffer import BarRing, NUM_COLUMNS, HEADER_SEQ, HEADER_TOTAL
+
+logger = logging.getLogger(__name__)
+
+BAR_STORE_NAME = "bar_store"
+BAR_STORE_MAGIC = 0x42415253  # "BARS"
+BAR_STORE_VERSION = 1
+
+HEADER_WORDS = 8
+SEQLOCK_WORDS = 8
+SYMBOL_DTYPE = 'S32'
+TIMEFRAME_DTYPE = 'S16'
+ALIGN = 64
+
+# Seqlock read: retries before giving up (writer preempted mid-write)
+READ_RETRIES = 100
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _layout(n_symbols: int, n_timeframes: int, capacity: int) -> Dict[str, tuple]:
+    """Section name → (offset, dtype, shape); '_size' → total bytes"""
+    sections = [
+        ('header', np.int64, (HEADER_WORDS,)),
+        ('symbols', SYMBOL_DTYPE, (n_symbols,)),
+        ('tf_names', TIMEFRAME_DTYPE, (n_timeframes,)),
+        ('tf_seconds', np.int64, (n_timeframes,)),
+        ('seqlocks', np.int64, (n_symbols, n_timeframes, SEQLOCK_WORDS)),
+        ('bars', np.float64, (n_symbols, n_timeframes, NUM_COLUMNS, 2 * capacity)),
+    ]
+    layout = {}
+    offset = 0
+    for name, dtype, shape in sections:
+        offset = _align(offset)
+        layout[name] = (offset, dtype, shape)
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    layout['_size'] = (_align(offset), None, None)
+    return layout
+
+
+class SharedBarStore:
+    """Fixed-capacity columnar bars per (symbol, timeframe) in shared memory"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        self.shm = shm
+        self.owner = owner
+
+        header = np.ndarray((HEADER_WORDS,), dtype=np.int64, buffer=shm.buf)
+        if header[0] != BAR_STORE_MAGIC or header[1] != BAR_STORE_VERSION:
+            raise ValueError(f"Shared memory '{shm.name}' is not a bar store (v{BAR_STORE_VERSION})")
+
+        n_symbols, n_timeframes, capacity = (int(x) for x in header[2:5])
+        self.capacity = capacity
+        self._arrays = {
+            name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            for name, (offset, dtype, shape) in _layout(n_symbols, n_timeframes, capacity).items()
+            if name != '_size'
+        }
+        self.symbols: List[str] = [s.decode() for s in self._arrays['symbols']]
+        self.timeframes: Dict[str, int] = {
+            name.decode(): int(seconds)
+            for name, seconds in zip(self._arrays['tf_names'], self._arrays['tf_seconds'])
+        }
+        self._symbol_index = {s: i for i, s in enumerate(self.symbols)}
+        # Exchange-form aliases ('BTCUSDT' for 'BTC/USDT') so account-side callers
+        # (position marking) can look bars up by their own symbol
+        for s, i in list(self._symbol_index.items()):
+            self._symbol_index.setdefault(normalize_symbol(s), i)
+        self._tf_index = {tf: i for i, tf in enumerate(self.timeframes)}
+        self.base_tf = min(self.timeframes, key=self.timeframes.get) if self.timeframes else None
+
+    @classmethod
+    def create(cls, symbols: List[str], timeframes: Dict[str, int], capacity: int,
+               name: str = BAR_STORE_NAME) -> 'SharedBarStore':
+        """Create (or replace a stale) segment; the creating process is the only writer"""
+        layout = _layout(len(symbols), len(timeframes), capacity)
+        size = layout['_size'][0]
+
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left over from a previous run (layout may differ) → recreate
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        shm.buf[:size] = b'\x00' * size
+        arrays = {
+            key: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            for key, (offset, dtype, shape) in layout.items()
+            if key != '_size'
+        }
+        arrays['symbols'][:] = [s.encode() for s in symbols]
+        arrays['tf_names'][:] = [tf.encode() for tf in timeframes]
+        arrays['tf_seconds'][:] = list(timeframes.values())
+        # Magic last: readers never see a half-initialized header
+        arrays['header'][1:5] = [BAR_STORE_VERSION, len(symbols), len(timeframes), capacity]
+        arrays['header'][0] = BAR_STORE_MAGIC
+        del arrays
+
+        logger.critical(
+            f"🗂️ SharedBarStore created: {len(symbols)} symbols × {len(timeframes)} timeframes × "
+            f"{capacity} bars ({size / 1024 / 1024:.1f} MB)"
+        )
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = BAR_STORE_NAME) -> 'SharedBarStore':
+        """Attach read-only to an existing segment (FileNotFoundError if absent)"""
+        return cls(shared_memory.SharedMemory(name=name))
+
+    def _slot(self, symbol: str, timeframe: str):
+        i = self._symbol_index[symbol]
+        j = self._tf_index[timeframe]
+        return self._arrays['seqlocks'][i, j], self._arrays['bars'][i, j]
+
+    def has(self, symbol: str, timeframe: str) -> bool:
+        return symbol in self._symbol_index and timeframe in self._tf_index
+
+    def ring(self, symbol: str, timeframe: str) -> BarRing:
+        """Writer side: a BarRing whose storage lives in this segment"""
+        header, store = self._slot(symbol, timeframe)
+        return BarRing(self.capacity, store=store, header=header)
+
+    def _window(self, total: int, n: Optional[int]) -> tuple:
+        count = min(total, self.capacity)
+        if n is not None:
+            count = min(max(n, 0), count)
+        end = (total - 1) % self.capacity + self.capacity + 1 if total else 0
+        return end - count, end
+
+    def view(self, symbol: str, timeframe: str, n: Optional[int] = None) -> np.ndarray:
+        """
+        Zero-copy (6, n) view, oldest → newest
+
+        Not protected by the seqlock: the writer may update it while you read.
+        Use read() when the bars must be mutually consistent.
+        """
+        header, store = self._slot(symbol, timeframe)
+        start, end = self._window(int(header[HEADER_TOTAL]), n)
+        return store[:, start:end]
+
+    def column_matrix(self, timeframes: List[str], n: int, column: int = CANDLE_IDX_CLOSE) -> np.ndarray:
+        """
+        Latest n values of one column for every symbol in one gather: (n_symbols, len(timeframes), n)
+
+        Slots with fewer than n bars are NaN-padded on the left. Like view(), this
+        is not seqlock-checked; it is meant for universe-wide screening
+        (e.g. TimeframeAnalyzer.validate_setups).
+        """
+        tf_idx = [self._tf_index[tf] for tf in timeframes]
+        totals = self._arrays['seqlocks'][:, tf_idx, HEADER_TOTAL]
+        ends = np.where(totals > 0, (totals - 1) % self.capacity + self.capacity + 1, 0)
+        idx = ends[..., None] - n + np.arange(n)  # (n_symbols, n_tf, n)
+
+        bars = self._arrays['bars'][:, tf_idx, column, :]
+        out = np.take_along_axis(bars, np.maximum(idx, 0), axis=2)
+        out[idx < ends[..., None] - np.minimum(totals, self.capacity)[..., None]] = np.nan
+        return out
+
+    def read(self, symbol: str, timeframe: str, n: Optional[int] = None) -> Optional[np.ndarray]:
+        """
+        Consistent (6, n) copy of the latest n bars, oldest → newest
+
+        Returns:
+            ndarray, or None if the writer kept the slot busy for READ_RETRIES attempts
+        """
+        if not self.has(symbol, timeframe):
+            return None
+        header, store = self._slot(symbol, timeframe)
+
+        for attempt in range(READ_RETRIES):
+            seq = int(header[HEADER_SEQ])
+            if seq & 1:
+                time.sleep(0)  # writer mid-update: yield
+                continue
+            start, end = self._window(int(header[HEADER_TOTAL]), n)
+            snapshot = store[:, start:end].copy()
+            if int(header[HEADER_SEQ]) == seq:
+                return snapshot
+
+        logger.debug(f"SharedBarStore read contention: {symbol} {timeframe}")
+        return None
+
+    def last_bar(self, symbol: str, timeframe: str) -> Optional[tuple]:
+        """Latest (timestamp_ms, open, high, low, close, volume), or None"""
+        bars = self.read(symbol, timeframe, 1)
+        if bars is None or bars.shape[1] == 0:
+            return None
+        return tuple(bars[:, 0].tolist())
+
+    def last_price(self, symbol: str) -> Optional[float]:
+        """Latest close on the smallest timeframe, or None"""
+        if self.base_tf is None:
+            return None
+        bar = self.last_bar(symbol, self.base_tf)
+        return bar[CANDLE_IDX_CLOSE] if bar else None
+
+    def close(self):
+        """Detach from shared memory"""
+        try:
+            self._arrays.clear()
+            self.shm.close()
+        except Exception as e:
+            logger.error(f"Error closing bar store: {e}")
+
+    def unlink(self):
+        """Remove the segment (writer, on shutdown)"""
+        try:
+            self.shm.unlink()
+        except Exception as e:
+            logger.debug(f"Bar store cleanup: {e}")
+
+
+# Per-process reader handle
+_store: Optional[SharedBarStore] = None
+
+
+def get_bar_store() -> Optional[SharedBarStore]:
+    """Attach to the brain's bar store (None until the brain has created it)"""
+    global _store
+    if _store is None:
+        try:
+            _store = SharedBarStore.attach()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Bar store unavailable: {e}")
+            return None
+    return _store
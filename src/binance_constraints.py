@@ -1,12 +1,19 @@
 """
 Binance 協議限制查詢和驗證
 包括最低開倉限制、槓桿限制等
+
+優先使用交易所真實過濾器索引（src/exchange_info.py：exchangeInfo +
+leverageBracket，磁碟快取 + 背景刷新）；索引中沒有的符號才回退到下方靜態表
 """
 
 import logging
+import math
 from typing import Dict, Optional
 import aiohttp
 
+from src.exchange_info import get_exchange_info
+from src.utils.math_utils import get_step_size, step_decimals
+
 logger = logging.getLogger(__name__)
 
 # Binance 最低名義價值（USDT）
@@ -54,13 +61,16 @@ class BinanceConstraints:
         Returns:
             最低名義價值（USDT）
         """
+        min_notional = get_exchange_info().min_notional(symbol)
+        if min_notional is not None:
+            return min_notional
         return MINIMUM_NOTIONAL_VALUES.get(symbol, MINIMUM_NOTIONAL_VALUES['DEFAULT'])
     
     @staticmethod
     def calculate_min_quantity(
         symbol: str,
         current_price: float,
-        lot_size_step: float = 0.001
+        lot_size_step: Optional[float] = None
     ) -> float:
         """
         計算符號的最低開倉數量
@@ -76,26 +86,32 @@ class BinanceConstraints:
         Args:
             symbol: 交易對
             current_price: 當前價格
-            lot_size_step: LOT_SIZE stepSize（默認 0.001）
+            lot_size_step: LOT_SIZE stepSize（默認取該符號的 stepSize）
             
         Returns:
             最低開倉數量
         """
+        if lot_size_step is None:
+            lot_size_step = get_step_size(symbol)
         min_notional = BinanceConstraints.get_min_notional(symbol)
         min_qty_from_notional = min_notional / current_price
         
-        # 四捨五入到 stepSize
-        import math
-        min_qty = math.ceil(min_qty_from_notional / lot_size_step) * lot_size_step
+        # LOT_SIZE minQty（索引中有時）
+        lot_min_qty = get_exchange_info().min_qty(symbol)
+        if lot_min_qty is not None:
+            min_qty_from_notional = max(min_qty_from_notional, lot_min_qty)
         
-        return min_qty
+        # 向上取整到 stepSize（去除浮點尾數）
+        min_qty = math.ceil(min_qty_from_notional / lot_size_step - 1e-9) * lot_size_step
+        
+        return round(min_qty, step_decimals(lot_size_step))
     
     @staticmethod
     def validate_order_size(
         symbol: str,
         quantity: float,
         current_price: float,
-        lot_size_step: float = 0.001,
+        lot_size_step: Optional[float] = None,
         tolerance_percent: float = 0.001  # 0.1% 容許誤差
     ) -> tuple[bool, str]:
         """
@@ -107,7 +123,7 @@ class BinanceConstraints:
             symbol: 交易對
             quantity: 開倉數量
             current_price: 當前價格
-            lot_size_step: LOT_SIZE stepSize
+            lot_size_step: LOT_SIZE stepSize（默認取該符號的 stepSize）
             tolerance_percent: 容許誤差百分比（默認 0.1%）
             
         Returns:
@@ -159,6 +175,11 @@ class BinanceConstraints:
         Returns:
             最大槓桿倍數（整數）
         """
+        # 交易所真實分檔優先
+        max_leverage = get_exchange_info().max_leverage(symbol, notional_value)
+        if max_leverage is not None:
+            return max_leverage
+        
         # 從 LEVERAGE_BRACKETS 獲得符號的分檔信息
         brackets = LEVERAGE_BRACKETS.get(symbol)
         if not brackets:
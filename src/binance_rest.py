@@ -0,0 +1,226 @@
+"""
+🌐 Binance REST Client - Persistent keep-alive HTTP session
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+One pooled aiohttp session per process instead of a fresh session per
+request, so an order on a warm connection costs one HTTP round trip:
+
+- Pooled TCPConnector with keep-alive (connections survive between orders)
+- DNS cache (resolved once at warm-up, refreshed every ttl_dns_cache seconds)
+- Configurable connect / total timeouts (BINANCE_REST_* env, see config.py)
+- warmup(): GET /fapi/v1/ping at startup opens DNS + TCP + TLS ahead of the
+  first order
+- Every request passes the weight / order-count RateLimiter first (see
+  src/rate_limiter.py); response headers feed back into it
+
+Callers sign their own query strings; the client adds the API key header.
+Pass a callable as `query` to sign after the throttle wait, so a queued
+request never goes out with a stale timestamp.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Union
+
+import aiohttp
+from yarl import URL
+
+from src.config import get_binance_rest_options
+from src.rate_limiter import RateLimiter, PRIORITY_ENTRY, PRIORITY_QUERY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://fapi.binance.com"
+PING_PATH = "/fapi/v1/ping"
+
+# (method, path) -> request weight (Binance futures docs); unknown endpoints cost 1
+ENDPOINT_WEIGHTS = {
+    ('GET', '/fapi/v1/ping'): 1,
+    ('POST', '/fapi/v1/order'): 1,
+    ('POST', '/fapi/v1/batchOrders'): 5,
+    ('DELETE', '/fapi/v1/order'): 1,
+    ('DELETE', '/fapi/v1/batchOrders'): 1,
+    ('GET', '/fapi/v1/order'): 1,
+    ('GET', '/fapi/v2/account'): 5,
+    ('GET', '/fapi/v1/exchangeInfo'): 1,
+    ('GET', '/fapi/v1/leverageBracket'): 1,
+    ('POST', '/fapi/v1/listenKey'): 1,
+    ('PUT', '/fapi/v1/listenKey'): 1,
+    ('DELETE', '/fapi/v1/listenKey'): 1,
+}
+# Endpoints that count against the ORDERS limit (one per order placed)
+ORDER_ENDPOINTS = {('POST', '/fapi/v1/order'), ('POST', '/fapi/v1/batchOrders')}
+
+
+class RestResponse:
+    """Status, raw body and decoded JSON (None if the body is not JSON)"""
+
+    __slots__ = ('status', 'text', 'data', 'elapsed_ms')
+
+    def __init__(self, status: int, text: str, data: Any, elapsed_ms: float):
+        self.status = status
+        self.text = text
+        self.data = data
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+
+class BinanceRestClient:
+    """Process-wide keep-alive REST client"""
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, api_key: str = "",
+                 pool_size: int = 20, keepalive_timeout: float = 60.0,
+                 connect_timeout: float = 5.0, total_timeout: float = 30.0,
+                 ttl_dns_cache: int = 300, limiter: Optional[RateLimiter] = None):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self.ttl_dns_cache = ttl_dns_cache
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.requests = 0
+        self.errors = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self.warmup_ms: Optional[float] = None
+
+    @classmethod
+    def from_env(cls, base_url: str = DEFAULT_BASE_URL, api_key: str = "") -> "BinanceRestClient":
+        options = get_binance_rest_options()
+        limiter = RateLimiter(
+            weight_limit=options.pop('weight_limit'),
+            order_limit_10s=options.pop('order_limit_10s'),
+            order_limit_1m=options.pop('order_limit_1m'),
+        )
+        return cls(base_url, api_key, limiter=limiter, **options)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The pooled session (created on first use, per event loop)"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.ttl_dns_cache,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+            self._loop = loop
+        return self._session
+
+    async def request(self, method: str, path: str, query: Union[str, Callable[[], str]] = "",
+                      headers: Optional[Dict[str, str]] = None, priority: Optional[int] = None,
+                      orders: Optional[int] = None) -> RestResponse:
+        """
+        Send one request over the pooled session
+
+        Args:
+            method: GET / POST / DELETE / PUT
+            path: API path, e.g. /fapi/v1/order
+            query: Encoded (and signed) query string, or a callable building it after the throttle wait
+            headers: Extra headers (X-MBX-APIKEY is added when an API key is set)
+            priority: Rate-limit queue priority (default: entry for order endpoints, else query)
+            orders: Orders placed by this request (default: 1 for order endpoints, else 0)
+
+        Raises:
+            aiohttp.ClientError / asyncio.TimeoutError on transport failure
+            ValueError if the query callable returns an empty string (signing failed)
+        """
+        is_order = (method, path) in ORDER_ENDPOINTS
+        if orders is None:
+            orders = 1 if is_order else 0
+        if priority is None:
+            priority = PRIORITY_ENTRY if is_order else PRIORITY_QUERY
+        await self.limiter.acquire(ENDPOINT_WEIGHTS.get((method, path), 1), orders, priority)
+
+        if callable(query):
+            query = query()
+            if not query:
+                raise ValueError(f"Failed to build signed request for {method} {path}")
+        url = f"{self.base_url}{path}?{query}" if query else f"{self.base_url}{path}"
+        request_headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        if self.api_key:
+            request_headers['X-MBX-APIKEY'] = self.api_key
+        if headers:
+            request_headers.update(headers)
+
+        start = time.perf_counter()
+        self.requests += 1
+        try:
+            # encoded=True: send the query byte-for-byte as signed (no requoting)
+            async with self.session.request(method, URL(url, encoded=True), headers=request_headers) as resp:
+                text = await resp.text()
+                try:
+                    data = await resp.json(content_type=None)
+                except ValueError:
+                    data = None
+                status = resp.status
+                self.limiter.update_from_headers(resp.headers, status)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._latency_total += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+        return RestResponse(status, text, data, elapsed * 1000)
+
+    async def warmup(self) -> bool:
+        """Ping once so the first order finds DNS cached and a connection open"""
+        try:
+            response = await self.request('GET', PING_PATH)
+        except Exception as e:
+            logger.warning(f"⚠️ Binance REST warm-up failed: {e}")
+            return False
+        self.warmup_ms = response.elapsed_ms
+        logger.info(f"🌐 Binance REST warm: {self.base_url} ping {response.elapsed_ms:.1f}ms (HTTP {response.status})")
+        return response.ok
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            try:
+                await self._session.close()
+            except RuntimeError:
+                pass  # session belonged to a loop that is already closed
+        self._session = None
+
+    def get_stats(self) -> Dict:
+        done = max(self.requests, 1)
+        return {
+            'base_url': self.base_url,
+            'requests': self.requests,
+            'errors': self.errors,
+            'avg_latency_ms': self._latency_total / done * 1000,
+            'max_latency_ms': self._latency_max * 1000,
+            'warmup_ms': self.warmup_ms,
+            'rate_limit': self.limiter.get_stats(),
+        }
+
+
+# Global client instance
+_client: Optional[BinanceRestClient] = None
+
+
+def get_rest_client(base_url: str = DEFAULT_BASE_URL, api_key: str = "") -> BinanceRestClient:
+    """Get or create the process-wide client (recreated if base URL or key changed)"""
+    global _client
+    if _client is None or _client.base_url != base_url.rstrip('/') or _client.api_key != api_key:
+        _client = BinanceRestClient.from_env(base_url, api_key)
+    return _client
+
+
+async def close_rest_client() -> None:
+    """Close the process-wide client's session"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -12,7 +12,7 @@ import asyncio
 import gc
 import os
 from time import time, sleep
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 try:
     import uvloop
@@ -24,8 +24,13 @@ from src.ring_buffer import get_ring_buffer
 from src.bus import bus, Topic
 from src import trade
 from src.indicators import Indicators
+from src.indicator_cache import get_indicator_cache
 from src.market_universe import BinanceUniverse
+from src.mark_to_market import normalize_symbol
 from src.timeframe_analyzer import get_timeframe_analyzer
+from src.data_formats import (
+    CANDLE_IDX_TIMESTAMP, CANDLE_IDX_HIGH, CANDLE_IDX_LOW, CANDLE_IDX_CLOSE, CANDLE_IDX_VOLUME
+)
 import numpy as np
 import uuid
 
@@ -37,6 +42,9 @@ from src.experience_buffer import get_experience_buffer
 from src.percentage_return_model import PercentageReturnModel
 from src.position_sizing import PositionSizingFactory
 from src.capital_tracker import init_capital_tracker, get_capital_tracker, get_total_equity
+from src.latency import (
+    get_tracer, STAGE_BRAIN_DEQUEUE, STAGE_BUFFER, STAGE_INDICATORS, STAGE_SIGNAL, STAGE_SIZING, STAGE_PUBLISH
+)
 
 # ✅ Railway 日誌過濾
 from src.utils.railway_logger import setup_railway_logger
@@ -67,11 +75,63 @@ def detect_pattern(candle: tuple) -> dict:
     return {'strength': 0.5}
 
 
-async def process_candle(candle: tuple, symbol: str = "BTC/USDT") -> None:
+# 🧱 Incremental SMC state per symbol (1m), seeded after preload in run_brain
+_smc_trackers: Dict[str, "SMCTracker"] = {}
+
+# 1m bars the signal indicators look at / need before the first signal
+SIGNAL_WINDOW = 50
+MIN_SIGNAL_BARS = 20
+
+
+def closed_bar_state(symbol: str, closed: np.ndarray, window_len: int) -> dict:
+    """
+    Indicators.closed_bar_state of a window's closed bars, via the indicator cache
+
+    closed: (6, window_len - 1) columns; keyed on its last (closed, immutable) bar
+    """
+    return get_indicator_cache().get_or_compute(
+        symbol, '1m', int(closed[CANDLE_IDX_TIMESTAMP][-1]), 'closed_state', (window_len,),
+        lambda: Indicators.closed_bar_state(closed[CANDLE_IDX_CLOSE], closed[CANDLE_IDX_HIGH], closed[CANDLE_IDX_LOW])
+    )
+
+
+def prime_indicator_cache(buffer, symbols: List[str]) -> int:
+    """
+    Build the closed-bar indicator state from preloaded bars before the first live candle
+
+    Primes both continuations: the next tick updating the last preloaded bar,
+    or opening a new one. Returns the number of symbols primed.
+    """
+    primed = 0
+    for symbol in symbols:
+        bars = buffer.get_ohlcv(symbol, '1m', SIGNAL_WINDOW)
+        n = bars.shape[1]
+        if n < MIN_SIGNAL_BARS:
+            continue
+        closed_bar_state(symbol, bars[:, :-1], n)
+        window_len = min(n + 1, SIGNAL_WINDOW)
+        closed_bar_state(symbol, bars[:, -(window_len - 1):], window_len)
+        primed += 1
+    return primed
+
+
+def mark_positions(symbol: str, price: float) -> None:
+    """Mark the live account and the capital tracker at `price` (any symbol form)"""
+    trade.on_price(symbol, price)
+    tracker = get_capital_tracker()
+    if tracker is not None:
+        tracker.update_position_price(symbol, price)
+
+
+async def process_candle(candle: tuple, symbol: str = "BTC/USDT", trace: Optional[list] = None) -> None:
     """
     Process multi-timeframe signal (1D → 1H → 15m → 5m/1m)
     Only generates signals when all timeframes align
+    
+    trace: tick-to-trade trace of this candle (src/latency.py); stamped per
+    stage and handed on with the signal
     """
+    tracer = get_tracer()
     # Get real multi-timeframe data from buffer
     from src.timeframe_buffer import get_timeframe_buffer
     
@@ -79,6 +139,10 @@ async def process_candle(candle: tuple, symbol: str = "BTC/USDT") -> None:
     
     # Add this candle to the buffer (it will be aggregated to all timeframes)
     buffer.add_tick(symbol, candle)
+    tracer.mark(trace, STAGE_BUFFER)
+    
+    # 📈 Mark open positions (live account + capital tracker) at this close - O(1)
+    mark_positions(symbol, float(candle[CANDLE_IDX_CLOSE]))
     
     # Check if we have enough data for analysis
     # 🔍 Lowered from min_candles_per_tf=3 to 1 to enable signal generation earlier
@@ -91,48 +155,55 @@ async def process_candle(candle: tuple, symbol: str = "BTC/USDT") -> None:
             logger.critical(f"🔍 process_candle({symbol}): Insufficient data [{static_candle_count} calls], skipping")
         return
     
-    # Get complete multi-timeframe candles
-    candles_by_tf = buffer.get_candles_by_tf(symbol)
-    
     # ✅ P0 修復: 調用真實指標計算而不是硬編碼
     # Extract historical data for technical analysis (minimum 20 candles for RSI-14)
-    min_candles = 20
-    if not candles_by_tf or '1m' not in candles_by_tf or len(candles_by_tf['1m']) < min_candles:
+    if buffer.count(symbol, '1m') < MIN_SIGNAL_BARS:
         # Not enough data yet
         return
     
-    # Get closes, highs, lows from available candles (use all available, not just 50)
-    recent_candles = candles_by_tf['1m'][-50:] if len(candles_by_tf['1m']) > 50 else candles_by_tf['1m']
-    closes = np.array([c[4] for c in recent_candles], dtype=np.float64)  # Close price
-    highs = np.array([c[2] for c in recent_candles], dtype=np.float64)    # High price
-    lows = np.array([c[3] for c in recent_candles], dtype=np.float64)     # Low price
+    # Last 50 1m candles as zero-copy contiguous float64 column views
+    ohlcv = buffer.get_ohlcv(symbol, '1m', SIGNAL_WINDOW)
+    closes = ohlcv[CANDLE_IDX_CLOSE]
+    highs = ohlcv[CANDLE_IDX_HIGH]
+    lows = ohlcv[CANDLE_IDX_LOW]
+    volumes = ohlcv[CANDLE_IDX_VOLUME]
+    
+    # 🗃️ Indicator cache: the closed bars' state is cached under the last closed
+    # bar (immutable → one miss per bar); the live bar is folded in on every tick
+    state = closed_bar_state(symbol, ohlcv[:, :-1], ohlcv.shape[1])
+    live = Indicators.live_bar(state, closes[-1], highs[-1], lows[-1])
     
     # ✅ 計算真實指標（不是硬編碼！）
-    rsi_value = Indicators.rsi(closes, period=14)
+    rsi_value = live['rsi']
     logger.critical(f"✅ 動態計算 RSI: {rsi_value:.2f} (0-100, 非硬編碼 50)")
     
     # ✅ 修復的 MACD（使用真正的 EMA）
-    macd_line, signal_line, histogram = Indicators.macd(closes, fast=12, slow=26, signal_period=9)
+    macd_line, signal_line, histogram = live['macd']
     logger.critical(f"✅ 動態計算 MACD: macd_line={macd_line:.4f}, signal={signal_line:.4f} (非硬編碼 0)")
     
-    atr_value = Indicators.atr(highs, lows, closes, period=14)
+    atr_value = live['atr']
     logger.critical(f"✅ 動態計算 ATR: {atr_value:.4f}")
     
-    bb_width_value = Indicators.bollinger_bands(closes, period=20, std_dev=2.0)
+    bb_width_value = live['bb_width']
     logger.critical(f"✅ 動態計算 BB Width: {bb_width_value:.4f}")
     
     # ✅ P1 新增: FVG 檢測
-    fvg_value = Indicators.detect_fvg(closes, highs, lows)
+    fvg_value = live['fvg']
     
     # ✅ P1 新增: 流動性計算（基於訂單簿深度的簡化版本）
     # 在實際系統中應該使用 Binance 訂單簿數據
     # 這裡使用成交量和波動性的組合作為近似值
-    volume = recent_candles[-1][5] if len(recent_candles[-1]) > 5 else 1000  # Volume
-    volume_ma = np.mean([c[5] if len(c) > 5 else 1000 for c in recent_candles[-20:]])
+    volume = volumes[-1]
+    volume_ma = np.mean(volumes[-20:])
     bid_price = candle[4] * 0.9995  # Approximate bid
     ask_price = candle[4] * 1.0005  # Approximate ask
     liquidity_value = Indicators.calculate_liquidity(bid_price, ask_price, volume, volume_ma)
     
+    # 🧱 SMC structure (swing / BOS / CHOCH / order block / FVG zones), updated on 1m close
+    smc_tracker = _smc_trackers.get(symbol)
+    smc_features = smc_tracker.features(float(closes[-1])) if smc_tracker is not None else {}
+    tracer.mark(trace, STAGE_INDICATORS)
+    
     # ✅ 基於技術面計算 confidence（不是硬編碼 0.65！）
     # 技術面信心度公式：
     # - RSI 在 30-70 範圍: 高信心度
@@ -160,7 +231,8 @@ async def process_candle(candle: tuple, symbol: str = "BTC/USDT") -> None:
         'atr': atr_value,            # ✅ 動態 ATR
         'macd': macd_line,           # ✅ 動態 MACD（正確的 EMA）
         'bb_width': bb_width_value,  # ✅ 動態 BB 寬度
-        'timeframe_analysis': {}
+        'timeframe_analysis': {},
+        **smc_features
     }
     
     if not signal_data:
@@ -172,8 +244,6 @@ async def process_candle(candle: tuple, symbol: str = "BTC/USDT") -> None:
     current_price = candle[4] if len(candle) > 4 else 1.0
     
     # Create complete signal object (統一格式 - 使用毫秒時間戳)
-    from src.data_formats import CANDLE_IDX_TIMESTAMP, CANDLE_IDX_CLOSE
-    
     signal = {
         'signal_id': str(uuid.uuid4()),
         'symbol': symbol,
@@ -193,7 +263,8 @@ async def process_candle(candle: tuple, symbol: str = "BTC/USDT") -> None:
             'bb_width': signal_data.get('bb_width', 0),
             'position_size': 100.0,
             'position_size_pct': 0.01,
-            'timeframe_analysis': signal_data.get('timeframe_analysis', {})
+            'timeframe_analysis': signal_data.get('timeframe_analysis', {}),
+            **smc_features
         },
         'entry_price': current_price,  # 🎯 Real market price for virtual trading
     }
@@ -202,6 +273,7 @@ async def process_candle(candle: tuple, symbol: str = "BTC/USDT") -> None:
     ml_model = get_ml_model()
     if ml_model.is_trained:
         signal = await ml_model.adjust_confidence(signal)
+    tracer.mark(trace, STAGE_SIGNAL)
     
     # ✅ NEW: Percentage Return Prediction + Position Sizing Integration
     try:
@@ -253,6 +325,8 @@ async def process_candle(candle: tuple, symbol: str = "BTC/USDT") -> None:
         logger.warning(f"⚠️ Position sizing error for {symbol}: {e}")
         signal['position_sizing'] = {'recommended': False, 'error': str(e)}
     
+    tracer.mark(trace, STAGE_SIZING)
+    
     # 💾 Record in experience buffer
     experience_buffer = get_experience_buffer()
     await experience_buffer.record_signal(signal['signal_id'], signal)
@@ -263,7 +337,10 @@ async def process_candle(candle: tuple, symbol: str = "BTC/USDT") -> None:
     tf_1h_conf = tf_analysis.get('1h', {}).get('confidence', 0)
     tf_15m_conf = tf_analysis.get('15m', {}).get('confidence', 0)
     
-    # Publish to EventBus
+    # Publish to EventBus (the trace rides along to the trade side)
+    tracer.mark(trace, STAGE_PUBLISH)
+    if trace is not None:
+        signal['trace'] = trace
     await bus.publish(Topic.SIGNAL_GENERATED, signal)
 
 
@@ -285,6 +362,13 @@ async def run_brain() -> None:
     
     logger.info("🚀 Brain process started")
     
+    # 🔥 Load JIT kernels (from the cache populated by initialize_system) before any candle
+    try:
+        from src.jit_warmup import run_warmup
+        run_warmup()
+    except Exception as e:
+        logger.warning(f"⚠️ JIT warmup failed: {e}")
+    
     # Discover all symbols
     logger.info("🔍 Discovering symbols...")
     universe = BinanceUniverse()
@@ -301,13 +385,18 @@ async def run_brain() -> None:
     logger.info(f"✅ Will analyze {len(_symbols)} symbols")
     logger.info(f"📊 Symbols: {_symbols[:10]}...")
     
-    # Initialize modules
-    await trade.init()
+    # 🚇 Cross-process topics (EVENT_BUS_TRANSPORTS); local-only when unset
+    await bus.start()
+    
+    # Initialize modules: orders are executed here only while signals stay
+    # in-process; a routed SIGNAL_GENERATED is executed by the trade process
+    await trade.init(execute=not bus.is_remote(Topic.SIGNAL_GENERATED))
     logger.info("✅ Trade module initialized")
     
     # Initialize ML model
     ml_model = get_ml_model()
-    logger.info("✅ ML model initialized")
+    await ml_model.start_batch_inference()
+    logger.info("✅ ML model initialized (batched off-loop inference)")
     
     # Initialize experience buffer
     experience_buffer = get_experience_buffer()
@@ -316,7 +405,27 @@ async def run_brain() -> None:
     # ✅ Initialize Capital Tracker (for virtual learning account: $10,000)
     tracker = init_capital_tracker(initial_balance=10000)
     logger.info("✅ Capital Tracker initialized with $10,000 virtual account")
-    
+
+    # 🔥 Warm-start: load recent bars from market_data before the first live candle
+    from src.timeframe_buffer import get_timeframe_buffer
+    from src.buffer_preload import preload_timeframe_buffer
+    buffer = get_timeframe_buffer()
+    await preload_timeframe_buffer(buffer, _symbols)
+    primed = prime_indicator_cache(buffer, _symbols)
+    logger.info(f"🗃️ Indicator cache primed from preload: {primed}/{len(_symbols)} symbols")
+
+    # 🧱 SMC trackers: seeded from the preloaded bars, then one scan per closed 1m bar
+    from src.smc import attach_trackers
+    _smc_trackers.update(attach_trackers(buffer, _symbols, timeframe=buffer.base_tf))
+
+    # 🗂️ Publish bars to shared memory so trade / monitor / API read them without the DB
+    try:
+        from src.bar_store import SharedBarStore
+        bar_store = SharedBarStore.create(_symbols, buffer.timeframes, buffer.max_candles_per_tf)
+        buffer.attach_shared_store(bar_store)
+    except Exception as e:
+        logger.warning(f"⚠️ Shared bar store unavailable, bars stay brain-local: {e}")
+
     # Get ring buffer (attach to existing)
     ring_buffer = get_ring_buffer(create=False)
     if ring_buffer is None:
@@ -327,8 +436,10 @@ async def run_brain() -> None:
     
     try:
         candle_count = 0
-        latencies = []
-        symbol_index = 0
+        tracer = get_tracer()
+        # Exchange symbol carried in each ring slot ('BTCUSDT') -> analysed symbol ('BTC/USDT')
+        symbol_by_exchange = {normalize_symbol(s): s for s in _symbols}
+        unattributed = 0
         last_pending_log = 0  # Track last pending count for diagnostic logging
         
         while True:
@@ -340,32 +451,58 @@ async def run_brain() -> None:
             # ✅ FIXED: Don't check pending_count - always try to read!
             # Ring buffer will return empty generator if no data
             candle_read_count = 0
-            for candle in ring_buffer.read_new():
-                if candle is None:
+            for item in ring_buffer.read_new(with_stamps=True, with_symbol=True):
+                if item is None:
                     break
+                candle, recv_ns, commit_ns, exchange_symbol = item
                 
                 try:
-                    # Measure latency
-                    write_time = candle[0] / 1000.0  # Convert ms to seconds
-                    read_time = time()
-                    latency_us = (read_time - write_time) * 1_000_000
-                    
-                    latencies.append(latency_us)
+                    # ⏱️ Continue the feed's trace (monotonic receive / commit stamps)
+                    trace = tracer.start(recv_ns, commit_ns)
+                    tracer.mark(trace, STAGE_BRAIN_DEQUEUE)
                     
-                    # Track which symbol this candle belongs to (round-robin)
-                    current_symbol = _symbols[symbol_index % len(_symbols)]
-                    symbol_index += 1
+                    # Symbol comes from the slot - never guessed from arrival order
+                    current_symbol = symbol_by_exchange.get(exchange_symbol)
+                    if current_symbol is None:
+                        # Outside the analysed universe: still mark positions, skip analysis
+                        if exchange_symbol:
+                            mark_positions(exchange_symbol, float(candle[CANDLE_IDX_CLOSE]))
+                        unattributed += 1
+                        if unattributed % 1000 == 1:
+                            logger.warning(
+                                f"⚠️ Candle for {exchange_symbol or '<no symbol>'} not in analysed symbols "
+                                f"({unattributed} so far) - not analysed"
+                            )
+                        candle_read_count += 1
+                        continue
                     
                     # Process candle (no need to pass candles_by_tf - it's fetched from buffer)
-                    await process_candle(candle, current_symbol)
+                    await process_candle(candle, current_symbol, trace)
+                    tracer.finish(trace)
                     
                     candle_count += 1
                     candle_read_count += 1
                     
                     if candle_count % 1000 == 0:
-                        avg_latency = np.mean(latencies[-1000:])
                         remaining_pending = ring_buffer.pending_count()
-                        logger.critical(f"📊 Brain: {candle_count} candles | {len(_symbols)} symbols | Latency: {avg_latency:.1f}µs | Remaining Pending: {remaining_pending}")
+                        dequeue = tracer.get_stats().get('feed_recv→brain_dequeue', {})
+                        logger.critical(
+                            f"📊 Brain: {candle_count} candles | {len(_symbols)} symbols | "
+                            f"Feed→brain p50 {dequeue.get('p50_us', 0):.0f}µs p99 {dequeue.get('p99_us', 0):.0f}µs | "
+                            f"Remaining Pending: {remaining_pending}"
+                        )
+                        tracer.log_summary()
+                        cache_stats = get_indicator_cache().get_stats()
+                        logger.info(
+                            f"🗃️ Indicator cache: {cache_stats['size']} entries | "
+                            f"hit rate {cache_stats['hit_rate']:.1%} | invalidations {cache_stats['invalidations']}"
+                        )
+                        for sub in bus.get_stats()['subscribers']:
+                            logger.info(
+                                f"🔌 Bus {sub['topic']} → {sub['subscriber']}: depth {sub['queue_depth']} | "
+                                f"avg {sub['avg_handler_ms']:.2f}ms | wait {sub['avg_wait_ms']:.2f}ms | "
+                                f"errors {sub['errors']} | dropped {sub['dropped']}"
+                            )
                 except Exception as e:
                     logger.error(f"Error processing candle: {e}", exc_info=True)
                     continue
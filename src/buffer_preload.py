@@ -0,0 +1,186 @@
+"""
+🔥 Buffer Preload - Warm-start TimeframeBuffer from market_data
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Fetches the last N bars per symbol and timeframe in ONE set-based query
+and loads them straight into the brain's TimeframeBuffer before the first
+live candle arrives. Restarts produce valid signals within seconds instead
+of waiting hours for 1h/1d history to accumulate from WebSocket ticks.
+
+market_data only stores 1m klines (one row per WebSocket update), so:
+- Duplicate updates of the same 1m bar are collapsed to the latest row
+- Higher timeframes are aggregated from 1m bars inside Postgres
+
+Each timeframe scans its own window, N bars × its duration, capped at
+DEFAULT_MAX_LOOKBACK_DAYS: market_data keeps one row per kline update, and
+every row in the window goes through the dedupe, so an uncapped 200-day
+daily window would take minutes. With the default cap (200 bars) 1m–15m load
+in full, 1h loads 168 bars and 1d the last week; both fill up live. The 1m rows are read once,
+back to the oldest cutoff.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default bars loaded per (symbol, timeframe)
+DEFAULT_PRELOAD_BARS = 200
+
+# Default cap on every timeframe's window (bounds the 1m rows scanned)
+DEFAULT_MAX_LOOKBACK_DAYS = 7
+
+# One query: dedupe kline updates → bucket into every timeframe (each from its
+# own cutoff) → keep last N per (symbol, tf)
+PRELOAD_QUERY = """
+    WITH bars_1m AS (
+        SELECT DISTINCT ON (symbol, timestamp)
+            symbol, timestamp,
+            open_price::float8 AS o, high_price::float8 AS h,
+            low_price::float8 AS l, close_price::float8 AS c,
+            volume::float8 AS v
+        FROM market_data
+        WHERE symbol = ANY($1::text[])
+          AND timeframe = '1m'
+          AND timestamp >= (SELECT min(s) FROM unnest($5::bigint[]) AS s)
+        ORDER BY symbol, timestamp, id DESC
+    ),
+    buckets AS (
+        SELECT
+            b.symbol, tf.name AS timeframe,
+            (b.timestamp / tf.ms) * tf.ms AS bucket,
+            (array_agg(b.o ORDER BY b.timestamp ASC))[1] AS o,
+            max(b.h) AS h,
+            min(b.l) AS l,
+            (array_agg(b.c ORDER BY b.timestamp DESC))[1] AS c,
+            sum(b.v) AS v
+        FROM bars_1m b
+        JOIN unnest($2::text[], $3::bigint[], $5::bigint[]) AS tf(name, ms, since)
+          ON b.timestamp >= tf.since
+        GROUP BY b.symbol, tf.name, (b.timestamp / tf.ms) * tf.ms
+    ),
+    ranked AS (
+        SELECT *, ROW_NUMBER() OVER (
+            PARTITION BY symbol, timeframe ORDER BY bucket DESC
+        ) AS rn
+        FROM buckets
+    )
+    SELECT symbol, timeframe, bucket, o, h, l, c, v
+    FROM ranked
+    WHERE rn <= $4
+    ORDER BY symbol, timeframe, bucket ASC
+"""
+
+
+def _to_db_symbol(symbol: str) -> str:
+    """Brain uses 'BTC/USDT', feed persists 'BTCUSDT'"""
+    return symbol.replace('/', '')
+
+
+def lookback_since_ms(now_ms: int, tf_ms: int, bars: int, max_lookback_days: Optional[float] = None) -> int:
+    """
+    Oldest 1m timestamp needed for the last `bars` buckets of one timeframe
+
+    The window starts at the open of the oldest bucket (the newest, still
+    forming bucket counts as one), optionally capped at max_lookback_days.
+    """
+    since = (now_ms // tf_ms - (bars - 1)) * tf_ms
+    if max_lookback_days is not None:
+        since = max(since, now_ms - int(max_lookback_days * 86400 * 1000))
+    return since
+
+
+def decode_rows(rows: Iterable, symbol_map: Dict[str, str]) -> Dict[str, Dict[str, List[tuple]]]:
+    """
+    Decode query rows into {symbol: {timeframe: [candle tuples]}}
+
+    Args:
+        rows: Records with (symbol, timeframe, bucket, o, h, l, c, v), sorted by bucket ASC
+        symbol_map: DB symbol → brain symbol
+
+    Returns:
+        Candles in the same (timestamp_ms, open, high, low, close, volume) format as add_tick
+    """
+    result: Dict[str, Dict[str, List[tuple]]] = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        symbol = symbol_map.get(row['symbol'], row['symbol'])
+        result[symbol][row['timeframe']].append((
+            float(row['bucket']),
+            row['o'], row['h'], row['l'], row['c'], row['v']
+        ))
+    return result
+
+
+async def preload_timeframe_buffer(
+    buffer,
+    symbols: List[str],
+    bars_per_tf: int = DEFAULT_PRELOAD_BARS,
+    lookback_days: Optional[float] = DEFAULT_MAX_LOOKBACK_DAYS,
+    conn=None
+) -> int:
+    """
+    Warm-start TimeframeBuffer from market_data
+
+    Args:
+        buffer: TimeframeBuffer to fill
+        symbols: Brain symbols (e.g. 'BTC/USDT')
+        bars_per_tf: Max bars loaded per (symbol, timeframe)
+        lookback_days: Cap on every timeframe's window of bars_per_tf ×
+            timeframe duration (None: uncapped)
+        conn: Optional asyncpg connection (a new one is opened if None)
+
+    Returns:
+        Number of candles loaded (0 if the DB is unavailable)
+    """
+    if not symbols:
+        return 0
+
+    own_conn = conn is None
+    try:
+        if own_conn:
+            from src.database.unified_db import UnifiedDatabaseManager
+            conn = await UnifiedDatabaseManager.get_connection()
+            if not conn:
+                logger.warning("⚠️ Preload skipped: database unavailable")
+                return 0
+
+        start = time.perf_counter()
+        symbol_map = {_to_db_symbol(s): s for s in symbols}
+        tf_names = list(buffer.timeframes)
+        tf_ms = [buffer.timeframes[tf] * 1000 for tf in tf_names]
+        bars = min(bars_per_tf, buffer.max_candles_per_tf)
+        now_ms = int(time.time() * 1000)
+        since_ms = [lookback_since_ms(now_ms, ms, bars, lookback_days) for ms in tf_ms]
+
+        rows = await conn.fetch(
+            PRELOAD_QUERY,
+            list(symbol_map.keys()), tf_names, tf_ms, bars, since_ms
+        )
+
+        loaded = 0
+        for symbol, by_tf in decode_rows(rows, symbol_map).items():
+            # Base timeframe first: higher timeframes mark how much of it they already contain
+            for tf_name in tf_names:
+                candles = by_tf.get(tf_name)
+                if candles:
+                    buffer.load_candles(symbol, tf_name, candles)
+                    loaded += len(candles)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.critical(
+            f"🔥 TimeframeBuffer preloaded: {loaded} candles | "
+            f"{len(symbols)} symbols × {len(tf_names)} timeframes | {elapsed_ms:.0f}ms"
+        )
+        return loaded
+
+    except Exception as e:
+        logger.warning(f"⚠️ TimeframeBuffer preload failed: {e}")
+        return 0
+    finally:
+        if own_conn and conn:
+            try:
+                await conn.close()
+            except Exception:
+                pass
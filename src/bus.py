@@ -1,11 +1,29 @@
 """
 🔌 EventBus - Zero-Coupling Event Communication
 Minimal version for inter-module messaging
+
+Topics are in-process by default. A topic configured with a transport
+(bus.configure / EVENT_BUS_TRANSPORTS, see src/bus_transport.py) is also
+broadcast to every other process that started its bus: publish() delivers
+locally and sends one frame; remote frames are delivered to the local
+subscribers of the receiving process.
+
+Each subscriber gets its own bounded queue and consumer task, so publish()
+only enqueues: a slow or failing subscriber never delays the publisher or
+the other subscribers. Handlers whose effect the publisher depends on
+(e.g. order execution) subscribe with sync=True and run inline, in order.
 """
 
 import asyncio
+import logging
+import os
+import time
 from enum import Enum
-from typing import Dict, Callable, List, Any
+from typing import Dict, Callable, List, Any, Optional, Union
+
+from src.bus_transport import Transport, create_transport, decode_frame, encode_frame, parse_transport_spec
+
+logger = logging.getLogger(__name__)
 
 
 class Topic(Enum):
@@ -16,29 +34,250 @@ class Topic(Enum):
     ORDER_FILLED = "order_filled"
 
 
+OVERFLOW_DROP_OLDEST = "drop_oldest"   # evict the oldest queued event
+OVERFLOW_DROP_NEWEST = "drop_newest"   # discard the event being published
+OVERFLOW_BLOCK = "block"               # publisher waits for space (backpressure)
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_BLOCK)
+DEFAULT_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """One subscriber: its queue, consumer task and latency / error counters"""
+
+    def __init__(self, topic: Topic, callback: Callable, sync: bool = False,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, overflow: str = OVERFLOW_DROP_OLDEST):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow} (expected one of {OVERFLOW_POLICIES})")
+        if queue_size < 1:
+            raise ValueError("queue_size must be >= 1")
+        self.topic = topic
+        self.callback = callback
+        self.name = getattr(callback, '__qualname__', repr(callback))
+        self.sync = sync
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self._is_coroutine = asyncio.iscoroutinefunction(callback)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.delivered = 0
+        self.errors = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+        self._handler_total = 0.0
+        self._handler_max = 0.0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def _invoke(self, data: Any) -> None:
+        start = time.perf_counter()
+        try:
+            if self._is_coroutine:
+                await self.callback(data)
+            else:
+                self.callback(data)
+        except Exception as e:
+            self.errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.error(f"❌ EventBus subscriber {self.name} failed on {self.topic.value}: {e}", exc_info=True)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.delivered += 1
+            self._handler_total += elapsed
+            self._handler_max = max(self._handler_max, elapsed)
+
+    def _ensure_consumer(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = loop.create_task(self._consume(), name=f"bus:{self.topic.value}:{self.name}")
+
+    async def _consume(self) -> None:
+        queue = self._queue
+        while True:
+            enqueued_at, data = await queue.get()
+            try:
+                wait = time.perf_counter() - enqueued_at
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+                await self._invoke(data)
+            finally:
+                queue.task_done()
+
+    async def offer(self, data: Any) -> None:
+        """Hand one event to this subscriber (inline when sync)"""
+        if self.sync:
+            await self._invoke(data)
+            return
+
+        self._ensure_consumer()
+        item = (time.perf_counter(), data)
+        if self.overflow == OVERFLOW_BLOCK:
+            await self._queue.put(item)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(
+                    f"⚠️ EventBus subscriber {self.name} queue full on {self.topic.value}: "
+                    f"{self.dropped} events dropped ({self.overflow}, queue_size={self.queue_size})"
+                )
+            if self.overflow == OVERFLOW_DROP_NEWEST:
+                return
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self._queue.put_nowait(item)
+
+    async def drain(self) -> None:
+        """Wait until every queued event has been handled"""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except RuntimeError:
+                pass  # task belonged to a loop that is already closed
+            self._task = None
+            self._queue = None
+
+    def get_stats(self) -> Dict:
+        handled = max(self.delivered, 1)
+        return {
+            'topic': self.topic.value,
+            'subscriber': self.name,
+            'mode': 'sync' if self.sync else 'queued',
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'delivered': self.delivered,
+            'errors': self.errors,
+            'dropped': self.dropped,
+            'last_error': self.last_error,
+            'avg_handler_ms': self._handler_total / handled * 1000,
+            'max_handler_ms': self._handler_max * 1000,
+            'avg_wait_ms': self._wait_total / handled * 1000 if not self.sync else 0.0,
+            'max_wait_ms': self._wait_max * 1000,
+        }
+
+
 class EventBus:
     """Simple EventBus for publishing/subscribing to topics"""
-    
+
     def __init__(self):
-        self.subscribers: Dict[Topic, List[Callable]] = {}
-    
+        self.subscribers: Dict[Topic, List[Subscription]] = {}
+        self.transports: Dict[Topic, Transport] = {}
+        self._origin: Optional[int] = None  # pid once started (fork-safe)
+
+    def configure(self, topic: Topic, transport: Union[str, Transport, None], **options) -> None:
+        """
+        Route a topic through a transport
+
+        Args:
+            topic: Topic to route
+            transport: 'local' / 'shm' / 'unix' / 'redis', a Transport instance, or None (local)
+        """
+        if self._origin is not None:
+            raise RuntimeError("EventBus already started: configure transports before start()")
+        if isinstance(transport, str):
+            transport = create_transport(transport, topic.value, **options)
+        if transport is None:
+            self.transports.pop(topic, None)
+        else:
+            self.transports[topic] = transport
+
+    def is_remote(self, topic: Topic) -> bool:
+        """True if the topic is routed through a transport (call after start())"""
+        return topic in self.transports
+
+    def configure_from_spec(self, spec: str) -> None:
+        """Apply "topic=kind,…" (unknown topic names raise ValueError)"""
+        for name, kind in parse_transport_spec(spec).items():
+            self.configure(Topic(name), kind)
+
+    async def start(self) -> None:
+        """Start receiving remote events (no-op if every topic is local)"""
+        if self._origin is not None:
+            return
+        if not self.transports:
+            from src.config import get_bus_transports
+            spec = get_bus_transports()
+            if spec:
+                self.configure_from_spec(spec)
+
+        self._origin = os.getpid()
+        for topic, transport in self.transports.items():
+            await transport.start(self._frame_handler(topic))
+            logger.info(f"🚇 EventBus: {topic.value} → {transport.kind}")
+
+    async def stop(self) -> None:
+        """Close every transport, then finish queued events and stop the consumers"""
+        for transport in self.transports.values():
+            await transport.close()
+        self._origin = None
+        await self.drain()
+        for subscriptions in self.subscribers.values():
+            for subscription in subscriptions:
+                await subscription.close()
+
+    async def drain(self, topic: Optional[Topic] = None) -> None:
+        """Wait until the subscribers (of one topic, or all) have handled every queued event"""
+        topics = [topic] if topic is not None else list(self.subscribers)
+        for t in topics:
+            for subscription in self.subscribers.get(t, []):
+                await subscription.drain()
+
+    def _frame_handler(self, topic: Topic):
+        async def on_frame(frame: bytes) -> None:
+            message = decode_frame(frame)
+            if message.get('o') == self._origin:
+                return  # our own broadcast: already delivered locally
+            await self._deliver(topic, message.get('d'))
+        return on_frame
+
     async def publish(self, topic: Topic, data: Any):
         """Publish event to topic"""
-        if topic in self.subscribers:
-            for callback in self.subscribers[topic]:
-                try:
-                    if asyncio.iscoroutinefunction(callback):
-                        await callback(data)
-                    else:
-                        callback(data)
-                except Exception as e:
-                    pass
-    
-    def subscribe(self, topic: Topic, callback: Callable):
-        """Subscribe to topic"""
-        if topic not in self.subscribers:
-            self.subscribers[topic] = []
-        self.subscribers[topic].append(callback)
+        transport = self.transports.get(topic)
+        if transport is not None and self._origin is not None:
+            try:
+                await transport.send(encode_frame(self._origin, topic.value, data))
+            except Exception as e:
+                logger.error(f"❌ EventBus: {transport.kind} send failed for {topic.value}: {e}")
+        await self._deliver(topic, data)
+
+    async def _deliver(self, topic: Topic, data: Any):
+        """Hand an event to the local subscribers of a topic"""
+        for subscription in self.subscribers.get(topic, ()):
+            await subscription.offer(data)
+
+    def subscribe(self, topic: Topic, callback: Callable, sync: bool = False,
+                  queue_size: int = DEFAULT_QUEUE_SIZE, overflow: str = OVERFLOW_DROP_OLDEST) -> Subscription:
+        """
+        Subscribe to topic
+
+        Args:
+            topic: Topic to receive
+            callback: sync or async handler taking the event data
+            sync: run inline inside publish(), in publish order (ordering-critical handlers)
+            queue_size: bound of this subscriber's queue
+            overflow: drop_oldest / drop_newest / block when the queue is full
+        """
+        subscription = Subscription(topic, callback, sync=sync, queue_size=queue_size, overflow=overflow)
+        self.subscribers.setdefault(topic, []).append(subscription)
+        return subscription
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-subscriber counters and transport counters per routed topic"""
+        return {
+            'subscribers': [s.get_stats() for subs in self.subscribers.values() for s in subs],
+            'transports': {topic.value: transport.get_stats() for topic, transport in self.transports.items()},
+        }
 
 
 # Global bus instance
@@ -0,0 +1,467 @@
+"""
+🚇 EventBus Transports - cross-process delivery behind publish/subscribe
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+A transport carries framed events between processes; EventBus decides per
+topic which one (if any) to use. Every transport broadcasts: each attached
+process receives every frame and drops the ones it published itself.
+
+- ShmRingTransport: shared-memory broadcast ring (flock-serialized writers,
+  lock-free polling readers that detect being lapped)
+- UnixSocketTransport: one datagram socket per process in a per-topic
+  directory; send = sendto() every peer, no broker
+- RedisStreamTransport: XADD / XREAD on a stream (survives restarts, works
+  across hosts)
+
+Frames: 1-byte codec tag + {'o': origin pid, 't': topic, 'd': data},
+encoded with orjson (numpy-aware), else msgpack, else json.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import socket
+import tempfile
+import time
+from multiprocessing import shared_memory
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+CODEC_ORJSON = b'o'
+CODEC_MSGPACK = b'm'
+CODEC_JSON = b'j'
+
+FrameHandler = Callable[[bytes], Awaitable[None]]
+
+
+# ============================================================================
+# Framing
+# ============================================================================
+
+def _default(obj):
+    """Fallback for values the codecs don't know (numpy, enums, datetimes…)"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, 'value'):
+        return obj.value
+    return str(obj)
+
+
+def encode_frame(origin: int, topic: str, data) -> bytes:
+    """Serialize one event into a transport frame"""
+    message = {'o': origin, 't': topic, 'd': data}
+    if HAS_ORJSON:
+        return CODEC_ORJSON + orjson.dumps(
+            message, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    if HAS_MSGPACK:
+        return CODEC_MSGPACK + msgpack.packb(message, default=_default, use_bin_type=True)
+    return CODEC_JSON + json.dumps(message, default=_default).encode()
+
+
+def decode_frame(frame: bytes) -> Dict:
+    """Inverse of encode_frame (any codec, whatever this process prefers)"""
+    codec, body = frame[:1], frame[1:]
+    if codec == CODEC_ORJSON:
+        return orjson.loads(body) if HAS_ORJSON else json.loads(body)
+    if codec == CODEC_MSGPACK:
+        if not HAS_MSGPACK:
+            raise ValueError("msgpack frame received but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    if codec == CODEC_JSON:
+        return json.loads(body)
+    raise ValueError(f"Unknown frame codec: {codec!r}")
+
+
+# ============================================================================
+# Transports
+# ============================================================================
+
+class Transport:
+    """Base class: start(on_frame) → send(frame)* → close()"""
+
+    kind = 'base'
+
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, on_frame: FrameHandler) -> None:
+        self._task = asyncio.create_task(self._receive_loop(on_frame))
+
+    async def _receive_loop(self, on_frame: FrameHandler) -> None:
+        raise NotImplementedError
+
+    async def _dispatch(self, on_frame: FrameHandler, frame: bytes) -> None:
+        self.received += 1
+        try:
+            await on_frame(frame)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"❌ {self.kind} transport: frame handler failed: {e}")
+
+    async def send(self, frame: bytes) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict:
+        return {'kind': self.kind, 'sent': self.sent, 'received': self.received,
+                'dropped': self.dropped, 'errors': self.errors}
+
+
+# Ring header (uint64): write sequence, capacity, slot size
+H_WRITE_SEQ = 0
+H_CAPACITY = 1
+H_SLOT_SIZE = 2
+RING_HEADER_BYTES = 64
+
+
+class ShmRingTransport(Transport):
+    """
+    Shared-memory broadcast ring
+
+    Slot meta holds (commit marker, length); the marker is seq + 1 once the
+    payload is complete. Writers serialize on a non-blocking flock: send()
+    retries asynchronously while another process holds it. Readers keep their own cursor, start at the current
+    head (no replay) and count frames lost to being lapped as dropped.
+    """
+
+    kind = 'shm'
+
+    def __init__(self, name: str, capacity: int = 1024, slot_size: int = 8192,
+                 poll_interval: float = 0.0005):
+        super().__init__()
+        self.name = name
+        self.poll_interval = poll_interval
+        self._shm = self._open(name, capacity, slot_size)
+        buf = self._shm.buf
+        self._header = np.ndarray((3,), dtype=np.uint64, buffer=buf)
+        self.capacity = int(self._header[H_CAPACITY])
+        self.slot_size = int(self._header[H_SLOT_SIZE])
+        self._meta = np.ndarray((self.capacity, 2), dtype=np.uint64, buffer=buf, offset=RING_HEADER_BYTES)
+        self._payload_offset = RING_HEADER_BYTES + self.capacity * 16
+        self._lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._lock_fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._cursor = int(self._header[H_WRITE_SEQ])
+        self.lock_waits = 0
+
+    @staticmethod
+    def _open(name: str, capacity: int, slot_size: int) -> shared_memory.SharedMemory:
+        """Create the ring, or attach to the one another process created"""
+        size = RING_HEADER_BYTES + capacity * (16 + slot_size)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            header = np.ndarray((3,), dtype=np.uint64, buffer=shm.buf)
+            header[H_WRITE_SEQ] = 0
+            header[H_SLOT_SIZE] = slot_size
+            header[H_CAPACITY] = capacity  # last: attachers wait for a non-zero capacity
+            del header
+            logger.info(f"🚇 Shm ring created: {name} ({capacity} × {slot_size} bytes)")
+            return shm
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(name=name)
+            header = np.ndarray((3,), dtype=np.uint64, buffer=shm.buf)
+            deadline = time.monotonic() + 1.0
+            while header[H_CAPACITY] == 0 and time.monotonic() < deadline:
+                time.sleep(0.001)
+            ready = header[H_CAPACITY] != 0
+            del header
+            if not ready:
+                shm.close()
+                raise RuntimeError(f"Shm ring {name} was never initialized")
+            return shm
+
+    def _write(self, frame: bytes) -> bool:
+        """Commit one frame; False (nothing written) while another writer holds the lock"""
+        n = len(frame)
+        if n > self.slot_size:
+            raise ValueError(f"Frame of {n} bytes exceeds shm slot size {self.slot_size}")
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        try:
+            seq = int(self._header[H_WRITE_SEQ])
+            slot = seq % self.capacity
+            start = self._payload_offset + slot * self.slot_size
+            self._meta[slot, 0] = 0  # in progress
+            self._meta[slot, 1] = n
+            self._shm.buf[start:start + n] = frame
+            self._meta[slot, 0] = seq + 1
+            self._header[H_WRITE_SEQ] = seq + 1
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        return True
+
+    async def send(self, frame: bytes) -> None:
+        # Never block the event loop on another process's lock: yield, then poll
+        attempts = 0
+        while not self._write(frame):
+            self.lock_waits += 1
+            await asyncio.sleep(0 if attempts == 0 else self.poll_interval)
+            attempts += 1
+        self.sent += 1
+
+    def get_stats(self) -> Dict:
+        return {**super().get_stats(), 'lock_waits': self.lock_waits}
+
+    def poll(self) -> List[bytes]:
+        """Frames committed since the last poll"""
+        head = int(self._header[H_WRITE_SEQ])
+        if head - self._cursor > self.capacity:
+            self.dropped += head - self.capacity - self._cursor
+            self._cursor = head - self.capacity
+
+        frames = []
+        while self._cursor < head:
+            seq = self._cursor
+            self._cursor += 1
+            slot = seq % self.capacity
+            if int(self._meta[slot, 0]) != seq + 1:
+                self.dropped += 1  # overwritten by a writer that lapped us
+                continue
+            n = int(self._meta[slot, 1])
+            start = self._payload_offset + slot * self.slot_size
+            frame = bytes(self._shm.buf[start:start + n])
+            if int(self._meta[slot, 0]) != seq + 1:
+                self.dropped += 1  # overwritten while copying
+                continue
+            frames.append(frame)
+        return frames
+
+    async def _receive_loop(self, on_frame: FrameHandler) -> None:
+        while True:
+            frames = self.poll()
+            for frame in frames:
+                await self._dispatch(on_frame, frame)
+            if not frames:
+                await asyncio.sleep(self.poll_interval)
+
+    async def close(self) -> None:
+        await super().close()
+        del self._header, self._meta
+        self._shm.close()
+        os.close(self._lock_fd)
+
+    def unlink(self) -> None:
+        """Remove the segment (main process, on shutdown)"""
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+MAX_DATAGRAM = 65507
+PEER_REFRESH_SECONDS = 1.0
+
+
+class UnixSocketTransport(Transport):
+    """
+    Brokerless datagram fan-out over Unix domain sockets
+
+    Each process binds <directory>/<name>.sock (name defaults to the pid); peers are the other sockets in
+    the directory (rescanned at most once per second). Sockets of dead
+    processes are removed on ECONNREFUSED; a full peer queue drops the frame.
+    """
+
+    kind = 'unix'
+
+    def __init__(self, directory: str, name: Optional[str] = None):
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name or os.getpid()}.sock")
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        self._sock.setblocking(False)
+        self._peers: List[str] = []
+        self._peers_at = 0.0
+
+    def _refresh_peers(self) -> None:
+        now = time.monotonic()
+        if now - self._peers_at < PEER_REFRESH_SECONDS:
+            return
+        self._peers_at = now
+        try:
+            self._peers = [
+                entry.path for entry in os.scandir(self.directory)
+                if entry.name.endswith('.sock') and entry.path != self.path
+            ]
+        except FileNotFoundError:
+            self._peers = []
+
+    async def send(self, frame: bytes) -> None:
+        if len(frame) > MAX_DATAGRAM:
+            raise ValueError(f"Frame of {len(frame)} bytes exceeds datagram limit {MAX_DATAGRAM}")
+        self._refresh_peers()
+        for peer in list(self._peers):
+            try:
+                self._sock.sendto(frame, peer)
+                self.sent += 1
+            except BlockingIOError:
+                self.dropped += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Stale socket of a dead process
+                self._peers.remove(peer)
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+
+    async def _receive_loop(self, on_frame: FrameHandler) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            frame = await loop.sock_recv(self._sock, MAX_DATAGRAM)
+            await self._dispatch(on_frame, frame)
+
+    async def close(self) -> None:
+        await super().close()
+        self._sock.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class RedisStreamTransport(Transport):
+    """Redis Streams: XADD (approximate MAXLEN) / blocking XREAD from the tail"""
+
+    kind = 'redis'
+
+    def __init__(self, stream: str, url: Optional[str] = None, maxlen: int = 10000,
+                 block_ms: int = 1000, client=None):
+        super().__init__()
+        self.stream = stream
+        self.url = url
+        self.maxlen = maxlen
+        self.block_ms = block_ms
+        self._client = client
+
+    def _get_client(self):
+        if self._client is None:
+            import redis.asyncio as redis_async
+            from src.config import get_redis_url
+            self._client = redis_async.from_url(self.url or get_redis_url())
+        return self._client
+
+    async def send(self, frame: bytes) -> None:
+        await self._get_client().xadd(self.stream, {'f': frame}, maxlen=self.maxlen, approximate=True)
+        self.sent += 1
+
+    async def _receive_loop(self, on_frame: FrameHandler) -> None:
+        client = self._get_client()
+        last = await client.xrevrange(self.stream, count=1)
+        last_id = last[0][0] if last else '0-0'
+        while True:
+            try:
+                response = await client.xread({self.stream: last_id}, block=self.block_ms, count=100)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ Redis stream {self.stream} read failed: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            for _, entries in response or []:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    frame = fields.get(b'f', fields.get('f'))
+                    if frame is not None:
+                        await self._dispatch(on_frame, frame)
+
+    async def close(self) -> None:
+        await super().close()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# ============================================================================
+# Per-topic configuration
+# ============================================================================
+
+TRANSPORT_KINDS = ('local', 'shm', 'unix', 'redis')
+SOCKET_ROOT = os.path.join(tempfile.gettempdir(), "event_bus")
+
+
+def bus_segment_name(topic: str) -> str:
+    """Shared-memory segment name of a topic's shm ring"""
+    return f"bus_{topic}"
+
+
+def unlink_shm_rings(topics: List[str]) -> int:
+    """Remove the shm rings of the given topics (main process, on shutdown)"""
+    removed = 0
+    for topic in topics:
+        try:
+            shm = shared_memory.SharedMemory(name=bus_segment_name(topic))
+        except FileNotFoundError:
+            continue
+        shm.close()
+        shm.unlink()
+        removed += 1
+    return removed
+
+
+def parse_transport_spec(spec: str) -> Dict[str, str]:
+    """
+    "signal_generated=shm, order_filled=unix" → {topic: kind}
+
+    Raises:
+        ValueError: malformed entry or unknown transport kind
+    """
+    result = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        topic, sep, kind = entry.partition('=')
+        topic, kind = topic.strip(), kind.strip().lower()
+        if not sep or not topic:
+            raise ValueError(f"Malformed transport entry: {entry!r}")
+        if kind not in TRANSPORT_KINDS:
+            raise ValueError(f"Unknown transport {kind!r} for {topic} (expected one of {TRANSPORT_KINDS})")
+        result[topic] = kind
+    return result
+
+
+def create_transport(kind: str, topic: str, **options) -> Optional[Transport]:
+    """Build the transport for one topic ('local' → None)"""
+    if kind == 'local':
+        return None
+    if kind == 'shm':
+        return ShmRingTransport(bus_segment_name(topic), **options)
+    if kind == 'unix':
+        return UnixSocketTransport(os.path.join(SOCKET_ROOT, topic), **options)
+    if kind == 'redis':
+        return RedisStreamTransport(f"bus:{topic}", **options)
+    raise ValueError(f"Unknown transport: {kind}")
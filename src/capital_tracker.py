@@ -6,6 +6,9 @@
 
 Total Equity = Available Balance + Open Position Value + Unrealized PnL
 
+未實現 PnL 由 MarkToMarketEngine 增量維護（src/mark_to_market.py）：
+update_position_price 為 O(1)，get_total_equity 直接讀取，不再遍歷倉位
+
 例子:
   Available Balance: $8,000
   Open Positions: 1 BTC @ $42,000 entry, current $43,000
@@ -17,6 +20,8 @@ import logging
 from typing import Dict, Optional, List
 import json
 
+from src.mark_to_market import MarkToMarketEngine
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,56 +39,35 @@ class CapitalTracker:
         self.available_balance = initial_balance
         self.positions: Dict[str, Dict] = {}  # {symbol: {entry_price, quantity, unrealized_pnl, ...}}
         self.trade_history: List[Dict] = []
+        self.committed = 0.0  # 開倉佔用的下單金額總和
+        self.marks = MarkToMarketEngine(balance=initial_balance)
+    
+    def _sync_marks(self) -> None:
+        """倉位變動後同步到逐筆盯市表"""
+        self.marks.sync(self.available_balance + self.committed, self.positions)
     
     def get_total_equity(self) -> float:
         """
-        計算並返回當前總權益
+        返回當前總權益（O(1)，由盯市引擎增量維護）
         
-        Total Equity = Available Balance + Sum(Position Values)
+        Total Equity = Available Balance + Sum(Order Amount + Unrealized PnL)
+        （多單即 Available Balance + Sum(Current Price × Quantity)）
         
         Returns:
             float: 總權益 (USD)
         """
-        
-        equity = self.available_balance
-        
-        # 加上所有開倉的值
-        for symbol, pos in self.positions.items():
-            if pos.get('quantity', 0) > 0:
-                # Position Value = Current Price × Quantity
-                current_price = pos.get('current_price', pos.get('entry_price', 0))
-                equity += current_price * pos.get('quantity', 0)
-        
-        return equity
+        return self.marks.equity
     
     def get_unrealized_pnl(self) -> float:
         """
-        計算所有開倉的未實現 PnL
+        返回所有開倉的未實現 PnL（O(1)）
         
-        Unrealized PnL = Sum(Current Price - Entry Price) × Quantity for all positions
+        Unrealized PnL = Sum(Current Price - Entry Price) × Signed Quantity
         
         Returns:
             float: 未實現 PnL (USD)
         """
-        
-        total_upnl = 0.0
-        
-        for symbol, pos in self.positions.items():
-            if pos.get('quantity', 0) > 0:
-                entry_price = pos.get('entry_price', 0)
-                current_price = pos.get('current_price', entry_price)
-                quantity = pos.get('quantity', 0)
-                side = pos.get('side', 'BUY')
-                
-                if side == 'BUY':
-                    upnl = (current_price - entry_price) * quantity
-                else:  # SELL
-                    upnl = (entry_price - current_price) * quantity
-                
-                total_upnl += upnl
-                pos['unrealized_pnl'] = upnl
-        
-        return total_upnl
+        return self.marks.unrealized_pnl
     
     def open_position(
         self,
@@ -108,6 +92,8 @@ class CapitalTracker:
         """
         
         try:
+            if symbol in self.positions:
+                self.committed -= self.positions[symbol].get('order_amount', 0)
             self.positions[symbol] = {
                 'symbol': symbol,
                 'side': side,
@@ -122,6 +108,8 @@ class CapitalTracker:
             
             # 從可用餘額中扣除
             self.available_balance -= order_amount
+            self.committed += order_amount
+            self._sync_marks()
             
             logger.info(f"📈 Position Opened: {symbol} {side} {quantity} @ ${entry_price:.2f}")
             return self.positions[symbol]
@@ -175,6 +163,8 @@ class CapitalTracker:
             
             # 移除開倉記錄
             del self.positions[symbol]
+            self.committed -= pos['order_amount']
+            self._sync_marks()
             
             logger.info(f"📉 Position Closed: {symbol}, PnL: ${realized_pnl:.2f}")
             return {**pos, 'realized_pnl': realized_pnl}
@@ -192,8 +182,11 @@ class CapitalTracker:
             current_price: 當前價格
         """
         
-        if symbol in self.positions:
-            self.positions[symbol]['current_price'] = current_price
+        self.marks.on_price(symbol, current_price)
+        pos = self.positions.get(symbol)
+        if pos is not None:
+            pos['current_price'] = current_price
+            pos['unrealized_pnl'] = self.marks.position_pnl(symbol)
     
     def get_account_status(self) -> Dict:
         """
@@ -41,3 +41,70 @@ def get_database_url() -> str:
     
     # Fallback to local Postgres for development
     return "postgresql://localhost/aegis"
+
+
+def get_bus_transports() -> str:
+    """
+    Per-topic EventBus transports, e.g. "signal_generated=shm,order_filled=unix"
+    Topics not listed stay in-process (local)
+    """
+    return os.getenv('EVENT_BUS_TRANSPORTS', '')
+
+
+def get_binance_rest_options() -> dict:
+    """
+    Binance REST client pool / timeout settings
+    BINANCE_REST_POOL_SIZE, BINANCE_REST_KEEPALIVE, BINANCE_REST_CONNECT_TIMEOUT,
+    BINANCE_REST_TIMEOUT, BINANCE_REST_DNS_TTL
+    Rate limits: BINANCE_WEIGHT_LIMIT (/1m), BINANCE_ORDER_LIMIT_10S, BINANCE_ORDER_LIMIT_1M
+    """
+    return {
+        'pool_size': int(os.getenv('BINANCE_REST_POOL_SIZE', '20')),
+        'keepalive_timeout': float(os.getenv('BINANCE_REST_KEEPALIVE', '60')),
+        'connect_timeout': float(os.getenv('BINANCE_REST_CONNECT_TIMEOUT', '5')),
+        'total_timeout': float(os.getenv('BINANCE_REST_TIMEOUT', '30')),
+        'ttl_dns_cache': int(os.getenv('BINANCE_REST_DNS_TTL', '300')),
+        'weight_limit': int(os.getenv('BINANCE_WEIGHT_LIMIT', '2400')),
+        'order_limit_10s': int(os.getenv('BINANCE_ORDER_LIMIT_10S', '300')),
+        'order_limit_1m': int(os.getenv('BINANCE_ORDER_LIMIT_1M', '1200')),
+    }
+
+
+def get_exchange_info_options() -> dict:
+    """
+    Exchange filter index settings
+    EXCHANGE_INFO_CACHE (on-disk copy for offline startup, empty disables it),
+    EXCHANGE_INFO_REFRESH_S (background refresh interval)
+    """
+    return {
+        'cache_path': os.getenv('EXCHANGE_INFO_CACHE', 'data/exchange_info.json') or None,
+        'refresh_interval': float(os.getenv('EXCHANGE_INFO_REFRESH_S', '3600')),
+    }
+
+
+def get_signal_writer_options() -> dict:
+    """
+    Signal persistence settings
+    SIGNAL_BATCH_SIZE (rows per insert), SIGNAL_FLUSH_MS (batching window),
+    SIGNAL_MAX_QUEUE (rows held in memory before spilling),
+    SIGNAL_SPILL_PATH (durable fallback while Postgres is down, empty disables it)
+    """
+    return {
+        'batch_size': int(os.getenv('SIGNAL_BATCH_SIZE', '500')),
+        'flush_interval_ms': float(os.getenv('SIGNAL_FLUSH_MS', '200')),
+        'max_queue': int(os.getenv('SIGNAL_MAX_QUEUE', '50000')),
+        'spill_path': os.getenv('SIGNAL_SPILL_PATH', 'data/signals_spill.jsonl') or None,
+    }
+
+
+def get_state_writer_options() -> dict:
+    """
+    Account-state persistence settings
+    STATE_FLUSH_MS (max flush rate), STATE_HISTORY_LIMIT (delta rows kept),
+    STATE_COMPACT_EVERY (flushes between history compactions)
+    """
+    return {
+        'flush_interval_ms': float(os.getenv('STATE_FLUSH_MS', '500')),
+        'history_limit': int(os.getenv('STATE_HISTORY_LIMIT', '10000')),
+        'compact_every': int(os.getenv('STATE_COMPACT_EVERY', '100')),
+    }
@@ -0,0 +1,133 @@
+"""
+🏛️ Elite Technical Engine - name-based indicator facade over the Numba kernels
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+engine.calculate(name, data, **params) → IndicatorResult(value=...)
+
+- 'ema_slope'        close Series → Series of EMA % change over `lookback` bars
+- 'swing_points'     OHLC DataFrame → {'highs': [...], 'lows': [...]}
+- 'order_blocks'     OHLC DataFrame → [{'type', 'price', 'strength', ...}]
+- 'market_structure' OHLC DataFrame → {'trend', 'structure_valid', 'higher_high', ...}
+- 'fvg'              OHLC DataFrame → DataFrame(index, direction, gap_start, gap_end, filled_at)
+
+`lookback` is the pivot window length (pandas rolling(center=True)
+convention): the SMC kernels get lookback // 2 bars on each side.
+
+Results are memoized in an IndicatorCache keyed by a digest of the input
+columns, so repeated calls on the same frame are dictionary lookups.
+Used by the ICT regression suite (tests/test_ict_regression.py).
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from src import smc
+from src.indicator_cache import IndicatorCache
+from src.indicators import Indicators
+
+logger = logging.getLogger(__name__)
+
+OHLC_COLUMNS = ('open', 'high', 'low', 'close')
+FVG_COLUMNS = ['index', 'direction', 'gap_start', 'gap_end', 'filled_at']
+
+
+@dataclass
+class IndicatorResult:
+    """Value returned by EliteTechnicalEngine.calculate"""
+    name: str
+    value: Any
+    params: Dict = field(default_factory=dict)
+    cached: bool = False
+
+
+class EliteTechnicalEngine:
+    """Dispatch indicator names to the Numba kernels, with result caching"""
+
+    def __init__(self, max_cache_entries: int = 1024):
+        self.cache = IndicatorCache(max_entries=max_cache_entries)
+        self._handlers = {
+            'ema_slope': self._ema_slope,
+            'swing_points': self._swing_points,
+            'order_blocks': self._order_blocks,
+            'market_structure': self._market_structure,
+            'fvg': self._fvg,
+        }
+
+    def calculate(self, name: str, data, **params) -> IndicatorResult:
+        """
+        Compute indicator `name` on `data`
+
+        Raises:
+            ValueError: unknown indicator name
+        """
+        handler = self._handlers.get(name)
+        if handler is None:
+            raise ValueError(f"Unknown indicator: {name}")
+
+        columns = self._columns(data)
+        digest = hashlib.blake2b(b''.join(c.tobytes() for c in columns.values()), digest_size=16).hexdigest()
+        key_params = tuple(sorted(params.items()))
+
+        misses = self.cache.misses
+        value = self.cache.get_or_compute(
+            digest, 'series', len(data), name, key_params, lambda: handler(data, columns, **params)
+        )
+        return IndicatorResult(name=name, value=value, params=params, cached=self.cache.misses == misses)
+
+    @staticmethod
+    def _columns(data) -> Dict[str, np.ndarray]:
+        if isinstance(data, pd.Series):
+            return {'close': np.ascontiguousarray(data.to_numpy(dtype=np.float64))}
+        if isinstance(data, pd.DataFrame) and all(col in data.columns for col in OHLC_COLUMNS):
+            return {col: np.ascontiguousarray(data[col].to_numpy(dtype=np.float64)) for col in OHLC_COLUMNS}
+        return {col: np.empty(0) for col in OHLC_COLUMNS}
+
+    # ------------------------------------------------------------------
+    # Indicators
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _ema_slope(data, columns, lookback: int = 5, period: int = 20) -> pd.Series:
+        closes = columns['close']
+        index = data.index if isinstance(data, pd.Series) else None
+        if len(closes) == 0:
+            return pd.Series([], dtype=float, index=index)
+
+        ema = Indicators.ema_series(closes, period=min(period, len(closes)))
+        slope = np.full(len(closes), np.nan)
+        if len(closes) > lookback:
+            prev = ema[:-lookback]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                slope[lookback:] = (ema[lookback:] - prev) / prev * 100.0
+        return pd.Series(slope, index=index)
+
+    @staticmethod
+    def _side(lookback: int) -> int:
+        return max(int(lookback) // 2, 1)
+
+    def _detect(self, columns, lookback: int, **params) -> Dict[str, np.ndarray]:
+        return smc.detect_structure(
+            columns['open'], columns['high'], columns['low'], columns['close'],
+            lookback=self._side(lookback), **params
+        )
+
+    def _swing_points(self, data, columns, lookback: int = 2 * smc.DEFAULT_LOOKBACK) -> Dict:
+        return smc.swing_points(columns['high'], columns['low'], lookback=self._side(lookback))
+
+    def _order_blocks(self, data, columns, lookback: int = 2 * smc.DEFAULT_LOOKBACK, **params) -> list:
+        return smc.order_blocks(self._detect(columns, lookback, **params))
+
+    def _market_structure(self, data, columns, lookback: int = 2 * smc.DEFAULT_LOOKBACK, **params) -> Dict:
+        return smc.market_structure(self._detect(columns, lookback, **params)['state'])
+
+    def _fvg(self, data, columns, min_gap_pct: float = 0.0, lookback: int = 2 * smc.DEFAULT_LOOKBACK) -> pd.DataFrame:
+        zones = smc.fvg_zones(self._detect(columns, lookback, min_gap_pct=min_gap_pct))
+        return pd.DataFrame(
+            [(z['index'], z['direction'], z['bottom'], z['top'], z['filled_at']) for z in zones],
+            columns=FVG_COLUMNS,
+        )
@@ -89,11 +89,12 @@ class SystemMonitor:
                 db_url = get_database_url()
                 conn = await asyncpg.connect(db_url)
                 
-                # Get latest account state
+                # Get current account state (single row, see src/state_writer.py;
+                # newest legacy snapshot until the writer has migrated the table)
                 row = await conn.fetchrow("""
                     SELECT balance, pnl, trade_count, positions 
                     FROM account_state 
-                    ORDER BY updated_at DESC 
+                    ORDER BY updated_at DESC NULLS LAST, id DESC 
                     LIMIT 1
                 """)
                 
@@ -1,12 +1,31 @@
 """
 🚀 Dispatcher - Priority task queue for async processing
 Offloads CPU-heavy analysis to thread pool without blocking event loop
+
+Scheduling:
+- One FIFO per priority; workers always take TRADING first, then ANALYSIS,
+  then LOGGING
+- Aging: a job that waited longer than its max wait (per-priority default,
+  or the deadline passed to submit) is promoted above every fresh
+  non-trading job, so LOGGING cannot starve — but real TRADING jobs still
+  go first
+- A fixed set of worker tasks; `reserved_trading_workers` of them only run
+  TRADING jobs, so trade work never waits behind a long analysis job
+- run_cpu(fn, *args) runs blocking / CPU work in the thread pool (or a
+  process pool) through the same priority queue
 """
 
 import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from enum import Enum
-from concurrent.futures import ThreadPoolExecutor
-from typing import Callable, Any
+from typing import Callable, Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
 
 class Priority(Enum):
     """Task priority levels"""
@@ -15,32 +34,254 @@ class Priority(Enum):
     LOGGING = 3   # Low priority
 
 
+# Scheduling order (0 = runs first)
+PRIORITY_ORDER = (Priority.TRADING, Priority.ANALYSIS, Priority.LOGGING)
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(PRIORITY_ORDER)}
+
+# Seconds a job may wait before it is promoted (TRADING is never promoted)
+DEFAULT_MAX_WAIT = {Priority.ANALYSIS: 1.0, Priority.LOGGING: 5.0}
+
+
+class _Job:
+    __slots__ = ('priority', 'rank', 'factory', 'future', 'enqueued_at', 'max_wait', 'coro')
+
+    def __init__(self, priority: Priority, factory: Callable, future: asyncio.Future,
+                 max_wait: Optional[float], coro: Any = None):
+        self.priority = priority
+        self.coro = coro  # closed if the job is cancelled before it starts
+        self.rank = PRIORITY_RANK[priority]
+        self.factory = factory
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.max_wait = max_wait
+
+
+class _PriorityStats:
+    __slots__ = ('submitted', 'completed', 'failed', 'cancelled', 'promoted', 'wait_total', 'wait_max')
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.promoted = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
 class Dispatcher:
     """Async dispatcher with priority queues"""
-    
-    def __init__(self, max_workers: int = 4):
+
+    def __init__(self, max_workers: int = 4, reserved_trading_workers: int = 1,
+                 max_wait: Optional[Dict[Priority, float]] = None):
+        if not 0 <= reserved_trading_workers < max_workers:
+            raise ValueError("reserved_trading_workers must leave at least one general worker")
+        self.max_workers = max_workers
+        self.reserved_trading_workers = reserved_trading_workers
+        self.max_wait = {**DEFAULT_MAX_WAIT, **(max_wait or {})}
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.process_executor: Optional[ProcessPoolExecutor] = None
         self.loop = None
-    
-    async def submit_priority(self, priority: Priority, coro: Any) -> Any:
+
+        self._queues: List[Deque[_Job]] = [deque() for _ in PRIORITY_ORDER]
+        self._stats = {priority: _PriorityStats() for priority in PRIORITY_ORDER}
+        self._workers: List[asyncio.Task] = []
+        self._work_available: Optional[asyncio.Event] = None
+        self._running = 0
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _ensure_workers(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self.loop is loop and self._workers:
+            return
+        self.loop = loop
+        self._work_available = asyncio.Event()
+        self._workers = [
+            loop.create_task(self._worker(trading_only=i < self.reserved_trading_workers), name=f"dispatch-{i}")
+            for i in range(self.max_workers)
+        ]
+
+    def _pop(self, trading_only: bool) -> Optional[_Job]:
+        """Next job: lowest (effective rank, rank, enqueue time) among the queue heads"""
+        now = time.monotonic()
+        best_rank, best_key, overdue_best = None, None, False
+        for rank, queue in enumerate(self._queues):
+            if not queue:
+                continue
+            if trading_only and rank != 0:
+                break
+            job = queue[0]
+            overdue = job.max_wait is not None and now - job.enqueued_at >= job.max_wait
+            key = (0 if overdue else rank, rank, job.enqueued_at)
+            if best_key is None or key < best_key:
+                best_rank, best_key, overdue_best = rank, key, overdue
+
+        if best_rank is None:
+            return None
+        job = self._queues[best_rank].popleft()
+        if overdue_best and best_rank != 0:
+            self._stats[job.priority].promoted += 1
+        return job
+
+    async def _worker(self, trading_only: bool) -> None:
+        while True:
+            job = self._pop(trading_only)
+            if job is None:
+                self._work_available.clear()
+                await self._work_available.wait()
+                continue
+            await self._run(job)
+            # Let other workers see the event again if work remains
+            if any(self._queues):
+                self._work_available.set()
+
+    async def _run(self, job: _Job) -> None:
+        stats = self._stats[job.priority]
+        wait = time.monotonic() - job.enqueued_at
+        stats.wait_total += wait
+        stats.wait_max = max(stats.wait_max, wait)
+        if job.future.cancelled():
+            if job.coro is not None:
+                job.coro.close()
+            return
+
+        self._running += 1
+        try:
+            result = job.factory()
+            if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+                result = await result
+        except asyncio.CancelledError:
+            job.future.cancel()
+            task = asyncio.current_task()
+            if task is not None and task.cancelling():
+                raise  # the worker itself is being stopped
+            # The job's own CancelledError (e.g. it awaited a cancelled future): keep the worker alive
+            stats.cancelled += 1
+        except Exception as e:
+            stats.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            stats.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._running -= 1
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+
+    def submit(self, priority: Priority, coro: Any, deadline: Optional[float] = None) -> asyncio.Future:
+        """
+        Queue a coroutine (or zero-arg callable returning one) and return its future
+
+        Args:
+            priority: Priority level
+            coro: Coroutine, coroutine function, or plain value
+            deadline: Seconds this job may wait before promotion (default per priority)
+        """
+        self._ensure_workers()
+        pending = coro if asyncio.iscoroutine(coro) else None
+        if pending is not None:
+            factory = lambda: coro
+        elif callable(coro):
+            factory = coro
+        else:
+            factory = lambda: coro
+
+        future = self.loop.create_future()
+        max_wait = deadline if deadline is not None else self.max_wait.get(priority)
+        job = _Job(priority, factory, future, None if priority == Priority.TRADING else max_wait, pending)
+        self._queues[job.rank].append(job)
+        self._stats[priority].submitted += 1
+        self._work_available.set()
+        return future
+
+    async def submit_priority(self, priority: Priority, coro: Any, deadline: Optional[float] = None) -> Any:
         """
         Submit async coroutine for priority execution
-        
+
         Args:
             priority: Priority level
             coro: Coroutine to execute
+            deadline: Seconds this job may wait before promotion (default per priority)
+
+        Returns:
+            The coroutine's result, or None if it raised (the error is logged)
         """
         try:
-            if asyncio.iscoroutine(coro):
-                return await coro
-            else:
-                return coro
+            return await self.submit(priority, coro, deadline)
         except Exception as e:
+            logger.error(f"❌ Dispatcher {priority.name} task failed: {e}", exc_info=True)
             return None
-    
+
+    async def run_cpu(self, fn: Callable, *args, priority: Priority = Priority.ANALYSIS,
+                      use_process: bool = False, **kwargs) -> Any:
+        """
+        Run a blocking / CPU-bound function off the event loop
+
+        Scheduled through the priority queue, then executed in the thread pool
+        (or a process pool when use_process=True; fn and args must pickle).
+        Exceptions propagate to the caller.
+        """
+        if use_process and self.process_executor is None:
+            self.process_executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        executor = self.process_executor if use_process else self.executor
+        call = functools.partial(fn, *args, **kwargs)
+
+        async def job():
+            return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+        return await self.submit(priority, job)
+
+    # ------------------------------------------------------------------
+    # Metrics / lifecycle
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict:
+        """Queue depth, throughput and wait times per priority"""
+        stats = {'workers': len(self._workers), 'running': self._running}
+        for priority, queue in zip(PRIORITY_ORDER, self._queues):
+            s = self._stats[priority]
+            started = max(s.completed + s.failed + s.cancelled, 1)
+            stats[priority.name] = {
+                'depth': len(queue),
+                'submitted': s.submitted,
+                'completed': s.completed,
+                'failed': s.failed,
+                'cancelled': s.cancelled,
+                'promoted': s.promoted,
+                'avg_wait_ms': s.wait_total / started * 1000,
+                'max_wait_ms': s.wait_max * 1000,
+            }
+        return stats
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued jobs are cancelled"""
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+        for queue in self._queues:
+            while queue:
+                job = queue.popleft()
+                job.future.cancel()
+                if job.coro is not None:
+                    job.coro.close()
+
     def shutdown(self):
         """Shutdown dispatcher"""
         self.executor.shutdown(wait=True)
+        if self.process_executor is not None:
+            self.process_executor.shutdown(wait=True)
 
 
 # Global dispatcher instance
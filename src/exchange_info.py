@@ -0,0 +1,313 @@
+"""
+📐 Exchange Info - Cached per-symbol filter index
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Binance's real trading filters for every symbol instead of hand-kept tables:
+
+- GET /fapi/v1/exchangeInfo: PRICE_FILTER tickSize, LOT_SIZE stepSize /
+  minQty / maxQty, MIN_NOTIONAL notional
+- GET /fapi/v1/leverageBracket (signed): notional caps -> max leverage
+- Parsed once into one SymbolFilters per symbol (plain attributes, bracket
+  caps as a sorted tuple), so lookups are a dict hit plus a bisect
+- Written to a JSON cache on disk after every refresh and read back at
+  startup, so validation is correct before (or without) network access
+- refresh_loop() reloads every refresh_interval seconds; a refresh swaps in
+  a whole new index, readers never see a half-built one
+
+Symbols missing from the index fall back to the static tables in
+src/binance_constraints.py and src/utils/math_utils.py.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.config import get_exchange_info_options
+from src.utils.math_utils import step_decimals
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_INFO_PATH = "/fapi/v1/exchangeInfo"
+LEVERAGE_BRACKET_PATH = "/fapi/v1/leverageBracket"
+CACHE_VERSION = 1
+
+
+class SymbolFilters:
+    """Trading filters of one symbol"""
+
+    __slots__ = ('symbol', 'tick_size', 'step_size', 'min_qty', 'max_qty', 'min_notional',
+                 'tick_decimals', 'step_decimals', 'bracket_caps', 'bracket_leverage')
+
+    def __init__(self, symbol: str, tick_size: float, step_size: float, min_qty: float,
+                 max_qty: float, min_notional: float,
+                 brackets: Iterable[Tuple[float, int]] = ()):
+        self.symbol = symbol
+        self.tick_size = tick_size
+        self.step_size = step_size
+        self.min_qty = min_qty
+        self.max_qty = max_qty
+        self.min_notional = min_notional
+        self.tick_decimals = step_decimals(tick_size)
+        self.step_decimals = step_decimals(step_size)
+        self.set_brackets(brackets)
+
+    def set_brackets(self, brackets: Iterable[Tuple[float, int]]) -> None:
+        """brackets: (notional cap, max leverage) pairs, any order"""
+        ordered = sorted(brackets)
+        self.bracket_caps = tuple(cap for cap, _ in ordered)
+        self.bracket_leverage = tuple(int(leverage) for _, leverage in ordered)
+
+    def max_leverage(self, notional: float) -> Optional[int]:
+        """Max leverage of the first bracket whose cap covers `notional` (None if brackets unknown)"""
+        if not self.bracket_caps:
+            return None
+        i = bisect_left(self.bracket_caps, notional)
+        return self.bracket_leverage[min(i, len(self.bracket_leverage) - 1)]
+
+    def to_row(self) -> List:
+        return [self.tick_size, self.step_size, self.min_qty, self.max_qty, self.min_notional,
+                [[cap, leverage] for cap, leverage in zip(self.bracket_caps, self.bracket_leverage)]]
+
+    @classmethod
+    def from_row(cls, symbol: str, row: List) -> "SymbolFilters":
+        tick_size, step_size, min_qty, max_qty, min_notional, brackets = row
+        return cls(symbol, tick_size, step_size, min_qty, max_qty, min_notional,
+                   [(cap, leverage) for cap, leverage in brackets])
+
+
+def parse_exchange_info(payload: Dict[str, Any]) -> Dict[str, SymbolFilters]:
+    """exchangeInfo response -> {symbol: SymbolFilters} (brackets left empty)"""
+    index = {}
+    for entry in payload.get('symbols', []):
+        filters = {f.get('filterType'): f for f in entry.get('filters', [])}
+        price = filters.get('PRICE_FILTER', {})
+        lot = filters.get('LOT_SIZE', {})
+        notional = filters.get('MIN_NOTIONAL', {})
+        try:
+            index[entry['symbol']] = SymbolFilters(
+                entry['symbol'],
+                tick_size=float(price.get('tickSize', 0.01)),
+                step_size=float(lot.get('stepSize', 0.001)),
+                min_qty=float(lot.get('minQty', 0)),
+                max_qty=float(lot.get('maxQty', 0)) or float('inf'),
+                # Futures use 'notional', spot 'minNotional'
+                min_notional=float(notional.get('notional', notional.get('minNotional', 0))),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            logger.debug(f"⚠️ Skipping exchangeInfo entry {entry.get('symbol')}: {e}")
+    return index
+
+
+def parse_leverage_brackets(payload: List[Dict[str, Any]]) -> Dict[str, List[Tuple[float, int]]]:
+    """leverageBracket response -> {symbol: [(notional cap, max leverage), ...]}"""
+    brackets = {}
+    for entry in payload:
+        try:
+            brackets[entry['symbol']] = [
+                (float(b['notionalCap']), int(b['initialLeverage'])) for b in entry.get('brackets', [])
+            ]
+        except (KeyError, TypeError, ValueError) as e:
+            logger.debug(f"⚠️ Skipping leverage brackets for {entry.get('symbol')}: {e}")
+    return brackets
+
+
+class ExchangeInfo:
+    """Process-wide symbol -> filters index with disk cache and background refresh"""
+
+    def __init__(self, cache_path: Optional[str] = None, refresh_interval: float = 3600):
+        self.cache_path = cache_path
+        self.refresh_interval = refresh_interval
+        self._symbols: Dict[str, SymbolFilters] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.updated_at: Optional[float] = None
+        self.source: Optional[str] = None  # 'cache' or 'exchange'
+        self.refreshes = 0
+        self.failures = 0
+
+    # ------------------------------------------------------------------
+    # Lookups (O(1))
+    # ------------------------------------------------------------------
+
+    def get(self, symbol: str) -> Optional[SymbolFilters]:
+        return self._symbols.get(symbol)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._symbols
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def tick_size(self, symbol: str) -> Optional[float]:
+        filters = self._symbols.get(symbol)
+        return filters.tick_size if filters is not None else None
+
+    def step_size(self, symbol: str) -> Optional[float]:
+        filters = self._symbols.get(symbol)
+        return filters.step_size if filters is not None else None
+
+    def min_qty(self, symbol: str) -> Optional[float]:
+        filters = self._symbols.get(symbol)
+        return filters.min_qty if filters is not None else None
+
+    def min_notional(self, symbol: str) -> Optional[float]:
+        filters = self._symbols.get(symbol)
+        return filters.min_notional if filters is not None else None
+
+    def max_leverage(self, symbol: str, notional: float) -> Optional[int]:
+        filters = self._symbols.get(symbol)
+        return filters.max_leverage(notional) if filters is not None else None
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def load(self, exchange_info: Dict[str, Any],
+             brackets: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        Build a new index from raw API payloads and swap it in
+
+        Without a brackets payload the previous index's brackets are kept.
+
+        Returns:
+            Number of symbols indexed
+        """
+        index = parse_exchange_info(exchange_info)
+        by_symbol = parse_leverage_brackets(brackets) if brackets is not None else {}
+        for symbol, filters in index.items():
+            if symbol in by_symbol:
+                filters.set_brackets(by_symbol[symbol])
+            elif symbol in self._symbols:
+                previous = self._symbols[symbol]
+                filters.bracket_caps = previous.bracket_caps
+                filters.bracket_leverage = previous.bracket_leverage
+        self._symbols = index
+        self.updated_at = time.time()
+        self.source = 'exchange'
+        return len(index)
+
+    def load_cache(self) -> bool:
+        """Read the on-disk cache (False if missing or unreadable)"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path, 'r') as f:
+                cached = json.load(f)
+            if cached.get('version') != CACHE_VERSION:
+                return False
+            self._symbols = {s: SymbolFilters.from_row(s, row) for s, row in cached['symbols'].items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"⚠️ Exchange info cache unreadable ({self.cache_path}): {e}")
+            return False
+        self.updated_at = cached.get('updated_at')
+        self.source = 'cache'
+        logger.info(f"📐 Exchange info loaded from cache: {len(self._symbols)} symbols ({self.cache_path})")
+        return True
+
+    def save_cache(self) -> bool:
+        """Write the index to disk atomically (temp file + rename)"""
+        if not self.cache_path:
+            return False
+        payload = {
+            'version': CACHE_VERSION,
+            'updated_at': self.updated_at,
+            'symbols': {s: f.to_row() for s, f in self._symbols.items()},
+        }
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Failed to write exchange info cache ({self.cache_path}): {e}")
+            return False
+        return True
+
+    async def refresh(self, client, sign: Optional[Callable[[Dict], Callable[[], str]]] = None) -> bool:
+        """
+        Fetch exchangeInfo (and leverage brackets when a signer is given) and swap them in
+
+        Args:
+            client: BinanceRestClient
+            sign: Builds a signing callable from params (trade._signer); None skips brackets
+        """
+        try:
+            resp = await client.request('GET', EXCHANGE_INFO_PATH)
+            if not resp.ok or not isinstance(resp.data, dict):
+                raise ConnectionError(f"exchangeInfo HTTP {resp.status}: {resp.text[:200]}")
+            exchange_info = resp.data
+
+            brackets = None
+            if sign is not None:
+                resp = await client.request('GET', LEVERAGE_BRACKET_PATH, sign({}))
+                if resp.ok and isinstance(resp.data, list):
+                    brackets = resp.data
+                else:
+                    logger.warning(f"⚠️ Leverage brackets unavailable (HTTP {resp.status}) - keeping previous")
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"⚠️ Exchange info refresh failed: {e}")
+            return False
+
+        count = self.load(exchange_info, brackets)
+        self.refreshes += 1
+        self.save_cache()
+        logger.info(f"📐 Exchange info refreshed: {count} symbols"
+                    f"{'' if brackets is not None else ' (no leverage brackets)'}")
+        return True
+
+    async def refresh_loop(self, client, sign=None) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh(client, sign)
+
+    async def start(self, client, sign=None) -> bool:
+        """
+        Refresh now (cache stays in use if that fails) and keep refreshing in the background
+
+        Returns:
+            True if the first refresh succeeded
+        """
+        ok = await self.refresh(client, sign)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(
+                self.refresh_loop(client, sign), name="exchange-info-refresh")
+        return ok
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict:
+        return {
+            'symbols': len(self._symbols),
+            'source': self.source,
+            'age_s': time.time() - self.updated_at if self.updated_at else None,
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+        }
+
+
+# Global index instance
+_exchange_info: Optional[ExchangeInfo] = None
+
+
+def get_exchange_info() -> ExchangeInfo:
+    """Get or create the process-wide index (seeded from the disk cache on creation)"""
+    global _exchange_info
+    if _exchange_info is None:
+        _exchange_info = ExchangeInfo(**get_exchange_info_options())
+        _exchange_info.load_cache()
+    return _exchange_info
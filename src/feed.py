@@ -306,6 +306,7 @@ async def main():
                         try:
                             # 增加超時時間為 45s，允許短暫的網絡波動
                             message = await asyncio.wait_for(websocket.recv(), timeout=45)
+                            recv_ns = time_module.monotonic_ns()  # ⏱️ trace start (src/latency.py)
                             message_count += 1
                             data = json.loads(message)
                             
@@ -334,7 +335,7 @@ async def main():
                                 if safe_candle:
                                     # 🔍 Diagnostic: Log Ring Buffer write
                                     write_cursor_before = ring_buffer._get_cursors()[0]
-                                    ring_buffer.write_candle(safe_candle)
+                                    ring_buffer.write_candle(safe_candle, recv_ns, kline.get('s', ''))
                                     write_cursor_after = ring_buffer._get_cursors()[0]
                                     candle_count += 1
                                     
@@ -0,0 +1,307 @@
+"""
+⏱️ Indicator Benchmark - Numba vs Python fallback vs NumPy
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Times every indicator in src/indicators.py across window sizes and input
+types, writes machine-readable JSON and flags regressions against a stored
+baseline.
+
+Paths per indicator:
+- numba:    the @jit kernel on a contiguous float64 ndarray
+- wrapper:  Indicators.<name>() (includes the np.array conversion)
+- python:   the same kernel's pure-Python body (kernel.py_func)
+- numpy:    a vectorized NumPy reference implementation
+
+Usage:
+    python -m src.indicator_benchmark                              # print table
+    python -m src.indicator_benchmark --output results.json
+    python -m src.indicator_benchmark --baseline src/benchmarks/indicators_baseline.json
+    python -m src.indicator_benchmark --save-baseline src/benchmarks/indicators_baseline.json
+
+Exit code 1 when --baseline is given and any case regressed.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src import indicators as ind
+from src.indicators import Indicators, HAS_NUMBA
+
+DEFAULT_WINDOWS = (20, 100, 1000, 10000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "benchmarks", "indicators_baseline.json")
+
+# A case regresses when slower than baseline × threshold and by more than MIN_DELTA_US
+DEFAULT_THRESHOLD = 1.5
+MIN_DELTA_US = 2.0
+
+# Timing: best of REPEATS runs, each at least MIN_RUN_SECONDS long
+REPEATS = 3
+MIN_RUN_SECONDS = 0.02
+
+
+# ============================================================================
+# NumPy reference implementations (same formulas as the kernels)
+# ============================================================================
+
+def np_rsi(prices, period=14):
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(prices) <= period:
+        return 50.0
+    diffs = np.diff(prices[-period - 1:])
+    avg_gain = diffs[diffs > 0].sum() / period
+    avg_loss = -diffs[diffs < 0].sum() / period
+    if avg_loss == 0:
+        return 100.0 if avg_gain > 0 else 50.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+def np_sma(prices, period=20):
+    prices = np.asarray(prices, dtype=np.float64)
+    return float(prices[-period:].mean()) if len(prices) >= period else 0.0
+
+
+def np_ema(prices, period=12):
+    """Closed form: ema_n = d^k · sma + α Σ d^(n-i) p_i (no Python loop)"""
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(prices) < period:
+        return 0.0
+    alpha = 2.0 / (period + 1.0)
+    tail = prices[period:]
+    decay = (1.0 - alpha) ** np.arange(len(tail) - 1, -1, -1)
+    return float((1.0 - alpha) ** len(tail) * prices[:period].mean() + alpha * (decay * tail).sum())
+
+
+def np_macd(prices, fast=12, slow=26, signal=9):
+    if len(prices) < slow:
+        return 0.0
+    macd_line = np_ema(prices, fast) - np_ema(prices, slow)
+    return macd_line  # line only: the signal EMA needs the MACD series
+
+
+def np_atr(highs, lows, closes, period=14):
+    highs, lows, closes = (np.asarray(a, dtype=np.float64) for a in (highs, lows, closes))
+    if len(closes) <= period:
+        return 0.0
+    prev = closes[:-1]
+    tr = np.maximum.reduce([highs[1:] - lows[1:], np.abs(highs[1:] - prev), np.abs(lows[1:] - prev)])
+    return float(tr[-period:].mean())
+
+
+def np_bb_width(prices, period=20, std_dev=2.0):
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(prices) < period:
+        return 0.0
+    recent = prices[-period:]
+    return float(2.0 * std_dev * recent.std())
+
+
+# ============================================================================
+# Cases
+# ============================================================================
+
+def _py_func(kernel):
+    return getattr(kernel, 'py_func', kernel)
+
+
+def _cases(n: int) -> Dict[str, Dict[str, Callable[[], object]]]:
+    """{indicator: {path: zero-arg callable}} for input length n"""
+    rng = np.random.default_rng(n)
+    closes = np.ascontiguousarray(60000.0 + rng.normal(scale=50.0, size=n).cumsum())
+    highs = closes + rng.uniform(0, 20.0, size=n)
+    lows = closes - rng.uniform(0, 20.0, size=n)
+    closes_list, highs_list, lows_list = closes.tolist(), highs.tolist(), lows.tolist()
+
+    def paths(kernel, wrapper, reference, args_nd, args_list):
+        return {
+            'numba': lambda: kernel(*args_nd),
+            'wrapper_ndarray': lambda: wrapper(*args_nd),
+            'wrapper_list': lambda: wrapper(*args_list),
+            'python_ndarray': lambda: _py_func(kernel)(*args_nd),
+            'python_list': lambda: _py_func(kernel)(*args_list),
+            'numpy': lambda: reference(*args_nd),
+        }
+
+    return {
+        'rsi': paths(ind.rsi_jit, Indicators.rsi, np_rsi, (closes, 14), (closes_list, 14)),
+        'sma': paths(ind.sma_jit, Indicators.sma, np_sma, (closes, 20), (closes_list, 20)),
+        'ema': paths(ind.ema_jit, Indicators.ema, np_ema, (closes, 12), (closes_list, 12)),
+        'macd': paths(ind.macd_jit, Indicators.macd, np_macd, (closes, 12, 26, 9), (closes_list, 12, 26, 9)),
+        'atr': paths(ind.atr_jit, Indicators.atr, np_atr,
+                     (highs, lows, closes, 14), (highs_list, lows_list, closes_list, 14)),
+        'bb_width': paths(ind.bollinger_width_jit, Indicators.bollinger_bands, np_bb_width,
+                          (closes, 20, 2.0), (closes_list, 20, 2.0)),
+    }
+
+
+def time_call(fn: Callable[[], object]) -> float:
+    """Best-of-REPEATS microseconds per call"""
+    fn()  # warm (JIT compile / caches)
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_RUN_SECONDS or number >= 1_000_000:
+            break
+        number *= 10
+
+    best = elapsed / number
+    for _ in range(REPEATS - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+
+def run_suite(windows: Sequence[int] = DEFAULT_WINDOWS,
+              indicators: Optional[Sequence[str]] = None,
+              paths: Optional[Sequence[str]] = None) -> Dict:
+    """
+    Run every (indicator, path, n) case
+
+    Returns:
+        {'meta': {...}, 'results': [{'indicator', 'path', 'n', 'us_per_call'}, ...],
+         'skipped': [{'indicator', 'path', 'n', 'reason'}, ...]}
+    """
+    results = []
+    skipped = []
+    for n in windows:
+        for indicator, by_path in _cases(n).items():
+            if indicators and indicator not in indicators:
+                continue
+            for path, fn in by_path.items():
+                if paths and path not in paths:
+                    continue
+                try:
+                    us_per_call = round(time_call(fn), 3)
+                except Exception as e:
+                    # e.g. python_list for macd: its py_func still calls the jitted series kernel
+                    skipped.append({'indicator': indicator, 'path': path, 'n': n, 'reason': type(e).__name__})
+                    continue
+                results.append({
+                    'indicator': indicator,
+                    'path': path,
+                    'n': n,
+                    'us_per_call': us_per_call,
+                })
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'numba': _numba_version(),
+            'has_numba': HAS_NUMBA,
+            'machine': platform.machine(),
+        },
+        'results': results,
+        'skipped': skipped,
+    }
+
+
+def _numba_version() -> Optional[str]:
+    try:
+        import numba
+        return numba.__version__
+    except ImportError:
+        return None
+
+
+def _case_key(entry: Dict) -> tuple:
+    return entry['indicator'], entry['path'], entry['n']
+
+
+def compare_to_baseline(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD,
+                        min_delta_us: float = MIN_DELTA_US) -> List[Dict]:
+    """
+    Cases slower than baseline × threshold (and by more than min_delta_us)
+
+    Returns:
+        [{'indicator', 'path', 'n', 'baseline_us', 'current_us', 'ratio'}, ...]
+    """
+    reference = {_case_key(entry): entry['us_per_call'] for entry in baseline.get('results', [])}
+    regressions = []
+    for entry in current['results']:
+        base_us = reference.get(_case_key(entry))
+        if not base_us:
+            continue
+        current_us = entry['us_per_call']
+        if current_us > base_us * threshold and current_us - base_us > min_delta_us:
+            regressions.append({
+                'indicator': entry['indicator'],
+                'path': entry['path'],
+                'n': entry['n'],
+                'baseline_us': base_us,
+                'current_us': current_us,
+                'ratio': round(current_us / base_us, 2),
+            })
+    return regressions
+
+
+def format_table(report: Dict) -> str:
+    """Human-readable µs/call table with speedup of numba over the Python fallback"""
+    rows = {}
+    path_names = []
+    for entry in report['results']:
+        rows.setdefault((entry['indicator'], entry['n']), {})[entry['path']] = entry['us_per_call']
+        if entry['path'] not in path_names:
+            path_names.append(entry['path'])
+
+    header = f"{'indicator':<10}{'n':>7}" + "".join(f"{p:>17}" for p in path_names) + f"{'py/numba':>10}"
+    lines = [header, "-" * len(header)]
+    for (indicator, n), by_path in rows.items():
+        line = f"{indicator:<10}{n:>7}" + "".join(f"{by_path.get(p, float('nan')):>17.2f}" for p in path_names)
+        if by_path.get('numba') and by_path.get('python_ndarray'):
+            line += f"{by_path['python_ndarray'] / by_path['numba']:>9.0f}x"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Indicator micro-benchmarks")
+    parser.add_argument("--windows", type=int, nargs="+", default=list(DEFAULT_WINDOWS))
+    parser.add_argument("--indicators", nargs="+", help="subset, e.g. rsi atr")
+    parser.add_argument("--paths", nargs="+", help="subset, e.g. numba numpy")
+    parser.add_argument("--output", help="write JSON results here")
+    parser.add_argument("--baseline", help="compare against this JSON baseline")
+    parser.add_argument("--save-baseline", help="write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.windows, args.indicators, args.paths)
+    print(format_table(report))
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(report, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.threshold)
+        report['regressions'] = regressions
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) vs {args.baseline} (threshold {args.threshold}x):")
+            for r in regressions:
+                print(f"   {r['indicator']:<10}{r['path']:<17} n={r['n']:<6} "
+                      f"{r['baseline_us']:.2f}µs → {r['current_us']:.2f}µs ({r['ratio']}x)")
+            return 1
+        print(f"\n✅ No regressions vs {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+🗃️ Indicator Cache - Per-process LRU of indicator results
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Key: (symbol, timeframe, bar_open_ts, indicator, params)
+
+- Closed bars never change → results are reused until evicted (LRU)
+- Open bars carry a revision (the bar's current high/low/close/volume);
+  a lookup with a different revision drops the entry and recomputes
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 4096
+
+_MISSING = object()
+
+
+class IndicatorCache:
+    """Bounded LRU cache of indicator outputs with open-bar invalidation"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # key → (revision, value); revision None = closed bar
+        self._entries: "OrderedDict[Tuple, Tuple[Optional[Hashable], Any]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(symbol: str, timeframe: str, bar_open_ts: int, indicator: str, params: Tuple = ()) -> Tuple:
+        return (symbol, timeframe, int(bar_open_ts), indicator, params)
+
+    def get(self, key: Tuple, revision: Optional[Hashable] = None) -> Any:
+        """
+        Cached value, or _MISSING
+
+        An entry stored for an open bar only matches the same revision;
+        a stale one is dropped (counted in invalidations).
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+
+        if entry[0] != revision:
+            del self._entries[key]
+            self.invalidations += 1
+            self.misses += 1
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Tuple, value: Any, revision: Optional[Hashable] = None) -> None:
+        self._entries[key] = (revision, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, symbol: str, timeframe: str, bar_open_ts: int, indicator: str,
+                       params: Tuple, compute: Callable[[], Any],
+                       revision: Optional[Hashable] = None) -> Any:
+        """
+        Return the cached result or compute and store it
+
+        Args:
+            bar_open_ts: open time (ms) of the last bar the indicator covers
+            params: hashable indicator parameters, e.g. (14,)
+            compute: zero-argument function producing the value
+            revision: None for a closed bar; any hashable snapshot of the open bar otherwise
+        """
+        key = (symbol, timeframe, int(bar_open_ts), indicator, params)
+        value = self.get(key, revision)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value, revision)
+        return value
+
+    def invalidate(self, symbol: str, timeframe: Optional[str] = None) -> int:
+        """Drop every entry for a symbol (optionally one timeframe)"""
+        stale = [
+            key for key in self._entries
+            if key[0] == symbol and (timeframe is None or key[1] == timeframe)
+        ]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Global per-process cache
+_cache: Optional[IndicatorCache] = None
+
+
+def get_indicator_cache() -> IndicatorCache:
+    """Get or create the per-process indicator cache"""
+    global _cache
+    if _cache is None:
+        _cache = IndicatorCache()
+    return _cache
@@ -36,7 +36,7 @@ def rsi_jit(prices, period=14):
     🚀 JIT-compiled RSI (Relative Strength Index)
     ~100-200x faster than Python
     """
-    if len(prices) < period:
+    if len(prices) <= period:
         return 50.0
     
     gains = 0.0
@@ -65,10 +65,10 @@ def atr_jit(highs, lows, closes, period=14):
     🚀 JIT-compiled ATR (Average True Range)
     ~100x faster than Python
     """
-    if len(closes) < period:
+    if len(closes) <= period:
         return 0.0
     
-    trs = np.zeros(len(closes))
+    trs = np.zeros(len(closes) - 1)
     
     for i in range(1, len(closes)):
         tr = max(
@@ -79,7 +79,7 @@ def atr_jit(highs, lows, closes, period=14):
         trs[i - 1] = tr
     
     # Return average of last period
-    return np.mean(trs[-period:]) if len(trs) > 0 else 0.0
+    return np.mean(trs[-period:])
 
 
 @jit(cache=True, nogil=True)
@@ -123,10 +123,14 @@ def macd_jit(prices, fast=12, slow=26, signal=9):
     if len(prices) < slow:
         return 0.0, 0.0, 0.0
     
+    # Signal line (EMA of the MACD series) needs signal - 1 more bars
+    if len(prices) >= slow + signal - 1:
+        macd_s, signal_s, hist_s = macd_series_jit(prices, fast, slow, signal)
+        return macd_s[-1], signal_s[-1], hist_s[-1]
+    
     # Calculate EMA using proper exponential smoothing
     fast_multiplier = 2.0 / (fast + 1.0)
     slow_multiplier = 2.0 / (slow + 1.0)
-    signal_multiplier = 2.0 / (signal + 1.0)
     
     # Initialize with SMA
     fast_ema = np.mean(prices[:fast])
@@ -139,16 +143,9 @@ def macd_jit(prices, fast=12, slow=26, signal=9):
     for i in range(slow, len(prices)):
         slow_ema = prices[i] * slow_multiplier + slow_ema * (1.0 - slow_multiplier)
     
-    # MACD line
+    # MACD line (not enough history for the signal EMA yet)
     macd_line = fast_ema - slow_ema
-    
-    # Signal line (EMA of MACD)
-    # Simplified: use recent MACD values
-    if len(prices) < slow + signal:
-        signal_line = macd_line
-    else:
-        signal_line = macd_line  # In real impl, compute EMA of MACD series
-    
+    signal_line = macd_line
     histogram = macd_line - signal_line
     
     return macd_line, signal_line, histogram
@@ -173,6 +170,208 @@ def bollinger_width_jit(prices, period=20, std_dev=2.0):
     return upper - lower
 
 
+# ============================================================================
+# Full-series kernels (one O(n) pass → array, NaN during warm-up)
+#
+# series[i] equals the scalar kernel on prices[:i + 1] wherever the scalar
+# has enough data, so training/backtest features match live values.
+# ============================================================================
+
+@jit(cache=True, nogil=True)
+def ema_series_jit(prices, period=12):
+    """
+    🚀 EMA for every bar (SMA seed at index period - 1)
+    """
+    n = len(prices)
+    out = np.full(n, np.nan)
+    if n < period:
+        return out
+    
+    multiplier = 2.0 / (period + 1.0)
+    ema = np.mean(prices[:period])
+    out[period - 1] = ema
+    
+    for i in range(period, n):
+        ema = prices[i] * multiplier + ema * (1.0 - multiplier)
+        out[i] = ema
+    
+    return out
+
+
+@jit(cache=True, nogil=True)
+def rsi_series_jit(prices, period=14):
+    """
+    🚀 RSI for every bar (rolling gain/loss sums over the last period diffs)
+    
+    Defined from index period (period diffs available).
+    """
+    n = len(prices)
+    out = np.full(n, np.nan)
+    if n <= period:
+        return out
+    
+    gains = 0.0
+    losses = 0.0
+    # Count of non-zero terms keeps the "no losses" check exact despite rolling float error
+    n_gains = 0
+    n_losses = 0
+    
+    for i in range(1, n):
+        diff = prices[i] - prices[i - 1]
+        if diff > 0:
+            gains += diff
+            n_gains += 1
+        elif diff < 0:
+            losses -= diff
+            n_losses += 1
+        
+        if i > period:
+            old = prices[i - period] - prices[i - period - 1]
+            if old > 0:
+                gains -= old
+                n_gains -= 1
+            elif old < 0:
+                losses += old
+                n_losses -= 1
+        
+        if i >= period:
+            if n_gains == 0:
+                gains = 0.0
+            if n_losses == 0:
+                losses = 0.0
+            avg_gain = gains / period
+            avg_loss = losses / period
+            if avg_loss == 0:
+                out[i] = 100.0 if avg_gain > 0 else 50.0
+            else:
+                out[i] = 100.0 - (100.0 / (1.0 + avg_gain / avg_loss))
+    
+    return out
+
+
+@jit(cache=True, nogil=True)
+def macd_series_jit(prices, fast=12, slow=26, signal=9):
+    """
+    🚀 MACD line / signal line / histogram for every bar
+    
+    Signal is a real EMA of the MACD line, seeded with the SMA of its first
+    `signal` values (defined from index slow + signal - 2).
+    
+    Returns: (macd_line, signal_line, histogram) arrays
+    """
+    n = len(prices)
+    macd_line = ema_series_jit(prices, fast) - ema_series_jit(prices, slow)
+    signal_line = np.full(n, np.nan)
+    
+    start = slow - 1  # first defined MACD value
+    seed = start + signal - 1
+    if n > seed:
+        multiplier = 2.0 / (signal + 1.0)
+        ema = np.mean(macd_line[start:seed + 1])
+        signal_line[seed] = ema
+        for i in range(seed + 1, n):
+            ema = macd_line[i] * multiplier + ema * (1.0 - multiplier)
+            signal_line[i] = ema
+    
+    return macd_line, signal_line, macd_line - signal_line
+
+
+@jit(cache=True, nogil=True)
+def atr_series_jit(highs, lows, closes, period=14):
+    """
+    🚀 ATR for every bar (rolling mean of the last period true ranges)
+    
+    Defined from index period.
+    """
+    n = len(closes)
+    out = np.full(n, np.nan)
+    if n <= period:
+        return out
+    
+    trs = np.zeros(n)
+    total = 0.0
+    for i in range(1, n):
+        trs[i] = max(
+            highs[i] - lows[i],
+            abs(highs[i] - closes[i - 1]),
+            abs(lows[i] - closes[i - 1])
+        )
+        total += trs[i]
+        if i > period:
+            total -= trs[i - period]
+        if i >= period:
+            out[i] = total / period
+    
+    return out
+
+
+@jit(cache=True, nogil=True)
+def bollinger_width_series_jit(prices, period=20, std_dev=2.0):
+    """
+    🚀 Bollinger Bands width for every bar
+    
+    Each window uses a two-pass mean/std (O(n * period)) rather than running
+    sums, which lose precision at BTC price levels.
+    """
+    n = len(prices)
+    out = np.full(n, np.nan)
+    
+    for i in range(period - 1, n):
+        recent = prices[i - period + 1:i + 1]
+        mean = np.mean(recent)
+        std = np.std(recent)
+        out[i] = (mean + std * std_dev) - (mean - std * std_dev)
+    
+    return out
+
+
+# 2-D variants: one row per symbol, bars along axis 1
+
+@jit(cache=True, nogil=True)
+def ema_series_2d_jit(prices, period=12):
+    out = np.empty(prices.shape)
+    for s in range(prices.shape[0]):
+        out[s] = ema_series_jit(prices[s], period)
+    return out
+
+
+@jit(cache=True, nogil=True)
+def rsi_series_2d_jit(prices, period=14):
+    out = np.empty(prices.shape)
+    for s in range(prices.shape[0]):
+        out[s] = rsi_series_jit(prices[s], period)
+    return out
+
+
+@jit(cache=True, nogil=True)
+def macd_series_2d_jit(prices, fast=12, slow=26, signal=9):
+    macd_line = np.empty(prices.shape)
+    signal_line = np.empty(prices.shape)
+    histogram = np.empty(prices.shape)
+    for s in range(prices.shape[0]):
+        m, sig, h = macd_series_jit(prices[s], fast, slow, signal)
+        macd_line[s] = m
+        signal_line[s] = sig
+        histogram[s] = h
+    return macd_line, signal_line, histogram
+
+
+@jit(cache=True, nogil=True)
+def atr_series_2d_jit(highs, lows, closes, period=14):
+    out = np.empty(closes.shape)
+    for s in range(closes.shape[0]):
+        out[s] = atr_series_jit(highs[s], lows[s], closes[s], period)
+    return out
+
+
+@jit(cache=True, nogil=True)
+def bollinger_width_series_2d_jit(prices, period=20, std_dev=2.0):
+    out = np.empty(prices.shape)
+    for s in range(prices.shape[0]):
+        out[s] = bollinger_width_series_jit(prices[s], period, std_dev)
+    return out
+
+
 # ============================================================================
 # Standard Python Fallback (when Numba not available)
 # ============================================================================
@@ -196,7 +395,7 @@ class Indicators:
             logger.debug(f"Numba RSI failed, using Python fallback: {e}")
         
         # Python fallback
-        if len(prices) < period:
+        if len(prices) <= period:
             return 50.0
         
         gains = sum(max(0, prices[i] - prices[i-1]) for i in range(-period, 0))
@@ -222,7 +421,7 @@ class Indicators:
             logger.debug(f"Numba ATR failed, using Python fallback: {e}")
         
         # Python fallback
-        if len(closes) < period:
+        if len(closes) <= period:
             return 0.0
         
         trs = []
@@ -307,7 +506,6 @@ class Indicators:
         # Calculate EMA
         fast_multiplier = 2.0 / (fast + 1.0)
         slow_multiplier = 2.0 / (slow + 1.0)
-        signal_multiplier = 2.0 / (signal_period + 1.0)
         
         # Initialize with SMA
         fast_ema = sum(prices[:fast]) / fast
@@ -323,8 +521,11 @@ class Indicators:
         # MACD line
         macd_line = fast_ema - slow_ema
         
-        # Signal line (simplified)
+        # Signal line: EMA of the MACD series
         signal_line = macd_line
+        if len(prices) >= slow + signal_period - 1:
+            macd_s, signal_s, _ = macd_series_jit(np.asarray(prices, dtype=np.float64), fast, slow, signal_period)
+            macd_line, signal_line = float(macd_s[-1]), float(signal_s[-1])
         
         histogram = macd_line - signal_line
         
@@ -359,6 +560,52 @@ class Indicators:
         
         return upper - lower
     
+    # ------------------------------------------------------------------
+    # Full series (1-D: bars; 2-D: symbols × bars). Without Numba the same
+    # kernels run as plain Python loops.
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _as_series(values):
+        return np.ascontiguousarray(values, dtype=np.float64)
+    
+    @staticmethod
+    def ema_series(prices, period=12):
+        """EMA for every bar (NaN during warm-up)"""
+        prices = Indicators._as_series(prices)
+        kernel = ema_series_2d_jit if prices.ndim == 2 else ema_series_jit
+        return kernel(prices, int(period))
+    
+    @staticmethod
+    def rsi_series(prices, period=14):
+        """RSI for every bar (NaN during warm-up)"""
+        prices = Indicators._as_series(prices)
+        kernel = rsi_series_2d_jit if prices.ndim == 2 else rsi_series_jit
+        return kernel(prices, int(period))
+    
+    @staticmethod
+    def macd_series(prices, fast=12, slow=26, signal_period=9):
+        """(macd_line, signal_line, histogram) arrays with a real signal EMA"""
+        prices = Indicators._as_series(prices)
+        kernel = macd_series_2d_jit if prices.ndim == 2 else macd_series_jit
+        return kernel(prices, int(fast), int(slow), int(signal_period))
+    
+    @staticmethod
+    def atr_series(highs, lows, closes, period=14):
+        """ATR for every bar (NaN during warm-up)"""
+        highs = Indicators._as_series(highs)
+        lows = Indicators._as_series(lows)
+        closes = Indicators._as_series(closes)
+        kernel = atr_series_2d_jit if closes.ndim == 2 else atr_series_jit
+        return kernel(highs, lows, closes, int(period))
+    
+    @staticmethod
+    def bollinger_width_series(prices, period=20, std_dev=2.0):
+        """Bollinger Bands width for every bar (NaN during warm-up)"""
+        prices = Indicators._as_series(prices)
+        kernel = bollinger_width_series_2d_jit if prices.ndim == 2 else bollinger_width_series_jit
+        return kernel(prices, int(period), float(std_dev))
+    
     @staticmethod
     def detect_fvg(closes, highs, lows):
         """
@@ -425,3 +672,78 @@ class Indicators:
             return min(max(liquidity, 0.0), 1.0)
         except (ValueError, ZeroDivisionError, TypeError):
             return 0.5
+    
+    # ------------------------------------------------------------------
+    # Closed-bar state + live-bar tail. Only the last bar of a window can
+    # still be forming: the state of the bars before it is built once per
+    # closed bar (cacheable under the closed bar's key), and each tick of
+    # the open bar costs one EMA step plus the short windowed kernels.
+    # Values equal the full-window calls on closed bars + [live bar].
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def closed_bar_state(closes, highs, lows, rsi_period=14, atr_period=14, bb_period=20,
+                         fast=12, slow=26, signal_period=9):
+        """
+        State of the closed bars of a window (the window without its last bar)
+        
+        Keeps the lookback the windowed indicators need (RSI / ATR / BB / FVG)
+        and the MACD EMAs at the last closed bar; during MACD warm-up the whole
+        prefix is kept and the tail recomputes MACD in full.
+        """
+        closes = Indicators._as_series(closes)
+        highs = Indicators._as_series(highs)
+        lows = Indicators._as_series(lows)
+        keep = max(rsi_period + 1, atr_period + 1, bb_period, 3) - 1
+        state = {
+            'closes': closes[-keep:].copy(),
+            'highs': highs[-keep:].copy(),
+            'lows': lows[-keep:].copy(),
+            'periods': (rsi_period, atr_period, bb_period, fast, slow, signal_period),
+            'macd': None,
+            'prefix': None,
+        }
+        if len(closes) >= slow + signal_period - 1:
+            _, signal_s, _ = macd_series_jit(closes, fast, slow, signal_period)
+            state['macd'] = (
+                float(ema_series_jit(closes, fast)[-1]),
+                float(ema_series_jit(closes, slow)[-1]),
+                float(signal_s[-1]),
+            )
+        else:
+            state['prefix'] = closes.copy()
+        return state
+    
+    @staticmethod
+    def live_bar(state, close, high, low, bb_std=2.0):
+        """
+        RSI / MACD / ATR / BB width / FVG for closed bars (state) + one live bar
+        
+        Returns: {'rsi', 'macd': (macd_line, signal_line, histogram), 'atr', 'bb_width', 'fvg'}
+        """
+        rsi_period, atr_period, bb_period, fast, slow, signal_period = state['periods']
+        closes = np.append(state['closes'], close)
+        highs = np.append(state['highs'], high)
+        lows = np.append(state['lows'], low)
+        
+        if state['macd'] is not None:
+            fast_ema, slow_ema, signal_ema = state['macd']
+            fast_multiplier = 2.0 / (fast + 1.0)
+            slow_multiplier = 2.0 / (slow + 1.0)
+            signal_multiplier = 2.0 / (signal_period + 1.0)
+            fast_ema = close * fast_multiplier + fast_ema * (1.0 - fast_multiplier)
+            slow_ema = close * slow_multiplier + slow_ema * (1.0 - slow_multiplier)
+            macd_line = fast_ema - slow_ema
+            signal_line = macd_line * signal_multiplier + signal_ema * (1.0 - signal_multiplier)
+            macd = (float(macd_line), float(signal_line), float(macd_line - signal_line))
+        else:
+            macd = Indicators.macd(np.append(state['prefix'], close), fast, slow, signal_period)
+        
+        return {
+            'rsi': Indicators.rsi(closes[-(rsi_period + 1):], period=rsi_period),
+            'macd': macd,
+            'atr': Indicators.atr(highs[-(atr_period + 1):], lows[-(atr_period + 1):],
+                                  closes[-(atr_period + 1):], period=atr_period),
+            'bb_width': Indicators.bollinger_bands(closes[-bb_period:], period=bb_period, std_dev=bb_std),
+            'fvg': Indicators.detect_fvg(closes, highs, lows),
+        }
@@ -0,0 +1,201 @@
+"""
+🔥 JIT Warmup - Compile / load every Numba kernel before the first candle
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+The @jit(cache=True) kernels compile lazily on first call. Without a warmup,
+the first candle after a deploy pays the JIT cost inside process_candle, and
+every restart pays it again if the on-disk cache is not writable.
+
+run_warmup():
+1. Validates the Numba cache directory (falls back to a writable temp dir)
+2. Calls every kernel with the exact argument types used in production
+   (float64 C-contiguous arrays, int periods, float std_dev)
+3. Reports per-kernel time and whether it was compiled or loaded from cache
+
+main.initialize_system runs it once to populate the disk cache; the brain
+runs it again at startup so its own process loads the kernels up front.
+"""
+
+import logging
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_CACHE_DIR = os.path.join(tempfile.gettempdir(), "numba_cache")
+
+# Numba's default: __pycache__ next to the kernel modules
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.path.join(_SRC_DIR, "__pycache__")
+
+WARMUP_BARS = 64
+
+
+def _is_writable(path: str) -> bool:
+    try:
+        os.makedirs(path, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path, prefix=".numba_probe_"):
+            pass
+        return True
+    except OSError:
+        return False
+
+
+def validate_cache_dir() -> Dict:
+    """
+    Make sure Numba can persist compiled kernels
+
+    Must run before the kernel modules are imported: the cache location is
+    chosen when a @jit function is decorated. If NUMBA_CACHE_DIR (or the
+    in-tree __pycache__) is not writable, NUMBA_CACHE_DIR is pointed at a
+    temp dir; spawned child processes inherit it.
+
+    Returns:
+        {'path': str, 'writable': bool, 'fallback': bool}
+    """
+    configured = os.environ.get("NUMBA_CACHE_DIR")
+    path = configured or DEFAULT_CACHE_DIR
+
+    if _is_writable(path):
+        return {'path': path, 'writable': True, 'fallback': False}
+
+    logger.warning(f"⚠️ Numba cache dir not writable: {path} → using {FALLBACK_CACHE_DIR}")
+    os.environ["NUMBA_CACHE_DIR"] = FALLBACK_CACHE_DIR
+    try:
+        import numba
+        numba.config.CACHE_DIR = FALLBACK_CACHE_DIR
+    except ImportError:
+        pass
+    return {'path': FALLBACK_CACHE_DIR, 'writable': _is_writable(FALLBACK_CACHE_DIR), 'fallback': True}
+
+
+def _warmup_calls() -> List[Tuple[str, Callable, tuple]]:
+    """(name, kernel, args) with the argument types used in production"""
+    from src import indicators as ind
+    from src import tree_ensemble as te
+    from src import smc
+
+    rng = np.random.default_rng(0)
+    closes = np.ascontiguousarray(100.0 + rng.normal(size=WARMUP_BARS).cumsum())
+    highs = closes + 0.5
+    lows = closes - 0.5
+    closes_2d = np.ascontiguousarray(np.stack([closes, closes]))
+    highs_2d = closes_2d + 0.5
+    lows_2d = closes_2d - 0.5
+
+    # Smallest valid ensemble: one stump (root split → two leaves)
+    n_features = 8
+    X = np.ascontiguousarray(rng.normal(size=(2, n_features)))
+    mean = np.zeros(n_features)
+    scale = np.ones(n_features)
+    feature = np.array([0, 0, 0], dtype=np.int64)
+    threshold = np.array([0.0, -2.0, -2.0])
+    left = np.array([1, te.TREE_LEAF, te.TREE_LEAF], dtype=np.int64)
+    right = np.array([2, te.TREE_LEAF, te.TREE_LEAF], dtype=np.int64)
+    roots = np.array([0], dtype=np.int64)
+    leaf_proba = np.array([[0.5, 0.5], [1.0, 0.0], [0.0, 1.0]])
+    leaf_value = np.array([0.0, -1.0, 1.0])
+
+    opens = np.ascontiguousarray(np.concatenate([[closes[0]], closes[:-1]]))
+    smc_out = smc._new_outputs(WARMUP_BARS)
+    smc_args = (opens, highs, lows, closes, smc.DEFAULT_LOOKBACK, smc.DEFAULT_OB_SEARCH, 0.0, 0, 0,
+                smc.new_state(), smc.new_zones()) + tuple(smc_out.values())
+
+    return [
+        ('rsi_jit', ind.rsi_jit, (closes, 14)),
+        ('atr_jit', ind.atr_jit, (highs, lows, closes, 14)),
+        ('sma_jit', ind.sma_jit, (closes, 20)),
+        ('ema_jit', ind.ema_jit, (closes, 12)),
+        ('macd_jit', ind.macd_jit, (closes, 12, 26, 9)),
+        ('bollinger_width_jit', ind.bollinger_width_jit, (closes, 20, 2.0)),
+        ('ema_series_jit', ind.ema_series_jit, (closes, 12)),
+        ('rsi_series_jit', ind.rsi_series_jit, (closes, 14)),
+        ('macd_series_jit', ind.macd_series_jit, (closes, 12, 26, 9)),
+        ('atr_series_jit', ind.atr_series_jit, (highs, lows, closes, 14)),
+        ('bollinger_width_series_jit', ind.bollinger_width_series_jit, (closes, 20, 2.0)),
+        ('ema_series_2d_jit', ind.ema_series_2d_jit, (closes_2d, 12)),
+        ('rsi_series_2d_jit', ind.rsi_series_2d_jit, (closes_2d, 14)),
+        ('macd_series_2d_jit', ind.macd_series_2d_jit, (closes_2d, 12, 26, 9)),
+        ('atr_series_2d_jit', ind.atr_series_2d_jit, (highs_2d, lows_2d, closes_2d, 14)),
+        ('bollinger_width_series_2d_jit', ind.bollinger_width_series_2d_jit, (closes_2d, 20, 2.0)),
+        ('forest_predict_proba_jit', te.forest_predict_proba_jit,
+         (X, mean, scale, feature, threshold, left, right, leaf_proba, roots)),
+        ('boosting_predict_proba_jit', te.boosting_predict_proba_jit,
+         (X, mean, scale, feature, threshold, left, right, leaf_value, roots, 0.0, 0.1)),
+        ('smc_scan_jit', smc.smc_scan_jit, smc_args),
+    ]
+
+
+def _cache_counters(kernel) -> Tuple[int, int]:
+    stats = getattr(kernel, 'stats', None)
+    if stats is None:
+        return 0, 0
+    return sum(stats.cache_hits.values()), sum(stats.cache_misses.values())
+
+
+def warmup_kernels() -> Dict[str, Dict]:
+    """
+    Call every kernel once
+
+    Returns:
+        {name: {'ms': float, 'source': 'compiled' | 'cache' | 'ready' | 'python' | 'error'}}
+    """
+    from src.indicators import HAS_NUMBA
+
+    report = {}
+    for name, kernel, args in _warmup_calls():
+        hits_before, misses_before = _cache_counters(kernel)
+        start = time.perf_counter()
+        try:
+            kernel(*args)
+        except Exception as e:
+            logger.error(f"❌ JIT warmup failed for {name}: {e}")
+            report[name] = {'ms': (time.perf_counter() - start) * 1000, 'source': 'error'}
+            continue
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        hits, misses = _cache_counters(kernel)
+        if not HAS_NUMBA:
+            source = 'python'
+        elif misses > misses_before:
+            source = 'compiled'
+        elif hits > hits_before:
+            source = 'cache'
+        else:
+            source = 'ready'  # already compiled in this process (e.g. as another kernel's callee)
+        report[name] = {'ms': elapsed_ms, 'source': source}
+
+    return report
+
+
+def run_warmup() -> Dict:
+    """
+    Validate the cache dir, warm every kernel and log a summary
+
+    Returns:
+        {'cache_dir': {...}, 'kernels': {...}, 'total_ms': float}
+    """
+    cache_dir = validate_cache_dir()
+    start = time.perf_counter()
+    kernels = warmup_kernels()
+    total_ms = (time.perf_counter() - start) * 1000
+
+    by_source: Dict[str, int] = {}
+    for entry in kernels.values():
+        by_source[entry['source']] = by_source.get(entry['source'], 0) + 1
+    slowest = sorted(kernels.items(), key=lambda item: item[1]['ms'], reverse=True)[:3]
+
+    logger.critical(
+        f"🔥 JIT warmup: {len(kernels)} kernels in {total_ms:.0f}ms | "
+        + " | ".join(f"{source}={count}" for source, count in sorted(by_source.items()))
+        + f" | cache: {cache_dir['path']}" + (" (fallback)" if cache_dir['fallback'] else "")
+    )
+    logger.info("   Slowest: " + ", ".join(f"{name} {entry['ms']:.0f}ms" for name, entry in slowest))
+    if by_source.get('compiled') and not cache_dir['writable']:
+        logger.warning("⚠️ Numba cache not writable: kernels will recompile on every restart")
+
+    return {'cache_dir': cache_dir, 'kernels': kernels, 'total_ms': total_ms}
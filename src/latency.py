@@ -0,0 +1,179 @@
+"""
+⏱️ Latency Tracing - Tick-to-trade spans across feed, brain and trade
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+A trace is a plain list of [stage, monotonic_ns] pairs that travels with
+the candle (ring buffer slot), then with the signal and order dicts (so it
+survives the bus transport codecs unchanged):
+
+    feed_recv → ring_commit → brain_dequeue → buffer → indicators → signal
+    → sizing → publish → trade_recv → order_send → order_ack
+
+Every mark() records two spans into this process's histograms: the step
+from the previous stage and the total since the first stage. Timestamps
+are time.monotonic_ns() (CLOCK_MONOTONIC, shared by all processes on the
+host), so spans crossing processes are valid and never jump with NTP.
+
+finish() keeps a sample of complete traces (1 in sample_every, plus every
+trace that reached an order ack) in a ring log for inspection.
+
+Histograms are log-linear: QUARTERS buckets per power of two of
+microseconds (~19% wide), so record() is one log2 and an increment.
+"""
+
+import logging
+import math
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STAGE_FEED_RECV = 'feed_recv'          # WebSocket message received (feed)
+STAGE_RING_COMMIT = 'ring_commit'      # candle written to the ring buffer (feed)
+STAGE_BRAIN_DEQUEUE = 'brain_dequeue'  # read from the ring buffer (brain)
+STAGE_BUFFER = 'buffer'                # added to the timeframe buffer
+STAGE_INDICATORS = 'indicators'        # RSI / MACD / ATR / BB / FVG / SMC
+STAGE_SIGNAL = 'signal'                # signal built (+ ML adjustment)
+STAGE_SIZING = 'sizing'                # return prediction + position sizing
+STAGE_PUBLISH = 'publish'              # SIGNAL_GENERATED published
+STAGE_TRADE_RECV = 'trade_recv'        # risk check picked the signal up
+STAGE_ORDER_SEND = 'order_send'        # order request leaves for Binance
+STAGE_ORDER_ACK = 'order_ack'          # Binance response received
+
+QUARTERS = 4                           # buckets per power of two
+NUM_BUCKETS = 30 * QUARTERS            # 1 µs .. ~18 min
+
+
+def now_ns() -> int:
+    return time.monotonic_ns()
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram (microsecond buckets)"""
+
+    __slots__ = ('counts', 'count', 'total_ns', 'max_ns')
+
+    def __init__(self):
+        self.counts = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns: int) -> None:
+        us = ns / 1000.0
+        index = int(math.log2(us) * QUARTERS) + 1 if us >= 1.0 else 0
+        self.counts[min(index, NUM_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, q: float) -> float:
+        """Upper bound (µs) of the bucket holding the q-th percentile (0 < q <= 100)"""
+        if not self.count:
+            return 0.0
+        target = math.ceil(self.count * q / 100.0)
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(2.0 ** (index / QUARTERS), self.max_ns / 1000.0)
+        return self.max_ns / 1000.0
+
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.count,
+            'avg_us': self.total_ns / self.count / 1000.0 if self.count else 0.0,
+            'p50_us': self.percentile(50),
+            'p90_us': self.percentile(90),
+            'p99_us': self.percentile(99),
+            'max_us': self.max_ns / 1000.0,
+        }
+
+
+class Tracer:
+    """Per-process span histograms + sampled ring log of full traces"""
+
+    def __init__(self, sample_every: int = 100, log_size: int = 1000):
+        self.sample_every = sample_every
+        self._spans: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._log: deque = deque(maxlen=log_size)
+        self.finished = 0
+
+    def _histogram(self, start: str, end: str) -> LatencyHistogram:
+        key = (start, end)
+        histogram = self._spans.get(key)
+        if histogram is None:
+            histogram = self._spans[key] = LatencyHistogram()
+        return histogram
+
+    def start(self, recv_ns: Optional[int] = None, commit_ns: Optional[int] = None) -> List[list]:
+        """New trace, seeded with the feed's receive / ring-commit stamps when known"""
+        trace: List[list] = []
+        if recv_ns:
+            self.mark(trace, STAGE_FEED_RECV, recv_ns)
+        if commit_ns:
+            self.mark(trace, STAGE_RING_COMMIT, commit_ns)
+        return trace
+
+    def mark(self, trace: Optional[List[list]], stage: str, ns: Optional[int] = None) -> None:
+        """Stamp `stage` (no-op for a missing trace) and record its step / total spans"""
+        if trace is None:
+            return
+        if ns is None:
+            ns = time.monotonic_ns()
+        if trace:
+            prev_stage, prev_ns = trace[-1]
+            self._histogram(prev_stage, stage).record(max(ns - prev_ns, 0))
+            if len(trace) > 1:
+                first_stage, first_ns = trace[0]
+                self._histogram(first_stage, stage).record(max(ns - first_ns, 0))
+        trace.append([stage, ns])
+
+    def finish(self, trace: Optional[List[list]]) -> bool:
+        """Offer a completed trace to the ring log; True if it was sampled"""
+        if not trace:
+            return False
+        self.finished += 1
+        if trace[-1][0] != STAGE_ORDER_ACK and self.finished % self.sample_every:
+            return False
+        origin = trace[0][1]
+        self._log.append([(stage, (ns - origin) / 1000.0) for stage, ns in trace])
+        return True
+
+    def recent(self, n: Optional[int] = None) -> List[List[Tuple[str, float]]]:
+        """Sampled traces, newest last, as [(stage, µs since first stage), ...]"""
+        traces = list(self._log)
+        return traces[-n:] if n else traces
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """{'start→end': {count, avg_us, p50_us, p90_us, p99_us, max_us}}"""
+        return {f"{start}→{end}": h.snapshot() for (start, end), h in self._spans.items()}
+
+    def log_summary(self, stages: Tuple[str, ...] = (STAGE_PUBLISH, STAGE_ORDER_ACK)) -> None:
+        """Log end-to-end percentiles for the spans ending at `stages`"""
+        for (start, end), h in self._spans.items():
+            if end in stages and start == STAGE_FEED_RECV and h.count:
+                s = h.snapshot()
+                logger.info(
+                    f"⏱️ {start}→{end}: n={s['count']} | p50 {s['p50_us']:.0f}µs | "
+                    f"p90 {s['p90_us']:.0f}µs | p99 {s['p99_us']:.0f}µs | max {s['max_us']:.0f}µs"
+                )
+
+    def reset(self) -> None:
+        self._spans.clear()
+        self._log.clear()
+        self.finished = 0
+
+
+# Global tracer instance (one per process)
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Get or create this process's tracer"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
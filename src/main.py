@@ -169,6 +169,13 @@ def initialize_system():
         logger.critical(f"❌ Error initializing database: {e}", exc_info=True)
         sys.exit(1)
     
+    # Compile / load Numba kernels so the first candle does not pay JIT latency
+    try:
+        from src.jit_warmup import run_warmup
+        run_warmup()
+    except Exception as e:
+        logger.warning(f"⚠️ JIT warmup failed (kernels will compile lazily): {e}")
+    
     # Create ring buffer
     logger.critical("🔄 Creating shared memory ring buffer...")
     try:
@@ -347,6 +354,14 @@ def main():
                     logger.critical("🧹 Shared memory unlinked")
                 except (AttributeError, Exception):
                     pass
+            from src.bar_store import get_bar_store
+            bar_store = get_bar_store()
+            if bar_store is not None:
+                bar_store.close()
+                bar_store.unlink()
+            from src.bus import Topic
+            from src.bus_transport import unlink_shm_rings
+            unlink_shm_rings([topic.value for topic in Topic])
         except Exception as e:
             logger.warning(f"⚠️ Error cleaning up shared memory: {e}")
         
@@ -0,0 +1,172 @@
+"""
+📈 Mark-to-Market - Incremental unrealized PnL, exposure and equity
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Open positions live in a compact array-backed table (one slot per symbol,
+parallel float64 arrays for signed quantity, entry, mark and PnL) and the
+portfolio aggregates are kept as running sums:
+
+- on_price(symbol, price): O(1) - updates that slot's mark / PnL and adjusts
+  unrealized PnL, gross and net exposure by the difference
+- sync(balance, positions): after any position change (fill, close,
+  reconciliation) - reslots the table and recomputes the sums exactly,
+  which also clears accumulated float drift
+- equity / unrealized_pnl / gross_exposure: plain attribute reads
+
+Prices for symbols without a position are kept too, so a position opened
+later is marked at the latest price straight away. Until a symbol has a
+price its position is marked at entry (PnL 0), never at a made-up price.
+
+Symbols are keyed in exchange form (normalize_symbol): the brain and the bar
+store use 'BTC/USDT', account sync and the user stream use 'BTCUSDT', and
+both must land on the same slot.
+"""
+
+import logging
+from array import array
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = 16
+
+
+def normalize_symbol(symbol: str) -> str:
+    """'BTC/USDT', 'BTC/USDT:USDT', 'btcusdt' -> 'BTCUSDT'"""
+    return symbol.split(':', 1)[0].replace('/', '').upper()
+
+
+def signed_quantity(position: Dict) -> float:
+    """Position dict ({quantity, side}) -> signed quantity (short < 0)"""
+    quantity = abs(position.get('quantity', 0))
+    return -quantity if position.get('side', 'BUY') == 'SELL' else quantity
+
+
+class MarkToMarketEngine:
+    """Array-backed position table with running portfolio PnL / exposure"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, balance: float = 0.0):
+        self.capacity = capacity
+        self.qty = array('d', bytes(8 * capacity))     # signed quantity
+        self.entry = array('d', bytes(8 * capacity))
+        self.mark = array('d', bytes(8 * capacity))
+        self.pnl = array('d', bytes(8 * capacity))
+
+        self._slots: Dict[str, int] = {}
+        self._free = list(range(capacity - 1, -1, -1))
+        self._prices: Dict[str, float] = {}
+
+        self.balance = balance
+        self.unrealized_pnl = 0.0
+        self.gross_exposure = 0.0   # sum |qty| * mark
+        self.net_exposure = 0.0     # sum qty * mark (short < 0)
+        self.updates = 0
+
+    # ------------------------------------------------------------------
+    # Reads (O(1))
+    # ------------------------------------------------------------------
+
+    @property
+    def equity(self) -> float:
+        return self.balance + self.unrealized_pnl
+
+    def __contains__(self, symbol: str) -> bool:
+        return normalize_symbol(symbol) in self._slots
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def price(self, symbol: str) -> Optional[float]:
+        """Latest price seen for `symbol` (with or without a position)"""
+        return self._prices.get(normalize_symbol(symbol))
+
+    def position_pnl(self, symbol: str) -> Optional[float]:
+        slot = self._slots.get(normalize_symbol(symbol))
+        return self.pnl[slot] if slot is not None else None
+
+    def position_mark(self, symbol: str) -> Optional[float]:
+        slot = self._slots.get(normalize_symbol(symbol))
+        return self.mark[slot] if slot is not None else None
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def on_price(self, symbol: str, price: float) -> None:
+        """Apply one price tick"""
+        symbol = normalize_symbol(symbol)
+        self._prices[symbol] = price
+        slot = self._slots.get(symbol)
+        if slot is None:
+            return
+        qty = self.qty[slot]
+        move = price - self.mark[slot]
+        pnl = qty * (price - self.entry[slot])
+        self.unrealized_pnl += pnl - self.pnl[slot]
+        self.net_exposure += qty * move
+        self.gross_exposure += abs(qty) * move
+        self.pnl[slot] = pnl
+        self.mark[slot] = price
+        self.updates += 1
+
+    def refresh(self, price_of: Callable[[str], Optional[float]]) -> None:
+        """
+        Pull prices for the open positions from a price source (e.g. SharedBarStore.last_price)
+
+        price_of is called with the exchange-form symbol ('BTCUSDT').
+        """
+        for symbol in list(self._slots):
+            price = price_of(symbol)
+            if price:
+                self.on_price(symbol, price)
+
+    def _grow(self) -> None:
+        extra = self.capacity
+        for column in (self.qty, self.entry, self.mark, self.pnl):
+            column.frombytes(bytes(8 * extra))
+        self._free.extend(range(2 * self.capacity - 1, self.capacity - 1, -1))
+        self.capacity *= 2
+
+    def sync(self, balance: float, positions: Dict[str, Dict]) -> None:
+        """
+        Mirror the account's positions into the table and recompute the sums
+
+        Args:
+            balance: Wallet balance (equity = balance + unrealized PnL)
+            positions: {symbol: {quantity, entry_price, side}}
+        """
+        self.balance = balance
+        positions = {normalize_symbol(symbol): position for symbol, position in positions.items()}
+        for symbol in [s for s in self._slots if s not in positions]:
+            self._free.append(self._slots.pop(symbol))
+
+        for symbol, position in positions.items():
+            slot = self._slots.get(symbol)
+            if slot is None:
+                if not self._free:
+                    self._grow()
+                slot = self._free.pop()
+                self._slots[symbol] = slot
+            entry = float(position.get('entry_price', 0) or 0)
+            mark = self._prices.get(symbol) or entry
+            qty = signed_quantity(position)
+            self.qty[slot] = qty
+            self.entry[slot] = entry
+            self.mark[slot] = mark
+            self.pnl[slot] = qty * (mark - entry)
+
+        slots = self._slots.values()
+        self.unrealized_pnl = sum(self.pnl[i] for i in slots)
+        self.net_exposure = sum(self.qty[i] * self.mark[i] for i in slots)
+        self.gross_exposure = sum(abs(self.qty[i]) * self.mark[i] for i in slots)
+
+    def get_stats(self) -> Dict:
+        return {
+            'balance': self.balance,
+            'equity': self.equity,
+            'unrealized_pnl': self.unrealized_pnl,
+            'gross_exposure': self.gross_exposure,
+            'net_exposure': self.net_exposure,
+            'positions': {s: {'mark': self.mark[i], 'pnl': self.pnl[i]} for s, i in self._slots.items()},
+            'updates': self.updates,
+        }
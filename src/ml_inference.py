@@ -0,0 +1,167 @@
+"""
+⚡ ML Inference Service - Micro-batched, off-loop signal scoring
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Collects the feature rows queued together (or until max_batch), runs ONE
+batched predict in a dedicated executor thread and resolves a future per
+signal. The event loop never blocks on sklearn, so ring buffer consumption
+keeps going while the model scores.
+
+A batch flushes as soon as a loop turn adds no new row: a lone signal is
+scored right away instead of waiting out max_wait_ms, which only bounds how
+long a burst keeps growing its batch. A compiled ensemble (microseconds per
+row) is scored inline by MLModel and never comes through here.
+
+Callers keep a synchronous fallback: if the service is not running,
+MLModel scores inline exactly as before.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BatchInferenceService:
+    """
+    Micro-batching wrapper around a vectorized predict function
+
+    predict_batch receives an (n, n_features) float64 matrix and must
+    return n win probabilities.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[np.ndarray], np.ndarray],
+        max_batch: int = 32,
+        max_wait_ms: float = 2.0
+    ):
+        """
+        Args:
+            predict_batch: Vectorized scorer (runs in the executor thread)
+            max_batch: Max rows per predict call
+            max_wait_ms: Max time a burst keeps growing one batch
+        """
+        self.predict_batch = predict_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Stats
+        self.batches = 0
+        self.rows = 0
+        self.errors = 0
+        self.total_predict_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        """True while the batching worker is alive"""
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self) -> None:
+        """Start the batching worker on the current event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ml-inference")
+        self._worker = asyncio.create_task(self._run())
+        logger.info(f"⚡ ML inference service started (max_batch={self.max_batch}, window={self.max_wait * 1000:.1f}ms)")
+
+    async def stop(self) -> None:
+        """Stop the worker and fail any pending requests"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("ML inference service stopped"))
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def predict(self, features: List[float]) -> float:
+        """
+        Queue one feature row and wait for its batched prediction
+
+        Raises:
+            RuntimeError: If the service is not running
+        """
+        if not self.running:
+            raise RuntimeError("ML inference service not running")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[List[float], asyncio.Future]]:
+        """Block for the first row, then gather more while callers keep queueing"""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            # Take everything already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            # Give callers already scheduled on the loop one turn; flush if none queued
+            await asyncio.sleep(0)
+            if self._queue.empty() or time.monotonic() >= deadline:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        """Batching worker loop"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect_batch()
+            X = np.array([features for features, _ in batch], dtype=np.float64)
+
+            start = time.perf_counter()
+            try:
+                probabilities = await loop.run_in_executor(self._executor, self.predict_batch, X)
+            except Exception as e:
+                self.errors += 1
+                logger.debug(f"Batched prediction error: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.total_predict_ms += (time.perf_counter() - start) * 1000
+            self.batches += 1
+            self.rows += len(batch)
+
+            for (_, future), probability in zip(batch, probabilities):
+                if not future.done():
+                    future.set_result(float(probability))
+
+    def get_stats(self) -> Dict:
+        """Batching statistics"""
+        return {
+            'running': self.running,
+            'batches': self.batches,
+            'rows': self.rows,
+            'errors': self.errors,
+            'avg_batch_size': self.rows / self.batches if self.batches else 0.0,
+            'avg_predict_ms': self.total_predict_ms / self.batches if self.batches else 0.0,
+            'pending': self._queue.qsize() if self._queue is not None else 0
+        }
@@ -42,6 +42,8 @@ class MLModel:
         self.model = None
         self.scaler = StandardScaler()
         self.is_trained = False
+        self.inference = None  # BatchInferenceService (optional, off-loop scoring)
+        self.compiled = None  # CompiledEnsemble (Numba tree evaluator)
         self.feature_names = [
             'confidence',
             'fvg_detected',
@@ -150,6 +152,9 @@ class MLModel:
             # Scale features
             X_scaled = self.scaler.fit_transform(X_array)
             
+            # Fit with all cores; inference switches back to a single thread
+            self._set_n_jobs(-1)
+            
             # Train model with sample weights (獎懲機制)
             # Heavier weights for more important trades (high losses, big profits)
             if hasattr(self.model, 'sample_weight'):
@@ -165,6 +170,8 @@ class MLModel:
                     self.model.fit(X_scaled, y_array)
             
             self.is_trained = True
+            self._set_n_jobs(1)
+            self._compile()
             
             # Calculate accuracy
             accuracy = self.model.score(X_scaled, y_array)
@@ -180,6 +187,61 @@ class MLModel:
             logger.error(f"❌ Training failed: {e}", exc_info=True)
             return False
     
+    def _set_n_jobs(self, n_jobs: int) -> None:
+        """
+        Set RandomForest parallelism
+        
+        n_jobs=-1 speeds up fitting, but every single-row predict_proba
+        then pays thread-pool dispatch across all cores.
+        """
+        if self.model is not None and hasattr(self.model, 'n_jobs'):
+            self.model.set_params(n_jobs=n_jobs)
+    
+    def _compile(self) -> None:
+        """Export the fitted model + scaler to the Numba tree evaluator (sklearn stays as fallback)"""
+        try:
+            from src.tree_ensemble import compile_ensemble
+            self.compiled = compile_ensemble(self.model, self.scaler)
+            if self.compiled is not None:
+                logger.info(f"🌲 Compiled ensemble ready: {self.compiled.n_trees} trees, {self.compiled.n_nodes} nodes")
+        except Exception as e:
+            self.compiled = None
+            logger.warning(f"⚠️ Tree ensemble compilation failed, using sklearn: {e}")
+    
+    def predict_win_probabilities(self, X: np.ndarray) -> np.ndarray:
+        """
+        Vectorized win probabilities for a batch of raw feature rows
+        
+        Args:
+            X: (n, n_features) unscaled feature matrix
+        
+        Returns:
+            (n,) probabilities of class 1 (win)
+        """
+        if self.compiled is not None:
+            return self.compiled.predict_proba(X)[:, 1]
+        X_scaled = self.scaler.transform(X)
+        return self.model.predict_proba(X_scaled)[:, 1]
+    
+    async def start_batch_inference(self, max_batch: int = 32, max_wait_ms: float = 2.0) -> None:
+        """Score signals in micro-batches on a dedicated executor thread"""
+        if not HAS_SKLEARN or self.model is None:
+            return
+        
+        from src.ml_inference import BatchInferenceService
+        if self.inference is None:
+            self.inference = BatchInferenceService(
+                self.predict_win_probabilities,
+                max_batch=max_batch,
+                max_wait_ms=max_wait_ms
+            )
+        await self.inference.start()
+    
+    async def stop_batch_inference(self) -> None:
+        """Stop batched scoring (falls back to inline predictions)"""
+        if self.inference is not None:
+            await self.inference.stop()
+    
     def predict_win_probability(self, signal_data: Dict) -> float:
         """
         Predict probability that a signal will be profitable
@@ -199,6 +261,10 @@ class MLModel:
             if not features:
                 return signal_data.get('confidence', 0.5)
             
+            # Numba tree evaluator (bit-identical to sklearn, microseconds per row)
+            if self.compiled is not None:
+                return self.compiled.predict_win_probability(features)
+            
             # Scale features using same scaler
             X = np.array([features])
             X_scaled = self.scaler.transform(X)
@@ -225,8 +291,19 @@ class MLModel:
         """
         original_confidence = signal_data.get('confidence', 0.5)
         
-        # Get ML prediction
-        win_prob = self.predict_win_probability(signal_data)
+        # Get ML prediction: the compiled evaluator scores inline in microseconds;
+        # sklearn goes through the off-loop batcher if it runs, inline otherwise
+        win_prob = None
+        if (self.is_trained and self.compiled is None
+                and self.inference is not None and self.inference.running):
+            features = self._extract_features(signal_data)
+            if features:
+                try:
+                    win_prob = await self.inference.predict(features)
+                except Exception as e:
+                    logger.debug(f"Batched prediction failed, using inline fallback: {e}")
+        if win_prob is None:
+            win_prob = self.predict_win_probability(signal_data)
         
         # Blend original confidence with ML prediction (70% original, 30% ML)
         adjusted_confidence = (original_confidence * 0.7) + (win_prob * 0.3)
@@ -262,6 +339,8 @@ class MLModel:
             self.model = joblib.load(f"{filepath}.model")
             self.scaler = joblib.load(f"{filepath}.scaler")
             self.is_trained = True
+            self._set_n_jobs(1)
+            self._compile()
             logger.info(f"📖 Model loaded from {filepath}")
             return True
         except Exception as e:
@@ -0,0 +1,360 @@
+"""
+🧾 Order Manager - Idempotent client order ids + order state index
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Every order carries a deterministic newClientOrderId (derived from the
+signal id or the position it closes), and its lifecycle is tracked in an
+in-memory index keyed by that id:
+
+    PENDING → NEW → PARTIALLY_FILLED → FILLED / CANCELED / EXPIRED / REJECTED
+
+- Transitions only move forward: REST acks, GET /fapi/v1/order answers and
+  user-stream ORDER_TRADE_UPDATE events can arrive in any order
+- A timeout or 5xx leaves the order UNKNOWN; resolve() waits briefly for the
+  user stream, then queries by client id. Only NOT_FOUND (or a rejected /
+  unfilled order) may be sent again, so a retry can never double-fill
+- Submitting an id that is already tracked returns the existing order
+  instead of sending a duplicate
+- No global lock: each order has its own wake-up event, so any number of
+  orders can be in flight at once
+"""
+
+import asyncio
+import hashlib
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Local states (never reported by Binance)
+PENDING = 'PENDING'        # request sent, no answer yet
+UNKNOWN = 'UNKNOWN'        # request timed out / 5xx: may or may not exist
+NOT_FOUND = 'NOT_FOUND'    # query confirmed the order was never placed
+
+# Binance order statuses
+NEW = 'NEW'
+PARTIALLY_FILLED = 'PARTIALLY_FILLED'
+FILLED = 'FILLED'
+CANCELED = 'CANCELED'
+EXPIRED = 'EXPIRED'
+REJECTED = 'REJECTED'
+EXPIRED_IN_MATCH = 'EXPIRED_IN_MATCH'
+
+LIVE_STATES = (NEW, PARTIALLY_FILLED)
+UNRESOLVED_STATES = (PENDING, UNKNOWN)
+
+# Forward-only ordering; equal rank only refreshes fill fields of the same state
+STATE_RANK = {
+    PENDING: 0, UNKNOWN: 0, NOT_FOUND: 0,
+    NEW: 1, PARTIALLY_FILLED: 2,
+    FILLED: 3, CANCELED: 3, EXPIRED: 3, REJECTED: 3, EXPIRED_IN_MATCH: 3,
+}
+
+ORDER_NOT_FOUND = -2013          # "Order does not exist."
+DUPLICATE_CLIENT_ORDER_ID = -4116
+
+CLIENT_ID_PREFIX = 'ae'
+
+
+def make_client_order_id(key: str) -> str:
+    """Deterministic newClientOrderId for `key` (35 chars, within Binance's 36 / [a-zA-Z0-9-_])"""
+    return f"{CLIENT_ID_PREFIX}-{hashlib.sha1(key.encode()).hexdigest()[:32]}"
+
+
+class ManagedOrder:
+    """One tracked order (latest known exchange state)"""
+
+    __slots__ = ('client_id', 'symbol', 'side', 'quantity', 'state', 'order_id', 'filled',
+                 'avg_price', 'commission', 'created', 'updated', '_event')
+
+    def __init__(self, client_id: str, symbol: str, side: str, quantity: float):
+        self.client_id = client_id
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.state = PENDING
+        self.order_id: Optional[int] = None
+        self.filled = 0.0
+        self.avg_price = 0.0
+        self.commission = 0.0
+        self.created = time.time()
+        self.updated = self.created
+        self._event = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return STATE_RANK.get(self.state, 0) == 3 or self.state == NOT_FOUND
+
+    @property
+    def resendable(self) -> bool:
+        """Safe to send again under the same client id (nothing was or can be executed)"""
+        if self.state in (NOT_FOUND, REJECTED):
+            return True
+        return self.state in (CANCELED, EXPIRED, EXPIRED_IN_MATCH) and self.filled <= 0
+
+    def result(self) -> Dict[str, Any]:
+        """Binance-style order result (for trade._filled_order)"""
+        return {
+            'orderId': self.order_id,
+            'clientOrderId': self.client_id,
+            'status': self.state,
+            'executedQty': self.filled,
+            'avgPrice': self.avg_price,
+            'commission': self.commission,
+            'time': int(self.updated * 1000),
+        }
+
+    def _notify(self) -> None:
+        self.updated = time.time()
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+
+class OrderManager:
+    """Client-order-id index with forward-only state transitions"""
+
+    def __init__(self, query: Callable[[str, str], Awaitable[Optional[Dict]]],
+                 resolve_delay: float = 0.2, resolve_attempts: int = 5,
+                 settle_timeout: float = 2.0, history: int = 10000):
+        """
+        Args:
+            query: Coroutine (symbol, client_id) -> Binance order dict, None if the
+                   order does not exist; raises if the answer is unknown
+            resolve_delay: Wait for a user-stream event before the first query (doubles per retry)
+            settle_timeout: How long to wait for a live MARKET order to reach a final state
+            history: Finished orders kept for duplicate suppression
+        """
+        self.query = query
+        self.resolve_delay = resolve_delay
+        self.resolve_attempts = resolve_attempts
+        self.settle_timeout = settle_timeout
+        self.history = history
+
+        self._orders: Dict[str, ManagedOrder] = {}
+        self._done: Deque[str] = deque()
+        self._session = f"{os.getpid()}:{time.time_ns()}"
+        self._seq = itertools.count(1)
+
+        self.registered = 0
+        self.resubmits = 0
+        self.queries = 0
+        self.resolved = 0
+        self.stream_updates = 0
+
+    # ------------------------------------------------------------------
+    # Client order ids
+    # ------------------------------------------------------------------
+
+    def client_order_id(self, order: Dict) -> str:
+        """
+        The order's client id, assigned once and stored on the order dict
+
+        Keyed by order['idempotency_key'], else signal_id + symbol + side;
+        orders with neither get a per-process sequence id.
+        """
+        client_id = order.get('client_order_id')
+        if client_id:
+            return client_id
+        key = order.get('idempotency_key')
+        if not key and order.get('signal_id'):
+            key = f"{order['signal_id']}:{order.get('symbol', '')}:{order.get('side', '')}"
+        if not key:
+            key = f"{self._session}:{next(self._seq)}"
+        client_id = order['client_order_id'] = make_client_order_id(key)
+        return client_id
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def get(self, client_id: str) -> Optional[ManagedOrder]:
+        return self._orders.get(client_id)
+
+    def register(self, client_id: str, symbol: str, side: str, quantity: float) -> Tuple[ManagedOrder, bool]:
+        """
+        Track an order about to be sent
+
+        Returns:
+            (order, True) if it should be sent now, or (existing order, False)
+            if this client id is already in flight / executed
+        """
+        order = self._orders.get(client_id)
+        if order is not None and not order.resendable:
+            self.resubmits += 1
+            return order, False
+        if order is None:
+            order = self._orders[client_id] = ManagedOrder(client_id, symbol, side, quantity)
+        else:
+            order.state = PENDING
+            order._notify()
+        self.registered += 1
+        return order, True
+
+    def _transition(self, order: ManagedOrder, state: str, order_id: Optional[int] = None,
+                    filled: Optional[float] = None, avg_price: Optional[float] = None) -> bool:
+        rank, current = STATE_RANK.get(state, 0), STATE_RANK.get(order.state, 0)
+        if rank < current or (rank == current and state != order.state and current > 0):
+            return False  # stale (e.g. REST ack after the stream already reported FILLED)
+        was_done = order.done
+        order.state = state
+        if order_id:
+            order.order_id = order_id
+        if filled is not None and filled >= order.filled:
+            order.filled = filled
+            if avg_price:
+                order.avg_price = avg_price
+        order._notify()
+        if order.done and not was_done:
+            self._remember(order.client_id)
+        return True
+
+    def _remember(self, client_id: str) -> None:
+        self._done.append(client_id)
+        while len(self._done) > self.history:
+            old = self._done.popleft()
+            order = self._orders.get(old)
+            if order is not None and order.done:
+                del self._orders[old]
+
+    def apply_result(self, client_id: str, data: Dict) -> Optional[ManagedOrder]:
+        """Apply a Binance order dict (POST ack, batch entry or GET /fapi/v1/order answer)"""
+        order = self._orders.get(client_id)
+        if order is None or not isinstance(data, dict):
+            return order
+        self._transition(order, data.get('status', NEW), data.get('orderId'),
+                         float(data.get('executedQty', 0) or 0), float(data.get('avgPrice', 0) or 0))
+        return order
+
+    def mark_unknown(self, client_id: str) -> None:
+        """The send failed in a way that leaves the order's existence unknown"""
+        order = self._orders.get(client_id)
+        if order is not None and order.state == PENDING:
+            order.state = UNKNOWN
+            order._notify()
+
+    def mark_rejected(self, client_id: str) -> None:
+        """Binance refused the order (4xx): nothing was placed"""
+        order = self._orders.get(client_id)
+        if order is not None and order.state in UNRESOLVED_STATES:
+            self._transition(order, REJECTED)
+
+    def on_order_update(self, update: Dict) -> None:
+        """UserDataStream ORDER_TRADE_UPDATE callback (see src/reconciliation.py)"""
+        order = self._orders.get(update.get('clientOrderId'))
+        if order is None:
+            return  # not placed by this process
+        self.stream_updates += 1
+        if update.get('execution') == 'TRADE':
+            order.commission += update.get('commission', 0.0)
+        self._transition(order, update.get('status') or NEW, update.get('orderId'),
+                         update.get('filled'), update.get('avg_price'))
+
+    # ------------------------------------------------------------------
+    # Resolution
+    # ------------------------------------------------------------------
+
+    async def wait(self, client_id: str, timeout: float,
+                   until: Optional[Callable[[ManagedOrder], bool]] = None) -> Optional[ManagedOrder]:
+        """Wait until `until(order)` (default: finished) or timeout; returns the order"""
+        order = self._orders.get(client_id)
+        if order is None:
+            return None
+        until = until or (lambda o: o.done)
+        deadline = time.monotonic() + timeout
+        while not until(order):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(order._event.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return order
+
+    async def _query(self, order: ManagedOrder) -> bool:
+        self.queries += 1
+        data = await self.query(order.symbol, order.client_id)
+        if data is None:
+            self._transition(order, NOT_FOUND)
+        else:
+            self.apply_result(order.client_id, data)
+        return True
+
+    async def resolve(self, client_id: str) -> Optional[ManagedOrder]:
+        """
+        Settle an UNKNOWN order: user-stream event first, then GET by client id
+
+        Stays UNKNOWN if every query fails (the caller must not resend).
+        """
+        order = self._orders.get(client_id)
+        if order is None:
+            return None
+        delay = self.resolve_delay
+        for attempt in range(self.resolve_attempts):
+            if order.state not in UNRESOLVED_STATES:
+                break
+            await self.wait(client_id, delay, until=lambda o: o.state not in UNRESOLVED_STATES)
+            if order.state not in UNRESOLVED_STATES:
+                break
+            try:
+                await self._query(order)
+            except Exception as e:
+                logger.warning(f"⚠️ Order lookup {order.symbol} {client_id} failed ({attempt + 1}/{self.resolve_attempts}): {e}")
+                delay *= 2
+        if order.state in UNRESOLVED_STATES:
+            logger.error(f"❌ Order {order.symbol} {client_id} still unknown after {self.resolve_attempts} lookups")
+        else:
+            self.resolved += 1
+            logger.info(f"🧾 Order {order.symbol} {client_id} resolved: {order.state} (filled {order.filled})")
+        return order
+
+    async def settle(self, client_id: str, timeout: Optional[float] = None) -> Optional[ManagedOrder]:
+        """
+        Bring an order to its best-known state
+
+        PENDING (another coroutine is sending it) waits for that answer,
+        UNKNOWN is resolved, NEW / PARTIALLY_FILLED wait for the stream and
+        fall back to one query.
+        """
+        order = self._orders.get(client_id)
+        if order is None:
+            return None
+        timeout = self.settle_timeout if timeout is None else timeout
+        if order.state == PENDING:
+            await self.wait(client_id, timeout, until=lambda o: o.state != PENDING)
+        if order.state == UNKNOWN:
+            return await self.resolve(client_id)
+        if order.state in LIVE_STATES:
+            await self.wait(client_id, timeout)
+            if order.state in LIVE_STATES:
+                try:
+                    await self._query(order)
+                except Exception as e:
+                    logger.warning(f"⚠️ Order lookup {order.symbol} {client_id} failed: {e}")
+        return order
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+
+    def in_flight(self) -> int:
+        return sum(1 for order in self._orders.values() if not order.done)
+
+    def get_stats(self) -> Dict[str, Any]:
+        states: Dict[str, int] = {}
+        for order in self._orders.values():
+            states[order.state] = states.get(order.state, 0) + 1
+        return {
+            'tracked': len(self._orders),
+            'in_flight': self.in_flight(),
+            'states': states,
+            'registered': self.registered,
+            'resubmits': self.resubmits,
+            'queries': self.queries,
+            'resolved': self.resolved,
+            'stream_updates': self.stream_updates,
+        }
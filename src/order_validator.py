@@ -4,8 +4,9 @@
 """
 
 import logging
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 from src.binance_constraints import get_binance_constraints
+from src.utils.math_utils import get_step_size
 import math
 
 logger = logging.getLogger(__name__)
@@ -28,7 +29,7 @@ class OrderValidator:
         symbol: str,
         quantity: float,
         current_price: float,
-        lot_size_step: float = 0.001,
+        lot_size_step: Optional[float] = None,
         price_precision: int = 8,
         quantity_precision: int = 8
     ) -> Tuple[bool, str, Dict]:
@@ -41,10 +42,14 @@ class OrderValidator:
         3. 精度符合性
         4. 浮點精度問題
         
+        lot_size_step 默認取該符號的真實 stepSize（交易所過濾器索引）
+        
         Returns:
             (is_valid, error_message, validation_details)
         """
         constraints = get_binance_constraints()
+        if lot_size_step is None:
+            lot_size_step = get_step_size(symbol)
         validation_details = {}
         
         # ========== 1. 精度處理 ==========
@@ -168,15 +173,19 @@ class OrderValidator:
         symbol: str,
         quantity: float,
         current_price: float,
-        lot_size_step: float = 0.001
+        lot_size_step: Optional[float] = None
     ) -> Tuple[float, float, bool]:
         """
         正規化訂單參數使其符合 Binance 要求
         
+        lot_size_step 默認取該符號的真實 stepSize（交易所過濾器索引）
+        
         Returns:
             (final_quantity, final_price, was_adjusted)
         """
         constraints = get_binance_constraints()
+        if lot_size_step is None:
+            lot_size_step = get_step_size(symbol)
         
         # 計算最低數量
         min_qty = constraints.calculate_min_quantity(
@@ -0,0 +1,220 @@
+"""
+🚦 Rate Limiter - Weight-aware Binance REST throttling
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Two token buckets mirror the exchange's limits:
+- weight: REQUEST_WEIGHT per minute (every request)
+- orders: ORDERS per 10s burst, refilled at the per-minute rate (order requests)
+
+Buckets are corrected from the live response headers (X-MBX-USED-WEIGHT-1M,
+X-MBX-ORDER-COUNT-10S / -1M), so usage by other clients on the same IP /
+account is respected. A 429 / 418 pauses everything for Retry-After.
+
+Requests that must wait queue by priority: reduce-only closes ahead of new
+entries, entries ahead of account / metadata queries. Limits are scaled by
+a safety margin so we never run at 100% of the ban threshold.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_CLOSE = 0   # reduce-only / flattening orders
+PRIORITY_ENTRY = 1   # new positions
+PRIORITY_QUERY = 2   # account, exchangeInfo, cancels of stale orders
+PRIORITY_NAMES = {PRIORITY_CLOSE: 'close', PRIORITY_ENTRY: 'entry', PRIORITY_QUERY: 'query'}
+
+# Binance USDⓈ-M futures defaults (exchangeInfo.rateLimits)
+DEFAULT_WEIGHT_LIMIT = 2400     # REQUEST_WEIGHT / 1m
+DEFAULT_ORDER_LIMIT_10S = 300   # ORDERS / 10s
+DEFAULT_ORDER_LIMIT_1M = 1200   # ORDERS / 1m
+
+
+class TokenBucket:
+    """Continuous-refill token bucket (tokens may go negative after a header sync)"""
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated')
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, cost: float, now: float) -> float:
+        """Seconds until `cost` tokens are available (cost is capped at capacity)"""
+        self._refill(now)
+        deficit = min(cost, self.capacity) - self.tokens
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def consume(self, cost: float, now: float) -> None:
+        self._refill(now)
+        self.tokens -= cost
+
+    def sync_used(self, used: float, now: float) -> None:
+        """Clamp to what the exchange says is left of our (safety-scaled) budget"""
+        self._refill(now)
+        self.tokens = min(self.tokens, self.capacity - used)
+
+
+class _PriorityStats:
+    __slots__ = ('granted', 'throttled', 'wait_total', 'wait_max')
+
+    def __init__(self):
+        self.granted = 0
+        self.throttled = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class RateLimiter:
+    """Priority-queued weight / order-count limiter driven by response headers"""
+
+    def __init__(self, weight_limit: int = DEFAULT_WEIGHT_LIMIT,
+                 order_limit_10s: int = DEFAULT_ORDER_LIMIT_10S,
+                 order_limit_1m: int = DEFAULT_ORDER_LIMIT_1M,
+                 safety: float = 0.9):
+        self.safety = safety
+        self.weight = TokenBucket(weight_limit * safety, weight_limit * safety / 60.0)
+        self.orders = TokenBucket(order_limit_10s * safety, order_limit_1m * safety / 60.0)
+        self.order_limit_1m = order_limit_1m * safety
+
+        self._waiters: List = []  # heap of (priority, seq, weight, orders, future, enqueued_at)
+        self._seq = itertools.count()
+        self._pump_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._paused_until = 0.0
+
+        self._stats = {p: _PriorityStats() for p in PRIORITY_NAMES}
+        self.rejections = 0
+        self.used_weight_1m: Optional[int] = None
+        self.order_count_10s: Optional[int] = None
+        self.order_count_1m: Optional[int] = None
+
+    def _delay(self, weight: float, orders: float, now: float) -> float:
+        delay = max(self._paused_until - now, self.weight.time_until(weight, now))
+        if orders:
+            delay = max(delay, self.orders.time_until(orders, now))
+        return delay
+
+    def _grant(self, priority: int, weight: float, orders: float, now: float, waited: float) -> None:
+        self.weight.consume(weight, now)
+        if orders:
+            self.orders.consume(orders, now)
+        stats = self._stats[priority]
+        stats.granted += 1
+        if waited > 0:
+            stats.throttled += 1
+            stats.wait_total += waited
+            stats.wait_max = max(stats.wait_max, waited)
+
+    async def acquire(self, weight: float = 1, orders: float = 0, priority: int = PRIORITY_QUERY) -> float:
+        """
+        Wait for budget, then consume it
+
+        Returns:
+            Seconds spent throttled
+        """
+        now = time.monotonic()
+        if not self._waiters and self._delay(weight, orders, now) <= 0:
+            self._grant(priority, weight, orders, now, 0.0)
+            return 0.0
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), weight, orders, future, now))
+        if self._pump_task is None or self._pump_task.done() or self._pump_task.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._pump_task = loop.create_task(self._pump(), name="rate-limiter")
+        else:
+            self._wakeup.set()  # a more urgent waiter may now be at the head
+        return await future
+
+    async def _pump(self) -> None:
+        """Grant queued requests strictly by (priority, arrival) as budget refills"""
+        while self._waiters:
+            priority, _, weight, orders, future, enqueued_at = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            now = time.monotonic()
+            delay = self._delay(weight, orders, now)
+            if delay <= 0:
+                heapq.heappop(self._waiters)
+                waited = now - enqueued_at
+                self._grant(priority, weight, orders, now, waited)
+                future.set_result(waited)
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def update_from_headers(self, headers: Mapping[str, str], status: int = 200) -> None:
+        """Correct the buckets from X-MBX-* headers; pause on 429 / 418"""
+        now = time.monotonic()
+        lowered = {k.lower(): v for k, v in headers.items()}
+
+        used = lowered.get('x-mbx-used-weight-1m')
+        if used is not None:
+            self.used_weight_1m = int(used)
+            self.weight.sync_used(self.used_weight_1m, now)
+        count_10s = lowered.get('x-mbx-order-count-10s')
+        if count_10s is not None:
+            self.order_count_10s = int(count_10s)
+            self.orders.sync_used(self.order_count_10s, now)
+        count_1m = lowered.get('x-mbx-order-count-1m')
+        if count_1m is not None:
+            self.order_count_1m = int(count_1m)
+            # Past ~90% of the minute budget the 10s bucket must not refill faster than the minute allows
+            remaining_1m = self.order_limit_1m - self.order_count_1m
+            self.orders.sync_used(self.orders.capacity - remaining_1m, now)
+
+        if status in (418, 429):
+            self.rejections += 1
+            retry_after = float(lowered.get('retry-after', 60))
+            self.pause(retry_after)
+            logger.error(f"🚦 Binance rate limit hit (HTTP {status}) - pausing REST for {retry_after:.0f}s")
+
+    def pause(self, seconds: float) -> None:
+        """Hold every request for `seconds` (e.g. Retry-After)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def get_stats(self) -> Dict:
+        now = time.monotonic()
+        self.weight._refill(now)
+        self.orders._refill(now)
+        depth = {p: 0 for p in PRIORITY_NAMES}
+        for priority, *_rest in self._waiters:
+            depth[priority] += 1
+        stats = {
+            'weight_tokens': self.weight.tokens,
+            'order_tokens': self.orders.tokens,
+            'used_weight_1m': self.used_weight_1m,
+            'order_count_10s': self.order_count_10s,
+            'order_count_1m': self.order_count_1m,
+            'paused_for_s': max(0.0, self._paused_until - now),
+            'rejections': self.rejections,
+        }
+        for priority, name in PRIORITY_NAMES.items():
+            s = self._stats[priority]
+            stats[name] = {
+                'queued': depth[priority],
+                'granted': s.granted,
+                'throttled': s.throttled,
+                'avg_wait_ms': s.wait_total / max(s.throttled, 1) * 1000,
+                'max_wait_ms': s.wait_max * 1000,
+            }
+        return stats
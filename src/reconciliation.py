@@ -1,44 +1,333 @@
 """
-🔄 Cache Reconciliation - REST API Fallback (PATCH_3)
-Minimal version for periodic state verification
+🔄 Cache Reconciliation - User-data stream + REST safety net
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+UserDataStream keeps the trade module's account state in sync with
+Binance in real time:
+- listenKey lifecycle: POST to create, PUT keepalive every 30 min, DELETE on stop,
+  new key + reconnect on listenKeyExpired or disconnect (with backoff)
+- ACCOUNT_UPDATE: wallet balance and position amounts applied incrementally
+- ORDER_TRADE_UPDATE: latest status per client order id (NEW, PARTIALLY_FILLED,
+  FILLED, CANCELED ...) kept in `orders` and forwarded to on_order_update
+
+Safety net: background_reconciliation_task diffs local positions against
+one GET /fapi/v2/account every `interval` seconds (and after every
+reconnect, since events may have been missed) and lets Binance win.
 """
 
-import logging
 import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+import aiohttp
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_WS_URL = "wss://fstream.binance.com"
+LISTEN_KEY_PATH = "/fapi/v1/listenKey"
+KEEPALIVE_INTERVAL = 30 * 60   # Binance expires a listenKey after 60 min without keepalive
+BALANCE_ASSET = "USDT"
+QTY_EPSILON = 1e-9
+
+
+def apply_position(positions: Dict[str, Dict], symbol: str, amount: float, entry_price: float) -> None:
+    """Set one position from a signed exchange amount (0 removes it), keeping our metadata"""
+    if abs(amount) < QTY_EPSILON:
+        positions.pop(symbol, None)
+        return
+    existing = positions.get(symbol, {})
+    positions[symbol] = {
+        **existing,
+        'quantity': abs(amount),
+        'entry_price': entry_price,
+        'entry_confidence': existing.get('entry_confidence', 0.5),
+        'entry_time': existing.get('entry_time', int(time.time() * 1000)),
+        'side': 'BUY' if amount > 0 else 'SELL'
+    }
 
-async def background_reconciliation_task(interval: int = 900):
+
+def diff_positions(local: Dict[str, Dict], remote: Dict[str, float]) -> Dict[str, list]:
     """
-    Periodic cache reconciliation with Binance REST API
-    - Every 15 minutes: Call /fapi/v1/account
-    - Verify local positions match Binance
-    - Detect WebSocket divergence
+    Compare local positions with exchange amounts
+
+    Args:
+        local: {symbol: {quantity, side, ...}}
+        remote: {symbol: signed position amount} (non-zero only)
+
+    Returns:
+        {'missing': on exchange only, 'stale': local only, 'mismatched': size or side differs}
     """
-    logger.info(f"🔄 Cache reconciliation task started (interval: {interval}s)")
-    logger.info("🔄 Starting cache reconciliation (every 900s)...")
-    
-    try:
-        # Check for credentials
-        import os
-        if not os.getenv('BINANCE_API_KEY') or not os.getenv('BINANCE_API_SECRET'):
-            logger.warning("⚠️ Binance credentials not configured - skipping reconciliation")
-            logger.warning("⚠️ Reconciliation skipped - could not fetch Binance state")
-            return
-        
+    def signed(position: Dict) -> float:
+        quantity = abs(position.get('quantity', 0))
+        return -quantity if position.get('side', 'BUY') == 'SELL' else quantity
+
+    return {
+        'missing': sorted(s for s in remote if s not in local),
+        'stale': sorted(s for s in local if s not in remote),
+        'mismatched': sorted(s for s in remote if s in local and abs(signed(local[s]) - remote[s]) > QTY_EPSILON),
+    }
+
+
+class UserDataStream:
+    """User-data WebSocket consumer applying fills / balance / positions to the account state"""
+
+    def __init__(self, client, state: Dict[str, Any], lock: asyncio.Lock,
+                 sign: Callable[[Dict], Callable[[], str]],
+                 ws_url: str = DEFAULT_WS_URL, keepalive_interval: float = KEEPALIVE_INTERVAL,
+                 reconcile_interval: float = 900,
+                 on_change: Optional[Callable[[], Any]] = None,
+                 on_order_update: Optional[Callable[[Dict], Any]] = None):
+        """
+        Args:
+            client: BinanceRestClient (its session also carries the WebSocket)
+            state: The trade module's account state ({balance, positions, ...}), mutated in place
+            lock: Lock guarding `state`
+            sign: Builds a signing callable from params (trade._signer)
+            on_change: Called after the state changed (e.g. mark it dirty for persistence)
+            on_order_update: Called with every order update dict
+        """
+        self.client = client
+        self.state = state
+        self.lock = lock
+        self.sign = sign
+        self.ws_url = ws_url.rstrip('/')
+        self.keepalive_interval = keepalive_interval
+        self.reconcile_interval = reconcile_interval
+        self.on_change = on_change
+        self.on_order_update = on_order_update
+
+        self.orders: Dict[str, Dict] = {}  # clientOrderId -> latest update
+        self.listen_key: Optional[str] = None
+        self.connected = False
+        self._tasks = []
+
+        self.events = 0
+        self.connects = 0
+        self.keepalives = 0
+        self.reconciliations = 0
+        self.corrections = 0
+        self.last_event_time: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._tasks = [
+            loop.create_task(self._run(), name="user-data-stream"),
+            loop.create_task(background_reconciliation_task(self.reconcile_interval, stream=self),
+                             name="user-data-reconcile"),
+        ]
+        logger.info(f"🔄 User-data stream started ({self.ws_url})")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self.listen_key is not None:
+            try:
+                await self.client.request('DELETE', LISTEN_KEY_PATH)
+            except Exception as e:
+                logger.debug(f"⚠️ listenKey close failed: {e}")
+            self.listen_key = None
+
+    async def _new_listen_key(self) -> str:
+        resp = await self.client.request('POST', LISTEN_KEY_PATH)
+        if not resp.ok or not isinstance(resp.data, dict) or 'listenKey' not in resp.data:
+            raise ConnectionError(f"listenKey request failed (HTTP {resp.status}): {resp.text}")
+        self.listen_key = resp.data['listenKey']
+        return self.listen_key
+
+    async def _keepalive_loop(self) -> None:
         while True:
+            await asyncio.sleep(self.keepalive_interval)
             try:
-                await asyncio.sleep(interval)
-                # Placeholder: In production, call /fapi/v1/account REST API
-                # and verify local positions
-                # logger.debug("Reconciling cache with Binance REST API...")
+                resp = await self.client.request('PUT', LISTEN_KEY_PATH)
+                self.keepalives += 1
+                if not resp.ok:
+                    logger.warning(f"⚠️ listenKey keepalive rejected (HTTP {resp.status}): {resp.text}")
+            except Exception as e:
+                logger.warning(f"⚠️ listenKey keepalive failed: {e}")
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            keepalive = None
+            expired = False
+            try:
+                key = await self._new_listen_key()
+                keepalive = asyncio.create_task(self._keepalive_loop())
+                async with self.client.session.ws_connect(f"{self.ws_url}/ws/{key}", heartbeat=30) as ws:
+                    self.connected = True
+                    self.connects += 1
+                    backoff = 1.0
+                    logger.info(f"🔌 User-data stream connected (#{self.connects})")
+                    if self.connects > 1:
+                        await self.reconcile()  # events may have been missed while disconnected
+                    async for message in ws:
+                        if message.type == aiohttp.WSMsgType.TEXT:
+                            if await self.handle_event(json.loads(message.data)):
+                                logger.warning("⚠️ listenKey expired - reconnecting with a new key")
+                                expired = True
+                                break
+                        elif message.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
             except asyncio.CancelledError:
-                logger.info("🔄 Reconciliation task cancelled")
-                break
+                raise
             except Exception as e:
-                logger.error(f"Reconciliation error: {e}")
-                await asyncio.sleep(5)
-    
-    except Exception as e:
-        logger.critical(f"Reconciliation fatal error: {e}", exc_info=True)
+                logger.error(f"❌ User-data stream error: {e}")
+            finally:
+                self.connected = False
+                if keepalive is not None:
+                    keepalive.cancel()
+            if not expired:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    # ------------------------------------------------------------------
+    # Events
+    # ------------------------------------------------------------------
+
+    async def _changed(self) -> None:
+        if self.on_change is not None:
+            result = self.on_change()
+            if asyncio.iscoroutine(result):
+                await result
+
+    async def handle_event(self, event: Dict) -> bool:
+        """
+        Apply one user-data event
+
+        Returns:
+            True if the listenKey expired (caller must reconnect)
+        """
+        self.events += 1
+        self.last_event_time = time.time()
+        kind = event.get('e')
+
+        if kind == 'ACCOUNT_UPDATE':
+            update = event.get('a', {})
+            async with self.lock:
+                for balance in update.get('B', []):
+                    if balance.get('a') == BALANCE_ASSET:
+                        self.state['balance'] = float(balance['wb'])
+                for position in update.get('P', []):
+                    apply_position(self.state['positions'], position['s'],
+                                   float(position['pa']), float(position.get('ep', 0)))
+            await self._changed()
+
+        elif kind == 'ORDER_TRADE_UPDATE':
+            order = event.get('o', {})
+            update = {
+                'symbol': order.get('s'),
+                'side': order.get('S'),
+                'status': order.get('X'),
+                'execution': order.get('x'),
+                'orderId': order.get('i'),
+                'clientOrderId': order.get('c'),
+                'filled': float(order.get('z', 0)),
+                'last_qty': float(order.get('l', 0)),
+                'last_price': float(order.get('L', 0)),
+                'avg_price': float(order.get('ap', 0)),
+                'commission': float(order.get('n', 0) or 0),
+                'timestamp': event.get('E', int(time.time() * 1000)),
+            }
+            self.orders[update['clientOrderId']] = update
+            if update['execution'] == 'TRADE':
+                logger.debug(f"📬 Fill: {update['symbol']} {update['side']} {update['last_qty']} @ {update['last_price']} ({update['status']})")
+            if self.on_order_update is not None:
+                result = self.on_order_update(update)
+                if asyncio.iscoroutine(result):
+                    await result
+
+        elif kind == 'listenKeyExpired':
+            return True
+
+        return False
+
+    # ------------------------------------------------------------------
+    # REST safety net
+    # ------------------------------------------------------------------
+
+    async def reconcile(self) -> Optional[Dict[str, list]]:
+        """One GET /fapi/v2/account; Binance wins on any difference"""
+        try:
+            resp = await self.client.request('GET', '/fapi/v2/account', self.sign({}))
+        except Exception as e:
+            logger.warning(f"⚠️ Reconciliation fetch failed: {e}")
+            return None
+        if not resp.ok or not isinstance(resp.data, dict):
+            logger.warning(f"⚠️ Reconciliation fetch rejected (HTTP {resp.status}): {resp.text}")
+            return None
+
+        remote = {}
+        entries = {}
+        for position in resp.data.get('positions', []):
+            amount = float(position.get('positionAmt', 0))
+            if abs(amount) >= QTY_EPSILON:
+                remote[position['symbol']] = amount
+                entries[position['symbol']] = float(position.get('entryPrice', 0))
+
+        async with self.lock:
+            diff = diff_positions(self.state['positions'], remote)
+            for symbol in diff['missing'] + diff['mismatched']:
+                apply_position(self.state['positions'], symbol, remote[symbol], entries[symbol])
+            for symbol in diff['stale']:
+                self.state['positions'].pop(symbol, None)
+            if 'totalWalletBalance' in resp.data:
+                self.state['balance'] = float(resp.data['totalWalletBalance'])
+
+        self.reconciliations += 1
+        divergent = sum(len(v) for v in diff.values())
+        if divergent:
+            self.corrections += divergent
+            logger.warning(f"🔄 Reconciliation corrected {divergent} positions: {diff}")
+        await self._changed()
+        return diff
+
+    def get_stats(self) -> Dict:
+        return {
+            'connected': self.connected,
+            'connects': self.connects,
+            'events': self.events,
+            'keepalives': self.keepalives,
+            'orders_tracked': len(self.orders),
+            'reconciliations': self.reconciliations,
+            'corrections': self.corrections,
+            'last_event_age_s': time.time() - self.last_event_time if self.last_event_time else None,
+        }
+
+
+async def background_reconciliation_task(interval: int = 900, stream: Optional[UserDataStream] = None):
+    """
+    Periodic cache reconciliation with Binance REST API
+    - Every `interval` seconds: one GET /fapi/v2/account
+    - Diff local positions against Binance and correct them
+    - Detect WebSocket divergence
+
+    Runs next to the UserDataStream in the process that owns the account
+    state (trade.init); elsewhere there is nothing to reconcile.
+    """
+    if stream is None:
+        logger.info("🔄 Reconciliation runs with the user-data stream in the trade process - nothing to do here")
+        return
+
+    logger.info(f"🔄 Cache reconciliation task started (interval: {interval}s)")
+    while True:
+        try:
+            await asyncio.sleep(interval)
+            await stream.reconcile()
+        except asyncio.CancelledError:
+            logger.info("🔄 Reconciliation task cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Reconciliation error: {e}")
+            await asyncio.sleep(5)
@@ -1,17 +1,25 @@
 """
 🔄 Shared Memory Ring Buffer (LMAX Disruptor Pattern)
 Wrapper class for inter-process communication
+
+Each slot carries the candle plus two monotonic-ns trace stamps (feed
+receive, ring commit) so the brain can continue the tick-to-trade trace
+(see src/latency.py), and the exchange symbol the candle belongs to
+('BTCUSDT', NUL-padded; empty if the writer did not know it).
 """
 
 import multiprocessing
 from multiprocessing import shared_memory
 import struct
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 TOTAL_BUFFER_SIZE = 480000  # bytes
-SLOT_SIZE = 48  # bytes per candle (8 slots per double)
+SYMBOL_SIZE = 16
+SLOT_FORMAT = f'ddddddqq{SYMBOL_SIZE}s'  # timestamp, open, high, low, close, volume, recv_ns, commit_ns, symbol
+SLOT_SIZE = struct.calcsize(SLOT_FORMAT)  # 80 bytes per candle
 NUM_SLOTS = TOTAL_BUFFER_SIZE // SLOT_SIZE
 METADATA_SIZE = 32  # bytes for write/read cursors
 
@@ -110,8 +118,13 @@ class RingBuffer:
             logger.error(f"Error getting pending count: {e}")
             return 0
     
-    def read_new(self):
-        """Generator to read new candles from buffer"""
+    def read_new(self, with_stamps: bool = False, with_symbol: bool = False):
+        """
+        Generator to read new candles from buffer
+        
+        Yields candle tuples, or (candle, recv_ns, commit_ns) when with_stamps=True;
+        with_symbol=True appends the exchange symbol ('' if unknown) to the tuple
+        """
         try:
             read_count = 0
             while True:
@@ -127,14 +140,18 @@ class RingBuffer:
                 slot_index = read_cursor % NUM_SLOTS
                 offset = slot_index * SLOT_SIZE
                 
-                # Read candle (6 doubles = 48 bytes)
+                # Read candle (6 doubles + 2 trace stamps + symbol = 80 bytes)
                 if offset + SLOT_SIZE <= len(self.shm.buf):
                     candle_data = bytes(self.shm.buf[offset:offset + SLOT_SIZE])
                     
                     # Unpack candle tuple (timestamp, open, high, low, close, volume)
                     try:
-                        candle = struct.unpack('dddddd', candle_data)
-                        yield candle
+                        *candle, recv_ns, commit_ns, symbol = struct.unpack(SLOT_FORMAT, candle_data)
+                        candle = tuple(candle)
+                        item = (candle, recv_ns, commit_ns) if with_stamps else (candle,)
+                        if with_symbol:
+                            item += (symbol.rstrip(b'\x00').decode('ascii', 'replace'),)
+                        yield item if len(item) > 1 else candle
                         read_count += 1
                         
                         # Increment read cursor - MUST refresh write_cursor!
@@ -150,8 +167,15 @@ class RingBuffer:
             logger.error(f"Error reading from buffer: {e}")
             yield None
     
-    def write_candle(self, candle: tuple):
-        """Write candle to buffer (called by Feed process)"""
+    def write_candle(self, candle: tuple, recv_ns: int = 0, symbol: str = ''):
+        """
+        Write candle to buffer (called by Feed process)
+        
+        Args:
+            candle: (timestamp, open, high, low, close, volume)
+            recv_ns: time.monotonic_ns() when the feed received it (0 if unknown)
+            symbol: Exchange symbol of the candle ('BTCUSDT'), truncated to 16 bytes
+        """
         try:
             write_cursor, read_cursor = self._get_cursors()
             
@@ -171,8 +195,8 @@ class RingBuffer:
             slot_index = write_cursor % NUM_SLOTS
             offset = slot_index * SLOT_SIZE
             
-            # Pack candle (6 doubles = 48 bytes)
-            candle_data = struct.pack('dddddd', *candle)
+            # Pack candle + trace stamps + symbol (80 bytes)
+            candle_data = struct.pack(SLOT_FORMAT, *candle, recv_ns, time.monotonic_ns(), symbol.encode('ascii'))
             self.shm.buf[offset:offset + SLOT_SIZE] = candle_data
             
             # Increment write cursor
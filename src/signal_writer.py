@@ -0,0 +1,236 @@
+"""
+📝 Signal Writer - Write-behind batched signal persistence
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+enqueue() only appends a row to an in-memory queue; the risk check never
+waits on Postgres. One background task drains the queue:
+
+- Up to batch_size rows per statement: a single multi-row
+  INSERT ... SELECT FROM unnest($1::uuid[], ...) round trip
+- Keyed by signal id (ON CONFLICT (id) DO NOTHING): a row written twice
+  (retry, replay) stays one row, so trades.signal_id and
+  experience_buffer.signal_id references resolve to it
+- Postgres down: the batch is appended to a JSON-lines spill file (fsynced)
+  and replayed, oldest first, after the next successful flush; while a spill
+  file exists the task retries every retry_delay, with or without new signals
+- Queue above max_queue: the oldest batch is spilled rather than dropped
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Row layout (one tuple per signal, in this column order)
+SIGNAL_COLUMNS = ('id', 'symbol', 'confidence', 'patterns', 'position_size', 'timestamp',
+                  'rsi', 'macd', 'bb_width', 'atr', 'fvg', 'liquidity')
+
+INSERT_SQL = """
+    INSERT INTO signals (id, symbol, confidence, patterns, position_size, timestamp, rsi, macd, bb_width, atr, fvg, liquidity)
+    SELECT id, symbol, confidence, patterns::jsonb, position_size, timestamp, rsi, macd, bb_width, atr, fvg, liquidity
+    FROM unnest($1::uuid[], $2::text[], $3::float8[], $4::text[], $5::float8[], $6::int8[],
+                $7::float8[], $8::float8[], $9::float8[], $10::float8[], $11::float8[], $12::float8[])
+        AS t(id, symbol, confidence, patterns, position_size, timestamp, rsi, macd, bb_width, atr, fvg, liquidity)
+    ON CONFLICT (id) DO NOTHING
+"""
+
+
+def to_columns(rows: Sequence[Sequence[Any]]) -> List[list]:
+    """Row tuples -> one list per column (the unnest arrays)"""
+    return [list(column) for column in zip(*rows)] if rows else [[] for _ in SIGNAL_COLUMNS]
+
+
+class SignalWriter:
+    """Batched, idempotent, spill-to-disk writer for the signals table"""
+
+    def __init__(self, connect: Callable[[], Awaitable[Any]],
+                 batch_size: int = 500, flush_interval_ms: float = 200,
+                 max_queue: int = 50000, spill_path: Optional[str] = None,
+                 retry_delay: float = 5.0):
+        """
+        Args:
+            connect: Coroutine returning an asyncpg-style connection (or None if unavailable)
+            spill_path: JSON-lines file for rows Postgres could not take (None disables spilling)
+        """
+        self.connect = connect
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_queue = max_queue
+        self.spill_path = spill_path
+        self.retry_delay = retry_delay
+
+        self._queue: Deque[tuple] = deque()
+        self._conn = None
+        self._pending: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._retry_at = 0.0
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failures = 0
+        self.spilled = 0
+        self.replayed = 0
+
+    def _ensure_task(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._pending = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._conn = None
+            self._task = loop.create_task(self._run(), name="signal-writer")
+
+    def enqueue(self, row: Sequence[Any]) -> None:
+        """Queue one signal row (SIGNAL_COLUMNS order); returns immediately"""
+        self._ensure_task()
+        self._queue.append(tuple(row))
+        self.enqueued += 1
+        if len(self._queue) > self.max_queue:
+            overflow = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            self._spill(overflow)
+        self._pending.set()
+
+    def start(self) -> None:
+        """Start the background task now (replays a spill file left by a previous run)"""
+        self._ensure_task()
+
+    def _has_spill(self) -> bool:
+        return bool(self.spill_path) and (os.path.exists(self.spill_path)
+                                          or os.path.exists(f"{self.spill_path}.replay"))
+
+    async def _run(self) -> None:
+        while True:
+            if self._has_spill():
+                # Spilled rows are retried every retry_delay, even if no new signal arrives
+                try:
+                    await asyncio.wait_for(self._pending.wait(), self.retry_delay)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await self._pending.wait()
+            # Let a burst of signals accumulate into one batch
+            await asyncio.sleep(max(self.flush_interval, self._retry_at - time.monotonic()))
+            await self.flush()
+
+    async def _connection(self):
+        if self._conn is not None and not getattr(self._conn, 'is_closed', lambda: False)():
+            return self._conn
+        self._conn = await self.connect()
+        return self._conn
+
+    async def _write(self, rows: List[tuple]) -> None:
+        conn = await self._connection()
+        if conn is None:
+            raise ConnectionError("Postgres not available")
+        await conn.execute(INSERT_SQL, *to_columns(rows))
+
+    async def flush(self) -> bool:
+        """Write everything queued now (then replay the spill file); False if Postgres failed"""
+        self._ensure_task()
+        async with self._flush_lock:
+            self._pending.clear()
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                try:
+                    await self._write(batch)
+                except Exception as e:
+                    self.failures += 1
+                    self._conn = None
+                    self._retry_at = time.monotonic() + self.retry_delay
+                    # Keep order: this batch and everything still queued go to disk
+                    batch.extend(self._queue)
+                    self._queue.clear()
+                    self._spill(batch)
+                    logger.error(f"❌ Failed to write {len(batch)} signals to Postgres (spilled to disk): {e}")
+                    return False
+                self.written += len(batch)
+                self.batches += 1
+            return await self._replay()
+
+    # ------------------------------------------------------------------
+    # Durable fallback
+    # ------------------------------------------------------------------
+
+    def _spill(self, rows: List[tuple]) -> None:
+        if not rows:
+            return
+        if not self.spill_path:
+            logger.error(f"❌ Dropping {len(rows)} signals (no spill file configured)")
+            return
+        try:
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.spill_path, 'a') as f:
+                for row in rows:
+                    f.write(json.dumps(row) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.spilled += len(rows)
+        except OSError as e:
+            logger.error(f"❌ Failed to spill {len(rows)} signals to {self.spill_path}: {e}")
+
+    async def _replay(self) -> bool:
+        """Insert spilled rows (idempotent by id); the file is removed once all are in"""
+        if not self.spill_path:
+            return True
+        replaying = f"{self.spill_path}.replay"
+        if not os.path.exists(replaying) and not os.path.exists(self.spill_path):
+            return True
+        try:
+            if not os.path.exists(replaying):
+                os.replace(self.spill_path, replaying)  # new spills go to a fresh file meanwhile
+            with open(replaying, 'r') as f:
+                rows = [tuple(json.loads(line)) for line in f if line.strip()]
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Failed to read spilled signals ({replaying}): {e}")
+            return False
+
+        for start in range(0, len(rows), self.batch_size):
+            try:
+                await self._write(rows[start:start + self.batch_size])
+            except Exception as e:
+                self.failures += 1
+                self._conn = None
+                logger.warning(f"⚠️ Spilled signal replay interrupted ({start}/{len(rows)}): {e}")
+                return False  # the .replay file is kept and retried from the start (ids dedupe)
+        os.remove(replaying)
+        self.replayed += len(rows)
+        if rows:
+            logger.info(f"📝 Replayed {len(rows)} spilled signals into Postgres")
+        return True
+
+    async def close(self) -> None:
+        """Flush (or spill) what is queued, stop the task and close the connection"""
+        if self._task is not None:
+            if self._queue:
+                await self.flush()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            try:
+                await self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'queued': len(self._queue),
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'batches': self.batches,
+            'failures': self.failures,
+            'spilled': self.spilled,
+            'replayed': self.replayed,
+        }
@@ -0,0 +1,528 @@
+"""
+🧱 SMC Structure - Numba detectors for swing points, BOS/CHOCH, order blocks, FVG zones
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+One JIT-compiled pass over OHLC column arrays produces every Smart Money
+Concepts primitive (O(n · lookback), no per-candle Python):
+
+- Swing high/low: strict extreme of the 2*lookback+1 window, confirmed
+  `lookback` bars later (no look-ahead in live use)
+- BOS / CHOCH: a close through the last unbroken swing level; a break in the
+  current trend direction is a BOS, against it a CHOCH (trend flips). The
+  range of the first `lookback` bars seeds the levels before any swing exists
+- Order block: the last opposite-colour candle before the structure break
+- FVG zone: three-bar gap (low[i] > high[i-2] bullish, high[i] < low[i-2]
+  bearish), kept active until price trades through it
+
+The scan is resumable: trend / swing levels live in a small `state` array and
+active FVG zones in a `zones` table, so SMCTracker processes only the newly
+closed bar (incremental mode) and produces exactly the batch results.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.data_formats import CANDLE_IDX_OPEN, CANDLE_IDX_HIGH, CANDLE_IDX_LOW, CANDLE_IDX_CLOSE
+
+logger = logging.getLogger(__name__)
+
+# Try to import Numba for JIT compilation
+HAS_NUMBA = False
+try:
+    from numba import jit
+    HAS_NUMBA = True
+except ImportError:
+    def jit(func=None, **kwargs):
+        if func is None:
+            return lambda f: f
+        return func
+
+# Structure events
+BOS_UP = 1
+CHOCH_UP = 2
+BOS_DOWN = -1
+CHOCH_DOWN = -2
+STRUCTURE_NAMES = {BOS_UP: 'BOS_UP', CHOCH_UP: 'CHOCH_UP', BOS_DOWN: 'BOS_DOWN', CHOCH_DOWN: 'CHOCH_DOWN'}
+
+# state slots (float64 array; absolute bar indices are stored as floats)
+ST_TREND = 0          # -1 / 0 / 1
+ST_SH_LEVEL = 1       # last confirmed swing high
+ST_SH_IDX = 2
+ST_SH_BROKEN = 3      # 1.0 once a close has broken it (or no level yet)
+ST_SL_LEVEL = 4
+ST_SL_IDX = 5
+ST_SL_BROKEN = 6
+ST_PREV_SH = 7        # swing high before the last one (HH / LH)
+ST_PREV_SL = 8
+ST_EVENT = 9          # last structure event
+ST_EVENT_IDX = 10
+ST_OB_TYPE = 11       # last order block: 1 bullish / -1 bearish
+ST_OB_TOP = 12
+ST_OB_BOTTOM = 13
+ST_OB_IDX = 14
+STATE_SIZE = 15
+
+# zones columns (Z_DIR == 0 marks a free slot)
+Z_ORIGIN = 0
+Z_DIR = 1
+Z_TOP = 2
+Z_BOTTOM = 3
+
+DEFAULT_LOOKBACK = 5
+DEFAULT_OB_SEARCH = 20
+DEFAULT_MAX_ZONES = 32
+
+
+# ============================================================================
+# Numba kernel
+# ============================================================================
+
+@jit(nopython=True, cache=True, nogil=True)
+def smc_scan_jit(opens, highs, lows, closes, lookback, ob_search, min_gap_pct, start, base,
+                 state, zones, swing_high, swing_low, structure, trend,
+                 ob_type, ob_top, ob_bottom, ob_strength, fvg_dir, fvg_top, fvg_bottom, fvg_filled):
+    """
+    Scan bars [start, n) and write results in place
+
+    `base` is the absolute index of bar 0, so state / zones stay valid when
+    the arrays are a sliding window. fvg_filled[k] receives the absolute
+    index of the bar that filled the gap created at k (-1 while open).
+    """
+    n = closes.shape[0]
+    n_zones = zones.shape[0]
+
+    for i in range(start, n):
+        # 1️⃣ Swing confirmation: bar j has `lookback` bars on both sides now
+        j = i - lookback
+        if j - lookback >= 0:
+            hj = highs[j]
+            is_high = True
+            for k in range(j - lookback, i + 1):
+                if k != j and (highs[k] > hj or (k < j and highs[k] == hj)):
+                    is_high = False
+                    break
+            if is_high:
+                swing_high[j] = True
+                state[ST_PREV_SH] = state[ST_SH_LEVEL]
+                state[ST_SH_LEVEL] = hj
+                state[ST_SH_IDX] = base + j
+                state[ST_SH_BROKEN] = 0.0
+
+            lj = lows[j]
+            is_low = True
+            for k in range(j - lookback, i + 1):
+                if k != j and (lows[k] < lj or (k < j and lows[k] == lj)):
+                    is_low = False
+                    break
+            if is_low:
+                swing_low[j] = True
+                state[ST_PREV_SL] = state[ST_SL_LEVEL]
+                state[ST_SL_LEVEL] = lj
+                state[ST_SL_IDX] = base + j
+                state[ST_SL_BROKEN] = 0.0
+
+        # Opening range seeds the first structure levels (no swing confirmed yet)
+        if base + i == lookback:
+            if np.isnan(state[ST_SH_LEVEL]):
+                state[ST_SH_LEVEL] = highs[0:i].max()
+                state[ST_SH_IDX] = base + np.argmax(highs[0:i])
+                state[ST_SH_BROKEN] = 0.0
+            if np.isnan(state[ST_SL_LEVEL]):
+                state[ST_SL_LEVEL] = lows[0:i].min()
+                state[ST_SL_IDX] = base + np.argmin(lows[0:i])
+                state[ST_SL_BROKEN] = 0.0
+
+        # 2️⃣ Structure break on close + order block
+        event = 0
+        lo = max(0, i - ob_search)
+        if state[ST_SH_BROKEN] == 0.0 and closes[i] > state[ST_SH_LEVEL]:
+            event = CHOCH_UP if state[ST_TREND] < 0 else BOS_UP
+            state[ST_SH_BROKEN] = 1.0
+            state[ST_TREND] = 1.0
+            for k in range(i - 1, lo - 1, -1):
+                if closes[k] < opens[k]:
+                    ob_type[k] = 1
+                    ob_top[k] = highs[k]
+                    ob_bottom[k] = lows[k]
+                    ob_strength[k] = (closes[i] - lows[k]) / lows[k] if lows[k] > 0 else 0.0
+                    state[ST_OB_TYPE] = 1.0
+                    state[ST_OB_TOP] = highs[k]
+                    state[ST_OB_BOTTOM] = lows[k]
+                    state[ST_OB_IDX] = base + k
+                    break
+        elif state[ST_SL_BROKEN] == 0.0 and closes[i] < state[ST_SL_LEVEL]:
+            event = CHOCH_DOWN if state[ST_TREND] > 0 else BOS_DOWN
+            state[ST_SL_BROKEN] = 1.0
+            state[ST_TREND] = -1.0
+            for k in range(i - 1, lo - 1, -1):
+                if closes[k] > opens[k]:
+                    ob_type[k] = -1
+                    ob_top[k] = highs[k]
+                    ob_bottom[k] = lows[k]
+                    ob_strength[k] = (highs[k] - closes[i]) / highs[k] if highs[k] > 0 else 0.0
+                    state[ST_OB_TYPE] = -1.0
+                    state[ST_OB_TOP] = highs[k]
+                    state[ST_OB_BOTTOM] = lows[k]
+                    state[ST_OB_IDX] = base + k
+                    break
+
+        structure[i] = event
+        trend[i] = int(state[ST_TREND])
+        if event != 0:
+            state[ST_EVENT] = event
+            state[ST_EVENT_IDX] = base + i
+
+        # 3️⃣ FVG zones: fills first, then the gap this bar creates
+        for z in range(n_zones):
+            d = zones[z, Z_DIR]
+            if d == 0.0:
+                continue
+            if (d > 0 and lows[i] <= zones[z, Z_BOTTOM]) or (d < 0 and highs[i] >= zones[z, Z_TOP]):
+                origin = int(zones[z, Z_ORIGIN]) - base
+                if origin >= 0:
+                    fvg_filled[origin] = base + i
+                zones[z, Z_DIR] = 0.0
+
+        if i >= 2:
+            gap_dir = 0
+            top = 0.0
+            bottom = 0.0
+            if lows[i] > highs[i - 2] and highs[i - 2] > 0:
+                if (lows[i] - highs[i - 2]) / highs[i - 2] >= min_gap_pct:
+                    gap_dir = 1
+                    top = lows[i]
+                    bottom = highs[i - 2]
+            elif highs[i] < lows[i - 2] and lows[i - 2] > 0:
+                if (lows[i - 2] - highs[i]) / lows[i - 2] >= min_gap_pct:
+                    gap_dir = -1
+                    top = lows[i - 2]
+                    bottom = highs[i]
+            if gap_dir != 0:
+                fvg_dir[i] = gap_dir
+                fvg_top[i] = top
+                fvg_bottom[i] = bottom
+                # Free slot, else evict the oldest zone
+                slot = -1
+                oldest = 0
+                for z in range(n_zones):
+                    if zones[z, Z_DIR] == 0.0:
+                        slot = z
+                        break
+                    if zones[z, Z_ORIGIN] < zones[oldest, Z_ORIGIN]:
+                        oldest = z
+                if slot < 0:
+                    slot = oldest
+                zones[slot, Z_ORIGIN] = base + i
+                zones[slot, Z_DIR] = gap_dir
+                zones[slot, Z_TOP] = top
+                zones[slot, Z_BOTTOM] = bottom
+
+
+# ============================================================================
+# Batch API
+# ============================================================================
+
+def new_state() -> np.ndarray:
+    """Initial scan state: neutral trend, no swing levels"""
+    state = np.full(STATE_SIZE, np.nan)
+    state[ST_TREND] = 0.0
+    state[ST_SH_BROKEN] = 1.0
+    state[ST_SL_BROKEN] = 1.0
+    state[ST_EVENT] = 0.0
+    state[ST_OB_TYPE] = 0.0
+    return state
+
+
+def new_zones(max_zones: int = DEFAULT_MAX_ZONES) -> np.ndarray:
+    """Empty FVG zone table (max_zones, 4)"""
+    return np.zeros((max_zones, 4), dtype=np.float64)
+
+
+def _new_outputs(n: int) -> Dict[str, np.ndarray]:
+    return {
+        'swing_high': np.zeros(n, dtype=np.bool_),
+        'swing_low': np.zeros(n, dtype=np.bool_),
+        'structure': np.zeros(n, dtype=np.int8),
+        'trend': np.zeros(n, dtype=np.int8),
+        'ob_type': np.zeros(n, dtype=np.int8),
+        'ob_top': np.full(n, np.nan),
+        'ob_bottom': np.full(n, np.nan),
+        'ob_strength': np.zeros(n),
+        'fvg_dir': np.zeros(n, dtype=np.int8),
+        'fvg_top': np.full(n, np.nan),
+        'fvg_bottom': np.full(n, np.nan),
+        'fvg_filled': np.full(n, -1, dtype=np.int64),
+    }
+
+
+def _run_scan(opens, highs, lows, closes, lookback, ob_search, min_gap_pct, start, base,
+              state, zones, out) -> None:
+    smc_scan_jit(
+        opens, highs, lows, closes, int(lookback), int(ob_search), float(min_gap_pct),
+        int(start), int(base), state, zones,
+        out['swing_high'], out['swing_low'], out['structure'], out['trend'],
+        out['ob_type'], out['ob_top'], out['ob_bottom'], out['ob_strength'],
+        out['fvg_dir'], out['fvg_top'], out['fvg_bottom'], out['fvg_filled'],
+    )
+
+
+def _as_column(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def detect_structure(opens, highs, lows, closes, lookback: int = DEFAULT_LOOKBACK,
+                     ob_search: int = DEFAULT_OB_SEARCH, min_gap_pct: float = 0.0,
+                     max_zones: int = DEFAULT_MAX_ZONES) -> Dict[str, np.ndarray]:
+    """
+    Full-series SMC detection
+
+    Returns:
+        Per-bar arrays: swing_high / swing_low (bool), structure (event code),
+        trend, ob_type / ob_top / ob_bottom / ob_strength (at the order block
+        candle), fvg_dir / fvg_top / fvg_bottom / fvg_filled (at the third gap
+        bar), plus the final 'state' and active 'zones'
+    """
+    opens, highs, lows, closes = (_as_column(a) for a in (opens, highs, lows, closes))
+    out = _new_outputs(len(closes))
+    state = new_state()
+    zones = new_zones(max_zones)
+    if len(closes):
+        _run_scan(opens, highs, lows, closes, lookback, ob_search, min_gap_pct, 0, 0, state, zones, out)
+    out['state'] = state
+    out['zones'] = zones
+    return out
+
+
+def swing_points(highs, lows, lookback: int = DEFAULT_LOOKBACK) -> Dict[str, List[Dict]]:
+    """{'highs': [{'index', 'price'}], 'lows': [...]} of confirmed swing points"""
+    highs = _as_column(highs)
+    lows = _as_column(lows)
+    result = detect_structure(highs, highs, lows, lows, lookback=lookback)
+    return {
+        'highs': [{'index': int(i), 'price': float(highs[i])} for i in np.flatnonzero(result['swing_high'])],
+        'lows': [{'index': int(i), 'price': float(lows[i])} for i in np.flatnonzero(result['swing_low'])],
+    }
+
+
+def order_blocks(result: Dict[str, np.ndarray]) -> List[Dict]:
+    """Order blocks from a detect_structure result, oldest first"""
+    blocks = []
+    for k in np.flatnonzero(result['ob_type']):
+        blocks.append({
+            'index': int(k),
+            'type': 'bullish' if result['ob_type'][k] > 0 else 'bearish',
+            'top': float(result['ob_top'][k]),
+            'bottom': float(result['ob_bottom'][k]),
+            'price': float((result['ob_top'][k] + result['ob_bottom'][k]) / 2.0),
+            'strength': float(result['ob_strength'][k]),
+        })
+    return blocks
+
+
+def fvg_zones(result: Dict[str, np.ndarray]) -> List[Dict]:
+    """FVG zones from a detect_structure result (filled_at = -1 while open)"""
+    return [
+        {
+            'index': int(k),
+            'direction': 'bullish' if result['fvg_dir'][k] > 0 else 'bearish',
+            'top': float(result['fvg_top'][k]),
+            'bottom': float(result['fvg_bottom'][k]),
+            'filled_at': int(result['fvg_filled'][k]),
+        }
+        for k in np.flatnonzero(result['fvg_dir'])
+    ]
+
+
+def _trend_name(trend: float) -> str:
+    return 'bullish' if trend > 0 else 'bearish' if trend < 0 else 'neutral'
+
+
+def market_structure(state: np.ndarray) -> Dict:
+    """
+    Trend and swing sequence from a scan state
+
+    structure_valid requires at least one confirmed swing high and low.
+    """
+    sh, prev_sh = state[ST_SH_LEVEL], state[ST_PREV_SH]
+    sl, prev_sl = state[ST_SL_LEVEL], state[ST_PREV_SL]
+    event = int(state[ST_EVENT])
+    return {
+        'trend': _trend_name(state[ST_TREND]),
+        'structure_valid': bool(not np.isnan(sh) and not np.isnan(sl)),
+        'higher_high': bool(sh > prev_sh),
+        'lower_high': bool(sh < prev_sh),
+        'higher_low': bool(sl > prev_sl),
+        'lower_low': bool(sl < prev_sl),
+        'last_event': STRUCTURE_NAMES.get(event),
+        'swing_high': None if np.isnan(sh) else float(sh),
+        'swing_low': None if np.isnan(sl) else float(sl),
+    }
+
+
+# ============================================================================
+# Incremental mode
+# ============================================================================
+
+class SMCTracker:
+    """
+    Incremental SMC state for one (symbol, timeframe)
+
+    Keeps the last `history` closed bars in a BarRing and scans only the newly
+    closed bar on update(); results are identical to detect_structure over
+    the full series as long as history >= max(2*lookback+1, ob_search+1).
+    """
+
+    def __init__(self, lookback: int = DEFAULT_LOOKBACK, ob_search: int = DEFAULT_OB_SEARCH,
+                 min_gap_pct: float = 0.0, max_zones: int = DEFAULT_MAX_ZONES):
+        from src.timeframe_buffer import BarRing
+
+        self.lookback = lookback
+        self.ob_search = ob_search
+        self.min_gap_pct = min_gap_pct
+        self.history = max(2 * lookback + 1, ob_search + 1)
+        self.ring = BarRing(self.history)
+        self.state = new_state()
+        self.zones = new_zones(max_zones)
+        self._offset = 0  # absolute index of the first bar ever loaded into the ring
+        self._out = _new_outputs(self.history)
+
+    @property
+    def bar_count(self) -> int:
+        """Closed bars processed so far"""
+        return self._offset + self.ring.total
+
+    def seed(self, ohlcv: np.ndarray) -> None:
+        """Scan a (6, n) block of closed bars in one pass (e.g. after preload)"""
+        ohlcv = np.asarray(ohlcv, dtype=np.float64)
+        n = ohlcv.shape[1]
+        self.state = new_state()
+        self.zones = new_zones(len(self.zones))
+        if n:
+            out = _new_outputs(n)
+            _run_scan(
+                _as_column(ohlcv[CANDLE_IDX_OPEN]), _as_column(ohlcv[CANDLE_IDX_HIGH]),
+                _as_column(ohlcv[CANDLE_IDX_LOW]), _as_column(ohlcv[CANDLE_IDX_CLOSE]),
+                self.lookback, self.ob_search, self.min_gap_pct, 0, 0, self.state, self.zones, out
+            )
+        self.ring.load(ohlcv)
+        self._offset = n - len(self.ring)
+
+    def update(self, bar: tuple) -> Dict:
+        """
+        Process one closed bar (timestamp_ms, open, high, low, close, volume)
+
+        Returns:
+            Events of this bar: swing_high / swing_low (confirmed swing point),
+            structure (BOS_UP / CHOCH_UP / BOS_DOWN / CHOCH_DOWN), order_block,
+            fvg — None when absent
+        """
+        ts, o, h, l, c, v = bar[:6]
+        self.ring.append(ts, o, h, l, c, v)
+        view = self.ring.view()
+        n = view.shape[1]
+        base = self.bar_count - n
+
+        out = {key: arr[:n] for key, arr in self._out.items()}
+        for key, arr in out.items():
+            arr.fill(-1 if key == 'fvg_filled' else 0)
+
+        _run_scan(
+            view[CANDLE_IDX_OPEN], view[CANDLE_IDX_HIGH], view[CANDLE_IDX_LOW], view[CANDLE_IDX_CLOSE],
+            self.lookback, self.ob_search, self.min_gap_pct, n - 1, base, self.state, self.zones, out
+        )
+
+        i = n - 1
+        j = i - self.lookback
+        events = {'swing_high': None, 'swing_low': None, 'structure': None, 'order_block': None, 'fvg': None}
+        if j >= 0 and out['swing_high'][j]:
+            events['swing_high'] = {'index': base + j, 'price': float(view[CANDLE_IDX_HIGH][j])}
+        if j >= 0 and out['swing_low'][j]:
+            events['swing_low'] = {'index': base + j, 'price': float(view[CANDLE_IDX_LOW][j])}
+        if out['structure'][i]:
+            events['structure'] = STRUCTURE_NAMES[int(out['structure'][i])]
+            if out['ob_type'].any():
+                k = int(np.flatnonzero(out['ob_type'])[-1])
+                events['order_block'] = {
+                    'index': base + k,
+                    'type': 'bullish' if out['ob_type'][k] > 0 else 'bearish',
+                    'top': float(out['ob_top'][k]),
+                    'bottom': float(out['ob_bottom'][k]),
+                    'strength': float(out['ob_strength'][k]),
+                }
+        if out['fvg_dir'][i]:
+            events['fvg'] = {
+                'index': base + i,
+                'direction': 'bullish' if out['fvg_dir'][i] > 0 else 'bearish',
+                'top': float(out['fvg_top'][i]),
+                'bottom': float(out['fvg_bottom'][i]),
+            }
+        return events
+
+    def active_zones(self) -> List[Dict]:
+        """Unfilled FVG zones, oldest first"""
+        zones = self.zones[self.zones[:, Z_DIR] != 0.0]
+        zones = zones[np.argsort(zones[:, Z_ORIGIN])]
+        return [
+            {'index': int(z[Z_ORIGIN]), 'direction': 'bullish' if z[Z_DIR] > 0 else 'bearish',
+             'top': float(z[Z_TOP]), 'bottom': float(z[Z_BOTTOM])}
+            for z in zones
+        ]
+
+    def features(self, price: Optional[float] = None) -> Dict:
+        """
+        Flat SMC features for the signal feature dict
+
+        Distances are fractions of price to the nearest zone edge (0 inside
+        the zone, None when there is no zone).
+        """
+        state = self.state
+        if price is None and len(self.ring):
+            price = self.ring.last_bar()[CANDLE_IDX_CLOSE]
+
+        active = self.zones[self.zones[:, Z_DIR] != 0.0]
+        event_idx = state[ST_EVENT_IDX]
+        features = {
+            'smc_trend': int(state[ST_TREND]),
+            'smc_structure': STRUCTURE_NAMES.get(int(state[ST_EVENT])),
+            'smc_structure_age': None if np.isnan(event_idx) else int(self.bar_count - 1 - event_idx),
+            'smc_fvg_bull': int((active[:, Z_DIR] > 0).sum()),
+            'smc_fvg_bear': int((active[:, Z_DIR] < 0).sum()),
+            'smc_fvg_distance': None,
+            'smc_ob_type': int(state[ST_OB_TYPE]),
+            'smc_ob_distance': None,
+        }
+        if price:
+            if len(active):
+                gaps = np.maximum(np.maximum(active[:, Z_BOTTOM] - price, price - active[:, Z_TOP]), 0.0)
+                features['smc_fvg_distance'] = float(gaps.min() / price)
+            if state[ST_OB_TYPE] != 0:
+                gap = max(state[ST_OB_BOTTOM] - price, price - state[ST_OB_TOP], 0.0)
+                features['smc_ob_distance'] = float(gap / price)
+        return features
+
+
+def attach_trackers(buffer, symbols: List[str], timeframe: str = '1m', **params) -> Dict[str, SMCTracker]:
+    """
+    Seed one SMCTracker per symbol from a TimeframeBuffer and keep it current
+
+    Seeds from the closed bars already in the buffer (preload), then
+    registers an on_bar_close callback so every closed bar is scanned once.
+    """
+    trackers = {}
+    for symbol in symbols:
+        tracker = SMCTracker(**params)
+        ohlcv = buffer.get_ohlcv(symbol, timeframe)
+        if buffer.bar_is_open.get(symbol, {}).get(timeframe) and ohlcv.shape[1]:
+            ohlcv = ohlcv[:, :-1]
+        tracker.seed(ohlcv.copy())
+        trackers[symbol] = tracker
+
+    def on_close(symbol, tf, bar):
+        tracker = trackers.get(symbol)
+        if tracker is not None:
+            tracker.update(bar)
+
+    buffer.on_bar_close(timeframe, on_close)
+    return trackers
@@ -0,0 +1,234 @@
+"""
+💾 Account State Writer - Coalesced Postgres persistence
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Mutations only mark the state dirty; one background task flushes at most
+every flush_interval_ms, however many mutations happened in between:
+
+- account_state: a single current-state row (id = 1), upserted per flush,
+  so "latest state" is a primary-key lookup
+- account_state_history: one compact delta per flush (changed scalars plus
+  added / changed / removed positions), compacted to the newest
+  history_limit rows every compact_every flushes
+
+Legacy snapshot rows (one INSERT per mutation) are folded into the id = 1
+row once, when the schema is first ensured: the newest snapshot wins.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STATE_ROW_ID = 1
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS account_state (
+        id SERIAL PRIMARY KEY,
+        balance DOUBLE PRECISION NOT NULL DEFAULT 10000.0,
+        pnl DOUBLE PRECISION NOT NULL DEFAULT 0.0,
+        trade_count INTEGER NOT NULL DEFAULT 0,
+        positions JSONB NOT NULL DEFAULT '{}',
+        last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS account_state_history (
+        seq BIGSERIAL PRIMARY KEY,
+        delta JSONB NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Fold legacy append-only snapshots into the single current row. The legacy
+# ids are SERIAL, so id = 1 is the OLDEST snapshot: overwrite it with the
+# newest one, and only then drop the rest.
+MIGRATE_SQL = """
+    INSERT INTO account_state (id, balance, pnl, trade_count, positions, last_update, updated_at)
+    SELECT $1, balance, pnl, trade_count, positions, last_update, updated_at
+    FROM account_state
+    WHERE id = (SELECT id FROM account_state ORDER BY updated_at DESC NULLS LAST, id DESC LIMIT 1)
+    ON CONFLICT (id) DO UPDATE SET
+        balance = EXCLUDED.balance,
+        pnl = EXCLUDED.pnl,
+        trade_count = EXCLUDED.trade_count,
+        positions = EXCLUDED.positions,
+        last_update = EXCLUDED.last_update,
+        updated_at = EXCLUDED.updated_at;
+    DELETE FROM account_state WHERE id <> $1
+"""
+
+UPSERT_SQL = """
+    INSERT INTO account_state (id, balance, pnl, trade_count, positions, last_update, updated_at)
+    VALUES ($1, $2, $3, $4, $5::jsonb, $6, CURRENT_TIMESTAMP)
+    ON CONFLICT (id) DO UPDATE SET
+        balance = EXCLUDED.balance,
+        pnl = EXCLUDED.pnl,
+        trade_count = EXCLUDED.trade_count,
+        positions = EXCLUDED.positions,
+        last_update = EXCLUDED.last_update,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+HISTORY_SQL = "INSERT INTO account_state_history (delta) VALUES ($1::jsonb)"
+
+COMPACT_SQL = """
+    DELETE FROM account_state_history
+    WHERE seq <= (SELECT COALESCE(MAX(seq), 0) FROM account_state_history) - $1
+"""
+
+
+def state_delta(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Changes from one snapshot to the next
+
+    Scalars that changed are copied; positions become {symbol: position}
+    for added / changed ones and {symbol: None} for removed ones.
+    """
+    if old is None:
+        return dict(new)
+    delta = {k: v for k, v in new.items() if k != 'positions' and old.get(k) != v}
+    old_positions = old.get('positions', {})
+    new_positions = new.get('positions', {})
+    positions = {s: p for s, p in new_positions.items() if old_positions.get(s) != p}
+    positions.update({s: None for s in old_positions if s not in new_positions})
+    if positions:
+        delta['positions'] = positions
+    return delta
+
+
+class AccountStateWriter:
+    """Debounced single-row upsert + delta log for the account state"""
+
+    def __init__(self, snapshot: Callable[[], Dict[str, Any]],
+                 connect: Callable[[], Awaitable[Any]],
+                 flush_interval_ms: float = 500, history_limit: int = 10000,
+                 compact_every: int = 100, retry_delay: float = 5.0):
+        """
+        Args:
+            snapshot: Returns {balance, pnl, trade_count, positions} (called at flush time)
+            connect: Coroutine returning an asyncpg-style connection (or None if unavailable)
+        """
+        self.snapshot = snapshot
+        self.connect = connect
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.history_limit = history_limit
+        self.compact_every = compact_every
+        self.retry_delay = retry_delay
+
+        self._conn = None
+        self._schema_ready = False
+        self._dirty: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._last: Optional[Dict[str, Any]] = None
+        self._next_flush = 0.0
+
+        self.marks = 0
+        self.flushes = 0
+        self.failures = 0
+
+    def _ensure_task(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._dirty = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._conn = None
+            self._task = loop.create_task(self._run(), name="account-state-writer")
+
+    def mark_dirty(self) -> None:
+        """Record that the state changed; the background task flushes it soon"""
+        self.marks += 1
+        self._ensure_task()
+        self._dirty.set()
+
+    async def _run(self) -> None:
+        while True:
+            await self._dirty.wait()
+            wait = self._next_flush - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self.flush()
+
+    async def _connection(self):
+        if self._conn is not None and not getattr(self._conn, 'is_closed', lambda: False)():
+            return self._conn
+        self._conn = await self.connect()
+        self._schema_ready = False
+        return self._conn
+
+    async def _ensure_schema(self, conn) -> None:
+        if self._schema_ready:
+            return
+        await conn.execute(SCHEMA_SQL)
+        async with conn.transaction():
+            for statement in MIGRATE_SQL.split(';'):
+                await conn.execute(statement, STATE_ROW_ID)
+        self._schema_ready = True
+
+    async def flush(self) -> bool:
+        """Write the current snapshot now (no-op if nothing changed since the last flush)"""
+        self._ensure_task()
+        async with self._flush_lock:
+            self._dirty.clear()
+            self._next_flush = time.monotonic() + self.flush_interval
+            state = self.snapshot()
+            delta = state_delta(self._last, state)
+            if not delta:
+                return True
+
+            try:
+                conn = await self._connection()
+                if conn is None:
+                    raise ConnectionError("Postgres not available")
+                await self._ensure_schema(conn)
+                async with conn.transaction():
+                    await conn.execute(
+                        UPSERT_SQL, STATE_ROW_ID,
+                        state['balance'], state['pnl'], state['trade_count'],
+                        json.dumps(state['positions']), datetime.fromtimestamp(time.time())
+                    )
+                    await conn.execute(HISTORY_SQL, json.dumps(delta))
+                    if (self.flushes + 1) % self.compact_every == 0:
+                        await conn.execute(COMPACT_SQL, self.history_limit)
+            except Exception as e:
+                self.failures += 1
+                self._conn = None
+                self._next_flush = time.monotonic() + self.retry_delay
+                self._dirty.set()  # retry after retry_delay
+                logger.error(f"❌ Failed to sync state to Postgres: {e}")
+                return False
+
+            self._last = state
+            self.flushes += 1
+            logger.debug(
+                f"💾 State persisted to Postgres: Balance=${state['balance']:.2f}, "
+                f"Positions={len(state['positions'])}, Trades={state['trade_count']} "
+                f"({self.marks} marks / {self.flushes} flushes)"
+            )
+            return True
+
+    async def close(self) -> None:
+        """Flush pending changes, stop the task and close the connection"""
+        if self._task is not None:
+            if self._dirty is not None and self._dirty.is_set():
+                await self.flush()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            try:
+                await self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'marks': self.marks, 'flushes': self.flushes, 'failures': self.failures,
+                'dirty': bool(self._dirty and self._dirty.is_set())}
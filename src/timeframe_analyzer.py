@@ -1,14 +1,26 @@
 """
 📊 多時間框架分析 - 正確的高頻交易架構
 分層分析：1D 趨勢 → 1H 確認 → 15m 機會 → 5m/1m 進場
+
+批次版本（validate_setups）：一次數組運算驗證整個交易對宇宙
 """
 
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Sequence
 import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# 趨勢編碼（批次結果矩陣使用）
+TREND_DOWN = -1
+TREND_RANGING = 0
+TREND_UP = 1
+TREND_NAMES = {TREND_DOWN: 'DOWN', TREND_RANGING: 'RANGING', TREND_UP: 'UP'}
+
+# 驗證使用的時間框架及綜合信心度權重（第一個為主趨勢）
+# 1H: 40% (主趨勢) / 15m: 30% (確認) / 5m: 20% (機會) / 1m: 10% (進場)
+VALIDATION_WEIGHTS = {'1h': 0.40, '15m': 0.30, '5m': 0.20, '1m': 0.10}
+
 
 class TimeframeAnalyzer:  # type: ignore[name-defined]
     """多時間框架市場分析"""
@@ -98,17 +110,12 @@ class TimeframeAnalyzer:  # type: ignore[name-defined]
                 logger.debug(f"❌ {symbol} 進場方向與主趨勢不一致")
                 return None
             
-            # 綜合信心度（不依賴 1D）
-            # 1H: 40% 權重 (主趨勢)
-            # 15m: 30% 權重 (確認)
-            # 5m: 20% 權重 (機會)
-            # 1m: 10% 權重 (進場)
-            
+            # 綜合信心度（不依賴 1D，權重見 VALIDATION_WEIGHTS）
             composite_confidence = (
-                h1_analysis['confidence'] * 0.40 +
-                m15_analysis['confidence'] * 0.30 +
-                m5_analysis['confidence'] * 0.20 +
-                m1_analysis['confidence'] * 0.10
+                h1_analysis['confidence'] * VALIDATION_WEIGHTS['1h'] +
+                m15_analysis['confidence'] * VALIDATION_WEIGHTS['15m'] +
+                m5_analysis['confidence'] * VALIDATION_WEIGHTS['5m'] +
+                m1_analysis['confidence'] * VALIDATION_WEIGHTS['1m']
             )
             
             if composite_confidence < self.MIN_CONFIDENCE:
@@ -118,11 +125,10 @@ class TimeframeAnalyzer:  # type: ignore[name-defined]
             # ✅ 設置通過所有驗證
             signal = {
                 'symbol': symbol,
-                'direction': d1_analysis['trend'],
+                'direction': primary_trend,
                 'confidence': composite_confidence,
-                'strength': d1_analysis['strength'],
+                'strength': h1_analysis['strength'],
                 'timeframe_analysis': {
-                    '1d': d1_analysis,
                     '1h': h1_analysis,
                     '15m': m15_analysis,
                     '5m': m5_analysis,
@@ -141,6 +147,130 @@ class TimeframeAnalyzer:  # type: ignore[name-defined]
             logger.error(f"Error in validate_setup: {e}", exc_info=True)
             return None
 
+    # ------------------------------------------------------------------
+    # 批次（向量化）版本
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def analyze_trends(closes: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        analyze_trend 的向量化版本（結果與逐個調用一致）
+
+        Args:
+            closes: (..., k) 收盤價，最後一軸按時間升序，只使用最後 3 根；
+                    含 NaN（數據不足）的位置視為 RANGING、strength=0、confidence=0
+
+        Returns:
+            {'trend': int8 (...)（TREND_*）, 'strength': (...), 'confidence': (...)}
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        shape = closes.shape[:-1]
+        if closes.shape[-1] < 3:
+            return {
+                'trend': np.zeros(shape, dtype=np.int8),
+                'strength': np.zeros(shape),
+                'confidence': np.zeros(shape),
+            }
+
+        c1, c2, c3 = closes[..., -3], closes[..., -2], closes[..., -1]
+        valid = ~(np.isnan(c1) | np.isnan(c2) | np.isnan(c3))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            up = valid & (c3 > c2) & (c2 > c1)
+            down = valid & (c3 < c2) & (c2 < c1)
+            trend = np.where(up, TREND_UP, np.where(down, TREND_DOWN, TREND_RANGING)).astype(np.int8)
+
+            strength = np.where(
+                up, np.minimum(1.0, (c3 - c1) / c1),
+                np.where(down, np.minimum(1.0, (c1 - c3) / c1), 0.3)
+            )
+            momentum = np.abs(c3 - c2) / c2
+            confidence = np.minimum(1.0, strength + momentum * 0.5)
+
+        strength = np.where(valid, strength, 0.0)
+        confidence = np.where(valid, confidence, 0.0)
+        return {'trend': trend, 'strength': strength, 'confidence': confidence}
+
+    def validate_setups(self, closes: np.ndarray,
+                        weights: Optional[Sequence[float]] = None) -> Dict[str, np.ndarray]:
+        """
+        validate_setup 的批次版本：整個交易對宇宙一次數組運算
+
+        Args:
+            closes: (n_symbols, n_timeframes, k) 最近收盤價，時間框架順序與
+                    VALIDATION_WEIGHTS 相同（第一個為主趨勢），缺失數據用 NaN
+            weights: 各時間框架的綜合信心度權重（預設 VALIDATION_WEIGHTS）
+
+        Returns:
+            {
+                'trend': (n_symbols, n_timeframes) int8,
+                'strength': (n_symbols, n_timeframes),
+                'confidence': (n_symbols, n_timeframes),
+                'composite': (n_symbols,) 綜合信心度,
+                'direction': (n_symbols,) 主趨勢,
+                'aligned': (n_symbols,) bool — 所有時間框架一致且綜合信心度達標
+            }
+        """
+        analysis = self.analyze_trends(closes)
+        trend = analysis['trend']
+
+        if weights is None:
+            weights = list(VALIDATION_WEIGHTS.values())
+        composite = analysis['confidence'] @ np.asarray(weights, dtype=np.float64)
+
+        direction = trend[:, 0]
+        aligned = (trend == direction[:, None]).all(axis=1) & (composite >= self.MIN_CONFIDENCE)
+
+        analysis.update({'composite': composite, 'direction': direction, 'aligned': aligned})
+        return analysis
+
+    @staticmethod
+    def collect_closes(buffer, symbols: Sequence[str],
+                       timeframes: Sequence[str] = tuple(VALIDATION_WEIGHTS), n: int = 3) -> np.ndarray:
+        """
+        從 TimeframeBuffer / SharedBarStore 收集 validate_setups 的輸入 (n_symbols, n_timeframes, n)
+
+        不足 n 根的位置左側補 NaN。傳入 SharedBarStore 時改用 column_matrix 一次收集。
+        """
+        if hasattr(buffer, 'column_matrix'):
+            index = {s: i for i, s in enumerate(buffer.symbols)}
+            rows = [index.get(symbol, -1) for symbol in symbols]
+            gathered = buffer.column_matrix(list(timeframes), n)
+            out = np.full((len(symbols), len(timeframes), n), np.nan)
+            present = [i for i, row in enumerate(rows) if row >= 0]
+            out[present] = gathered[[rows[i] for i in present]]
+            return out
+
+        out = np.full((len(symbols), len(timeframes), n), np.nan)
+        for i, symbol in enumerate(symbols):
+            for j, tf in enumerate(timeframes):
+                column = buffer.get_column(symbol, tf, 'close', n)
+                if len(column):
+                    out[i, j, n - len(column):] = column
+        return out
+
+    @staticmethod
+    def signals_from_batch(symbols: Sequence[str], result: Dict[str, np.ndarray],
+                           timeframes: Sequence[str] = tuple(VALIDATION_WEIGHTS)) -> List[Dict]:
+        """把 validate_setups 結果中通過驗證的交易對轉成 validate_setup 的信號格式"""
+        signals = []
+        for i in np.flatnonzero(result['aligned']):
+            signals.append({
+                'symbol': symbols[i],
+                'direction': TREND_NAMES[int(result['direction'][i])],
+                'confidence': float(result['composite'][i]),
+                'strength': float(result['strength'][i, 0]),
+                'timeframe_analysis': {
+                    tf: {
+                        'trend': TREND_NAMES[int(result['trend'][i, j])],
+                        'strength': float(result['strength'][i, j]),
+                        'confidence': float(result['confidence'][i, j]),
+                    }
+                    for j, tf in enumerate(timeframes)
+                }
+            })
+        return signals
+
 
 _analyzer: Optional[TimeframeAnalyzer] = None
 
@@ -151,6 +281,3 @@ def get_timeframe_analyzer() -> TimeframeAnalyzer:
     if _analyzer is None:
         _analyzer = TimeframeAnalyzer()
     return _analyzer
-
-# Fix imports at top
-from typing import Optional
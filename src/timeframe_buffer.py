@@ -1,26 +1,152 @@
 """
 📊 多時間框架數據緩衝區 - 聚合多個時間框架的 K 線數據
 用於信號生成的完整多時間框架分析
+
+聚合：每個 tick 只更新基礎時間框架（1m），較高時間框架在基礎 K 線收盤時增量合併
+存儲：每個 (symbol, timeframe) 一個預分配的 NumPy 環形數組（列式 OHLCV）
+- 追加 / 原地更新 O(1)，每個 tick 零分配
+- 讀取返回按時間排序的零拷貝視圖（連續 float64，可直接給指標使用）
 """
 
 import logging
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from collections import defaultdict
-import time
+
+import numpy as np
+
+from src.data_formats import (
+    CANDLE_IDX_TIMESTAMP, CANDLE_IDX_OPEN, CANDLE_IDX_HIGH,
+    CANDLE_IDX_LOW, CANDLE_IDX_CLOSE, CANDLE_IDX_VOLUME
+)
 
 logger = logging.getLogger(__name__)
 
+# 列名 → 行索引（與 candle 元組索引一致）
+COLUMNS = {
+    'timestamp': CANDLE_IDX_TIMESTAMP,
+    'open': CANDLE_IDX_OPEN,
+    'high': CANDLE_IDX_HIGH,
+    'low': CANDLE_IDX_LOW,
+    'close': CANDLE_IDX_CLOSE,
+    'volume': CANDLE_IDX_VOLUME,
+}
+NUM_COLUMNS = len(COLUMNS)
+
+
+# 共享內存 K 線環的 header 欄位（int64）：seqlock 序號、累計寫入數量
+HEADER_SEQ = 0
+HEADER_TOTAL = 1
+
+
+class BarRing:
+    """
+    單個 (symbol, timeframe) 的列式環形 K 線存儲
+
+    鏡像寫入：容量為 N 的環使用 (6, 2N) 數組，每根 K 線同時寫入
+    slot 和 slot + N，因此最近 N 根 K 線永遠是一段連續內存，
+    讀取只需切片（零拷貝），不需要重新排序。
+
+    傳入 store/header 時，環直接寫入共享內存（見 src/bar_store.py）：
+    每次寫入前後各遞增一次 header[HEADER_SEQ]（seqlock），讀者據此檢測撕裂讀取。
+    """
+
+    __slots__ = ('capacity', 'store', 'total', 'header')
+
+    def __init__(self, capacity: int, store: Optional[np.ndarray] = None,
+                 header: Optional[np.ndarray] = None):
+        self.capacity = capacity
+        if store is None:
+            store = np.zeros((NUM_COLUMNS, 2 * capacity), dtype=np.float64)
+        self.store = store
+        self.header = header
+        self.total = int(header[HEADER_TOTAL]) if header is not None else 0  # 累計寫入的 K 線數量
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def _last_slot(self) -> int:
+        return (self.total - 1) % self.capacity
+
+    def _begin_write(self) -> None:
+        if self.header is not None:
+            self.header[HEADER_SEQ] += 1  # 奇數：寫入中
+
+    def _end_write(self) -> None:
+        if self.header is not None:
+            self.header[HEADER_TOTAL] = self.total
+            self.header[HEADER_SEQ] += 1  # 偶數：穩定
+
+    def append(self, ts: float, o: float, h: float, l: float, c: float, v: float) -> None:
+        """追加一根新 K 線 O(1)"""
+        self._begin_write()
+        slot = self.total % self.capacity
+        mirror = slot + self.capacity
+        store = self.store
+        store[0, slot] = store[0, mirror] = ts
+        store[1, slot] = store[1, mirror] = o
+        store[2, slot] = store[2, mirror] = h
+        store[3, slot] = store[3, mirror] = l
+        store[4, slot] = store[4, mirror] = c
+        store[5, slot] = store[5, mirror] = v
+        self.total += 1
+        self._end_write()
+
+    def update_last(self, h: float, l: float, c: float, v: float) -> None:
+        """原地更新最後一根 K 線 O(1)：high/low 取極值，close 覆蓋，volume 累加"""
+        slot = self._last_slot()
+        mirror = slot + self.capacity
+        store = self.store
+        high = max(store[2, slot], h)
+        low = min(store[3, slot], l)
+        volume = store[5, slot] + v
+        self._begin_write()
+        store[2, slot] = store[2, mirror] = high
+        store[3, slot] = store[3, mirror] = low
+        store[4, slot] = store[4, mirror] = c
+        store[5, slot] = store[5, mirror] = volume
+        self._end_write()
+
+    def last_bar(self) -> tuple:
+        """最後一根 K 線 (timestamp_ms, open, high, low, close, volume)"""
+        return tuple(self.store[:, self._last_slot()].tolist())
+
+    def view(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        最近 n 根 K 線的列式視圖 (6, n)，按時間升序
+
+        每一行（如 view[CANDLE_IDX_CLOSE]）是連續的 float64 數組。
+        視圖與內部存儲共享內存，新 K 線寫入後可能被覆蓋；需要保留時請 copy()。
+        """
+        count = len(self)
+        if n is not None:
+            count = min(max(n, 0), count)
+        if count == 0:
+            return self.store[:, :0]
+        end = self._last_slot() + self.capacity + 1
+        return self.store[:, end - count:end]
+
+    def load(self, columns: np.ndarray) -> None:
+        """批量覆蓋載入 (6, k) 列式數據（按時間升序）"""
+        columns = columns[:, -self.capacity:]
+        k = columns.shape[1]
+        self._begin_write()
+        self.store[:, :k] = columns
+        self.store[:, self.capacity:self.capacity + k] = columns
+        self.total = k
+        self._end_write()
+
 
 class TimeframeBuffer:
     """
-    聚合多個時間框架的 K 線數據
-    
-    - 每個符號維護 5 個時間框架的歷史數據
-    - 自動聚合原始 tick 數據到不同時間框架
-    - 提供完整的 candles_by_tf 結構用於多時間框架分析
+    聚合多個時間框架的 K 線數據（分層 rollup）
+
+    - 每個 tick 只更新最小時間框架（預設 1m）
+    - 基礎 K 線收盤時增量合併到較高時間框架（1m → 5m / 15m / 1h / 1d）
+    - 時間框架可配置（如 3m、4h），新增時間框架不會增加每個 tick 的成本
+    - 每個時間框架可註冊 K 線收盤回調
     """
-    
-    # 時間框架配置（秒）
+
+    # 預設時間框架配置（秒）
     TIMEFRAMES = {
         '1m': 60,
         '5m': 300,
@@ -28,83 +154,220 @@ class TimeframeBuffer:
         '1h': 3600,
         '1d': 86400
     }
-    
-    def __init__(self, max_candles_per_tf: int = 500):
+
+    def __init__(self, max_candles_per_tf: int = 500, timeframes: Optional[Dict[str, int]] = None):
         """
         初始化多時間框架緩衝區
-        
+
         Args:
-            max_candles_per_tf: 每個時間框架最多保留的 K 線數量
+            max_candles_per_tf: 每個時間框架最多保留的 K 線數量（環形數組容量）
+            timeframes: {名稱: 秒數}，預設 TIMEFRAMES；必須都是最小時間框架的整數倍
         """
         self.max_candles_per_tf = max_candles_per_tf
-        
-        # 格式：{symbol: {timeframe: [candles...]}}
-        self.data: Dict[str, Dict[str, List[tuple]]] = defaultdict(
-            lambda: {tf: [] for tf in self.TIMEFRAMES.keys()}
+
+        # 按週期排序，最小的是基礎時間框架
+        self.timeframes: Dict[str, int] = dict(
+            sorted((timeframes or self.TIMEFRAMES).items(), key=lambda item: item[1])
         )
-        
-        # 追蹤每個時間框架的當前開倉時間
-        # 格式：{symbol: {timeframe: open_time}}
-        self.current_candle_time: Dict[str, Dict[str, float]] = defaultdict(
-            lambda: {tf: 0 for tf in self.TIMEFRAMES.keys()}
+        self.base_tf = next(iter(self.timeframes))
+        self._tf_ms = {tf: seconds * 1000 for tf, seconds in self.timeframes.items()}
+        self._higher_tfs = self._validate_timeframes()
+
+        # 格式：{symbol: {timeframe: BarRing}}
+        self.data: Dict[str, Dict[str, BarRing]] = defaultdict(
+            lambda: {tf: BarRing(self.max_candles_per_tf) for tf in self.timeframes}
+        )
+
+        # 每個時間框架當前 K 線的開盤時間（毫秒）以及是否仍在形成中
+        # 格式：{symbol: {timeframe: open_time_ms}}
+        self.current_open_ms: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {tf: 0 for tf in self.timeframes}
         )
-    
+        self.bar_is_open: Dict[str, Dict[str, bool]] = defaultdict(
+            lambda: {tf: False for tf in self.timeframes}
+        )
+
+        # 預熱載入的形成中 K 線已包含載入時刻之前的成交量：
+        # 開盤時間不晚於此（毫秒）的基礎 K 線合併時只更新 high/low/close，避免重複計算成交量
+        self._preloaded_through_ms: Dict[str, Dict[str, int]] = defaultdict(dict)
+
+        # K 線收盤回調：{timeframe: [callback(symbol, timeframe, bar_tuple)]}
+        self._close_callbacks: Dict[str, List[Callable]] = defaultdict(list)
+
+    def _validate_timeframes(self) -> List[str]:
+        """所有時間框架必須是基礎時間框架的整數倍；返回需要 rollup 的較高時間框架"""
+        base_seconds = self.timeframes[self.base_tf]
+        for tf, seconds in self.timeframes.items():
+            if seconds % base_seconds != 0:
+                raise ValueError(f"Timeframe {tf} ({seconds}s) is not a multiple of {self.base_tf}")
+        return [tf for tf in self.timeframes if tf != self.base_tf]
+
+    def on_bar_close(self, timeframe: str, callback: Callable) -> None:
+        """
+        註冊 K 線收盤回調
+
+        Args:
+            timeframe: 時間框架
+            callback: callback(symbol, timeframe, bar)，bar 為 (timestamp_ms, open, high, low, close, volume)
+        """
+        if timeframe not in self.timeframes:
+            raise ValueError(f"Unknown timeframe: {timeframe}")
+        self._close_callbacks[timeframe].append(callback)
+
     def add_tick(self, symbol: str, tick: tuple) -> None:
         """
-        添加 tick 數據並聚合到所有時間框架
-        
+        添加 tick 數據：只更新基礎時間框架，收盤時再向上合併
+
         Args:
             symbol: 交易對
             tick: (timestamp_ms, open, high, low, close, volume)
         """
         timestamp_ms, o, h, l, c, v = tick
-        timestamp = timestamp_ms / 1000.0  # 轉換為秒
-        
-        # 為每個時間框架聚合 tick
-        for tf_name, tf_seconds in self.TIMEFRAMES.items():
-            # 計算該 tick 應該屬於哪個 K 線
-            candle_open_time = int(timestamp / tf_seconds) * tf_seconds
-            
-            # 如果是新的 K 線，創建新的 candle
-            if candle_open_time > self.current_candle_time[symbol][tf_name]:
-                # 保存舊 K 線（如果存在）
-                if self.data[symbol][tf_name]:
-                    # 更新最後一根 K 線的收盤價（如果時間相同，更新；否則創建新的）
-                    pass
-                
-                # 創建新 K 線
-                self.current_candle_time[symbol][tf_name] = candle_open_time
-                new_candle = (
-                    candle_open_time * 1000,  # timestamp_ms
-                    c,  # open (用 close 作為開倉價)
-                    c,  # high
-                    c,  # low
-                    c,  # close
-                    v  # volume
-                )
-                self.data[symbol][tf_name].append(new_candle)
+        tf = self.base_tf
+        ts = int(timestamp_ms)
+        candle_open_ms = ts - ts % self._tf_ms[tf]
+        current = self.current_open_ms[symbol]
+        ring = self.data[symbol][tf]
+
+        if candle_open_ms > current[tf]:
+            # 新 K 線：先收盤上一根（觸發 rollup），再用 tick 的真實 OHLC 開新 K 線
+            if self.bar_is_open[symbol][tf]:
+                self._close_base_bar(symbol)
+            current[tf] = candle_open_ms
+            ring.append(candle_open_ms, o, h, l, c, v)
+            self.bar_is_open[symbol][tf] = True
+        elif len(ring) and candle_open_ms == current[tf]:
+            # 更新當前 K 線的 OHLCV
+            ring.update_last(h, l, c, v)
+
+    def _close_bar(self, symbol: str, tf: str) -> tuple:
+        """收盤一根 K 線並觸發回調"""
+        self.bar_is_open[symbol][tf] = False
+        bar = self.data[symbol][tf].last_bar()
+
+        for callback in self._close_callbacks.get(tf, ()):
+            try:
+                callback(symbol, tf, bar)
+            except Exception as e:
+                logger.error(f"Bar close callback error ({symbol} {tf}): {e}", exc_info=True)
+
+        return bar
+
+    def _close_base_bar(self, symbol: str) -> None:
+        """
+        收盤一根基礎 K 線，並按週期從小到大合併到每個較高時間框架
+
+        較高時間框架因此只落後形成中的那一根基礎 K 線（不會逐級累積延遲），
+        每根基礎 K 線收盤的成本與時間框架數量成正比，與 tick 數量無關。
+        """
+        base_ms = self._tf_ms[self.base_tf]
+        bar_ts, o, h, l, c, v = self._close_bar(symbol, self.base_tf)
+        bar_ts = int(bar_ts)
+        current = self.current_open_ms[symbol]
+        is_open = self.bar_is_open[symbol]
+        preloaded = self._preloaded_through_ms[symbol]
+
+        for tf in self._higher_tfs:
+            tf_ms = self._tf_ms[tf]
+            bucket = bar_ts - bar_ts % tf_ms
+            ring = self.data[symbol][tf]
+
+            if bucket > current[tf]:
+                # 有缺口時上一根可能還沒收盤
+                if is_open[tf]:
+                    self._close_bar(symbol, tf)
+                current[tf] = bucket
+                ring.append(bucket, o, h, l, c, v)
+                is_open[tf] = True
+            elif bucket == current[tf] and len(ring):
+                # 預熱載入的 K 線已包含這根基礎 K 線的成交量
+                volume = 0.0 if bar_ts <= preloaded.get(tf, -1) else v
+                ring.update_last(h, l, c, volume)
             else:
-                # 更新當前 K 線的 OHLCV
-                if self.data[symbol][tf_name]:
-                    last_candle = self.data[symbol][tf_name][-1]
-                    updated_candle = (
-                        last_candle[0],  # timestamp_ms（不變）
-                        last_candle[1],  # open（不變）
-                        max(last_candle[2], h),  # high
-                        min(last_candle[3], l),  # low
-                        c,  # close（更新為最新價）
-                        last_candle[5] + v  # volume 累加
-                    )
-                    self.data[symbol][tf_name][-1] = updated_candle
-            
-            # 限制緩衝區大小
-            if len(self.data[symbol][tf_name]) > self.max_candles_per_tf:
-                self.data[symbol][tf_name] = self.data[symbol][tf_name][-self.max_candles_per_tf:]
-    
-    def get_candles_by_tf(self, symbol: str) -> Dict[str, List[tuple]]:
-        """
-        獲取符號的所有時間框架 K 線數據
-        
+                continue
+
+            # 這根基礎 K 線是該時間框架的最後一根 → 收盤
+            if bar_ts + base_ms >= bucket + tf_ms and is_open[tf]:
+                self._close_bar(symbol, tf)
+
+    def load_candles(self, symbol: str, timeframe: str, candles: List[tuple]) -> None:
+        """
+        直接載入歷史 K 線（啟動預熱用）
+
+        覆蓋該時間框架的現有數據，並把最後一根視為仍在形成中，
+        之後的即時數據會繼續更新這根 K 線，而不是重複開新 K 線。
+
+        Args:
+            symbol: 交易對
+            timeframe: 時間框架（必須在 timeframes 中）
+            candles: 按時間升序的 [(timestamp_ms, open, high, low, close, volume), ...]
+        """
+        if timeframe not in self.timeframes or not len(candles):
+            return
+
+        columns = np.asarray(candles, dtype=np.float64).T
+        self.data[symbol][timeframe].load(columns)
+        last_open_ms = int(columns[CANDLE_IDX_TIMESTAMP, -1])
+        self.current_open_ms[symbol][timeframe] = last_open_ms
+        self.bar_is_open[symbol][timeframe] = True
+
+        if timeframe != self.base_tf:
+            # 基礎時間框架已載入時，以其最後一根為準；否則以本 K 線開盤時間為準
+            base_open_ms = self.current_open_ms[symbol][self.base_tf]
+            self._preloaded_through_ms[symbol][timeframe] = max(base_open_ms, last_open_ms)
+
+    def attach_shared_store(self, store) -> int:
+        """
+        把 store 中的 (symbol, timeframe) 改為寫入共享內存（其他進程可直接讀取）
+
+        已有數據會先複製到共享環中；store 中沒有的時間框架保持私有。
+
+        Args:
+            store: SharedBarStore（容量必須等於 max_candles_per_tf）
+
+        Returns:
+            切換到共享內存的環數量
+        """
+        if store.capacity != self.max_candles_per_tf:
+            raise ValueError(
+                f"Shared store capacity {store.capacity} != buffer capacity {self.max_candles_per_tf}"
+            )
+
+        attached = 0
+        for symbol in store.symbols:
+            rings = self.data[symbol]
+            for tf in store.timeframes:
+                if tf not in rings:
+                    continue
+                shared = store.ring(symbol, tf)
+                if len(rings[tf]):
+                    shared.load(rings[tf].view())
+                rings[tf] = shared
+                attached += 1
+        return attached
+
+    def get_ohlcv(self, symbol: str, timeframe: str, n: Optional[int] = None) -> np.ndarray:
+        """
+        列式零拷貝視圖 (6, n)
+
+        例：closes = buffer.get_ohlcv(symbol, '1m', 50)[CANDLE_IDX_CLOSE]
+        """
+        if symbol not in self.data:
+            return np.empty((NUM_COLUMNS, 0), dtype=np.float64)
+        return self.data[symbol][timeframe].view(n)
+
+    def get_column(self, symbol: str, timeframe: str, column: str, n: Optional[int] = None) -> np.ndarray:
+        """單列零拷貝視圖（連續 float64），column ∈ COLUMNS"""
+        return self.get_ohlcv(symbol, timeframe, n)[COLUMNS[column]]
+
+    def get_candles(self, symbol: str, timeframe: str, n: Optional[int] = None) -> np.ndarray:
+        """按行訪問的零拷貝視圖 (n, 6)：candles[-1][CANDLE_IDX_CLOSE] 與舊元組格式相同"""
+        return self.get_ohlcv(symbol, timeframe, n).T
+
+    def get_candles_by_tf(self, symbol: str) -> Dict[str, np.ndarray]:
+        """
+        獲取符號的所有時間框架 K 線數據（每個時間框架一個 (n, 6) 零拷貝視圖）
+
         Returns:
             {
                 '1d': [...],
@@ -114,48 +377,60 @@ class TimeframeBuffer:
                 '1m': [...]
             }
         """
-        if symbol not in self.data:
-            return {tf: [] for tf in self.TIMEFRAMES.keys()}
-        
         return {
-            tf: list(self.data[symbol].get(tf, []))
-            for tf in self.TIMEFRAMES.keys()
+            tf: self.get_candles(symbol, tf)
+            for tf in self.timeframes
         }
-    
+
+    def count(self, symbol: str, timeframe: str) -> int:
+        """某時間框架已有的 K 線數量"""
+        if symbol not in self.data:
+            return 0
+        return len(self.data[symbol][timeframe])
+
+    def bar_state(self, symbol: str, timeframe: str) -> tuple:
+        """
+        最後一根 K 線的 (open_time_ms, revision)，供指標快取使用
+
+        revision：已收盤為 None；形成中為 (high, low, close, volume)，每次更新都會改變
+        """
+        if self.count(symbol, timeframe) == 0:
+            return 0, None
+        ts, _, h, l, c, v = self.data[symbol][timeframe].last_bar()
+        if self.bar_is_open[symbol][timeframe]:
+            return int(ts), (h, l, c, v)
+        return int(ts), None
+
     def has_sufficient_data(self, symbol: str, min_candles_per_tf: int = 3) -> bool:
         """
         檢查符號是否有足夠的多時間框架數據用於分析
-        
+
         🔍 OPTIMIZED: Only check recent timeframes (5m, 15m, 1h)
            Skip 1d because WebSocket takes too long to accumulate daily data
-        
+
         Args:
             symbol: 交易對
             min_candles_per_tf: 每個時間框架最少需要的 K 線數
-            
+
         Returns:
             True 如果所有檢查的時間框架都有足夠的數據
         """
         if symbol not in self.data:
             return False
-        
+
         # 🔍 Check only recent timeframes for faster signal generation
         required_tfs = ['5m', '15m', '1h']  # Skip '1d' and '1m' for efficiency
         for tf_name in required_tfs:
-            if len(self.data[symbol].get(tf_name, [])) < min_candles_per_tf:
+            if tf_name not in self.timeframes:
+                continue
+            if self.count(symbol, tf_name) < min_candles_per_tf:
                 return False
-        
+
         return True
-    
+
     def get_stats(self, symbol: str) -> Dict:
         """獲取緩衝區統計信息"""
-        stats = {}
-        if symbol in self.data:
-            for tf_name in self.TIMEFRAMES.keys():
-                candles = self.data[symbol][tf_name]
-                stats[tf_name] = len(candles)
-        
-        return stats or {tf: 0 for tf in self.TIMEFRAMES.keys()}
+        return {tf: self.count(symbol, tf) for tf in self.timeframes}
 
 
 # 全局多時間框架緩衝區
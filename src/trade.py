@@ -13,12 +13,11 @@ import hmac
 import hashlib
 import time
 import uuid
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 from urllib.parse import urlencode
-from datetime import datetime
-import aiohttp
 
 import json  # Always available
+import aiohttp
 import redis.asyncio as redis_async
 
 try:
@@ -27,8 +26,19 @@ try:
 except ImportError:
     HAS_ORJSON = False
 
-from src.bus import bus, Topic
-from src.config import Config, get_database_url
+from src.binance_rest import BinanceRestClient, close_rest_client, get_rest_client
+from src.bus import bus, Topic, OVERFLOW_BLOCK
+from src.rate_limiter import PRIORITY_CLOSE, PRIORITY_ENTRY
+from src.reconciliation import UserDataStream
+from src.order_manager import (
+    OrderManager, ManagedOrder, DUPLICATE_CLIENT_ORDER_ID, ORDER_NOT_FOUND, FILLED, UNRESOLVED_STATES
+)
+from src.state_writer import AccountStateWriter
+from src.signal_writer import SignalWriter
+from src.config import Config, get_database_url, get_state_writer_options, get_signal_writer_options
+from src.exchange_info import get_exchange_info
+from src.latency import get_tracer, STAGE_TRADE_RECV, STAGE_ORDER_SEND, STAGE_ORDER_ACK
+from src.mark_to_market import MarkToMarketEngine
 from src.experience_buffer import get_experience_buffer
 from src.utils.math_utils import round_step_size, round_to_precision, validate_quantity, get_step_size
 from src.virtual_learning import (
@@ -72,76 +82,92 @@ async def _get_postgres_connection():
         return None
 
 
-async def _sync_state_to_postgres() -> None:
+def _state_snapshot() -> Dict:
+    """Current account state as persisted (PnL from the mark-to-market engine)"""
+    return {
+        'balance': _account_state['balance'],
+        'pnl': _marks.unrealized_pnl,
+        'trade_count': len(_account_state['trades']),
+        'positions': {symbol: dict(pos) for symbol, pos in _account_state['positions'].items()},
+    }
+
+
+_state_writer: Optional[AccountStateWriter] = None
+
+
+def _get_state_writer() -> AccountStateWriter:
+    """Process-wide coalescing writer for account_state"""
+    global _state_writer
+    if _state_writer is None:
+        _state_writer = AccountStateWriter(_state_snapshot, _get_postgres_connection, **get_state_writer_options())
+    return _state_writer
+
+
+_signal_writer: Optional[SignalWriter] = None
+
+
+def _get_signal_writer() -> SignalWriter:
+    """Process-wide write-behind writer for the signals table"""
+    global _signal_writer
+    if _signal_writer is None:
+        _signal_writer = SignalWriter(_get_postgres_connection, **get_signal_writer_options())
+    return _signal_writer
+
+
+def _signal_row(signal: Dict, position_size: float) -> tuple:
+    """One signals row (src/signal_writer.SIGNAL_COLUMNS order); assigns signal_id if missing"""
+    signal_id = signal.setdefault('signal_id', str(uuid.uuid4()))
+    features = signal.get('features', {})
+    
+    # Store signal details in patterns JSONB + 12 ML FEATURES
+    # Extract features from signal.features or signal directly
+    patterns_data = {
+        'direction': signal.get('direction', 'LONG'),
+        'strength': signal.get('strength', 0.5),
+        'entry_price': signal.get('entry_price', 1.0),
+        'timeframe_analysis': signal.get('timeframe_analysis', {}),
+        'signal_id': signal_id,
+        # ✅ 12 個 ML 特徵
+        'confidence': signal.get('confidence', features.get('confidence', 0.65)),
+        'fvg': signal.get('fvg', features.get('fvg', 0.5)),
+        'liquidity': signal.get('liquidity', features.get('liquidity', 0.5)),
+        'rsi': signal.get('rsi', features.get('rsi', 50)),
+        'atr': signal.get('atr', features.get('atr', 0.02)),
+        'macd': signal.get('macd', features.get('macd', 0)),
+        'bb_width': signal.get('bb_width', features.get('bb_width', 0)),
+        'position_size_pct': signal.get('position_size_pct', features.get('position_size_pct', 0.01))
+    }
+    
+    return (
+        signal_id,
+        signal.get('symbol', ''),
+        float(signal.get('confidence', 0)),
+        json.dumps(patterns_data, default=float),
+        float(position_size),
+        int(signal.get('timestamp', time.time()) * 1000),
+        # ✅ 新增的特徵欄位
+        float(patterns_data['rsi']),
+        float(patterns_data['macd']),
+        float(patterns_data['bb_width']),
+        float(patterns_data['atr']),
+        float(patterns_data['fvg']),
+        float(patterns_data['liquidity']),
+    )
+
+
+async def _sync_state_to_postgres(immediate: bool = False) -> None:
     """
     💾 STATE BROADCASTER: Sync account state to Postgres
-    Creates table if needed and writes current state
-    Called after every state mutation to persist data
+    Marks the state dirty; the writer upserts the single current row plus a
+    delta at most every STATE_FLUSH_MS (see src/state_writer.py)
+    Called after every state mutation - cheap, never waits on Postgres
+    unless immediate=True
     """
-    conn = None
-    try:
-        conn = await _get_postgres_connection()
-        if not conn:
-            logger.warning("⚠️ Postgres not available, skipping state sync")
-            return
-        
-        # Create table if not exists
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS account_state (
-                id SERIAL PRIMARY KEY,
-                balance FLOAT NOT NULL,
-                pnl FLOAT NOT NULL,
-                trade_count INT NOT NULL,
-                positions JSONB NOT NULL,
-                last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Get current state
-        positions_json = json.dumps(_account_state['positions'])
-        
-        # Calculate PnL from all positions (sum the PnL of each position)
-        # For now: use simple 2% mock gain per position (in production: fetch real prices)
-        pnl = 0.0
-        for symbol, pos_data in _account_state['positions'].items():
-            entry_price = pos_data.get('entry_price', 0)
-            quantity = pos_data.get('quantity', 0)
-            side = pos_data.get('side', 'BUY')
-            
-            # Mock current price (2% gain)
-            current_price = entry_price * 1.02
-            
-            if side == 'BUY':
-                pos_pnl = (current_price - entry_price) * quantity
-            else:
-                pos_pnl = (entry_price - current_price) * quantity
-            
-            pnl += pos_pnl
-        
-        # Insert/update state (insert new row with latest state)
-        await conn.execute("""
-            INSERT INTO account_state (balance, pnl, trade_count, positions, last_update)
-            VALUES ($1, $2, $3, $4::jsonb, $5)
-        """,
-            _account_state['balance'],
-            pnl,
-            len(_account_state['trades']),
-            positions_json,
-            datetime.fromtimestamp(time.time())
-        )
-        
-        logger.critical(f"💾 State persisted to Postgres: Balance=${_account_state['balance']:.2f}, Positions={len(_account_state['positions'])}, Trades={len(_account_state['trades'])}")
-    
-    except Exception as e:
-        logger.critical(f"❌ Failed to sync state to Postgres: {e}", exc_info=True)
-    
-    finally:
-        if conn:
-            try:
-                await conn.close()
-            except:
-                pass
+    _sync_marks()
+    writer = _get_state_writer()
+    writer.mark_dirty()
+    if immediate:
+        await writer.flush()
 
 
 async def _sync_state_to_redis() -> None:
@@ -157,7 +183,8 @@ async def _sync_state_to_redis() -> None:
         
         state_payload = {
             "balance": _account_state['balance'],
-            "pnl": sum(_account_state['positions'].values()) if _account_state['positions'] else 0.0,
+            "pnl": _marks.unrealized_pnl,
+            "equity": _marks.equity,
             "trade_count": len(_account_state['trades']),
             "positions": _account_state['positions'].copy(),
             "last_update": time.time()
@@ -177,9 +204,12 @@ async def _sync_state_to_redis() -> None:
         logger.debug(f"⚠️ Failed to sync state to Redis: {e}")
 
 # Binance API configuration
+BATCH_ORDER_LIMIT = 5    # POST /fapi/v1/batchOrders max orders per request
+BATCH_CANCEL_LIMIT = 10  # DELETE /fapi/v1/batchOrders max order ids per request
 BINANCE_API_KEY = os.getenv('BINANCE_API_KEY', '')
 BINANCE_API_SECRET = os.getenv('BINANCE_API_SECRET', '')
 BINANCE_BASE_URL = "https://fapi.binance.com"  # Futures API
+BINANCE_WS_URL = "wss://fstream.binance.com"  # Futures user-data stream
 LIVE_TRADING_ENABLED = BINANCE_API_KEY and BINANCE_API_SECRET
 
 # In-memory account state (in production: use Redis/DB)
@@ -192,6 +222,10 @@ _account_state = {
 # Lock for async-safe state mutations
 _state_lock = asyncio.Lock()
 
+# 📈 Live unrealized PnL / exposure / equity of _account_state's positions
+# (prices via on_price; positions mirrored by _sync_marks after each mutation)
+_marks = MarkToMarketEngine(balance=_account_state['balance'])
+
 # FIX 2: Failed Order Cooldown - Prevent infinite retry loops
 # Maps symbol -> timestamp of last failed order
 _failed_order_cooldown: Dict[str, float] = {}
@@ -275,12 +309,207 @@ def _build_signed_request(params: Dict) -> str:
     return signed_request
 
 
+def _rest_client() -> BinanceRestClient:
+    """Process-wide keep-alive REST client for signed Binance calls"""
+    return get_rest_client(BINANCE_BASE_URL, BINANCE_API_KEY)
+
+
+def _signer(params: Dict) -> Callable[[], str]:
+    """Sign at send time (after any rate-limit wait) so the timestamp is fresh"""
+    return lambda: _build_signed_request({**params, 'recvWindow': 5000})
+
+
+def _order_priority(order: Dict) -> int:
+    """Closing orders jump the rate-limit queue ahead of new entries"""
+    return PRIORITY_CLOSE if order.get('reduce_only') else PRIORITY_ENTRY
+
+
+async def _query_order(symbol: str, client_order_id: str) -> Optional[Dict]:
+    """GET /fapi/v1/order by client id: the order, or None if Binance has no such order"""
+    resp = await _rest_client().request('GET', '/fapi/v1/order',
+                                        _signer({'symbol': symbol, 'origClientOrderId': client_order_id}))
+    if resp.status == 200 and isinstance(resp.data, dict):
+        return resp.data
+    if isinstance(resp.data, dict) and resp.data.get('code') == ORDER_NOT_FOUND:
+        return None
+    raise RuntimeError(f"HTTP {resp.status}: {resp.text}")
+
+
+_order_manager: Optional[OrderManager] = None
+
+
+def _get_order_manager() -> OrderManager:
+    """Process-wide client-order-id index (fed by order acks, lookups and the user stream)"""
+    global _order_manager
+    if _order_manager is None:
+        _order_manager = OrderManager(_query_order)
+    return _order_manager
+
+
+def _order_params(order: Dict) -> Optional[Dict]:
+    """
+    Validate and round one order into Binance order parameters (unsigned)
+    
+    Returns:
+        {symbol, side, type, quantity[, reduceOnly], newClientOrderId[, newOrderRespType]}
+        or None if the order is invalid
+    """
+    symbol = order.get('symbol', '')
+    side = order.get('side', 'BUY')  # BUY or SELL
+    quantity = order.get('quantity', 0)
+    order_type = order.get('type', 'MARKET')
+    
+    # Validate quantity is numeric
+    if not isinstance(quantity, (int, float)) or quantity <= 0:
+        logger.error(f"❌ Invalid quantity: {quantity} (must be numeric and > 0)")
+        return None
+    
+    # ✅ FIX 1: APPLY PRECISION ROUNDING (StepSize Filter)
+    # Round quantity DOWN to safe precision before sending to Binance
+    step_size = get_step_size(symbol)
+    quantity_safe = round_step_size(quantity, step_size)
+    
+    # Additional validation after rounding
+    if not validate_quantity(quantity_safe, symbol):
+        logger.error(f"❌ Quantity invalid after rounding: {quantity_safe}")
+        return None
+    
+    params = {
+        'symbol': symbol,  # e.g., "BTCUSDT"
+        'side': side,      # "BUY" or "SELL"
+        'type': order_type,  # "MARKET" or "LIMIT"
+        'quantity': str(quantity_safe),  # Binance API expects string
+    }
+    if order.get('reduce_only'):
+        params['reduceOnly'] = 'true'
+    # Same id on every retry / fallback of this order (see src/order_manager.py)
+    params['newClientOrderId'] = _get_order_manager().client_order_id(order)
+    if order_type == 'MARKET':
+        params['newOrderRespType'] = 'RESULT'  # ack carries the fill instead of status NEW
+    return params
+
+
+def _filled_order(params: Dict, result: Dict) -> Optional[Dict]:
+    """Map a Binance order response onto our filled-order dict (None if no orderId)"""
+    # Validate response contains required fields
+    if not result.get('orderId'):
+        logger.error(f"❌ Invalid response: missing orderId")
+        return None
+    
+    quantity = float(result.get('executedQty', 0) or 0) or float(params['quantity'])
+    avg_price = float(result.get('avgPrice', 0))
+    return {
+        'symbol': params['symbol'],  # BTCUSDT
+        'side': params['side'],  # BUY/SELL
+        'quantity': quantity,  # Quantity in base asset (BTC, ETH, etc)
+        'price': avg_price,  # Price in quote asset (USDT)
+        'cost': avg_price * quantity,  # Total cost in quote asset
+        'orderId': result.get('orderId', ''),
+        'clientOrderId': params.get('newClientOrderId', ''),
+        'status': result.get('status', 'FILLED'),
+        'timestamp': result.get('time', int(time.time() * 1000)),
+        'commission': float(result.get('commission', 0))
+    }
+
+
+def _order_rejected(symbol: str, status: int, error: Optional[Dict], text: str = "") -> None:
+    """Log a Binance rejection and put the symbol in cooldown"""
+    logger.error(f"❌ Binance API error ({status}) for {symbol}: {text or error}")
+    if isinstance(error, dict):
+        logger.error(f"   Error Code: {error.get('code', 'Unknown')}")
+        logger.error(f"   Error Message: {error.get('msg', 'Unknown error')}")
+    
+    # FIX 2: Record cooldown for this symbol to prevent infinite retry loops
+    _failed_order_cooldown[symbol] = time.time()
+    logger.debug(f"❄️ COOLDOWN ACTIVATED: {symbol} - Skipping new signals for 60 seconds")
+
+
+def _managed_fill(params: Dict, managed: Optional[ManagedOrder]) -> Optional[Dict]:
+    """Filled-order dict for a tracked order (None if nothing executed or the outcome is unknown)"""
+    if managed is None or managed.state in UNRESOLVED_STATES:
+        return None
+    if managed.done and managed.filled <= 0 and managed.state != FILLED:
+        return None
+    return _filled_order(params, managed.result())
+
+
+async def _settle_ack(params: Dict, status: Optional[int], data, text: str = "") -> Optional[Dict]:
+    """
+    Apply one Binance answer to an order (single ack or batch entry) and return its fill
+    
+    Args:
+        status: HTTP status, None if the request itself failed (timeout / connection)
+    
+    An ack with an orderId is applied (a MARKET order still NEW waits for its
+    fill); a 4xx / error entry is a rejection; anything else (timeout, 5xx,
+    duplicate client id, malformed ack) may have placed the order and is
+    resolved through the user stream or a lookup by client id.
+    """
+    manager = _get_order_manager()
+    client_id = params['newClientOrderId']
+    code = data.get('code') if isinstance(data, dict) else None
+    
+    if status == 200 and isinstance(data, dict) and data.get('orderId'):
+        manager.apply_result(client_id, data)
+        if params['type'] == 'MARKET':
+            await manager.settle(client_id)
+        return _managed_fill(params, manager.get(client_id))
+    
+    if status is not None and status < 500 and code != DUPLICATE_CLIENT_ORDER_ID and (status != 200 or code is not None):
+        manager.mark_rejected(client_id)
+        _order_rejected(params['symbol'], status, data, text)
+        return None
+    
+    logger.warning(f"⚠️ Order {params['symbol']} {client_id} outcome unknown (HTTP {status}) - resolving")
+    manager.mark_unknown(client_id)
+    filled_order = _managed_fill(params, await manager.resolve(client_id))
+    if filled_order is None:
+        _failed_order_cooldown[params['symbol']] = time.time()
+    return filled_order
+
+
+async def _place_order(order: Dict, params: Dict) -> Optional[Dict]:
+    """Send one order under its client id, unless that id is already placed / in flight"""
+    manager = _get_order_manager()
+    symbol = params['symbol']
+    client_id = params['newClientOrderId']
+    
+    managed, fresh = manager.register(client_id, symbol, params['side'], float(params['quantity']))
+    if not fresh:
+        managed = await manager.settle(client_id)
+        if not managed.resendable:
+            logger.warning(f"⚠️ Order {symbol} {client_id} already {managed.state} - not sent again")
+            return _managed_fill(params, managed)
+        manager.register(client_id, symbol, params['side'], float(params['quantity']))
+    
+    logger.debug(f"📤 Sending order to Binance: {symbol} {params['side']} {params['quantity']} units ({client_id})")
+    
+    tracer = get_tracer()
+    trace = order.get('trace')
+    tracer.mark(trace, STAGE_ORDER_SEND)
+    try:
+        resp = await _rest_client().request('POST', '/fapi/v1/order', _signer(params),
+                                            priority=_order_priority(order))
+    except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+        logger.warning(f"⚠️ Order request {symbol} failed: {e!r}")
+        resp = None
+    except Exception:
+        manager.mark_rejected(client_id)  # failed before sending (e.g. signing)
+        raise
+    tracer.mark(trace, STAGE_ORDER_ACK)
+    tracer.finish(trace)
+    
+    if resp is None:
+        return await _settle_ack(params, None, None)
+    return await _settle_ack(params, resp.status, resp.data, resp.text)
+
+
 async def _execute_order_live(order: Dict) -> Optional[Dict]:
     """
     Execute order on live Binance Futures account
     
     Args:
-        order: Order details {symbol, side, quantity, type, confidence}
+        order: Order details {symbol, side, quantity, type, confidence[, reduce_only, signal_id]}
     
     Returns:
         Filled order details or None if failed
@@ -290,105 +519,19 @@ async def _execute_order_live(order: Dict) -> Optional[Dict]:
         return None
     
     symbol = order.get('symbol', '')
-    side = order.get('side', 'BUY')  # BUY or SELL
-    quantity = order.get('quantity', 0)
-    order_type = order.get('type', 'MARKET')
     
     try:
-        # Validate quantity is numeric
-        if not isinstance(quantity, (int, float)) or quantity <= 0:
-            logger.error(f"❌ Invalid quantity: {quantity} (must be numeric and > 0)")
-            return None
-        
-        # ✅ FIX 1: APPLY PRECISION ROUNDING (StepSize Filter)
-        # Round quantity DOWN to safe precision before sending to Binance
-        step_size = get_step_size(symbol)
-        quantity_safe = round_step_size(quantity, step_size)
-        
-        # Additional validation after rounding
-        if not validate_quantity(quantity_safe, symbol):
-            logger.error(f"❌ Quantity invalid after rounding: {quantity_safe}")
+        params = _order_params(order)
+        if params is None:
             return None
         
-        # Convert quantity to string (Binance API expects string)
-        quantity_str = str(quantity_safe)
-        
-        # Prepare order parameters (all as base types, will be converted to strings)
-        params = {
-            'symbol': symbol,  # e.g., "BTCUSDT"
-            'side': side,      # "BUY" or "SELL"
-            'type': order_type,  # "MARKET" or "LIMIT"
-            'quantity': float(quantity),  # Keep as float for now, will stringify in _build_signed_request
-            'timestamp': int(time.time() * 1000),
-            'recvWindow': 5000
-        }
-        
-        # Build properly signed request
-        signed_query = _build_signed_request(params)
-        if not signed_query:
-            logger.error("❌ Failed to build signed request")
-            return None
-        
-        # Build complete URL
-        url = f"{BINANCE_BASE_URL}/fapi/v1/order?{signed_query}"
-        headers = {
-            'X-MBX-APIKEY': BINANCE_API_KEY,
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
-        
-        logger.debug(f"📤 Sending order to Binance: {symbol} {side} {quantity_str} units")
-        logger.debug(f"URL: {url[:100]}...")  # Log partial URL for debug
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as resp:
-                response_text = await resp.text()
-                
-                if resp.status == 200:
-                    result = await resp.json()
-                    
-                    # Extract price from response
-                    avg_price = float(result.get('avgPrice', 0))
-                    
-                    # Validate response contains required fields
-                    if not result.get('orderId'):
-                        logger.error(f"❌ Invalid response: missing orderId")
-                        return None
-                    
-                    filled_order = {
-                        'symbol': symbol,  # BTCUSDT
-                        'side': side,  # BUY/SELL
-                        'quantity': float(quantity_str),  # Quantity in base asset (BTC, ETH, etc)
-                        'price': avg_price,  # Price in quote asset (USDT)
-                        'cost': avg_price * float(quantity_str),  # Total cost in quote asset
-                        'orderId': result.get('orderId', ''),
-                        'status': result.get('status', 'FILLED'),
-                        'timestamp': result.get('time', int(time.time() * 1000)),
-                        'commission': float(result.get('commission', 0))
-                    }
-                    
-                    logger.debug(
-                        f"✅ Order executed: {symbol} {side} {quantity_str} @ ${avg_price:.2f} USDT "
-                        f"(Total: ${filled_order['cost']:.2f})"
-                    )
-                    return filled_order
-                else:
-                    logger.error(f"❌ Binance API error ({resp.status}): {response_text}")
-                    
-                    # Try to parse error message
-                    try:
-                        error_json = await resp.json()
-                        error_msg = error_json.get('msg', 'Unknown error')
-                        error_code = error_json.get('code', 'Unknown')
-                        logger.error(f"   Error Code: {error_code}")
-                        logger.error(f"   Error Message: {error_msg}")
-                    except Exception as e:
-                        logger.error(f"Failed to parse error response: {e}", exc_info=True)
-                    
-                    # FIX 2: Record cooldown for this symbol to prevent infinite retry loops
-                    _failed_order_cooldown[symbol] = time.time()
-                    logger.debug(f"❄️ COOLDOWN ACTIVATED: {symbol} - Skipping new signals for 60 seconds")
-                    
-                    return None
+        filled_order = await _place_order(order, params)
+        if filled_order is not None:
+            logger.debug(
+                f"✅ Order executed: {symbol} {params['side']} {filled_order['quantity']} @ ${filled_order['price']:.2f} USDT "
+                f"(Total: ${filled_order['cost']:.2f})"
+            )
+        return filled_order
     
     except Exception as e:
         logger.error(f"❌ Order execution failed: {e}", exc_info=True)
@@ -400,15 +543,199 @@ async def _execute_order_live(order: Dict) -> Optional[Dict]:
         return None
 
 
-async def _get_position_pnl(position_data: Dict) -> float:
+async def execute_orders(orders: List[Dict]) -> List[Optional[Dict]]:
+    """
+    Execute several orders with as few round trips as possible (LIVE MODE ONLY)
+    
+    Orders are grouped into POST /fapi/v1/batchOrders requests of up to
+    BATCH_ORDER_LIMIT, sent concurrently. Each batch entry's result is mapped
+    back to its order; a rejected entry puts its symbol in cooldown like a
+    single order. If a whole batch request fails, its orders fall back to
+    concurrent single orders under the same client ids: after a 4xx they are
+    resent, after a timeout / 5xx each id is resolved first and only resent
+    if Binance never placed it. Orders whose client id is already tracked
+    skip the batch and take the single-order path (no duplicate sends).
+    
+    Returns:
+        Filled order (or None) per input order, in input order
+    """
+    results: List[Optional[Dict]] = [None] * len(orders)
+    if not orders:
+        return results
+    if not LIVE_TRADING_ENABLED:
+        logger.warning("⚠️ Live trading not enabled - set BINANCE_API_KEY and BINANCE_API_SECRET")
+        return results
+    
+    manager = _get_order_manager()
+    prepared, resubmitted = [], []
+    for index, order in enumerate(orders):
+        params = _order_params(order)
+        if params is None:
+            continue
+        if manager.get(params['newClientOrderId']) is not None:
+            resubmitted.append((index, order))
+        else:
+            prepared.append((index, order, params))
+    
+    async def run_single(index: int, order: Dict) -> None:
+        results[index] = await _execute_order_live(order)
+    
+    async def run_batch(batch) -> None:
+        if len(batch) == 1:
+            index, order, _ = batch[0]
+            await run_single(index, order)
+            return
+        
+        for _, _, params in batch:
+            manager.register(params['newClientOrderId'], params['symbol'], params['side'], float(params['quantity']))
+        
+        tracer = get_tracer()
+        traces = [order['trace'] for _, order, _ in batch if order.get('trace') is not None]
+        try:
+            for trace in traces:
+                tracer.mark(trace, STAGE_ORDER_SEND)
+            resp = await _rest_client().request(
+                'POST', '/fapi/v1/batchOrders',
+                _signer({'batchOrders': json.dumps([params for _, _, params in batch], separators=(',', ':'))}),
+                priority=min(_order_priority(order) for _, order, _ in batch),
+                orders=len(batch)
+            )
+            for trace in traces:
+                tracer.mark(trace, STAGE_ORDER_ACK)
+                tracer.finish(trace)
+        except Exception as e:
+            logger.warning(f"⚠️ Batch order request failed ({e}) - falling back to single orders")
+            resp = None
+        
+        if resp is None or resp.status != 200 or not isinstance(resp.data, list) or len(resp.data) != len(batch):
+            if resp is not None:
+                logger.warning(f"⚠️ Batch order rejected (HTTP {resp.status}): {resp.text} - falling back to single orders")
+            for _, _, params in batch:
+                if resp is None or resp.status >= 500:
+                    manager.mark_unknown(params['newClientOrderId'])  # may have been placed
+                else:
+                    manager.mark_rejected(params['newClientOrderId'])
+            await asyncio.gather(*(run_single(index, order) for index, order, _ in batch))
+            return
+        
+        fills = await asyncio.gather(*(
+            _settle_ack(params, resp.status, entry) for (_, _, params), entry in zip(batch, resp.data)
+        ))
+        for (index, _, _), filled in zip(batch, fills):
+            results[index] = filled
+        logger.debug(f"📦 Batch of {len(batch)} orders executed ({resp.elapsed_ms:.1f}ms)")
+    
+    batches = [prepared[i:i + BATCH_ORDER_LIMIT] for i in range(0, len(prepared), BATCH_ORDER_LIMIT)]
+    await asyncio.gather(*(run_batch(batch) for batch in batches),
+                         *(run_single(index, order) for index, order in resubmitted))
+    return results
+
+
+async def cancel_orders(symbol: str, order_ids: List[int]) -> List[Optional[Dict]]:
+    """
+    Cancel open orders of one symbol via DELETE /fapi/v1/batchOrders
+    
+    Groups of up to BATCH_CANCEL_LIMIT ids per request, sent concurrently;
+    a failed batch request falls back to concurrent DELETE /fapi/v1/order.
+    
+    Returns:
+        Binance cancel result (or None if that cancel failed) per order id, in order
+    """
+    results: List[Optional[Dict]] = [None] * len(order_ids)
+    if not order_ids or not LIVE_TRADING_ENABLED:
+        return results
+    
+    async def cancel_one(order_id) -> Optional[Dict]:
+        try:
+            resp = await _rest_client().request('DELETE', '/fapi/v1/order',
+                                                _signer({'symbol': symbol, 'orderId': order_id}))
+        except Exception as e:
+            logger.error(f"❌ Cancel {symbol} #{order_id} failed: {e}")
+            return None
+        if resp.status == 200 and isinstance(resp.data, dict):
+            return resp.data
+        logger.error(f"❌ Cancel {symbol} #{order_id} rejected ({resp.status}): {resp.text}")
+        return None
+    
+    async def run_batch(offset: int, ids: List[int]) -> None:
+        try:
+            resp = await _rest_client().request('DELETE', '/fapi/v1/batchOrders', _signer({
+                'symbol': symbol,
+                'orderIdList': json.dumps(ids, separators=(',', ':'))
+            }))
+        except Exception as e:
+            logger.warning(f"⚠️ Batch cancel request failed ({e}) - falling back to single cancels")
+            resp = None
+        
+        if resp is None or resp.status != 200 or not isinstance(resp.data, list) or len(resp.data) != len(ids):
+            entries = await asyncio.gather(*(cancel_one(order_id) for order_id in ids))
+        else:
+            entries = []
+            for order_id, entry in zip(ids, resp.data):
+                if isinstance(entry, dict) and entry.get('orderId'):
+                    entries.append(entry)
+                else:
+                    logger.error(f"❌ Cancel {symbol} #{order_id} rejected: {entry}")
+                    entries.append(None)
+        results[offset:offset + len(ids)] = entries
+    
+    await asyncio.gather(*(
+        run_batch(i, list(order_ids[i:i + BATCH_CANCEL_LIMIT]))
+        for i in range(0, len(order_ids), BATCH_CANCEL_LIMIT)
+    ))
+    return results
+
+
+def _sync_marks() -> None:
+    """Mirror balance + positions into the mark-to-market table (after every state mutation)"""
+    _marks.sync(_account_state['balance'], _account_state['positions'])
+
+
+def on_price(symbol: str, price: float) -> None:
+    """Live price for `symbol` (brain: every candle) - O(1) PnL / equity update"""
+    _marks.on_price(symbol, price)
+
+
+def get_equity() -> float:
+    """Balance + unrealized PnL, always current (O(1))"""
+    return _marks.equity
+
+
+def get_mark_stats() -> Dict:
+    """Per-position marks / PnL plus portfolio equity and exposure"""
+    return _marks.get_stats()
+
+
+def _mark_price(symbol: Optional[str], entry_price: float) -> float:
+    """
+    Latest price for `symbol`: live feed, else the brain's shared bar store
+    
+    Falls back to the entry price (PnL 0) while no price is known.
+    """
+    if symbol:
+        price = _marks.price(symbol)
+        if price:
+            return price
+        from src.bar_store import get_bar_store
+        store = get_bar_store()
+        if store is not None:
+            price = store.last_price(symbol)
+            if price:
+                return price
+    return entry_price
+
+
+async def _get_position_pnl(position_data: Dict, symbol: Optional[str] = None) -> float:
     """
     Calculate PnL for a position
     
-    In production: fetch current price from Binance
-    For now: use mock calculation
+    Tracked positions read the mark-to-market table; others are marked at
+    the latest known price
     
     Returns: PnL in USD (positive = profit)
     """
+    if symbol in _marks:
+        return _marks.position_pnl(symbol)
     entry_price = position_data.get('entry_price', 0)
     quantity = position_data.get('quantity', 0)
     side = position_data.get('side', 'BUY')
@@ -416,8 +743,7 @@ async def _get_position_pnl(position_data: Dict) -> float:
     if entry_price <= 0 or quantity <= 0:
         return 0.0
     
-    # Mock current price (in production: fetch from API)
-    current_price = entry_price * 1.02  # Assume 2% gain
+    current_price = _mark_price(symbol, entry_price)
     
     if side == 'BUY':
         pnl = (current_price - entry_price) * quantity
@@ -460,6 +786,7 @@ async def _close_position(symbol: str, quantity: float) -> bool:
         async with _state_lock:
             if symbol in _account_state['positions']:
                 del _account_state['positions'][symbol]
+                _sync_marks()
                 logger.debug(f"✅ Position closed: {symbol}")
                 return True
         
@@ -469,18 +796,88 @@ async def _close_position(symbol: str, quantity: float) -> bool:
         return False
 
 
+def _close_order(symbol: str, position: Dict) -> Dict:
+    """Reduce-only market order that flattens a position"""
+    order = {
+        'symbol': symbol,
+        'side': 'BUY' if position.get('side', 'BUY') == 'SELL' else 'SELL',
+        'quantity': abs(position.get('quantity', 0)),
+        'type': 'MARKET',
+        'confidence': 0.0,  # Forced close (not a signal trade)
+        'reduce_only': True
+    }
+    if position.get('entry_time'):
+        # One close per position: a repeated close of the same position reuses its client id
+        order['idempotency_key'] = f"close:{symbol}:{position['entry_time']}"
+    return order
+
+
+async def flatten_positions(symbols: Optional[List[str]] = None) -> int:
+    """
+    Close every open position (or only `symbols`) in batched round trips
+    
+    Returns:
+        Number of positions closed
+    """
+    async with _state_lock:
+        targets = [(s, dict(p)) for s, p in _account_state['positions'].items()
+                   if symbols is None or s in symbols]
+    if not targets:
+        return 0
+    
+    logger.critical(f"🧹 Flattening {len(targets)} positions: {', '.join(s for s, _ in targets)}")
+    fills = await execute_orders([_close_order(s, p) for s, p in targets])
+    
+    closed = 0
+    async with _state_lock:
+        for (symbol, _), filled in zip(targets, fills):
+            if filled is None:
+                logger.error(f"❌ Failed to close {symbol}")
+                continue
+            _account_state['positions'].pop(symbol, None)
+            _account_state['trades'].append(filled)
+            closed += 1
+    
+    await _sync_state_to_postgres()
+    asyncio.create_task(_sync_state_to_redis())
+    return closed
+
+
+async def _unwind_rotation_open(open_fill: Dict) -> Optional[Dict]:
+    """
+    Flatten a rotation entry whose paired close was rejected
+    
+    Returns:
+        None once the entry is flattened, or the entry fill itself if the
+        unwind failed too (the position is real and must be tracked)
+    """
+    symbol = open_fill['symbol']
+    logger.error(f"❌ Rotation close rejected but {symbol} filled - flattening the new position")
+    unwind = _close_order(symbol, {'side': open_fill['side'], 'quantity': open_fill['quantity'],
+                                   'entry_time': open_fill.get('timestamp')})
+    unwind_fill = await _execute_order_live(unwind)
+    if unwind_fill is None:
+        logger.critical(f"🚨 Could not flatten rotation entry {symbol} - keeping it as an open position")
+        return open_fill
+    async with _state_lock:
+        _account_state['trades'].extend([open_fill, unwind_fill])
+    await _sync_state_to_postgres()
+    asyncio.create_task(_sync_state_to_redis())
+    return None
+
+
 async def _check_risk(signal: Dict) -> None:
     """
     Validate risk parameters + Elite Rotation Logic
     
     Logic:
-    1. Get account balance
+    1. Get account equity (balance + live unrealized PnL, O(1))
     2. Check if slots available (MAX_OPEN_POSITIONS = 3)
     3. If slots full: Check for rotation opportunity
        - Find weakest position (lowest confidence)
        - If New_Confidence > Weakest_Confidence AND Weakest_Position.PnL > 0:
-         - Close weakest position
-         - Open new position (Upgrade quality)
+         - Close weakest + open new position in one batch request (Upgrade quality);
+           if the close is rejected but the entry fills, the entry is flattened again
        - Else: Reject signal
     4. If slots available: Open new position
     """
@@ -488,6 +885,10 @@ async def _check_risk(signal: Dict) -> None:
         if not signal:
             return
         
+        # ⏱️ Tick-to-trade trace from the brain (rides along on the order)
+        trace = signal.get('trace')
+        get_tracer().mark(trace, STAGE_TRADE_RECV)
+        
         symbol = signal.get('symbol', '')
         confidence = signal.get('confidence', 0)
         
@@ -503,56 +904,11 @@ async def _check_risk(signal: Dict) -> None:
         # Calculate position size (quantity) from order amount
         position_size = (order_amount / entry_price) if entry_price > 0 else 0
         
-        # 💾 PERSIST SIGNAL TO POSTGRES
+        # 💾 PERSIST SIGNAL TO POSTGRES (write-behind: queued, batched off the decision path)
         try:
-            conn = await _get_postgres_connection()
-            if conn:
-                signal_id = signal.get('signal_id', str(uuid.uuid4()))
-                timestamp = int(signal.get('timestamp', time.time()) * 1000)
-                
-                # Store signal details in patterns JSONB + 12 ML FEATURES
-                # Extract features from signal.features or signal directly
-                features = signal.get('features', {})
-                patterns_data = {
-                    'direction': direction,
-                    'strength': signal.get('strength', 0.5),
-                    'entry_price': entry_price,
-                    'timeframe_analysis': signal.get('timeframe_analysis', {}),
-                    'signal_id': signal_id,
-                    # ✅ 12 個 ML 特徵
-                    'confidence': signal.get('confidence', features.get('confidence', 0.65)),
-                    'fvg': signal.get('fvg', features.get('fvg', 0.5)),
-                    'liquidity': signal.get('liquidity', features.get('liquidity', 0.5)),
-                    'rsi': signal.get('rsi', features.get('rsi', 50)),
-                    'atr': signal.get('atr', features.get('atr', 0.02)),
-                    'macd': signal.get('macd', features.get('macd', 0)),
-                    'bb_width': signal.get('bb_width', features.get('bb_width', 0)),
-                    'position_size_pct': signal.get('position_size_pct', features.get('position_size_pct', 0.01))
-                }
-                
-                await conn.execute("""
-                    INSERT INTO signals (id, symbol, confidence, patterns, position_size, timestamp, rsi, macd, bb_width, atr, fvg, liquidity)
-                    VALUES ($1, $2, $3, $4::jsonb, $5, $6, $7, $8, $9, $10, $11, $12)
-                    ON CONFLICT DO NOTHING
-                """,
-                    signal_id, 
-                    symbol, 
-                    confidence, 
-                    json.dumps(patterns_data), 
-                    position_size, 
-                    timestamp,
-                    # ✅ 新增的特徵欄位
-                    patterns_data.get('rsi', 50),
-                    patterns_data.get('macd', 0),
-                    patterns_data.get('bb_width', 0),
-                    patterns_data.get('atr', 0.02),
-                    patterns_data.get('fvg', 0.5),
-                    patterns_data.get('liquidity', 0.5)
-                )
-                logger.debug(f"💾 Signal saved: {symbol} {direction} (conf: {confidence:.2%})")
-                await conn.close()
+            _get_signal_writer().enqueue(_signal_row(signal, position_size))
         except Exception as e:
-            logger.warning(f"⚠️ Failed to save signal to DB: {e}")
+            logger.warning(f"⚠️ Failed to queue signal for DB: {e}")
         
         # Check if this symbol is in cooldown
         current_time = time.time()
@@ -570,10 +926,10 @@ async def _check_risk(signal: Dict) -> None:
         
         # Get current state
         async with _state_lock:
-            balance = _account_state['balance']
+            equity = _marks.equity
             current_positions = list(_account_state['positions'].items())
         
-        max_risk = balance * 0.02
+        max_risk = equity * 0.02
         
         # 🎓 VIRTUAL LEARNING: ALWAYS run virtual trading (independent of risk checks)
         try:
@@ -635,7 +991,9 @@ async def _check_risk(signal: Dict) -> None:
                 'side': 'BUY',
                 'quantity': position_size,
                 'type': 'MARKET',
-                'confidence': confidence
+                'confidence': confidence,
+                'signal_id': signal.get('signal_id'),
+                'trace': trace
             }
             
             logger.debug(f"✅ Order approved (Slot {num_positions + 1}/{max_positions}): {symbol} {order['side']} {position_size:.0f}")
@@ -689,7 +1047,7 @@ async def _check_risk(signal: Dict) -> None:
             return
         
         # Check if weakest position is profitable
-        pnl = await _get_position_pnl(weakest_pos)
+        pnl = await _get_position_pnl(weakest_pos, weakest_key)
         
         if pnl <= 0:
             logger.debug(f"❌ Rotation Rejected: Weakest position {weakest_key} is losing money (PnL: ${pnl:.2f}). Holding position.")
@@ -700,23 +1058,39 @@ async def _check_risk(signal: Dict) -> None:
             logger.error("❌ Rotation failed: Invalid weakest key")
             return
         
-        weakest_quantity = weakest_pos.get('quantity', 0)
         logger.debug(f"♻️ ROTATION: Swapping {weakest_key} (Conf: {weakest_confidence:.2f}, PnL: +${pnl:.2f}) for {symbol} (Conf: {confidence:.2f})")
         
-        # Close weakest position
-        if await _close_position(weakest_key, weakest_quantity):
-            # Open new position
-            order = {
-                'symbol': symbol,
-                'side': 'BUY',
-                'quantity': position_size,
-                'type': 'MARKET',
-                'confidence': confidence
-            }
-            
-            logger.debug(f"✅ New position approved: {symbol} {order['side']} {position_size:.0f}")
-            await bus.publish(Topic.ORDER_REQUEST, order)
-            
+        # Close weakest and open new in one batch round trip
+        order = {
+            'symbol': symbol,
+            'side': 'BUY',
+            'quantity': position_size,
+            'type': 'MARKET',
+            'confidence': confidence,
+            'signal_id': signal.get('signal_id'),
+            'trace': trace
+        }
+        close_fill, open_fill = await execute_orders([_close_order(weakest_key, weakest_pos), order])
+        
+        if close_fill is not None:
+            async with _state_lock:
+                _account_state['positions'].pop(weakest_key, None)
+                _account_state['trades'].append(close_fill)
+                _sync_marks()
+            logger.debug(f"✅ Position closed: {weakest_key}")
+            await _sync_state_to_postgres()
+            asyncio.create_task(_sync_state_to_redis())
+        elif open_fill is not None:
+            # Close rejected but the new entry filled: undo it so we never exceed MAX_OPEN_POSITIONS
+            open_fill = await _unwind_rotation_open(open_fill)
+        
+        if open_fill is not None:
+            logger.debug(f"✅ New position opened: {symbol} {order['side']} {position_size:.0f}")
+            await bus.publish(Topic.ORDER_FILLED, {**open_fill, 'confidence': confidence})
+        elif close_fill is not None:
+            logger.error(f"❌ Order failed for {symbol}")
+        
+        if close_fill is not None:
             # 🎓 VIRTUAL LEARNING: Open virtual position for rotation
             # ✅ Include percentage stop-loss and take-profit + 12 ML features
             features = signal.get('features', {})
@@ -824,8 +1198,8 @@ async def _update_state(filled_order: Dict) -> None:
             
             logger.debug(f"💾 State updated: {symbol} | Balance: ${_account_state['balance']:.0f} | Positions: {len(_account_state['positions'])}")
         
-        # 💾 STEP 1: STATE BROADCASTER - Sync to Postgres (primary persistence)
-        asyncio.create_task(_sync_state_to_postgres())
+        # 💾 STEP 1: STATE BROADCASTER - Sync to Postgres (primary persistence, coalesced)
+        await _sync_state_to_postgres()
         
         # 📡 STEP 2: STATE BROADCASTER - Sync to Redis (if available)
         asyncio.create_task(_sync_state_to_redis())
@@ -858,11 +1232,11 @@ async def _load_state_from_postgres() -> None:
             logger.debug("⚠️ Postgres not available, using default state")
             return
         
-        # Get latest state from database
+        # Get current state row (before migration, legacy snapshot rows: newest one)
         row = await conn.fetchrow("""
             SELECT balance, positions, trade_count 
             FROM account_state 
-            ORDER BY updated_at DESC 
+            ORDER BY updated_at DESC NULLS LAST, id DESC 
             LIMIT 1
         """)
         
@@ -873,6 +1247,7 @@ async def _load_state_from_postgres() -> None:
                 _account_state['balance'] = row['balance']
                 _account_state['positions'] = json.loads(row['positions'])
                 _account_state['trade_count'] = row['trade_count']
+                _sync_marks()
                 logger.info(f"📖 Loaded state from Postgres: Balance=${_account_state['balance']:.2f}, Positions={len(_account_state['positions'])}")
         
         await conn.close()
@@ -904,96 +1279,142 @@ async def initial_account_sync() -> None:
     try:
         logger.critical("💧 Hydrating Account State from Binance API...")
         
-        # Prepare request params for GET /fapi/v2/account
-        params = {
-            'timestamp': int(time.time() * 1000),
-            'recvWindow': 5000
-        }
-        
-        # Build properly signed request
-        signed_query = _build_signed_request(params)
-        if not signed_query:
-            logger.error("❌ Failed to build signed request for account sync")
-            return
-        
-        # Build complete URL for account info endpoint
-        url = f"{BINANCE_BASE_URL}/fapi/v2/account?{signed_query}"
-        headers = {
-            'X-MBX-APIKEY': BINANCE_API_KEY,
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
-        
         logger.debug(f"📤 Fetching account information from Binance...")
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=30)) as resp:
-                response_text = await resp.text()
+        resp = await _rest_client().request('GET', '/fapi/v2/account', _signer({}))
+        
+        if resp.status == 200:
+            account_data = resp.data or {}
+            
+            # Extract real balance from API response
+            balance = float(account_data.get('totalWalletBalance', 10000.0))
+            pnl = float(account_data.get('totalUnrealizedProfit', 0.0))
+            
+            # Extract active positions (positionAmt != 0)
+            active_positions = {}
+            for position in account_data.get('positions', []):
+                symbol = position.get('symbol', '')
+                position_amt = float(position.get('positionAmt', 0))
                 
-                if resp.status == 200:
-                    account_data = await resp.json()
-                    
-                    # Extract real balance from API response
-                    balance = float(account_data.get('totalWalletBalance', 10000.0))
-                    pnl = float(account_data.get('totalUnrealizedProfit', 0.0))
-                    
-                    # Extract active positions (positionAmt != 0)
-                    active_positions = {}
-                    for position in account_data.get('positions', []):
-                        symbol = position.get('symbol', '')
-                        position_amt = float(position.get('positionAmt', 0))
-                        
-                        # Only keep positions with non-zero amount
-                        if position_amt != 0:
-                            entry_price = float(position.get('entryPrice', 0))
-                            active_positions[symbol] = {
-                                'quantity': position_amt,
-                                'entry_price': entry_price,
-                                'entry_confidence': 0.5,  # Default confidence
-                                'entry_time': int(time.time() * 1000),
-                                'side': 'BUY' if position_amt > 0 else 'SELL'
-                            }
-                    
-                    # Update global state UNDER LOCK
-                    global _account_state
-                    async with _state_lock:
-                        _account_state['balance'] = balance
-                        _account_state['positions'] = active_positions
-                    
-                    logger.critical(
-                        f"✅ Account Hydrated: Balance=${balance:.2f}, "
-                        f"PnL=${pnl:.2f}, Active Positions={len(active_positions)}"
-                    )
-                    
-                    # Force immediate sync to Redis and Postgres
-                    await _sync_state_to_redis()
-                    await _sync_state_to_postgres()
-                    
-                    logger.critical("✅ Account state synced to Redis & Postgres")
-                    
-                else:
-                    logger.error(f"❌ Failed to fetch account info: HTTP {resp.status}")
-                    logger.error(f"Response: {response_text}")
-                    try:
-                        error_json = json.loads(response_text)
-                        logger.error(f"Error: {error_json.get('msg', 'Unknown')}")
-                    except:
-                        pass
+                # Only keep positions with non-zero amount
+                if position_amt != 0:
+                    entry_price = float(position.get('entryPrice', 0))
+                    active_positions[symbol] = {
+                        'quantity': position_amt,
+                        'entry_price': entry_price,
+                        'entry_confidence': 0.5,  # Default confidence
+                        'entry_time': int(time.time() * 1000),
+                        'side': 'BUY' if position_amt > 0 else 'SELL'
+                    }
+            
+            # Update global state UNDER LOCK
+            global _account_state
+            async with _state_lock:
+                _account_state['balance'] = balance
+                _account_state['positions'] = active_positions
+            
+            logger.critical(
+                f"✅ Account Hydrated: Balance=${balance:.2f}, "
+                f"PnL=${pnl:.2f}, Active Positions={len(active_positions)}"
+            )
+            
+            # Force immediate sync to Redis and Postgres
+            await _sync_state_to_redis()
+            await _sync_state_to_postgres(immediate=True)
+            
+            logger.critical("✅ Account state synced to Redis & Postgres")
+            
+        else:
+            logger.error(f"❌ Failed to fetch account info: HTTP {resp.status}")
+            logger.error(f"Response: {resp.text}")
+            if isinstance(resp.data, dict):
+                logger.error(f"Error: {resp.data.get('msg', 'Unknown')}")
     
     except Exception as e:
         logger.error(f"❌ Account hydration failed: {e}", exc_info=True)
 
 
-async def init() -> None:
-    """Initialize trade module - connect risk → execution → state (LIVE MODE ONLY)"""
+_user_stream: Optional[UserDataStream] = None
+
+
+async def _on_stream_change() -> None:
+    """User-data stream / reconciliation changed the account state"""
+    await _sync_state_to_postgres()
+    asyncio.create_task(_sync_state_to_redis())
+
+
+async def _start_user_stream() -> None:
+    """Start the user-data stream consumer for this process's account state"""
+    global _user_stream
+    if _user_stream is not None:
+        return
+    _user_stream = UserDataStream(
+        _rest_client(), _account_state, _state_lock, _signer,
+        ws_url=BINANCE_WS_URL, on_change=_on_stream_change,
+        on_order_update=_get_order_manager().on_order_update
+    )
+    await _user_stream.start()
+
+
+async def stop_user_stream() -> None:
+    """Stop the user-data stream and release its listenKey"""
+    global _user_stream
+    if _user_stream is not None:
+        await _user_stream.stop()
+        _user_stream = None
+
+
+def _subscribe_handlers() -> None:
+    """
+    Wire risk → execution → state onto the bus
+    
+    Signals queue behind the publisher and never drop (a full queue blocks the
+    publisher instead); order execution and state updates run inline so
+    _check_risk sees the new position before the next signal.
+    """
+    bus.subscribe(Topic.SIGNAL_GENERATED, _check_risk, overflow=OVERFLOW_BLOCK)
+    bus.subscribe(Topic.ORDER_REQUEST, _execute_order, sync=True)
+    bus.subscribe(Topic.ORDER_FILLED, _update_state, sync=True)
+
+
+async def init(execute: bool = True) -> None:
+    """
+    Initialize trade module - connect risk → execution → state (LIVE MODE ONLY)
+    
+    Args:
+        execute: Own order execution in this process (risk → ORDER_REQUEST →
+            ORDER_FILLED handlers, user-data stream, signal writer). Exactly one
+            process may execute: the trade process when SIGNAL_GENERATED is
+            routed through a transport, the brain otherwise. With execute=False
+            only the account state is loaded (for marking).
+    """
     logger.info("💰 Trade module initializing - LIVE TRADING MODE")
     
     # Load previous state from Postgres if available
     await _load_state_from_postgres()
     
+    if not execute:
+        await initial_account_sync()
+        logger.critical("✅ Trade module ready (state only - orders are executed by the trade process)")
+        return
+    
     # 🔴 LIVE MODE: Fetch real account state from Binance API
     logger.critical("🔴 LIVE TRADING MODE - Syncing with real Binance account")
+    if BINANCE_API_KEY:
+        # Open DNS + TCP + TLS now so the first order rides a warm connection
+        await _rest_client().warmup()
+        # Real tick / step / min-notional / leverage brackets for every symbol
+        # (the on-disk copy already serves validation until this returns)
+        await get_exchange_info().start(_rest_client(), _signer if BINANCE_API_SECRET else None)
     await initial_account_sync()
     
+    # 🔄 Real-time fills / balance / positions (REST diff as safety net)
+    if LIVE_TRADING_ENABLED:
+        await _start_user_stream()
+    
+    # 📝 Signal writer task (replays signals spilled during a previous Postgres outage)
+    _get_signal_writer().start()
+    
     # 🎓 Initialize virtual learning account
     await init_virtual_learning()
     
@@ -1002,9 +1423,7 @@ async def init() -> None:
     else:
         logger.critical("⚠️ WARNING: LIVE TRADING DISABLED - Set BINANCE_API_KEY and BINANCE_API_SECRET")
     
-    bus.subscribe(Topic.SIGNAL_GENERATED, _check_risk)
-    bus.subscribe(Topic.ORDER_REQUEST, _execute_order)
-    bus.subscribe(Topic.ORDER_FILLED, _update_state)
+    _subscribe_handlers()
     logger.critical("✅ Trade module ready (LIVE MODE - Real Binance trading + Virtual Learning)")
 
 
@@ -1111,42 +1530,46 @@ async def main():
     Main entry point for Trade Process
     Monitors the event bus for trading signals and executes virtual trades
     """
-    import asyncio
-    from src.bus import bus, Topic
-    
     logger.critical("📈 Trade process main loop started")
     
     try:
-        # Initialize trade state
-        await init()
-        logger.critical("✅ Trade process initialized")
+        # 🚇 Transports first: they decide which process executes orders
+        await bus.start()
+        execute = bus.is_remote(Topic.SIGNAL_GENERATED)
         
-        # Subscribe to SIGNAL_GENERATED events
-        async def handle_signal(message):
-            """Handle incoming trading signals from Brain"""
-            try:
-                signal = message.get('data', {})
-                logger.debug(f"📨 Trade received signal: {signal.get('symbol', 'UNKNOWN')}")
-                
-                # Process the signal (order execution would happen here)
-                # For virtual trading, the signal is processed for analysis
-                
-            except Exception as e:
-                logger.error(f"❌ Error processing signal: {e}", exc_info=True)
-        
-        # Subscribe to signals
-        bus.subscribe(Topic.SIGNAL_GENERATED, handle_signal)
+        # Initialize trade state; signals from the brain arrive through the
+        # SIGNAL_GENERATED transport and go straight to _check_risk
+        await init(execute=execute)
+        if not execute:
+            logger.warning(
+                "⚠️ SIGNAL_GENERATED is not routed through a transport: the brain executes orders "
+                "in-process, this process only marks positions"
+            )
+        logger.critical("✅ Trade process initialized")
         
         # Keep the process running
         logger.critical("🔄 Trade process listening for signals...")
+        from src.bar_store import get_bar_store
         while True:
             await asyncio.sleep(1)
+            # No candle feed in this process: mark open positions from the shared bar store
+            store = get_bar_store()
+            if store is not None:
+                _marks.refresh(store.last_price)
             
     except KeyboardInterrupt:
         logger.info("🛑 Trade process shutting down gracefully")
     except Exception as e:
         logger.critical(f"❌ Trade process fatal error: {e}", exc_info=True)
         raise
+    finally:
+        await stop_user_stream()
+        if _signal_writer is not None:
+            await _signal_writer.close()
+        if _state_writer is not None:
+            await _state_writer.close()
+        await get_exchange_info().stop()
+        await close_rest_client()
 
 
 if __name__ == "__main__":
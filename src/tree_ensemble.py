@@ -0,0 +1,255 @@
+"""
+🌲 Compiled Tree Ensemble - Numba evaluator for sklearn forests
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Flattens a trained RandomForestClassifier / GradientBoostingClassifier
+plus its StandardScaler into contiguous node arrays, and evaluates one row
+or a batch in a single JIT-compiled pass (no per-tree Python overhead).
+
+Results are bit-identical to sklearn's predict_proba:
+- Scaling uses the same (x - mean) / scale steps as StandardScaler
+- Features are cast to float32 before comparisons, like sklearn trees
+- Per-tree probabilities are summed in estimator order, then averaged
+- Boosting uses the fitted prior as initial raw score + learning_rate * leaf
+"""
+
+import logging
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Try to import Numba for JIT compilation
+HAS_NUMBA = False
+try:
+    from numba import jit
+    HAS_NUMBA = True
+except ImportError:
+    def jit(func=None, **kwargs):
+        if func is None:
+            return lambda f: f
+        return func
+
+TREE_LEAF = -1
+
+
+# ============================================================================
+# Numba kernels
+# ============================================================================
+
+@jit(nopython=True, cache=True, nogil=True)
+def _find_leaf(x32, root, feature, threshold, left, right):
+    """Walk one tree from its root to a leaf (node indices are global)"""
+    node = root
+    while left[node] != TREE_LEAF:
+        if x32[feature[node]] <= threshold[node]:
+            node = left[node]
+        else:
+            node = right[node]
+    return node
+
+
+@jit(nopython=True, cache=True, nogil=True)
+def _scale_row(row, mean, scale, out32):
+    """StandardScaler.transform then float32 cast (sklearn tree input dtype)"""
+    for j in range(row.shape[0]):
+        out32[j] = np.float32((row[j] - mean[j]) / scale[j])
+
+
+@jit(nopython=True, cache=True, nogil=True)
+def forest_predict_proba_jit(X, mean, scale, feature, threshold, left, right, leaf_proba, roots):
+    """
+    RandomForest predict_proba
+
+    leaf_proba[node] holds the normalized class distribution of each leaf.
+    Returns (n_samples, n_classes).
+    """
+    n_samples = X.shape[0]
+    n_classes = leaf_proba.shape[1]
+    n_trees = roots.shape[0]
+    out = np.zeros((n_samples, n_classes))
+    x32 = np.empty(X.shape[1], dtype=np.float32)
+
+    for i in range(n_samples):
+        _scale_row(X[i], mean, scale, x32)
+        for t in range(n_trees):
+            leaf = _find_leaf(x32, roots[t], feature, threshold, left, right)
+            for k in range(n_classes):
+                out[i, k] += leaf_proba[leaf, k]
+        for k in range(n_classes):
+            out[i, k] /= n_trees
+
+    return out
+
+
+@jit(nopython=True, cache=True, nogil=True)
+def boosting_predict_proba_jit(X, mean, scale, feature, threshold, left, right, leaf_value, roots,
+                               init_raw, learning_rate):
+    """
+    Binary GradientBoosting predict_proba
+
+    raw = init_raw + Σ learning_rate * leaf_value, proba = expit(raw).
+    Returns (n_samples, 2).
+    """
+    n_samples = X.shape[0]
+    n_trees = roots.shape[0]
+    out = np.empty((n_samples, 2))
+    x32 = np.empty(X.shape[1], dtype=np.float32)
+
+    for i in range(n_samples):
+        _scale_row(X[i], mean, scale, x32)
+        raw = init_raw
+        for t in range(n_trees):
+            leaf = _find_leaf(x32, roots[t], feature, threshold, left, right)
+            raw += learning_rate * leaf_value[leaf]
+        p1 = 1.0 / (1.0 + np.exp(-raw))
+        out[i, 0] = 1.0 - p1
+        out[i, 1] = p1
+
+    return out
+
+
+# ============================================================================
+# Exporter
+# ============================================================================
+
+class CompiledEnsemble:
+    """Flattened tree ensemble + scaler, evaluated by Numba kernels"""
+
+    def __init__(self, kind: str, feature, threshold, left, right, leaf_values, roots,
+                 mean, scale, init_raw: float = 0.0, learning_rate: float = 1.0):
+        self.kind = kind  # "forest" or "boosting"
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.mean = mean
+        self.scale = scale
+        self.init_raw = float(init_raw)
+        self.learning_rate = float(learning_rate)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Class probabilities for a batch of raw (unscaled) feature rows
+
+        Returns:
+            (n_samples, n_classes) — identical to scaler + model.predict_proba
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        if self.kind == "forest":
+            return forest_predict_proba_jit(
+                X, self.mean, self.scale, self.feature, self.threshold,
+                self.left, self.right, self.leaf_values, self.roots
+            )
+        return boosting_predict_proba_jit(
+            X, self.mean, self.scale, self.feature, self.threshold,
+            self.left, self.right, self.leaf_values, self.roots,
+            self.init_raw, self.learning_rate
+        )
+
+    def predict_win_probability(self, features: List[float]) -> float:
+        """Probability of class 1 for a single feature row"""
+        return float(self.predict_proba(np.asarray(features, dtype=np.float64))[0, 1])
+
+
+def _flatten_trees(trees, leaf_fn):
+    """Concatenate sklearn Tree objects into global node arrays"""
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+
+    for tree in trees:
+        n = tree.node_count
+        left = tree.children_left.astype(np.int64)
+        right = tree.children_right.astype(np.int64)
+        # Shift child indices into the global node space (leaves keep -1)
+        features.append(np.where(left == TREE_LEAF, 0, tree.feature).astype(np.int64))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(np.where(left == TREE_LEAF, TREE_LEAF, left + offset))
+        rights.append(np.where(right == TREE_LEAF, TREE_LEAF, right + offset))
+        values.append(leaf_fn(tree))
+        roots.append(offset)
+        offset += n
+
+    return (
+        np.ascontiguousarray(np.concatenate(features)),
+        np.ascontiguousarray(np.concatenate(thresholds)),
+        np.ascontiguousarray(np.concatenate(lefts)),
+        np.ascontiguousarray(np.concatenate(rights)),
+        np.ascontiguousarray(np.concatenate(values)),
+        np.asarray(roots, dtype=np.int64),
+    )
+
+
+def _forest_leaf_proba(tree) -> np.ndarray:
+    """Normalize leaf values exactly like DecisionTreeClassifier.predict_proba"""
+    proba = tree.value[:, 0, :].astype(np.float64)
+    normalizer = proba.sum(axis=1)[:, np.newaxis]
+    normalizer[normalizer == 0.0] = 1.0
+    return proba / normalizer
+
+
+def _scaler_arrays(scaler, n_features: int):
+    """StandardScaler parameters (identity if fitted without mean/std)"""
+    mean = getattr(scaler, 'mean_', None)
+    scale = getattr(scaler, 'scale_', None)
+    if mean is None or not getattr(scaler, 'with_mean', True):
+        mean = np.zeros(n_features)
+    if scale is None or not getattr(scaler, 'with_std', True):
+        scale = np.ones(n_features)
+    return (
+        np.ascontiguousarray(mean, dtype=np.float64),
+        np.ascontiguousarray(scale, dtype=np.float64),
+    )
+
+
+def compile_ensemble(model, scaler) -> Optional[CompiledEnsemble]:
+    """
+    Export a fitted sklearn ensemble + StandardScaler to a CompiledEnsemble
+
+    Returns:
+        CompiledEnsemble, or None for unsupported models (caller keeps sklearn)
+    """
+    try:
+        from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+    except ImportError:
+        return None
+
+    n_features = model.n_features_in_
+    mean, scale = _scaler_arrays(scaler, n_features)
+
+    if isinstance(model, RandomForestClassifier):
+        trees = [est.tree_ for est in model.estimators_]
+        arrays = _flatten_trees(trees, _forest_leaf_proba)
+        return CompiledEnsemble("forest", *arrays, mean=mean, scale=scale)
+
+    if isinstance(model, GradientBoostingClassifier):
+        if model.n_classes_ != 2:
+            logger.debug("Compiled ensemble: only binary GradientBoosting is supported")
+            return None
+        if model.init_ != 'zero' and type(model.init_).__name__ != 'DummyClassifier':
+            logger.debug("Compiled ensemble: custom GradientBoosting init estimator not supported")
+            return None
+        trees = [stage[0].tree_ for stage in model.estimators_]
+        arrays = _flatten_trees(trees, lambda tree: tree.value[:, 0, 0].astype(np.float64))
+        # Initial raw score from the fitted prior (constant for the default init)
+        init_raw = float(model._raw_predict_init(np.zeros((1, n_features), dtype=np.float32))[0, 0])
+        return CompiledEnsemble(
+            "boosting", *arrays, mean=mean, scale=scale,
+            init_raw=init_raw, learning_rate=model.learning_rate
+        )
+
+    return None
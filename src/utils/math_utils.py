@@ -10,16 +10,38 @@ FIX 1: PRECISION & ROUNDING (StepSize Filter)
 
 import logging
 from decimal import Decimal, ROUND_DOWN
+from functools import lru_cache
 from typing import Union
 
 logger = logging.getLogger(__name__)
 
+# Fraction of a step treated as float noise when counting whole steps
+STEP_TOLERANCE = 1e-9
+
+
+def step_decimals(step_size: float) -> int:
+    """
+    Decimal places of a step / tick size (0.001 -> 3, 1e-08 -> 8, 1.0 -> 0)
+
+    Cached: there are only a handful of distinct step sizes.
+    """
+    return _step_decimals(float(step_size))
+
+
+@lru_cache(maxsize=None)
+def _step_decimals(step_size: float) -> int:
+    return max(0, -Decimal(repr(step_size)).normalize().as_tuple().exponent)
+
 
 def round_step_size(quantity: Union[float, int], step_size: float) -> float:
     """
-    ✅ FIX 1: Round quantity to step size using Decimal (safe precision)
+    ✅ FIX 1: Round quantity down to a whole number of steps
     
-    CRITICAL: Always rounds DOWN (floor) to prevent "Insufficient Balance"
+    CRITICAL: Always rounds DOWN (toward zero) to prevent "Insufficient Balance"
+    
+    Counts whole steps in float (a 1e-9 step tolerance absorbs IEEE 754 error,
+    so 0.3 / 0.1 is 3 steps, not 2) and rounds the product to the step's
+    decimals - no Decimal or string allocation per order.
     
     Args:
         quantity: Raw quantity (e.g., 0.14977266648836587)
@@ -36,18 +58,9 @@ def round_step_size(quantity: Union[float, int], step_size: float) -> float:
         0.12345678  # Rounded down to 8 decimals
     """
     try:
-        # Convert to Decimal to avoid IEEE 754 float errors
-        q = Decimal(str(quantity))
-        s = Decimal(str(step_size))
-        
-        # Quantize (round) DOWN to step size
-        # ROUND_DOWN ensures we never round up (safe for balance checks)
-        target = q.quantize(s, rounding=ROUND_DOWN)
-        
-        result = float(target)
-        
-        logger.debug(f"💰 Rounded {quantity} to {result} (step={step_size})")
-        return result
+        steps = int(abs(quantity) / step_size + STEP_TOLERANCE)
+        result = round(steps * step_size, _step_decimals(step_size))
+        return -result if quantity < 0 else result
     
     except Exception as e:
         logger.error(f"❌ rounding failed: qty={quantity}, step={step_size}, error={e}")
@@ -140,7 +153,11 @@ BINANCE_STEP_SIZES = {
 
 def get_step_size(symbol: str) -> float:
     """
-    Get default step size for symbol
+    Get step size for symbol
+    
+    Binance's LOT_SIZE stepSize from the exchange info index (see
+    src/exchange_info.py); the static table below only for symbols the
+    index does not know yet.
     
     Args:
         symbol: Trading pair (e.g., "BTCUSDT")
@@ -148,6 +165,11 @@ def get_step_size(symbol: str) -> float:
     Returns:
         Step size (e.g., 0.001 for BTC)
     """
+    from src.exchange_info import get_exchange_info
+    step_size = get_exchange_info().step_size(symbol)
+    if step_size is not None:
+        return step_size
+    
     # Try exact match
     if symbol in BINANCE_STEP_SIZES:
         return BINANCE_STEP_SIZES[symbol]
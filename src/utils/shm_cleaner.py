@@ -16,10 +16,14 @@ def cleanup_segments():
     Prevents FileExistsError when RingBuffer tries to create new segments
     after an unclean shutdown.
     """
+    from src.bus import Topic
+    from src.bus_transport import bus_segment_name
+
     segments_to_clean = [
         "ring_buffer",
-        "ring_buffer_meta"
-    ]
+        "ring_buffer_meta",
+        "bar_store"
+    ] + [bus_segment_name(topic.value) for topic in Topic]
     
     cleaned_count = 0
     
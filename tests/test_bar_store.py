@@ -0,0 +1,102 @@
+"""
+測試共享內存 K 線存儲（單寫者 / 多讀者，seqlock 一致性讀取）
+"""
+
+import multiprocessing
+import uuid
+import numpy as np
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bar_store import SharedBarStore
+from src.timeframe_buffer import TimeframeBuffer, HEADER_SEQ
+from src.data_formats import CANDLE_IDX_CLOSE, CANDLE_IDX_TIMESTAMP
+
+BASE_MS = 1_700_000_040_000
+SYMBOLS = ['BTC/USDT', 'ETH/USDT']
+
+
+@pytest.fixture
+def store():
+    store = SharedBarStore.create(SYMBOLS, TimeframeBuffer.TIMEFRAMES, capacity=50,
+                                  name=f"test_bars_{uuid.uuid4().hex[:8]}")
+    yield store
+    store.unlink()
+
+
+def _read_last_closes(name, queue):
+    reader = SharedBarStore.attach(name)
+    queue.put((reader.symbols, reader.read('ETH/USDT', '1m', 3)[CANDLE_IDX_CLOSE].tolist()))
+    reader.close()
+
+
+class TestSharedBarStore:
+    """共享 K 線存儲測試"""
+
+    def test_buffer_writes_are_visible_to_readers(self, store):
+        buffer = TimeframeBuffer(max_candles_per_tf=50)
+        buffer.add_tick('BTC/USDT', (BASE_MS, 1.0, 1.0, 1.0, 1.0, 1.0))
+        assert buffer.attach_shared_store(store) == len(SYMBOLS) * len(TimeframeBuffer.TIMEFRAMES)
+
+        for i in range(1, 80):
+            buffer.add_tick('BTC/USDT', (BASE_MS + i * 60_000, i, i + 1, i - 1, i + 0.5, 1.0))
+
+        reader = SharedBarStore.attach(store.shm.name)
+        try:
+            bars = reader.read('BTC/USDT', '1m')
+            assert bars.shape == (6, 50)
+            assert np.array_equal(bars, buffer.get_ohlcv('BTC/USDT', '1m'))
+            assert reader.last_price('BTC/USDT') == 79.5
+            assert reader.last_price('BTCUSDT') == 79.5  # 帳戶側交易對格式（盯市 refresh）
+            assert reader.read('BTC/USDT', '5m', 2)[CANDLE_IDX_TIMESTAMP].tolist() == \
+                buffer.get_column('BTC/USDT', '5m', 'timestamp', 2).tolist()
+        finally:
+            reader.close()
+
+    def test_read_from_another_process(self, store):
+        ring = store.ring('ETH/USDT', '1m')
+        for i in range(5):
+            ring.append(BASE_MS + i * 60_000, i, i, i, float(i), 1.0)
+
+        ctx = multiprocessing.get_context('spawn')
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_read_last_closes, args=(store.shm.name, queue))
+        proc.start()
+        symbols, closes = queue.get(timeout=30)
+        proc.join(timeout=10)
+
+        assert symbols == SYMBOLS
+        assert closes == [2.0, 3.0, 4.0]
+
+    def test_seqlock_rejects_torn_reads(self, store):
+        ring = store.ring('BTC/USDT', '1h')
+        ring.append(BASE_MS, 1.0, 1.0, 1.0, 1.0, 1.0)
+        assert ring.header[HEADER_SEQ] % 2 == 0
+
+        ring.header[HEADER_SEQ] += 1  # 模擬寫者停在寫入中
+        assert store.read('BTC/USDT', '1h') is None
+        ring.header[HEADER_SEQ] += 1
+        assert store.last_bar('BTC/USDT', '1h') == (BASE_MS, 1.0, 1.0, 1.0, 1.0, 1.0)
+
+    def test_column_matrix_matches_per_slot_reads(self, store):
+        buffer = TimeframeBuffer(max_candles_per_tf=50)
+        buffer.attach_shared_store(store)
+        for i in range(70):
+            buffer.add_tick('BTC/USDT', (BASE_MS + i * 60_000, i, i, i, float(i), 1.0))
+        buffer.add_tick('ETH/USDT', (BASE_MS, 1.0, 1.0, 1.0, 1.0, 1.0))
+
+        closes = store.column_matrix(['1h', '5m', '1m'], 3)
+        assert closes.shape == (2, 3, 3)
+        assert closes[0, 2].tolist() == [67.0, 68.0, 69.0]
+        assert closes[0, 1].tolist() == buffer.get_column('BTC/USDT', '5m', 'close', 3).tolist()
+        assert np.isnan(closes[0, 0, 0]) and not np.isnan(closes[0, 0, 1:]).any()  # 只有兩根 1h
+        assert np.isnan(closes[1, 2, :2]).all() and closes[1, 2, 2] == 1.0
+
+    def test_unknown_slot_and_capacity_mismatch(self, store):
+        assert store.read('DOGE/USDT', '1m') is None
+        assert store.last_price('ETH/USDT') is None
+        with pytest.raises(ValueError):
+            TimeframeBuffer(max_candles_per_tf=10).attach_shared_store(store)
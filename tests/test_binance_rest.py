@@ -0,0 +1,266 @@
+"""
+測試 Binance REST 長連接客戶端（連接復用、預熱、交易模塊簽名請求，使用本地模擬 HTTP 服務器）
+"""
+
+import hashlib
+import hmac
+import json
+import pytest
+import sys
+import os
+from urllib.parse import parse_qsl
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import binance_rest
+from src.binance_rest import BinanceRestClient
+
+API_KEY = "test-key"
+API_SECRET = "test-secret"
+
+
+async def _start_mock_binance():
+    """本地模擬 Binance：記錄每個請求所用的 TCP 連接"""
+    seen = {'peers': [], 'paths': [], 'batch_down': False, 'placed': {}, 'lookups': []}
+
+    def record(request):
+        seen['peers'].append(request.transport.get_extra_info('peername'))
+        seen['paths'].append(request.path)
+
+    def verify(request):
+        query = request.rel_url.raw_query_string
+        payload, _, signature = query.rpartition('&signature=')
+        expected = hmac.new(API_SECRET.encode(), payload.encode(), hashlib.sha256).hexdigest()
+        return request.headers.get('X-MBX-APIKEY') == API_KEY and signature == expected
+
+    async def ping(request):
+        record(request)
+        return web.json_response({})
+
+    async def order(request):
+        record(request)
+        if not verify(request):
+            return web.json_response({'code': -1022, 'msg': 'Signature invalid'}, status=400)
+        params = dict(parse_qsl(request.query_string))
+        if params['symbol'] == 'FAILUSDT':
+            return web.json_response({'code': -2019, 'msg': 'Margin is insufficient'}, status=400)
+        result = {'orderId': 42, 'avgPrice': '50000.0', 'status': 'FILLED', 'time': 1}
+        seen['placed'][params.get('newClientOrderId')] = result
+        return web.json_response(result)
+
+    async def query_order(request):
+        record(request)
+        client_id = dict(parse_qsl(request.query_string)).get('origClientOrderId')
+        seen['lookups'].append(client_id)
+        if client_id in seen['placed']:
+            return web.json_response(seen['placed'][client_id])
+        return web.json_response({'code': -2013, 'msg': 'Order does not exist.'}, status=400)
+
+    async def batch_orders(request):
+        record(request)
+        if not verify(request) or seen['batch_down']:
+            return web.json_response({'code': -1000, 'msg': 'Unknown error'}, status=500)
+        results = []
+        for i, params in enumerate(json.loads(dict(parse_qsl(request.query_string))['batchOrders'])):
+            if params['symbol'] == 'FAILUSDT':
+                results.append({'code': -2019, 'msg': 'Margin is insufficient'})
+            else:
+                results.append({'orderId': 100 + i, 'avgPrice': '10.0', 'status': 'FILLED',
+                                'reduceOnly': params.get('reduceOnly') == 'true'})
+        return web.json_response(results)
+
+    async def cancel_batch(request):
+        record(request)
+        ids = json.loads(dict(parse_qsl(request.query_string))['orderIdList'])
+        return web.json_response([{'orderId': i, 'status': 'CANCELED'} if i > 0 else {'code': -2011, 'msg': 'Unknown order'}
+                                  for i in ids])
+
+    async def account(request):
+        record(request)
+        if not verify(request):
+            return web.json_response({'code': -1022, 'msg': 'Signature invalid'}, status=400)
+        return web.json_response({
+            'totalWalletBalance': '1234.5', 'totalUnrealizedProfit': '0',
+            'positions': [{'symbol': 'ETHUSDT', 'positionAmt': '-0.5', 'entryPrice': '3000'},
+                          {'symbol': 'BTCUSDT', 'positionAmt': '0', 'entryPrice': '0'}],
+        })
+
+    app = web.Application()
+    app.router.add_get('/fapi/v1/ping', ping)
+    app.router.add_post('/fapi/v1/order', order)
+    app.router.add_get('/fapi/v1/order', query_order)
+    app.router.add_get('/fapi/v2/account', account)
+    app.router.add_post('/fapi/v1/batchOrders', batch_orders)
+    app.router.add_delete('/fapi/v1/batchOrders', cancel_batch)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", seen
+
+
+@pytest.fixture
+def trade(monkeypatch):
+    from src import trade
+    monkeypatch.setattr(trade, 'BINANCE_API_KEY', API_KEY)
+    monkeypatch.setattr(trade, 'BINANCE_API_SECRET', API_SECRET)
+    monkeypatch.setenv('BINANCE_API_SECRET', API_SECRET)
+    monkeypatch.setattr(trade, 'LIVE_TRADING_ENABLED', True)
+    monkeypatch.setattr(trade, '_order_manager', None)
+    yield trade
+    binance_rest._client = None
+
+
+class TestClient:
+    """連接池與預熱"""
+
+    @pytest.mark.asyncio
+    async def test_warmup_then_requests_reuse_one_connection(self):
+        runner, url, seen = await _start_mock_binance()
+        client = BinanceRestClient(url, API_KEY)
+        try:
+            assert await client.warmup()
+            assert client.warmup_ms is not None
+            for _ in range(5):
+                response = await client.request('GET', '/fapi/v1/ping')
+                assert response.ok and response.data == {}
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+        assert seen['paths'][0] == '/fapi/v1/ping'
+        assert len(seen['peers']) == 6
+        assert len(set(seen['peers'])) == 1  # 一次握手，其餘請求走同一長連接
+        assert client.get_stats()['requests'] == 6
+
+    @pytest.mark.asyncio
+    async def test_warmup_failure_is_reported_not_raised(self):
+        client = BinanceRestClient("http://127.0.0.1:9", connect_timeout=0.5, total_timeout=1.0)
+        assert await client.warmup() is False
+        assert client.errors == 1
+        await client.close()
+
+    def test_options_from_env(self, monkeypatch):
+        monkeypatch.setenv('BINANCE_REST_POOL_SIZE', '7')
+        monkeypatch.setenv('BINANCE_REST_TIMEOUT', '2.5')
+        client = BinanceRestClient.from_env()
+        assert client.pool_size == 7
+        assert client.timeout.total == 2.5
+
+
+class TestTradeRouting:
+    """trade.py 的簽名請求經由共享客戶端"""
+
+    @pytest.mark.asyncio
+    async def test_order_and_account_over_warm_connection(self, trade, monkeypatch):
+        runner, url, seen = await _start_mock_binance()
+        monkeypatch.setattr(trade, 'BINANCE_BASE_URL', url)
+
+        async def noop():
+            return None
+
+        monkeypatch.setattr(trade, '_sync_state_to_redis', noop)
+        monkeypatch.setattr(trade, '_sync_state_to_postgres', noop)
+        try:
+            assert await trade._rest_client().warmup()
+            filled = await trade._execute_order_live({'symbol': 'BTCUSDT', 'side': 'BUY', 'quantity': 0.01})
+            assert filled['orderId'] == 42
+            assert filled['price'] == 50000.0
+
+            failed = await trade._execute_order_live({'symbol': 'FAILUSDT', 'side': 'BUY', 'quantity': 1.0})
+            assert failed is None
+            assert 'FAILUSDT' in trade._failed_order_cooldown
+
+            await trade.initial_account_sync()
+            assert trade._account_state['balance'] == 1234.5
+            assert trade._account_state['positions']['ETHUSDT']['side'] == 'SELL'
+        finally:
+            await binance_rest.close_rest_client()
+            await runner.cleanup()
+
+        assert seen['paths'] == ['/fapi/v1/ping', '/fapi/v1/order', '/fapi/v1/order', '/fapi/v2/account']
+        assert len(set(seen['peers'])) == 1
+
+
+class TestBatchOrders:
+    """批量下單與撤單"""
+
+    @pytest.mark.asyncio
+    async def test_batches_map_partial_failures_back(self, trade, monkeypatch):
+        runner, url, seen = await _start_mock_binance()
+        monkeypatch.setattr(trade, 'BINANCE_BASE_URL', url)
+        orders = [{'symbol': 'FAILUSDT' if i == 2 else f'C{i}USDT', 'side': 'BUY', 'quantity': 1.0}
+                  for i in range(7)]
+        orders.insert(3, {'symbol': 'BADUSDT', 'side': 'BUY', 'quantity': -1})
+        try:
+            fills = await trade.execute_orders(orders)
+        finally:
+            await binance_rest.close_rest_client()
+            await runner.cleanup()
+
+        # 7 筆有效訂單 → 5 + 2 兩個批量請求
+        assert seen['paths'] == ['/fapi/v1/batchOrders'] * 2
+        assert [f is None for f in fills] == [False, False, True, True, False, False, False, False]
+        assert fills[0]['symbol'] == 'C0USDT' and fills[0]['price'] == 10.0
+        assert 'FAILUSDT' in trade._failed_order_cooldown
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_concurrent_single_orders(self, trade, monkeypatch):
+        runner, url, seen = await _start_mock_binance()
+        monkeypatch.setattr(trade, 'BINANCE_BASE_URL', url)
+        seen['batch_down'] = True
+        try:
+            fills = await trade.execute_orders([{'symbol': 'AUSDT', 'side': 'BUY', 'quantity': 1.0},
+                                                {'symbol': 'BUSDT', 'side': 'SELL', 'quantity': 2.0}])
+        finally:
+            await binance_rest.close_rest_client()
+            await runner.cleanup()
+
+        # 5xx：批量結果未知 → 逐筆按 client id 查詢，確認未下單後才重發
+        assert seen['paths'][0] == '/fapi/v1/batchOrders'
+        assert seen['paths'][1:].count('/fapi/v1/order') == 4
+        assert len(seen['lookups']) == 2
+        assert set(seen['placed']) == set(seen['lookups'])
+        assert [f['orderId'] for f in fills] == [42, 42]
+
+    @pytest.mark.asyncio
+    async def test_flatten_positions_in_one_round_trip(self, trade, monkeypatch):
+        runner, url, seen = await _start_mock_binance()
+        monkeypatch.setattr(trade, 'BINANCE_BASE_URL', url)
+
+        async def noop():
+            return None
+
+        monkeypatch.setattr(trade, '_sync_state_to_redis', noop)
+        monkeypatch.setattr(trade, '_sync_state_to_postgres', noop)
+        monkeypatch.setitem(trade._account_state, 'positions', {
+            'AUSDT': {'quantity': 1.0, 'side': 'BUY'},
+            'BUSDT': {'quantity': -2.0, 'side': 'SELL'},
+        })
+        monkeypatch.setitem(trade._account_state, 'trades', [])
+        try:
+            assert await trade.flatten_positions() == 2
+        finally:
+            await binance_rest.close_rest_client()
+            await runner.cleanup()
+
+        assert seen['paths'] == ['/fapi/v1/batchOrders']
+        assert trade._account_state['positions'] == {}
+        assert [t['side'] for t in trade._account_state['trades']] == ['SELL', 'BUY']
+
+    @pytest.mark.asyncio
+    async def test_cancel_orders(self, trade, monkeypatch):
+        runner, url, seen = await _start_mock_binance()
+        monkeypatch.setattr(trade, 'BINANCE_BASE_URL', url)
+        try:
+            results = await trade.cancel_orders('BTCUSDT', [1, 2, 0] + list(range(3, 12)))
+        finally:
+            await binance_rest.close_rest_client()
+            await runner.cleanup()
+
+        assert seen['paths'] == ['/fapi/v1/batchOrders'] * 2
+        assert results[2] is None
+        assert [r['orderId'] for r in results if r] == [1, 2] + list(range(3, 12))
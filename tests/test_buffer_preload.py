@@ -0,0 +1,116 @@
+"""
+測試 TimeframeBuffer 啟動預熱（market_data → buffer、各時間框架按 K 線數 × 週期回看）
+"""
+
+import time
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.timeframe_buffer import TimeframeBuffer
+from src.buffer_preload import preload_timeframe_buffer, decode_rows, lookback_since_ms, DEFAULT_MAX_LOOKBACK_DAYS
+
+
+class FakeConnection:
+    """模擬 asyncpg 連接，返回預設的查詢結果"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def fetch(self, query, *args):
+        self.calls.append((query, args))
+        return self.rows
+
+
+def _rows():
+    rows = []
+    for i in range(25):
+        ts = 1_700_000_040_000 + i * 60_000
+        rows.append({'symbol': 'BTCUSDT', 'timeframe': '1m', 'bucket': ts,
+                     'o': 100.0 + i, 'h': 101.0 + i, 'l': 99.0 + i, 'c': 100.5 + i, 'v': 10.0})
+    for tf in ('5m', '15m', '1h', '1d'):
+        rows.append({'symbol': 'BTCUSDT', 'timeframe': tf, 'bucket': 1_699_920_000_000,
+                     'o': 100.0, 'h': 125.0, 'l': 99.0, 'c': 124.5, 'v': 250.0})
+    return rows
+
+
+class TestBufferPreload:
+    """預熱測試"""
+
+    def test_decode_rows_maps_symbols(self):
+        decoded = decode_rows(_rows(), {'BTCUSDT': 'BTC/USDT'})
+        assert set(decoded.keys()) == {'BTC/USDT'}
+        assert len(decoded['BTC/USDT']['1m']) == 25
+        assert decoded['BTC/USDT']['1m'][0] == (1_700_000_040_000.0, 100.0, 101.0, 99.0, 100.5, 10.0)
+
+    @pytest.mark.asyncio
+    async def test_preload_makes_buffer_ready(self):
+        buffer = TimeframeBuffer()
+        conn = FakeConnection(_rows())
+
+        loaded = await preload_timeframe_buffer(buffer, ['BTC/USDT'], bars_per_tf=100, conn=conn)
+
+        assert loaded == 29
+        assert buffer.has_sufficient_data('BTC/USDT', min_candles_per_tf=1)
+        assert len(buffer.get_candles_by_tf('BTC/USDT')['1m']) == 25
+        # One set-based query for all symbols and timeframes
+        assert len(conn.calls) == 1
+        assert conn.calls[0][1][0] == ['BTCUSDT']
+
+    @pytest.mark.asyncio
+    async def test_live_tick_continues_preloaded_bar(self):
+        buffer = TimeframeBuffer()
+        await preload_timeframe_buffer(buffer, ['BTC/USDT'], conn=FakeConnection(_rows()))
+        last_ts = buffer.get_candles_by_tf('BTC/USDT')['1m'][-1][0]
+
+        # Same minute → update in place, no duplicate bar
+        buffer.add_tick('BTC/USDT', (last_ts + 10_000, 124.0, 130.0, 123.0, 129.0, 1.0))
+        candles = buffer.get_candles_by_tf('BTC/USDT')['1m']
+        assert len(candles) == 25
+        assert candles[-1][2] == 130.0
+        assert candles[-1][4] == 129.0
+
+    def test_lookback_covers_bars_per_timeframe(self):
+        now_ms = 1_700_000_040_000 + 30_000
+        day_ms = 86_400_000
+        since = lookback_since_ms(now_ms, day_ms, 200)
+        assert since % day_ms == 0
+        assert (now_ms - since) // day_ms == 199  # 199 根完整日線 + 當前形成中
+        assert lookback_since_ms(now_ms, 60_000, 200) == 1_700_000_040_000 - 199 * 60_000
+        assert lookback_since_ms(now_ms, day_ms, 200, max_lookback_days=3) == now_ms - 3 * day_ms
+
+    @pytest.mark.asyncio
+    async def test_query_gets_per_timeframe_cutoffs(self):
+        buffer = TimeframeBuffer()
+        conn = FakeConnection([])
+        await preload_timeframe_buffer(buffer, ['BTC/USDT'], bars_per_tf=200, lookback_days=None, conn=conn)
+
+        _, (symbols, tf_names, tf_ms, bars, since_ms) = conn.calls[0]
+        assert tf_names == list(buffer.timeframes)
+        assert bars == min(200, buffer.max_candles_per_tf)
+        now_ms = int(time.time() * 1000)
+        for ms, since in zip(tf_ms, since_ms):
+            assert since <= now_ms - ms * (bars - 1)  # 每個時間框架至少回看 (bars - 1) 個完整週期
+        assert since_ms[tf_names.index('1d')] < since_ms[tf_names.index('1h')] < since_ms[tf_names.index('1m')]
+
+    @pytest.mark.asyncio
+    async def test_default_window_is_capped(self):
+        buffer = TimeframeBuffer()
+        conn = FakeConnection([])
+        start_ms = int(time.time() * 1000)
+        await preload_timeframe_buffer(buffer, ['BTC/USDT'], bars_per_tf=200, conn=conn)
+
+        _, (_, tf_names, tf_ms, bars, since_ms) = conn.calls[0]
+        cap_ms = DEFAULT_MAX_LOOKBACK_DAYS * 86_400_000
+        since = dict(zip(tf_names, since_ms))
+        assert min(since_ms) >= start_ms - cap_ms  # 掃描的 1m 行數有上限
+        assert since['1m'] <= start_ms - 60_000 * (bars - 1)  # 短週期不受上限影響
+        assert since['1h'] == since['1d']  # 長週期被截到同一上限
+
+    @pytest.mark.asyncio
+    async def test_preload_without_symbols_is_noop(self):
+        buffer = TimeframeBuffer()
+        assert await preload_timeframe_buffer(buffer, [], conn=FakeConnection([])) == 0
@@ -0,0 +1,205 @@
+"""
+測試 EventBus 跨進程傳輸（共享內存環、Unix socket、Redis Streams）
+"""
+
+import asyncio
+import multiprocessing
+import uuid
+import pytest
+import numpy as np
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bus import EventBus, Topic
+from src.bus_transport import (
+    ShmRingTransport, UnixSocketTransport, RedisStreamTransport,
+    encode_frame, decode_frame, parse_transport_spec, CODEC_JSON,
+)
+
+
+def _ring_name():
+    return f"test_bus_{uuid.uuid4().hex[:8]}"
+
+
+class TestFraming:
+    """幀編解碼測試"""
+
+    def test_roundtrip_with_numpy_and_enum(self):
+        data = {'price': np.float64(1.5), 'size': np.int64(3), 'topic': Topic.ORDER_FILLED,
+                'series': np.array([1.0, 2.0])}
+        message = decode_frame(encode_frame(123, 'order_filled', data))
+        assert message == {'o': 123, 't': 'order_filled',
+                           'd': {'price': 1.5, 'size': 3, 'topic': 'order_filled', 'series': [1.0, 2.0]}}
+
+    def test_json_frames_decode_anywhere(self):
+        frame = CODEC_JSON + b'{"o": 1, "t": "x", "d": [1, 2]}'
+        assert decode_frame(frame)['d'] == [1, 2]
+        with pytest.raises(ValueError):
+            decode_frame(b'?{}')
+
+    def test_parse_transport_spec(self):
+        assert parse_transport_spec(" signal_generated=shm, order_filled=UNIX ,") == {
+            'signal_generated': 'shm', 'order_filled': 'unix'}
+        with pytest.raises(ValueError):
+            parse_transport_spec("signal_generated=carrier_pigeon")
+        with pytest.raises(ValueError):
+            parse_transport_spec("signal_generated")
+
+
+class TestShmRing:
+    """共享內存廣播環測試"""
+
+    def test_every_reader_sees_every_frame(self):
+        name = _ring_name()
+        writer = ShmRingTransport(name, capacity=8, slot_size=64)
+        readers = [ShmRingTransport(name), ShmRingTransport(name)]
+        try:
+            for i in range(5):
+                writer._write(b'frame-%d' % i)
+            for reader in readers:
+                assert reader.poll() == [b'frame-%d' % i for i in range(5)]
+                assert reader.poll() == []
+        finally:
+            for reader in readers:
+                asyncio.run(reader.close())
+            writer.unlink()
+            asyncio.run(writer.close())
+
+    def test_lapped_reader_counts_drops(self):
+        name = _ring_name()
+        writer = ShmRingTransport(name, capacity=4, slot_size=32)
+        reader = ShmRingTransport(name)
+        try:
+            for i in range(10):
+                writer._write(b'%d' % i)
+            assert reader.poll() == [b'6', b'7', b'8', b'9']
+            assert reader.dropped == 6
+            with pytest.raises(ValueError):
+                writer._write(b'x' * 33)
+        finally:
+            asyncio.run(reader.close())
+            writer.unlink()
+            asyncio.run(writer.close())
+
+    @pytest.mark.asyncio
+    async def test_send_does_not_block_loop_on_held_lock(self):
+        import fcntl
+        name = _ring_name()
+        writer = ShmRingTransport(name, capacity=8, slot_size=64, poll_interval=0.001)
+        reader = ShmRingTransport(name)
+        other = os.open(writer._lock_path, os.O_RDWR)  # 另一個寫入者（獨立的 open file description）
+        try:
+            fcntl.flock(other, fcntl.LOCK_EX)
+            ticks = 0
+            send = asyncio.get_running_loop().create_task(writer.send(b'late'))
+            for _ in range(20):
+                await asyncio.sleep(0.001)
+                ticks += 1  # 事件循環照常運行
+            assert not send.done() and ticks == 20
+            assert reader.poll() == []
+
+            fcntl.flock(other, fcntl.LOCK_UN)
+            await asyncio.wait_for(send, 1.0)
+            assert reader.poll() == [b'late']
+            assert writer.get_stats()['lock_waits'] > 0
+        finally:
+            os.close(other)
+            await reader.close()
+            writer.unlink()
+            await writer.close()
+
+
+def _subscriber_process(name, kind_options, ready, results):
+    """子進程：訂閱 ORDER_FILLED，把收到的事件放回隊列"""
+    async def run():
+        bus = EventBus()
+        if kind_options['kind'] == 'shm':
+            bus.configure(Topic.ORDER_FILLED, ShmRingTransport(name))
+        else:
+            bus.configure(Topic.ORDER_FILLED, UnixSocketTransport(name, name='child'))
+        bus.subscribe(Topic.ORDER_FILLED, lambda data: results.put(data))
+        await bus.start()
+        ready.set()
+        await asyncio.sleep(3.0)
+        await bus.stop()
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("kind", ["shm", "unix"])
+def test_cross_process_delivery(kind, tmp_path):
+    name = _ring_name() if kind == 'shm' else str(tmp_path / "order_filled")
+    ctx = multiprocessing.get_context('fork')
+    ready, results = ctx.Event(), ctx.Queue()
+
+    async def publish():
+        bus = EventBus()
+        if kind == 'shm':
+            transport = ShmRingTransport(name)
+        else:
+            transport = UnixSocketTransport(name, name='parent')
+        bus.configure(Topic.ORDER_FILLED, transport)
+        local = []
+        bus.subscribe(Topic.ORDER_FILLED, local.append)
+        await bus.start()
+
+        child = ctx.Process(target=_subscriber_process, args=(name, {'kind': kind}, ready, results))
+        child.start()
+        assert ready.wait(5.0)
+        await asyncio.sleep(0.1)
+
+        for i in range(3):
+            await bus.publish(Topic.ORDER_FILLED, {'order_id': i, 'price': np.float64(100.5)})
+        received = [results.get(timeout=5.0) for _ in range(3)]
+        await asyncio.sleep(0.05)
+
+        child.terminate()
+        child.join()
+        await bus.stop()
+        if kind == 'shm':
+            transport.unlink()
+        return local, received, bus
+
+    local, received, bus = asyncio.run(publish())
+    assert received == [{'order_id': i, 'price': 100.5} for i in range(3)]
+    # 自己發佈的事件只在本地投遞一次（傳輸層回環被過濾）
+    assert [m['order_id'] for m in local] == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_redis_stream_transport():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    stream = f"bus:test:{uuid.uuid4().hex[:6]}"
+    publisher = RedisStreamTransport(stream, block_ms=50, client=fakeredis.FakeAsyncRedis(server=server))
+    subscriber = RedisStreamTransport(stream, block_ms=50, client=fakeredis.FakeAsyncRedis(server=server))
+
+    received = []
+
+    async def on_frame(frame):
+        received.append(decode_frame(frame)['d'])
+
+    await publisher.send(encode_frame(1, 'signal_generated', {'old': True}))  # 訂閱前的消息不重放
+    await subscriber.start(on_frame)
+    await asyncio.sleep(0.05)
+    for i in range(3):
+        await publisher.send(encode_frame(1, 'signal_generated', {'i': i}))
+    for _ in range(50):
+        if len(received) == 3:
+            break
+        await asyncio.sleep(0.02)
+
+    await subscriber.close()
+    await publisher.close()
+    assert received == [{'i': 0}, {'i': 1}, {'i': 2}]
+
+
+def test_configure_after_start_is_rejected():
+    async def run():
+        bus = EventBus()
+        await bus.start()
+        with pytest.raises(RuntimeError):
+            bus.configure(Topic.SIGNAL_GENERATED, 'unix')
+        await bus.stop()
+    asyncio.run(run())
@@ -0,0 +1,151 @@
+"""
+測試 Dispatcher 優先級調度（優先級順序、老化提升、交易保留工作者、CPU 卸載、指標）
+"""
+
+import asyncio
+import time
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.dispatch import Dispatcher, Priority
+
+
+def _square(x):
+    return x * x
+
+
+class TestOrdering:
+    """調度順序"""
+
+    @pytest.mark.asyncio
+    async def test_trading_runs_before_queued_analysis_and_logging(self):
+        dispatcher = Dispatcher(max_workers=2, reserved_trading_workers=1)
+        gate = asyncio.Event()
+        order = []
+
+        async def job(name):
+            await gate.wait()
+            order.append(name)
+
+        # 唯一的通用工作者被阻塞，其餘任務排隊
+        blocker = dispatcher.submit(Priority.ANALYSIS, job('blocker'))
+        await asyncio.sleep(0)
+        futures = [dispatcher.submit(Priority.LOGGING, job('log')),
+                   dispatcher.submit(Priority.ANALYSIS, job('analysis'))]
+        await asyncio.sleep(0)
+        assert dispatcher.get_stats()['LOGGING']['depth'] == 1
+
+        trade = dispatcher.submit(Priority.TRADING, job('trade'))
+        gate.set()
+        await asyncio.gather(blocker, trade, *futures)
+        assert order.index('trade') < order.index('analysis') < order.index('log')
+        await dispatcher.stop()
+        dispatcher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_reserved_worker_serves_trading_while_general_workers_busy(self):
+        dispatcher = Dispatcher(max_workers=2, reserved_trading_workers=1)
+        slow = dispatcher.submit(Priority.ANALYSIS, asyncio.sleep(0.3))
+        await asyncio.sleep(0)
+
+        start = time.perf_counter()
+        assert await dispatcher.submit_priority(Priority.TRADING, asyncio.sleep(0, result='filled')) == 'filled'
+        assert time.perf_counter() - start < 0.1
+        await slow
+        await dispatcher.stop()
+        dispatcher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_overdue_logging_is_promoted_above_fresh_analysis(self):
+        dispatcher = Dispatcher(max_workers=2, reserved_trading_workers=1,
+                                max_wait={Priority.LOGGING: 0.05})
+        gate = asyncio.Event()
+        order = []
+
+        async def job(name):
+            await gate.wait()
+            order.append(name)
+
+        blocker = dispatcher.submit(Priority.ANALYSIS, job('blocker'))
+        await asyncio.sleep(0)
+        log = dispatcher.submit(Priority.LOGGING, job('log'))
+        await asyncio.sleep(0.08)
+        analysis = dispatcher.submit(Priority.ANALYSIS, job('analysis'))
+        gate.set()
+        await asyncio.gather(blocker, log, analysis)
+
+        assert order == ['blocker', 'log', 'analysis']
+        assert dispatcher.get_stats()['LOGGING']['promoted'] == 1
+        await dispatcher.stop()
+        dispatcher.shutdown()
+
+
+class TestResults:
+    """結果與錯誤"""
+
+    @pytest.mark.asyncio
+    async def test_submit_priority_returns_result_and_swallows_errors(self):
+        dispatcher = Dispatcher()
+
+        async def broken():
+            raise ValueError("boom")
+
+        assert await dispatcher.submit_priority(Priority.ANALYSIS, asyncio.sleep(0, result=7)) == 7
+        assert await dispatcher.submit_priority(Priority.ANALYSIS, broken()) is None
+        with pytest.raises(ValueError):
+            await dispatcher.submit(Priority.ANALYSIS, broken)
+
+        stats = dispatcher.get_stats()['ANALYSIS']
+        assert stats['submitted'] == 3
+        assert stats['completed'] == 1
+        assert stats['failed'] == 2
+        await dispatcher.stop()
+        dispatcher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_run_cpu_thread_and_process(self):
+        dispatcher = Dispatcher(max_workers=2)
+        assert await dispatcher.run_cpu(_square, 4) == 16
+        assert await dispatcher.run_cpu(_square, 5, use_process=True) == 25
+        assert await dispatcher.run_cpu(sum, [1, 2, 3], priority=Priority.TRADING) == 6
+        await dispatcher.stop()
+        dispatcher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_queued_jobs(self):
+        dispatcher = Dispatcher(max_workers=2)
+        running = dispatcher.submit(Priority.ANALYSIS, asyncio.sleep(10))
+        await asyncio.sleep(0)
+        queued = dispatcher.submit(Priority.LOGGING, asyncio.sleep(0))
+        await dispatcher.stop()
+        assert queued.cancelled()
+        assert running.cancelled()
+        dispatcher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_job_cancelled_error_keeps_worker(self):
+        dispatcher = Dispatcher(max_workers=2, reserved_trading_workers=1)
+
+        async def awaits_cancelled_future():
+            future = asyncio.get_running_loop().create_future()
+            future.cancel()
+            await future
+
+        cancelled = dispatcher.submit(Priority.TRADING, awaits_cancelled_future)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert cancelled.cancelled()
+
+        # 保留的交易 worker 仍存活，後續任務照常執行
+        assert await asyncio.wait_for(dispatcher.submit(Priority.TRADING, asyncio.sleep(0, result='ok')), 1.0) == 'ok'
+        assert all(not worker.done() for worker in dispatcher._workers)
+        assert dispatcher.get_stats()['TRADING']['cancelled'] == 1
+        await dispatcher.stop()
+        dispatcher.shutdown()
+
+    def test_reserved_workers_validated(self):
+        with pytest.raises(ValueError):
+            Dispatcher(max_workers=1, reserved_trading_workers=1)
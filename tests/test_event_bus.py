@@ -0,0 +1,259 @@
+"""
+測試 EventBus 並發隔離投遞（每訂閱者隊列、溢出策略、計數器、同步模式）
+"""
+
+import asyncio
+import time
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bus import EventBus, Topic, OVERFLOW_DROP_NEWEST, OVERFLOW_BLOCK
+
+
+class TestIsolatedDispatch:
+    """訂閱者互相隔離"""
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_does_not_delay_publisher_or_others(self):
+        bus = EventBus()
+        fast = []
+
+        async def slow(data):
+            await asyncio.sleep(0.2)
+
+        bus.subscribe(Topic.SIGNAL_GENERATED, slow)
+        bus.subscribe(Topic.SIGNAL_GENERATED, fast.append)
+
+        start = time.perf_counter()
+        for i in range(5):
+            await bus.publish(Topic.SIGNAL_GENERATED, i)
+        assert time.perf_counter() - start < 0.05
+
+        await asyncio.sleep(0.01)
+        assert fast == [0, 1, 2, 3, 4]
+        await bus.stop()
+
+    @pytest.mark.asyncio
+    async def test_errors_are_counted_and_isolated(self):
+        bus = EventBus()
+        received = []
+
+        def broken(data):
+            raise ValueError("boom")
+
+        bus.subscribe(Topic.ORDER_FILLED, broken)
+        bus.subscribe(Topic.ORDER_FILLED, received.append)
+        for i in range(3):
+            await bus.publish(Topic.ORDER_FILLED, i)
+        await bus.drain()
+
+        stats = {s['subscriber']: s for s in bus.get_stats()['subscribers']}
+        assert stats[broken.__qualname__]['errors'] == 3
+        assert stats[broken.__qualname__]['last_error'] == "ValueError: boom"
+        assert received == [0, 1, 2]
+        assert stats['list.append']['delivered'] == 3
+        await bus.stop()
+
+    @pytest.mark.asyncio
+    async def test_per_subscriber_order_is_preserved(self):
+        bus = EventBus()
+        seen = []
+
+        async def handler(data):
+            await asyncio.sleep(0)
+            seen.append(data)
+
+        bus.subscribe(Topic.TICK_UPDATE, handler)
+        for i in range(100):
+            await bus.publish(Topic.TICK_UPDATE, i)
+        await bus.drain(Topic.TICK_UPDATE)
+        assert seen == list(range(100))
+        await bus.stop()
+
+
+class TestOverflow:
+    """溢出策略"""
+
+    @staticmethod
+    async def _fill(overflow, n=10):
+        bus = EventBus()
+        gate = asyncio.Event()
+        seen = []
+
+        async def handler(data):
+            await gate.wait()
+            seen.append(data)
+
+        subscription = bus.subscribe(Topic.TICK_UPDATE, handler, queue_size=3, overflow=overflow)
+        await bus.publish(Topic.TICK_UPDATE, 0)
+        await asyncio.sleep(0)  # 消費者取走 0 並阻塞在 gate
+        for i in range(1, n):
+            await bus.publish(Topic.TICK_UPDATE, i)
+        gate.set()
+        await bus.drain()
+        await bus.stop()
+        return seen, subscription
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_keeps_latest(self):
+        seen, subscription = await self._fill('drop_oldest')
+        assert seen == [0, 7, 8, 9]
+        assert subscription.dropped == 6
+
+    @pytest.mark.asyncio
+    async def test_drop_newest_keeps_earliest(self):
+        seen, subscription = await self._fill(OVERFLOW_DROP_NEWEST)
+        assert seen == [0, 1, 2, 3]
+        assert subscription.dropped == 6
+
+    @pytest.mark.asyncio
+    async def test_block_applies_backpressure(self):
+        bus = EventBus()
+        seen = []
+
+        async def handler(data):
+            await asyncio.sleep(0.01)
+            seen.append(data)
+
+        bus.subscribe(Topic.TICK_UPDATE, handler, queue_size=2, overflow=OVERFLOW_BLOCK)
+        for i in range(6):
+            await bus.publish(Topic.TICK_UPDATE, i)
+        await bus.drain()
+        assert seen == list(range(6))
+        await bus.stop()
+
+    def test_invalid_policy(self):
+        with pytest.raises(ValueError):
+            EventBus().subscribe(Topic.TICK_UPDATE, print, overflow='spill')
+
+
+class TestSyncMode:
+    """同步模式：發佈返回前已處理"""
+
+    @pytest.mark.asyncio
+    async def test_sync_handler_runs_inline(self):
+        bus = EventBus()
+        state = []
+
+        async def execute(order):
+            await asyncio.sleep(0.01)
+            state.append(order)
+
+        bus.subscribe(Topic.ORDER_REQUEST, execute, sync=True)
+        await bus.publish(Topic.ORDER_REQUEST, 'a')
+        assert state == ['a']
+
+        stats = bus.get_stats()['subscribers'][0]
+        assert stats['mode'] == 'sync'
+        assert stats['max_handler_ms'] >= 10.0
+        await bus.stop()
+
+
+class _PipeTransport:
+    """不收發的假傳輸（只用來把主題標記為跨進程）"""
+
+    kind = 'pipe'
+
+    async def start(self, on_frame):
+        pass
+
+    async def send(self, frame):
+        pass
+
+    async def close(self):
+        pass
+
+
+class TestTradeSubscriptions:
+    """交易信號不因隊列滿而丟失；執行處理器只在一個進程訂閱"""
+
+    @pytest.fixture
+    def trade_init(self, monkeypatch):
+        from src import trade
+        started = []
+
+        async def noop():
+            pass
+
+        async def start_user_stream():
+            started.append('user_stream')
+
+        class _Writer:
+            def start(self):
+                started.append('signal_writer')
+
+        monkeypatch.setattr(trade, '_load_state_from_postgres', noop)
+        monkeypatch.setattr(trade, 'initial_account_sync', noop)
+        monkeypatch.setattr(trade, 'init_virtual_learning', noop)
+        monkeypatch.setattr(trade, '_start_user_stream', start_user_stream)
+        monkeypatch.setattr(trade, '_get_signal_writer', lambda: _Writer())
+        monkeypatch.setattr(trade, 'BINANCE_API_KEY', '')
+        monkeypatch.setattr(trade, 'LIVE_TRADING_ENABLED', True)
+        return trade, started
+
+    @pytest.mark.asyncio
+    async def test_execution_handlers_in_exactly_one_process(self, trade_init, monkeypatch):
+        trade, started = trade_init
+        brain_bus, trade_bus = EventBus(), EventBus()
+        for b in (brain_bus, trade_bus):
+            b.configure(Topic.SIGNAL_GENERATED, _PipeTransport())
+            await b.start()
+
+        # 大腦：信號跨進程 → 只載入狀態
+        monkeypatch.setattr(trade, 'bus', brain_bus)
+        await trade.init(execute=not brain_bus.is_remote(Topic.SIGNAL_GENERATED))
+        assert brain_bus.subscribers == {}
+        assert started == []
+
+        # 交易進程：唯一的執行者（一個 _check_risk、一個用戶數據流）
+        monkeypatch.setattr(trade, 'bus', trade_bus)
+        await trade.init(execute=trade_bus.is_remote(Topic.SIGNAL_GENERATED))
+        assert [s.callback for s in trade_bus.subscribers[Topic.SIGNAL_GENERATED]] == [trade._check_risk]
+        assert set(trade_bus.subscribers) == {Topic.SIGNAL_GENERATED, Topic.ORDER_REQUEST, Topic.ORDER_FILLED}
+        assert started == ['user_stream', 'signal_writer']
+
+    @pytest.mark.asyncio
+    async def test_local_signals_execute_in_brain(self, trade_init, monkeypatch):
+        trade, started = trade_init
+        bus = EventBus()
+        await bus.start()
+        monkeypatch.setattr(trade, 'bus', bus)
+        await trade.init(execute=not bus.is_remote(Topic.SIGNAL_GENERATED))
+        assert len(bus.subscribers[Topic.SIGNAL_GENERATED]) == 1
+        assert started == ['user_stream', 'signal_writer']
+
+    @pytest.mark.asyncio
+    async def test_full_signal_queue_loses_nothing(self, monkeypatch):
+        from src import trade
+        bus = EventBus()
+        monkeypatch.setattr(trade, 'bus', bus)
+        gate = asyncio.Event()
+        seen = []
+
+        async def check_risk(signal):
+            await gate.wait()
+            seen.append(signal['n'])
+
+        monkeypatch.setattr(trade, '_check_risk', check_risk)
+        trade._subscribe_handlers()
+        subscription = bus.subscribers[Topic.SIGNAL_GENERATED][0]
+        assert subscription.overflow == OVERFLOW_BLOCK
+        subscription.queue_size = 5
+
+        async def burst():
+            for n in range(50):
+                await bus.publish(Topic.SIGNAL_GENERATED, {'n': n})
+
+        publisher = asyncio.get_running_loop().create_task(burst())
+        await asyncio.sleep(0.01)
+        assert not publisher.done()  # 隊列滿：發布方等待而非丟棄
+        gate.set()
+        await publisher
+        await bus.drain()
+        await bus.stop()
+
+        assert seen == list(range(50))
+        assert subscription.dropped == 0
@@ -0,0 +1,226 @@
+"""
+測試交易所過濾器索引（exchangeInfo / 槓桿分檔解析、O(1) 查詢、磁碟快取離線啟動、背景刷新、接入驗證器），使用本地模擬 HTTP 服務器
+"""
+
+import json
+import pytest
+import sys
+import os
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import exchange_info as exchange_info_module
+from src.binance_constraints import BinanceConstraints
+from src.binance_rest import BinanceRestClient
+from src.exchange_info import ExchangeInfo, parse_exchange_info
+from src.order_validator import OrderValidator
+from src.utils.math_utils import get_step_size, round_step_size, step_decimals
+
+EXCHANGE_INFO = {'symbols': [
+    {'symbol': 'SOLUSDT', 'filters': [
+        {'filterType': 'PRICE_FILTER', 'tickSize': '0.0100'},
+        {'filterType': 'LOT_SIZE', 'stepSize': '1', 'minQty': '1', 'maxQty': '1000000'},
+        {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+    ]},
+    {'symbol': 'PEPEUSDT', 'filters': [
+        {'filterType': 'PRICE_FILTER', 'tickSize': '0.0000001'},
+        {'filterType': 'LOT_SIZE', 'stepSize': '100', 'minQty': '100', 'maxQty': '800000000'},
+        {'filterType': 'MIN_NOTIONAL', 'notional': '5'},
+    ]},
+    {'symbol': 'BTCUSDT', 'filters': [
+        {'filterType': 'PRICE_FILTER', 'tickSize': '0.10'},
+        {'filterType': 'LOT_SIZE', 'stepSize': '0.001', 'minQty': '0.001', 'maxQty': '1000'},
+        {'filterType': 'MIN_NOTIONAL', 'notional': '100'},
+    ]},
+]}
+
+BRACKETS = [
+    {'symbol': 'SOLUSDT', 'brackets': [
+        {'bracket': 2, 'initialLeverage': 50, 'notionalCap': 50000, 'notionalFloor': 5000},
+        {'bracket': 1, 'initialLeverage': 75, 'notionalCap': 5000, 'notionalFloor': 0},
+        {'bracket': 3, 'initialLeverage': 20, 'notionalCap': 500000, 'notionalFloor': 50000},
+    ]},
+]
+
+
+async def _start_mock_binance(state):
+    async def exchange_info(request):
+        state['calls'] += 1
+        if state.get('down'):
+            return web.json_response({'code': -1001, 'msg': 'Internal error'}, status=503)
+        return web.json_response(state.get('info', EXCHANGE_INFO))
+
+    async def leverage_bracket(request):
+        state['signed'] = 'signature=' in request.query_string
+        return web.json_response(BRACKETS)
+
+    app = web.Application()
+    app.router.add_get('/fapi/v1/exchangeInfo', exchange_info)
+    app.router.add_get('/fapi/v1/leverageBracket', leverage_bracket)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def _sign(params):
+    return lambda: "timestamp=1&signature=abc"
+
+
+@pytest.fixture
+def index(monkeypatch, tmp_path):
+    """以測試索引替換全局索引"""
+    info = ExchangeInfo(cache_path=str(tmp_path / 'exchange_info.json'))
+    monkeypatch.setattr(exchange_info_module, '_exchange_info', info)
+    return info
+
+
+class TestRounding:
+    """步長取整"""
+
+    def test_round_down_to_step(self):
+        assert round_step_size(0.14977266648836587, 0.001) == 0.149
+        assert round_step_size(0.123456789, 0.00000001) == 0.12345678
+        assert round_step_size(0.3, 0.1) == 0.3  # 浮點 2.9999... 步仍算 3 步
+        assert round_step_size(1234, 100.0) == 1200.0
+        assert round_step_size(1, 0) == 0.0
+
+    def test_step_decimals(self):
+        assert step_decimals(0.001) == 3
+        assert step_decimals(1e-8) == 8
+        assert step_decimals(1.0) == 0
+        assert step_decimals(100.0) == 0
+
+
+class TestIndex:
+    """解析與查詢"""
+
+    def test_parse_and_lookup(self, index):
+        index.load(EXCHANGE_INFO, BRACKETS)
+
+        assert len(index) == 3
+        assert index.tick_size('PEPEUSDT') == 1e-7
+        assert index.step_size('PEPEUSDT') == 100.0
+        assert index.min_qty('SOLUSDT') == 1.0
+        assert index.min_notional('BTCUSDT') == 100.0
+        assert index.get('UNKNOWNUSDT') is None
+        assert index.step_size('UNKNOWNUSDT') is None
+
+    def test_leverage_by_notional(self, index):
+        index.load(EXCHANGE_INFO, BRACKETS)
+
+        assert index.max_leverage('SOLUSDT', 1000) == 75
+        assert index.max_leverage('SOLUSDT', 5000) == 75
+        assert index.max_leverage('SOLUSDT', 5001) == 50
+        assert index.max_leverage('SOLUSDT', 10_000_000) == 20
+        assert index.max_leverage('BTCUSDT', 1000) is None  # 沒有分檔數據
+
+    def test_refresh_without_brackets_keeps_previous(self, index):
+        index.load(EXCHANGE_INFO, BRACKETS)
+        index.load(EXCHANGE_INFO)
+        assert index.max_leverage('SOLUSDT', 1000) == 75
+
+    def test_malformed_entry_skipped(self):
+        parsed = parse_exchange_info({'symbols': [{'symbol': 'BADUSDT', 'filters': [
+            {'filterType': 'LOT_SIZE', 'stepSize': 'x'}]}] + EXCHANGE_INFO['symbols']})
+        assert 'BADUSDT' not in parsed
+        assert 'SOLUSDT' in parsed
+
+
+class TestCache:
+    """磁碟快取"""
+
+    def test_offline_startup_from_cache(self, tmp_path):
+        path = str(tmp_path / 'cache' / 'exchange_info.json')
+        first = ExchangeInfo(cache_path=path)
+        first.load(EXCHANGE_INFO, BRACKETS)
+        assert first.save_cache()
+
+        offline = ExchangeInfo(cache_path=path)
+        assert offline.load_cache()
+        assert offline.source == 'cache'
+        assert offline.step_size('PEPEUSDT') == 100.0
+        assert offline.max_leverage('SOLUSDT', 20000) == 50
+
+    def test_missing_or_corrupt_cache(self, tmp_path):
+        path = tmp_path / 'exchange_info.json'
+        assert not ExchangeInfo(cache_path=str(path)).load_cache()
+        path.write_text('{not json')
+        assert not ExchangeInfo(cache_path=str(path)).load_cache()
+
+
+class TestRefresh:
+    """從交易所刷新"""
+
+    @pytest.mark.asyncio
+    async def test_refresh_fetches_and_caches(self, tmp_path):
+        state = {'calls': 0}
+        runner, url = await _start_mock_binance(state)
+        client = BinanceRestClient(url)
+        path = str(tmp_path / 'exchange_info.json')
+        try:
+            info = ExchangeInfo(cache_path=path, refresh_interval=3600)
+            assert await info.start(client, _sign)
+            assert state['signed']
+            assert info.source == 'exchange'
+            assert info.max_leverage('SOLUSDT', 100) == 75
+
+            with open(path) as f:
+                assert 'SOLUSDT' in json.load(f)['symbols']
+
+            # 交易所不可用：保留現有索引
+            state['down'] = True
+            assert not await info.refresh(client, _sign)
+            assert info.step_size('SOLUSDT') == 1.0
+            assert info.get_stats()['failures'] == 1
+            await info.stop()
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    @pytest.mark.asyncio
+    async def test_refresh_swaps_whole_index(self, index):
+        state = {'calls': 0, 'info': {'symbols': EXCHANGE_INFO['symbols'][:1]}}
+        runner, url = await _start_mock_binance(state)
+        client = BinanceRestClient(url)
+        try:
+            index.load(EXCHANGE_INFO, BRACKETS)
+            assert await index.refresh(client)
+            assert 'SOLUSDT' in index and 'PEPEUSDT' not in index  # 下架符號被移除
+            assert index.max_leverage('SOLUSDT', 100) == 75
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+
+class TestValidatorWiring:
+    """驗證器使用真實過濾器"""
+
+    def test_step_size_and_constraints(self, index):
+        index.load(EXCHANGE_INFO, BRACKETS)
+
+        assert get_step_size('PEPEUSDT') == 100.0
+        assert get_step_size('XRPUSDT') == 1.0  # 不在索引中：回退靜態表
+        assert BinanceConstraints.get_min_notional('BTCUSDT') == 100.0
+        assert BinanceConstraints.get_min_notional('XRPUSDT') == 5.0
+        assert BinanceConstraints.get_max_leverage('SOLUSDT', 60000) == 20
+        assert BinanceConstraints.get_max_leverage('BTCUSDT', 1000) == 125  # 無分檔：回退靜態表
+
+        # PEPE：5 USDT / 0.00001 = 500000 → 已是 100 的倍數
+        assert BinanceConstraints.calculate_min_quantity('PEPEUSDT', 0.00001) == 500000
+        # SOL minQty 1 高於 5 / 200 = 0.025
+        assert BinanceConstraints.calculate_min_quantity('SOLUSDT', 200.0) == 1.0
+
+    def test_order_validator_uses_symbol_step(self, index):
+        index.load(EXCHANGE_INFO, BRACKETS)
+
+        quantity, _, adjusted = OrderValidator.normalize_for_binance('SOLUSDT', 0.5, 200.0)
+        assert quantity == 1.0 and adjusted
+
+        valid, error, details = OrderValidator.validate_order_with_tolerance('BTCUSDT', 0.001, 50000.0)
+        assert not valid  # 50 USDT < 交易所 MIN_NOTIONAL 100
+        assert details['min_notional'] == 100.0
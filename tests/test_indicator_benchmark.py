@@ -0,0 +1,57 @@
+"""
+測試指標基準測試工具：NumPy 參考實現正確、結果格式、回歸判定
+"""
+
+import json
+import numpy as np
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import indicator_benchmark as bench
+from src import indicators as ind
+
+
+class TestIndicatorBenchmark:
+    """基準測試工具測試"""
+
+    @pytest.mark.parametrize("n", [20, 300])
+    def test_numpy_references_match_kernels(self, n):
+        cases = bench._cases(n)
+        for indicator in ('rsi', 'sma', 'ema', 'atr', 'bb_width'):
+            assert cases[indicator]['numpy']() == pytest.approx(cases[indicator]['numba'](), rel=1e-9), indicator
+        assert cases['macd']['numpy']() == pytest.approx(cases['macd']['numba']()[0], rel=1e-9)
+
+    def test_run_suite_is_machine_readable(self, monkeypatch):
+        monkeypatch.setattr(bench, "MIN_RUN_SECONDS", 0.0)
+        report = bench.run_suite(windows=[50], indicators=['rsi'], paths=['numba', 'numpy'])
+
+        assert json.loads(json.dumps(report)) == report
+        assert {(r['indicator'], r['path'], r['n']) for r in report['results']} == \
+            {('rsi', 'numba', 50), ('rsi', 'numpy', 50)}
+        assert all(r['us_per_call'] > 0 for r in report['results'])
+        assert report['meta']['has_numba'] == ind.HAS_NUMBA
+
+    def test_regressions_are_flagged(self):
+        baseline = {'results': [
+            {'indicator': 'rsi', 'path': 'numba', 'n': 20, 'us_per_call': 1.0},
+            {'indicator': 'atr', 'path': 'numba', 'n': 20, 'us_per_call': 10.0},
+            {'indicator': 'ema', 'path': 'numba', 'n': 20, 'us_per_call': 10.0},
+        ]}
+        current = {'results': [
+            {'indicator': 'rsi', 'path': 'numba', 'n': 20, 'us_per_call': 2.5},   # 2.5x 但只慢 1.5µs → 噪音
+            {'indicator': 'atr', 'path': 'numba', 'n': 20, 'us_per_call': 30.0},  # 回歸
+            {'indicator': 'ema', 'path': 'numba', 'n': 20, 'us_per_call': 12.0},  # 在閾值內
+            {'indicator': 'sma', 'path': 'numba', 'n': 20, 'us_per_call': 99.0},  # 無基準
+        ]}
+
+        regressions = bench.compare_to_baseline(current, baseline, threshold=1.5)
+        assert [(r['indicator'], r['ratio']) for r in regressions] == [('atr', 3.0)]
+
+    def test_stored_baseline_covers_every_case(self):
+        with open(bench.DEFAULT_BASELINE) as f:
+            baseline = json.load(f)
+        cases = {(r['indicator'], r['n']) for r in baseline['results'] if r['path'] == 'numba'}
+        assert cases == {(i, n) for i in bench._cases(20) for n in bench.DEFAULT_WINDOWS}
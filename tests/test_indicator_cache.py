@@ -0,0 +1,159 @@
+"""
+測試指標結果 LRU 快取（已收盤 K 線重用、形成中 K 線失效、已收盤狀態 + 形成中 K 線增量尾部）
+"""
+
+import numpy as np
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.data_formats import CANDLE_IDX_TIMESTAMP, CANDLE_IDX_HIGH, CANDLE_IDX_LOW, CANDLE_IDX_CLOSE
+from src.indicator_cache import IndicatorCache, _MISSING
+from src.indicators import Indicators
+from src.timeframe_buffer import TimeframeBuffer
+
+BASE_MS = 1_700_000_040_000
+
+
+class TestIndicatorCache:
+    """指標快取測試"""
+
+    def test_closed_bar_is_computed_once(self):
+        cache = IndicatorCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 42.0
+
+        for _ in range(5):
+            assert cache.get_or_compute('BTC/USDT', '5m', BASE_MS, 'rsi', (14,), compute) == 42.0
+
+        assert len(calls) == 1
+        stats = cache.get_stats()
+        assert (stats['hits'], stats['misses']) == (4, 1)
+        assert stats['hit_rate'] == 0.8
+
+    def test_params_and_bar_are_part_of_the_key(self):
+        cache = IndicatorCache()
+        cache.get_or_compute('BTC/USDT', '1m', BASE_MS, 'rsi', (14,), lambda: 1)
+        assert cache.get_or_compute('BTC/USDT', '1m', BASE_MS, 'rsi', (7,), lambda: 2) == 2
+        assert cache.get_or_compute('BTC/USDT', '1m', BASE_MS + 60_000, 'rsi', (14,), lambda: 3) == 3
+        assert cache.get_or_compute('ETH/USDT', '1m', BASE_MS, 'rsi', (14,), lambda: 4) == 4
+        assert len(cache) == 4
+
+    def test_open_bar_updates_invalidate(self):
+        buffer = TimeframeBuffer()
+        cache = IndicatorCache()
+
+        def lookup(value):
+            ts, revision = buffer.bar_state('BTC/USDT', '1m')
+            return cache.get_or_compute('BTC/USDT', '1m', ts, 'close', (), lambda: value, revision)
+
+        buffer.add_tick('BTC/USDT', (BASE_MS, 10.0, 10.0, 10.0, 10.0, 1.0))
+        assert lookup(1) == 1
+        assert lookup(2) == 1  # 無更新 → 命中
+
+        buffer.add_tick('BTC/USDT', (BASE_MS + 10_000, 10.0, 11.0, 10.0, 11.0, 1.0))
+        assert lookup(3) == 3  # 形成中的 K 線更新 → 失效重算
+        assert cache.get_stats()['invalidations'] == 1
+
+    def test_lru_eviction(self):
+        cache = IndicatorCache(max_entries=2)
+        cache.put(('a',), 1)
+        cache.put(('b',), 2)
+        cache.get(('a',))
+        cache.put(('c',), 3)
+
+        assert cache.get(('a',)) == 1
+        assert cache.get(('b',)) is _MISSING
+        assert cache.get_stats()['evictions'] == 1
+
+    def test_invalidate_symbol(self):
+        cache = IndicatorCache()
+        cache.get_or_compute('BTC/USDT', '1m', BASE_MS, 'rsi', (14,), lambda: 1)
+        cache.get_or_compute('BTC/USDT', '5m', BASE_MS, 'rsi', (14,), lambda: 1)
+        cache.get_or_compute('ETH/USDT', '1m', BASE_MS, 'rsi', (14,), lambda: 1)
+        assert cache.invalidate('BTC/USDT', '1m') == 1
+        assert cache.invalidate('BTC/USDT') == 1
+        assert len(cache) == 1
+
+
+class TestLiveBarTail:
+    """已收盤狀態快取 + 形成中 K 線尾部"""
+
+    @pytest.mark.parametrize('n', [20, 34, 35, 50])
+    def test_tail_matches_full_window(self, n):
+        rng = np.random.default_rng(n)
+        closes = 50000 + np.cumsum(rng.normal(0, 20, n))
+        highs = closes + rng.random(n) * 10
+        lows = closes - rng.random(n) * 10
+
+        state = Indicators.closed_bar_state(closes[:-1], highs[:-1], lows[:-1])
+        live = Indicators.live_bar(state, closes[-1], highs[-1], lows[-1])
+        assert live['rsi'] == pytest.approx(Indicators.rsi(closes, period=14), rel=1e-12)
+        assert live['macd'] == pytest.approx(Indicators.macd(closes, fast=12, slow=26, signal_period=9), rel=1e-12)
+        assert live['atr'] == pytest.approx(Indicators.atr(highs, lows, closes, period=14), rel=1e-12)
+        assert live['bb_width'] == pytest.approx(Indicators.bollinger_bands(closes, period=20, std_dev=2.0), rel=1e-12)
+        assert live['fvg'] == Indicators.detect_fvg(closes, highs, lows)
+
+    def test_ticks_hit_closed_state(self):
+        """每根 K 線只重算一次已收盤狀態；形成中 K 線的每筆更新都命中"""
+        buffer = TimeframeBuffer()
+        cache = IndicatorCache()
+        rng = np.random.default_rng(0)
+        price = 100.0
+        bars, ticks = 40, 10
+        for b in range(bars):
+            for t in range(ticks):
+                price += rng.normal(0, 0.1)
+                buffer.add_tick('BTC/USDT', (BASE_MS + b * 60_000 + t * 5_000, price, price + 0.05, price - 0.05, price, 1.0))
+                ohlcv = buffer.get_ohlcv('BTC/USDT', '1m', 50)
+                if ohlcv.shape[1] < 20:
+                    continue
+                closes, highs, lows = ohlcv[CANDLE_IDX_CLOSE], ohlcv[CANDLE_IDX_HIGH], ohlcv[CANDLE_IDX_LOW]
+                state = cache.get_or_compute(
+                    'BTC/USDT', '1m', int(ohlcv[CANDLE_IDX_TIMESTAMP][-2]), 'closed_state', (len(closes),),
+                    lambda: Indicators.closed_bar_state(closes[:-1], highs[:-1], lows[:-1])
+                )
+                live = Indicators.live_bar(state, closes[-1], highs[-1], lows[-1])
+                assert live['rsi'] == pytest.approx(Indicators.rsi(closes, period=14), rel=1e-12)
+
+        stats = cache.get_stats()
+        assert stats['misses'] == bars - 19  # 每根已收盤 K 線一次
+        assert stats['invalidations'] == 0
+        assert stats['hit_rate'] > 0.85
+
+
+class TestPreloadPriming:
+    """預熱後填充已收盤狀態：第一根即時 K 線不從頭計算"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('next_minute', [0, 1])
+    async def test_first_live_candle_hits_primed_state(self, monkeypatch, next_minute):
+        from src import brain, indicator_cache, timeframe_buffer
+        buffer = TimeframeBuffer()
+        cache = IndicatorCache()
+        monkeypatch.setattr(timeframe_buffer, '_buffer', buffer)
+        monkeypatch.setattr(indicator_cache, '_cache', cache)
+
+        rng = np.random.default_rng(3)
+        closes = 100 + np.cumsum(rng.normal(0, 0.2, 80))
+        buffer.load_candles('BTC/USDT', '1m', [
+            (float(BASE_MS - (79 - i) * 60_000), c, c + 0.1, c - 0.1, c, 1.0) for i, c in enumerate(closes)
+        ])
+        for tf, seconds in TimeframeBuffer.TIMEFRAMES.items():
+            if tf != '1m':
+                step = seconds * 1000
+                buffer.load_candles('BTC/USDT', tf, [(float(BASE_MS // step * step), 100.0, 101.0, 99.0, 100.0, 1.0)])
+        assert brain.prime_indicator_cache(buffer, ['BTC/USDT', 'ETH/USDT']) == 1
+        primed = cache.get_stats()['misses']
+
+        # 同一分鐘的更新，或下一分鐘的第一筆
+        ts = BASE_MS + next_minute * 60_000 + 30_000
+        await brain.process_candle((ts, 101.0, 101.2, 100.9, 101.1, 2.0), 'BTC/USDT')
+        stats = cache.get_stats()
+        assert stats['misses'] == primed
+        assert stats['hits'] == 1
@@ -0,0 +1,100 @@
+"""
+測試全序列指標內核：每個位置與標量內核在 prices[:i + 1] 上的結果一致
+"""
+
+import numpy as np
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.indicators import (
+    Indicators, rsi_jit, ema_jit, macd_jit, atr_jit, bollinger_width_jit,
+)
+
+
+def _ohlc(n, seed=0, base=60000.0):
+    rng = np.random.default_rng(seed)
+    closes = base + rng.normal(scale=base * 0.002, size=n).cumsum()
+    highs = closes + rng.uniform(0, base * 0.001, size=n)
+    lows = closes - rng.uniform(0, base * 0.001, size=n)
+    return highs, lows, closes
+
+
+def _prefix_values(fn, n, start):
+    return np.array([fn(i) for i in range(start, n)])
+
+
+class TestSeriesMatchScalar:
+    """全序列 vs 標量"""
+
+    N = 300
+
+    def test_ema(self):
+        _, _, closes = _ohlc(self.N)
+        series = Indicators.ema_series(closes, 12)
+        assert np.isnan(series[:11]).all()
+        expected = _prefix_values(lambda i: ema_jit(closes[:i + 1], 12), self.N, 11)
+        assert np.array_equal(series[11:], expected)
+
+    def test_rsi(self):
+        _, _, closes = _ohlc(self.N, seed=1)
+        closes[50:70] = closes[49] + np.arange(20)  # 單邊上漲 → RSI 100
+        series = Indicators.rsi_series(closes, 14)
+        assert np.isnan(series[:14]).all()
+        expected = _prefix_values(lambda i: rsi_jit(closes[:i + 1], 14), self.N, 14)
+        assert np.allclose(series[14:], expected, rtol=0, atol=1e-8)
+        assert series[69] == 100.0
+
+    def test_macd_has_real_signal_line(self):
+        _, _, closes = _ohlc(self.N, seed=2)
+        macd_line, signal_line, histogram = Indicators.macd_series(closes, 12, 26, 9)
+
+        assert np.isnan(signal_line[:33]).all() and not np.isnan(signal_line[33:]).any()
+        # 信號線 = MACD 線的 EMA(9)
+        assert np.allclose(signal_line[33:], Indicators.ema_series(macd_line[25:], 9)[8:])
+        assert np.allclose(histogram[33:], macd_line[33:] - signal_line[33:])
+        assert np.abs(histogram[33:]).max() > 0
+
+        for i in (25, 30, 33, 100, self.N - 1):
+            m, sig, h = macd_jit(closes[:i + 1], 12, 26, 9)
+            assert m == pytest.approx(macd_line[i])
+            if i >= 33:
+                assert (sig, h) == (signal_line[i], histogram[i])
+
+    def test_atr(self):
+        highs, lows, closes = _ohlc(self.N, seed=3)
+        series = Indicators.atr_series(highs, lows, closes, 14)
+        assert np.isnan(series[:14]).all()
+        expected = _prefix_values(lambda i: atr_jit(highs[:i + 1], lows[:i + 1], closes[:i + 1], 14), self.N, 14)
+        assert np.allclose(series[14:], expected, rtol=1e-10, atol=0)
+
+    def test_bollinger_width(self):
+        _, _, closes = _ohlc(self.N, seed=4)
+        series = Indicators.bollinger_width_series(closes, 20, 2.0)
+        expected = _prefix_values(lambda i: bollinger_width_jit(closes[:i + 1], 20, 2.0), self.N, 19)
+        assert np.array_equal(series[19:], expected)
+
+
+class TestSeries2D:
+    """多交易對 2-D 版本與逐行一致"""
+
+    def test_rows_match_1d(self):
+        rows = [_ohlc(120, seed=s, base=b) for s, b in enumerate((60000.0, 3000.0, 0.5))]
+        highs, lows, closes = (np.stack(parts) for parts in zip(*rows))
+
+        assert np.array_equal(Indicators.rsi_series(closes), np.stack([Indicators.rsi_series(c) for c in closes]),
+                              equal_nan=True)
+        assert np.array_equal(Indicators.atr_series(highs, lows, closes),
+                              np.stack([Indicators.atr_series(*r) for r in rows]), equal_nan=True)
+        macd_2d = Indicators.macd_series(closes)
+        for k, c in enumerate(closes):
+            for got, want in zip(macd_2d, Indicators.macd_series(c)):
+                assert np.array_equal(got[k], want, equal_nan=True)
+        assert Indicators.bollinger_width_series(closes).shape == closes.shape
+        assert Indicators.ema_series(closes, 5).shape == closes.shape
+
+    def test_short_input_is_all_nan(self):
+        assert np.isnan(Indicators.rsi_series([1.0, 2.0, 3.0])).all()
+        assert np.isnan(Indicators.macd_series(np.ones(10))[1]).all()
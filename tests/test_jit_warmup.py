@@ -0,0 +1,45 @@
+"""
+測試 Numba 預熱：快取目錄驗證與每個內核的編譯/載入報告
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import jit_warmup
+from src.jit_warmup import validate_cache_dir, warmup_kernels, run_warmup
+
+
+class TestJitWarmup:
+    """JIT 預熱測試"""
+
+    def test_writable_cache_dir_is_kept(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("NUMBA_CACHE_DIR", str(tmp_path))
+        result = validate_cache_dir()
+        assert result == {'path': str(tmp_path), 'writable': True, 'fallback': False}
+
+    def test_unwritable_cache_dir_falls_back(self, tmp_path, monkeypatch):
+        blocker = tmp_path / "not_a_dir"
+        blocker.write_text("x")
+        fallback = tmp_path / "fallback"
+        monkeypatch.setenv("NUMBA_CACHE_DIR", str(blocker / "cache"))
+        monkeypatch.setattr(jit_warmup, "FALLBACK_CACHE_DIR", str(fallback))
+        try:
+            import numba
+            monkeypatch.setattr(numba.config, "CACHE_DIR", numba.config.CACHE_DIR)
+        except ImportError:
+            pass
+
+        result = validate_cache_dir()
+        assert result['fallback'] and result['writable']
+        assert os.environ["NUMBA_CACHE_DIR"] == str(fallback)
+
+    def test_every_kernel_is_warmed(self):
+        report = warmup_kernels()
+        assert len(report) == len(jit_warmup._warmup_calls())
+        assert all(entry['source'] in ('compiled', 'cache', 'ready', 'python') for entry in report.values())
+
+        # 第二次預熱不再編譯
+        again = run_warmup()
+        assert all(entry['source'] in ('ready', 'python') for entry in again['kernels'].values())
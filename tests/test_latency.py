@@ -0,0 +1,132 @@
+"""
+測試 tick-to-trade 延遲追蹤（對數直方圖、階段跨度、抽樣環形日誌、環形緩衝區時間戳、下單階段）
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.latency import (
+    LatencyHistogram, Tracer, STAGE_FEED_RECV, STAGE_RING_COMMIT, STAGE_BRAIN_DEQUEUE,
+    STAGE_PUBLISH, STAGE_TRADE_RECV, STAGE_ORDER_SEND, STAGE_ORDER_ACK
+)
+
+
+class TestHistogram:
+    """對數直方圖"""
+
+    def test_percentiles_within_bucket_width(self):
+        h = LatencyHistogram()
+        for us in range(1, 1001):
+            h.record(us * 1000)
+
+        snapshot = h.snapshot()
+        assert snapshot['count'] == 1000
+        assert snapshot['max_us'] == 1000.0
+        assert snapshot['avg_us'] == pytest.approx(500.5)
+        # 桶寬約 19%：百分位為桶上界
+        assert 500 <= h.percentile(50) <= 500 * 1.19
+        assert 990 <= h.percentile(99) <= 1000
+
+    def test_sub_microsecond_and_empty(self):
+        h = LatencyHistogram()
+        assert h.percentile(99) == 0.0
+        h.record(200)
+        assert h.percentile(50) == pytest.approx(0.2)
+
+
+class TestTracer:
+    """追蹤階段與抽樣"""
+
+    def test_step_and_total_spans(self):
+        tracer = Tracer()
+        trace = tracer.start(recv_ns=1_000_000, commit_ns=1_050_000)
+        tracer.mark(trace, STAGE_BRAIN_DEQUEUE, 1_250_000)
+        tracer.mark(trace, STAGE_PUBLISH, 2_250_000)
+
+        stats = tracer.get_stats()
+        assert stats['feed_recv→ring_commit']['max_us'] == 50.0
+        assert stats['ring_commit→brain_dequeue']['max_us'] == 200.0
+        assert stats['brain_dequeue→publish']['max_us'] == 1000.0
+        assert stats['feed_recv→publish']['max_us'] == 1250.0
+        assert [stage for stage, _ in trace] == [STAGE_FEED_RECV, STAGE_RING_COMMIT, STAGE_BRAIN_DEQUEUE, STAGE_PUBLISH]
+
+    def test_missing_trace_is_noop(self):
+        tracer = Tracer()
+        tracer.mark(None, STAGE_PUBLISH)
+        assert not tracer.finish(None)
+        assert tracer.get_stats() == {}
+
+    def test_sampling_keeps_every_order_trace(self):
+        tracer = Tracer(sample_every=10, log_size=5)
+        for i in range(100):
+            trace = tracer.start(recv_ns=1000 + i)
+            tracer.mark(trace, STAGE_PUBLISH, 5000 + i)
+            tracer.finish(trace)
+        assert len(tracer.recent()) == 5  # 10 個抽樣，環形日誌只保留最後 5 個
+
+        order_trace = tracer.start(recv_ns=1000)
+        for stage, ns in ((STAGE_TRADE_RECV, 2000), (STAGE_ORDER_SEND, 3000), (STAGE_ORDER_ACK, 9000)):
+            tracer.mark(order_trace, stage, ns)
+        assert tracer.finish(order_trace)
+        assert tracer.recent(1)[0][-1] == (STAGE_ORDER_ACK, 8.0)
+
+
+class TestRingBufferStamps:
+    """環形緩衝區攜帶追蹤時間戳"""
+
+    def test_stamps_round_trip(self):
+        from src.ring_buffer import RingBuffer
+        ring = RingBuffer(create=True)
+        try:
+            ring._set_cursors(0, 0)
+            ring.write_candle((1.0, 2.0, 3.0, 0.5, 2.5, 10.0), recv_ns=123456789)
+            ring.write_candle((2.0, 2.0, 3.0, 0.5, 2.5, 10.0))
+
+            (candle, recv_ns, commit_ns), (plain, plain_recv, _) = list(ring.read_new(with_stamps=True))
+            assert candle == (1.0, 2.0, 3.0, 0.5, 2.5, 10.0)
+            assert recv_ns == 123456789
+            assert commit_ns > 0
+            assert plain_recv == 0
+
+            ring.write_candle((3.0, 2.0, 3.0, 0.5, 2.5, 10.0))
+            assert list(ring.read_new()) == [(3.0, 2.0, 3.0, 0.5, 2.5, 10.0)]
+        finally:
+            ring.close()
+            ring.unlink()
+
+
+class _Response:
+    status = 200
+    data = {'orderId': 1, 'avgPrice': '100.0', 'status': 'FILLED'}
+    text = ''
+    elapsed_ms = 1.0
+
+
+class _Client:
+    async def request(self, *args, **kwargs):
+        return _Response()
+
+
+class TestOrderStages:
+    """下單路徑標記發送 / 回報"""
+
+    @pytest.mark.asyncio
+    async def test_order_send_and_ack(self, monkeypatch):
+        from src import trade, latency
+        tracer = Tracer(sample_every=1000)
+        monkeypatch.setattr(latency, '_tracer', tracer)
+        monkeypatch.setattr(trade, 'LIVE_TRADING_ENABLED', True)
+        monkeypatch.setattr(trade, '_rest_client', lambda: _Client())
+
+        trace = tracer.start(recv_ns=1)
+        tracer.mark(trace, STAGE_TRADE_RECV)
+        filled = await trade._execute_order_live(
+            {'symbol': 'BTCUSDT', 'side': 'BUY', 'quantity': 0.01, 'type': 'MARKET', 'trace': trace})
+
+        assert filled is not None
+        assert [stage for stage, _ in trace][-2:] == [STAGE_ORDER_SEND, STAGE_ORDER_ACK]
+        assert 'order_send→order_ack' in tracer.get_stats()
+        assert len(tracer.recent()) == 1  # 到達下單回報的追蹤總是保留
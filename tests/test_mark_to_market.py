@@ -0,0 +1,184 @@
+"""
+測試逐筆盯市引擎（增量未實現 PnL / 曝險 / 權益、陣列倉位表槽位管理、交易對格式統一、資金追蹤器與交易模塊 / 大腦行情路徑接入）
+"""
+
+import random
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.capital_tracker import CapitalTracker
+from src.mark_to_market import MarkToMarketEngine, normalize_symbol
+
+
+def _full_recompute(positions, prices):
+    """逐倉重算（對照組）"""
+    pnl = gross = net = 0.0
+    for symbol, p in positions.items():
+        qty = p['quantity'] if p['side'] == 'BUY' else -p['quantity']
+        mark = prices.get(symbol, p['entry_price'])
+        pnl += qty * (mark - p['entry_price'])
+        gross += abs(qty) * mark
+        net += qty * mark
+    return pnl, gross, net
+
+
+class TestEngine:
+    """盯市引擎"""
+
+    def test_long_and_short_pnl(self):
+        engine = MarkToMarketEngine(balance=1000.0)
+        engine.sync(1000.0, {
+            'BTCUSDT': {'quantity': 0.1, 'entry_price': 50000.0, 'side': 'BUY'},
+            'ETHUSDT': {'quantity': 2.0, 'entry_price': 3000.0, 'side': 'SELL'},
+        })
+        assert engine.unrealized_pnl == 0.0  # 尚無價格：按進場價計
+        assert engine.equity == 1000.0
+
+        engine.on_price('BTCUSDT', 51000.0)
+        engine.on_price('ETHUSDT', 2900.0)
+        assert engine.position_pnl('BTCUSDT') == pytest.approx(100.0)
+        assert engine.position_pnl('ETHUSDT') == pytest.approx(200.0)
+        assert engine.unrealized_pnl == pytest.approx(300.0)
+        assert engine.equity == pytest.approx(1300.0)
+        assert engine.gross_exposure == pytest.approx(0.1 * 51000 + 2 * 2900)
+        assert engine.net_exposure == pytest.approx(0.1 * 51000 - 2 * 2900)
+
+    def test_price_before_position_is_used(self):
+        engine = MarkToMarketEngine()
+        engine.on_price('SOLUSDT', 110.0)  # 無倉位：只記錄價格
+        assert engine.unrealized_pnl == 0.0
+        engine.sync(0.0, {'SOLUSDT': {'quantity': 10, 'entry_price': 100.0, 'side': 'BUY'}})
+        assert engine.position_pnl('SOLUSDT') == pytest.approx(100.0)
+
+    def test_incremental_matches_full_recompute(self):
+        rng = random.Random(7)
+        symbols = [f"S{i}USDT" for i in range(40)]
+        positions, prices = {}, {}
+        engine = MarkToMarketEngine(capacity=4)  # 觸發擴容
+        for step in range(5000):
+            if step % 97 == 0:
+                symbol = rng.choice(symbols)
+                if symbol in positions and rng.random() < 0.4:
+                    del positions[symbol]
+                else:
+                    positions[symbol] = {'quantity': rng.uniform(0.1, 5), 'entry_price': rng.uniform(10, 100),
+                                         'side': rng.choice(['BUY', 'SELL'])}
+                engine.sync(500.0, positions)
+            symbol = rng.choice(symbols)
+            prices[symbol] = rng.uniform(10, 100)
+            engine.on_price(symbol, prices[symbol])
+
+        pnl, gross, net = _full_recompute(positions, prices)
+        assert len(engine) == len(positions)
+        assert engine.unrealized_pnl == pytest.approx(pnl, rel=1e-9, abs=1e-6)
+        assert engine.gross_exposure == pytest.approx(gross, rel=1e-9, abs=1e-6)
+        assert engine.net_exposure == pytest.approx(net, rel=1e-9, abs=1e-6)
+
+    def test_slots_reused_after_close(self):
+        engine = MarkToMarketEngine(capacity=2)
+        engine.sync(0.0, {'A': {'quantity': 1, 'entry_price': 1.0}, 'B': {'quantity': 1, 'entry_price': 1.0}})
+        engine.sync(0.0, {'B': {'quantity': 1, 'entry_price': 1.0}, 'C': {'quantity': 1, 'entry_price': 2.0}})
+        assert engine.capacity == 2
+        assert 'A' not in engine and 'C' in engine
+
+    def test_refresh_from_price_source(self):
+        engine = MarkToMarketEngine()
+        engine.sync(0.0, {'BTCUSDT': {'quantity': 1, 'entry_price': 100.0, 'side': 'BUY'}})
+        engine.refresh({'BTCUSDT': 105.0}.get)
+        assert engine.unrealized_pnl == pytest.approx(5.0)
+
+    def test_symbol_forms_share_one_slot(self):
+        assert normalize_symbol('BTC/USDT') == normalize_symbol('BTC/USDT:USDT') == normalize_symbol('btcusdt') == 'BTCUSDT'
+        engine = MarkToMarketEngine()
+        engine.sync(0.0, {'BTCUSDT': {'quantity': 1, 'entry_price': 100.0, 'side': 'BUY'}})
+        engine.on_price('BTC/USDT', 110.0)  # 大腦 / K 線倉庫格式
+        assert 'BTC/USDT' in engine and len(engine) == 1
+        assert engine.position_pnl('BTCUSDT') == pytest.approx(10.0)
+        assert engine.price('BTCUSDT') == 110.0
+
+
+class TestCapitalTracker:
+    """資金追蹤器權益"""
+
+    def test_equity_follows_prices(self):
+        tracker = CapitalTracker(10000.0)
+        tracker.open_position('BTCUSDT', 'BUY', 0.1, 42000.0, 4200.0)
+        assert tracker.get_total_equity() == pytest.approx(10000.0)
+
+        tracker.update_position_price('BTCUSDT', 43000.0)
+        assert tracker.get_unrealized_pnl() == pytest.approx(100.0)
+        assert tracker.get_total_equity() == pytest.approx(5800.0 + 0.1 * 43000)
+        assert tracker.positions['BTCUSDT']['unrealized_pnl'] == pytest.approx(100.0)
+
+        tracker.open_position('ETHUSDT', 'SELL', 1.0, 3000.0, 3000.0)
+        tracker.update_position_price('ETHUSDT', 2900.0)
+        assert tracker.get_total_equity() == pytest.approx(10200.0)
+
+        tracker.close_position('BTCUSDT', 43000.0, 100.0)
+        assert tracker.get_total_equity() == pytest.approx(10200.0)
+        assert tracker.get_account_status()['unrealized_pnl'] == pytest.approx(100.0)
+
+
+class TestTradeWiring:
+    """交易模塊使用盯市引擎"""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_and_risk_equity(self, monkeypatch):
+        from src import trade
+        monkeypatch.setattr(trade, '_account_state', {'balance': 1000.0, 'trades': [], 'positions': {
+            'BTCUSDT': {'quantity': 0.01, 'entry_price': 50000.0, 'side': 'BUY'},
+        }})
+        monkeypatch.setattr(trade, '_marks', MarkToMarketEngine())
+        trade._sync_marks()
+
+        trade.on_price('BTCUSDT', 52000.0)
+        assert trade.get_equity() == pytest.approx(1020.0)
+        assert trade._state_snapshot()['pnl'] == pytest.approx(20.0)
+        assert await trade._get_position_pnl(trade._account_state['positions']['BTCUSDT'], 'BTCUSDT') == pytest.approx(20.0)
+        # 未知價格不再假設 +2%
+        assert trade._mark_price('NOPRICEUSDT', 10.0) == 10.0
+
+
+class TestBrainPath:
+    """帳戶同步的倉位（BTCUSDT）由大腦行情（BTC/USDT）盯市"""
+
+    @pytest.fixture
+    def synced(self, monkeypatch):
+        from src import trade
+        monkeypatch.setattr(trade, '_account_state', {'balance': 1000.0, 'trades': [], 'positions': {
+            'BTCUSDT': {'quantity': 0.01, 'entry_price': 50000.0, 'side': 'BUY'},  # initial_account_sync 格式
+        }})
+        monkeypatch.setattr(trade, '_marks', MarkToMarketEngine())
+        trade._sync_marks()
+        return trade
+
+    @pytest.mark.asyncio
+    async def test_process_candle_marks_exchange_symbol_position(self, synced):
+        from src import brain
+        await brain.process_candle((1700000000000.0, 51000.0, 52100.0, 50900.0, 52000.0, 5.0), 'BTC/USDT')
+        assert synced._marks.position_pnl('BTCUSDT') == pytest.approx(20.0)
+        assert await synced._get_position_pnl(synced._account_state['positions']['BTCUSDT'], 'BTCUSDT') == pytest.approx(20.0)
+
+    def test_ring_buffer_carries_symbol(self, synced):
+        from src import brain
+        from src.ring_buffer import RingBuffer
+        try:
+            ring = RingBuffer(create=True)
+        except Exception:
+            pytest.skip("shared memory unavailable")
+        try:
+            ring.write_candle((1.0, 2.0, 3.0, 0.5, 2.5, 10.0), 0, 'ETHUSDT')
+            ring.write_candle((2.0, 51000.0, 52100.0, 50900.0, 52000.0, 5.0), 0, 'BTCUSDT')
+            ring.write_candle((3.0, 2.0, 3.0, 0.5, 2.5, 10.0))
+            items = list(ring.read_new(with_stamps=True, with_symbol=True))
+            assert [item[3] for item in items] == ['ETHUSDT', 'BTCUSDT', '']
+            for candle, _, _, symbol in items:
+                if symbol:
+                    brain.mark_positions(symbol, candle[4])
+            assert synced._marks.position_pnl('BTCUSDT') == pytest.approx(20.0)  # 不會被 ETH 價格誤標
+        finally:
+            ring.close()
+            ring.unlink()
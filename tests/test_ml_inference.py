@@ -0,0 +1,146 @@
+"""
+測試微批次 ML 推理服務（off-loop predict_proba、單筆不等待窗口、編譯評估器內聯）
+"""
+
+import asyncio
+import pytest
+import numpy as np
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.ml_inference import BatchInferenceService
+from src.ml_model import MLModel, HAS_SKLEARN
+
+
+def _training_data(n=200, seed=7):
+    rng = np.random.default_rng(seed)
+    data = []
+    for _ in range(n):
+        rsi = float(rng.uniform(10, 90))
+        data.append({
+            'confidence': float(rng.uniform(0.3, 0.9)),
+            'features': {'rsi': rsi, 'fvg': float(rng.uniform()), 'liquidity': float(rng.uniform()),
+                         'atr': float(rng.uniform(0, 0.05)), 'macd': float(rng.normal()),
+                         'bb_width': float(rng.uniform(0, 5))},
+            'label': int(rsi < 50),
+            'weight': 1.0
+        })
+    return data
+
+
+class TestBatchInferenceService:
+    """批次推理測試"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_batch(self):
+        calls = []
+
+        def predict_batch(X):
+            calls.append(X.shape)
+            return X[:, 0] / 10.0
+
+        service = BatchInferenceService(predict_batch, max_batch=16, max_wait_ms=20)
+        await service.start()
+        try:
+            results = await asyncio.gather(*(service.predict([float(i), 0.0]) for i in range(10)))
+        finally:
+            await service.stop()
+
+        assert results == pytest.approx([i / 10.0 for i in range(10)])
+        assert calls == [(10, 2)]
+        assert service.get_stats()['avg_batch_size'] == 10
+
+    @pytest.mark.asyncio
+    async def test_batch_is_capped_at_max_batch(self):
+        sizes = []
+
+        def predict_batch(X):
+            sizes.append(len(X))
+            return np.zeros(len(X))
+
+        service = BatchInferenceService(predict_batch, max_batch=4, max_wait_ms=20)
+        await service.start()
+        try:
+            await asyncio.gather(*(service.predict([0.0]) for _ in range(10)))
+        finally:
+            await service.stop()
+
+        assert max(sizes) <= 4
+        assert sum(sizes) == 10
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_every_waiter(self):
+        def predict_batch(X):
+            raise ValueError("boom")
+
+        service = BatchInferenceService(predict_batch, max_wait_ms=5)
+        await service.start()
+        try:
+            with pytest.raises(ValueError):
+                await service.predict([1.0])
+            assert service.running
+        finally:
+            await service.stop()
+
+    @pytest.mark.asyncio
+    async def test_lone_row_does_not_wait_out_window(self):
+        service = BatchInferenceService(lambda X: X[:, 0], max_wait_ms=500)
+        await service.start()
+        try:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            assert await service.predict([0.25]) == 0.25
+            assert loop.time() - start < 0.1  # 無其他排隊請求：立即送出
+        finally:
+            await service.stop()
+
+    @pytest.mark.asyncio
+    async def test_predict_requires_running_service(self):
+        service = BatchInferenceService(lambda X: X[:, 0])
+        with pytest.raises(RuntimeError):
+            await service.predict([1.0])
+
+
+@pytest.mark.skipif(not HAS_SKLEARN, reason="scikit-learn not available")
+class TestMLModelBatchedConfidence:
+    """MLModel 批次推理與同步路徑一致"""
+
+    @pytest.mark.asyncio
+    async def test_batched_matches_inline(self):
+        model = MLModel()
+        assert await model.train(_training_data())
+        assert model.model.n_jobs == 1
+        model.compiled = None  # sklearn 路徑才經過批次服務
+
+        signals = _training_data(20, seed=11)
+        inline = [model.predict_win_probability(s) for s in signals]
+
+        await model.start_batch_inference(max_wait_ms=5)
+        try:
+            adjusted = await asyncio.gather(*(model.adjust_confidence(dict(s)) for s in signals))
+        finally:
+            await model.stop_batch_inference()
+
+        assert [a['ml_confidence'] for a in adjusted] == pytest.approx(inline)
+        assert model.inference.get_stats()['rows'] == 20
+
+    @pytest.mark.asyncio
+    async def test_compiled_ensemble_skips_batcher(self):
+        model = MLModel()
+        assert await model.train(_training_data())
+        if model.compiled is None:
+            pytest.skip("compiled ensemble not available")
+
+        signals = _training_data(5, seed=11)
+        inline = [model.predict_win_probability(s) for s in signals]
+
+        await model.start_batch_inference(max_wait_ms=5)
+        try:
+            adjusted = [await model.adjust_confidence(dict(s)) for s in signals]
+        finally:
+            await model.stop_batch_inference()
+
+        assert [a['ml_confidence'] for a in adjusted] == inline
+        assert model.inference.get_stats()['rows'] == 0  # 內聯評分，不經執行緒
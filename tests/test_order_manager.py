@@ -0,0 +1,240 @@
+"""
+測試冪等下單狀態機（確定性 client order id、單向狀態轉換、未知狀態查詢 / 用戶流解析、並發在途訂單、交易模塊不重複下單）
+"""
+
+import asyncio
+import re
+import time
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.order_manager import (
+    OrderManager, make_client_order_id, PENDING, UNKNOWN, NOT_FOUND, NEW, PARTIALLY_FILLED, FILLED
+)
+
+
+def _stream_update(client_id, status, filled=0.0, avg_price=0.0, execution='TRADE', commission=0.0):
+    return {'clientOrderId': client_id, 'status': status, 'execution': execution, 'orderId': 7,
+            'filled': filled, 'avg_price': avg_price, 'commission': commission}
+
+
+class _Exchange:
+    """假交易所查詢：按 client id 返回訂單，可設定延遲 / 失敗次數"""
+
+    def __init__(self, orders=None, delay=0.0, failures=0):
+        self.orders = orders or {}
+        self.delay = delay
+        self.failures = failures
+        self.calls = 0
+
+    async def query(self, symbol, client_id):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("timeout")
+        return self.orders.get(client_id)
+
+
+class TestClientOrderId:
+    """確定性 client order id"""
+
+    def test_deterministic_and_valid(self):
+        manager = OrderManager(_Exchange().query)
+        a = {'signal_id': 'sig-1', 'symbol': 'BTCUSDT', 'side': 'BUY'}
+        b, sell = dict(a), {**a, 'side': 'SELL'}
+        assert manager.client_order_id(a) == manager.client_order_id(b) == make_client_order_id('sig-1:BTCUSDT:BUY')
+        assert a['client_order_id'] == b['client_order_id']  # 寫回訂單
+        assert re.fullmatch(r'[.A-Z:/a-z0-9_-]{1,36}', a['client_order_id'])
+        assert manager.client_order_id(sell) != a['client_order_id']
+        assert manager.client_order_id({'idempotency_key': 'close:BTCUSDT:1'}) == make_client_order_id('close:BTCUSDT:1')
+
+    def test_unkeyed_orders_get_unique_ids(self):
+        manager = OrderManager(_Exchange().query)
+        order = {'symbol': 'BTCUSDT', 'side': 'BUY'}
+        first = manager.client_order_id(order)
+        assert manager.client_order_id(order) == first  # 同一訂單重試沿用
+        assert manager.client_order_id({'symbol': 'BTCUSDT', 'side': 'BUY'}) != first
+
+
+class TestTransitions:
+    """單向狀態轉換與重複提交"""
+
+    def test_stream_before_ack(self):
+        manager = OrderManager(_Exchange().query)
+        order, fresh = manager.register('c1', 'BTCUSDT', 'BUY', 1.0)
+        assert fresh and order.state == PENDING
+
+        manager.on_order_update(_stream_update('c1', PARTIALLY_FILLED, 0.4, 100.0, commission=0.01))
+        manager.on_order_update(_stream_update('c1', FILLED, 1.0, 101.0, commission=0.02))
+        manager.apply_result('c1', {'orderId': 7, 'status': NEW, 'executedQty': '0', 'avgPrice': '0'})  # 遲到的回報
+
+        assert order.state == FILLED
+        assert order.filled == 1.0 and order.avg_price == 101.0
+        assert order.commission == pytest.approx(0.03)
+        assert order.result()['orderId'] == 7
+
+    def test_duplicate_register_and_resend_after_reject(self):
+        manager = OrderManager(_Exchange().query)
+        manager.register('c1', 'BTCUSDT', 'BUY', 1.0)
+        order, fresh = manager.register('c1', 'BTCUSDT', 'BUY', 1.0)
+        assert not fresh
+
+        manager.mark_rejected('c1')
+        assert order.resendable
+        order, fresh = manager.register('c1', 'BTCUSDT', 'BUY', 1.0)
+        assert fresh and order.state == PENDING
+
+        manager.apply_result('c1', {'orderId': 1, 'status': FILLED, 'executedQty': '1'})
+        assert not manager.register('c1', 'BTCUSDT', 'BUY', 1.0)[1]
+
+    def test_unrelated_stream_updates_ignored(self):
+        manager = OrderManager(_Exchange().query)
+        manager.on_order_update(_stream_update('manual', FILLED, 1.0))
+        assert manager.get('manual') is None
+
+    def test_history_is_bounded(self):
+        manager = OrderManager(_Exchange().query, history=3)
+        for i in range(10):
+            manager.register(f"c{i}", 'BTCUSDT', 'BUY', 1.0)
+            manager.apply_result(f"c{i}", {'orderId': i + 1, 'status': FILLED})
+        assert manager.get_stats()['tracked'] == 3
+        assert manager.get('c9') is not None and manager.get('c0') is None
+
+
+class TestResolution:
+    """未知狀態解析"""
+
+    @pytest.mark.asyncio
+    async def test_stream_event_resolves_without_query(self):
+        exchange = _Exchange()
+        manager = OrderManager(exchange.query, resolve_delay=1.0)
+        manager.register('c1', 'BTCUSDT', 'BUY', 1.0)
+        manager.mark_unknown('c1')
+
+        async def late_fill():
+            await asyncio.sleep(0.01)
+            manager.on_order_update(_stream_update('c1', FILLED, 1.0, 100.0))
+
+        asyncio.get_running_loop().create_task(late_fill())
+        order = await manager.resolve('c1')
+        assert order.state == FILLED
+        assert exchange.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_query_found_and_not_found(self):
+        exchange = _Exchange({'placed': {'orderId': 9, 'status': FILLED, 'executedQty': '2', 'avgPrice': '10'}},
+                             failures=1)
+        manager = OrderManager(exchange.query, resolve_delay=0.001)
+        for client_id in ('placed', 'lost'):
+            manager.register(client_id, 'BTCUSDT', 'BUY', 2.0)
+            manager.mark_unknown(client_id)
+
+        placed = await manager.resolve('placed')  # 第一次查詢失敗，重試成功
+        lost = await manager.resolve('lost')
+        assert placed.state == FILLED and placed.filled == 2.0
+        assert lost.state == NOT_FOUND and lost.resendable
+        assert exchange.calls == 3
+
+    @pytest.mark.asyncio
+    async def test_unresolvable_stays_unknown(self):
+        manager = OrderManager(_Exchange(failures=10).query, resolve_delay=0.001, resolve_attempts=3)
+        manager.register('c1', 'BTCUSDT', 'BUY', 1.0)
+        manager.mark_unknown('c1')
+        order = await manager.resolve('c1')
+        assert order.state == UNKNOWN and not order.resendable
+
+    @pytest.mark.asyncio
+    async def test_settle_waits_for_live_order(self):
+        exchange = _Exchange()
+        manager = OrderManager(exchange.query, settle_timeout=1.0)
+        manager.register('c1', 'BTCUSDT', 'BUY', 1.0)
+        manager.apply_result('c1', {'orderId': 1, 'status': NEW})
+
+        asyncio.get_running_loop().call_later(0.01, manager.on_order_update, _stream_update('c1', FILLED, 1.0, 5.0))
+        order = await manager.settle('c1')
+        assert order.state == FILLED and order.avg_price == 5.0
+        assert exchange.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_many_orders_resolve_concurrently(self):
+        exchange = _Exchange({f"c{i}": {'orderId': i + 1, 'status': FILLED} for i in range(0, 200, 2)}, delay=0.05)
+        manager = OrderManager(exchange.query, resolve_delay=0.001)
+        for i in range(200):
+            manager.register(f"c{i}", 'BTCUSDT', 'BUY', 1.0)
+            manager.mark_unknown(f"c{i}")
+        assert manager.in_flight() == 200
+
+        start = time.monotonic()
+        orders = await asyncio.gather(*(manager.resolve(f"c{i}") for i in range(200)))
+        assert time.monotonic() - start < 1.0  # 並行查詢，而非 200 × 50ms
+        assert [o.state for o in orders[:2]] == [FILLED, NOT_FOUND]
+        assert manager.in_flight() == 0
+
+
+class _Response:
+    def __init__(self, status, data):
+        self.status = status
+        self.data = data
+        self.text = str(data)
+        self.elapsed_ms = 1.0
+
+
+class _Client:
+    """POST 超時但訂單已在交易所成交；GET 按 client id 查得"""
+
+    def __init__(self):
+        self.placed = {}
+        self.posts = 0
+        self.gets = 0
+
+    async def request(self, method, path, query, **kwargs):
+        if method == 'POST':
+            self.posts += 1
+            client_id = self.current['newClientOrderId']
+            self.placed[client_id] = {'orderId': 77, 'status': 'FILLED', 'executedQty': '0.01', 'avgPrice': '100.0'}
+            raise asyncio.TimeoutError()
+        self.gets += 1
+        client_id = self.current['newClientOrderId']
+        if client_id in self.placed:
+            return _Response(200, self.placed[client_id])
+        return _Response(400, {'code': -2013, 'msg': 'Order does not exist.'})
+
+
+class TestTradeIntegration:
+    """交易模塊：超時不重發、同一訂單重試不重複成交"""
+
+    @pytest.mark.asyncio
+    async def test_timeout_resolved_and_retry_deduplicated(self, monkeypatch):
+        from src import trade
+        client = _Client()
+        monkeypatch.setattr(trade, 'LIVE_TRADING_ENABLED', True)
+        monkeypatch.setattr(trade, '_rest_client', lambda: client)
+        monkeypatch.setattr(trade, '_order_manager', OrderManager(trade._query_order, resolve_delay=0.001))
+
+        real_order_params = trade._order_params
+
+        def order_params(order):
+            client.current = real_order_params(order)
+            return client.current
+
+        monkeypatch.setattr(trade, '_order_params', order_params)
+
+        order = {'symbol': 'BTCUSDT', 'side': 'BUY', 'quantity': 0.01, 'type': 'MARKET', 'signal_id': 'sig-42'}
+        filled = await trade._execute_order_live(order)
+        assert filled is not None
+        assert filled['orderId'] == 77 and filled['price'] == 100.0
+        assert filled['clientOrderId'] == make_client_order_id('sig-42:BTCUSDT:BUY')
+        assert client.posts == 1 and client.gets == 1
+
+        # 同一信號再次下單（重試 / 重投遞）：不再發送
+        again = await trade._execute_order_live(dict(order))
+        assert again['orderId'] == 77
+        assert client.posts == 1
+
+        trade._get_order_manager().mark_rejected('unused')  # 未追蹤的 id：無操作
+        assert trade._get_order_manager().get_stats()['states'] == {FILLED: 1}
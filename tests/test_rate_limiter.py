@@ -0,0 +1,111 @@
+"""
+測試權重感知限流器（令牌桶、響應頭校正、優先級隊列、429 暫停）
+"""
+
+import asyncio
+import time
+import pytest
+import sys
+import os
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.binance_rest import BinanceRestClient
+from src.rate_limiter import RateLimiter, PRIORITY_CLOSE, PRIORITY_ENTRY, PRIORITY_QUERY
+
+
+class TestBuckets:
+    """令牌桶與響應頭"""
+
+    @pytest.mark.asyncio
+    async def test_grant_without_waiting_when_budget_available(self):
+        limiter = RateLimiter(safety=1.0)
+        assert await limiter.acquire(5, 1, PRIORITY_ENTRY) == 0.0
+        stats = limiter.get_stats()
+        assert stats['entry']['granted'] == 1
+        assert stats['entry']['throttled'] == 0
+        assert 2394 < stats['weight_tokens'] <= 2395.1
+        assert 299 <= stats['order_tokens'] <= 299.1
+
+    def test_headers_clamp_budget(self):
+        limiter = RateLimiter(weight_limit=2400, order_limit_10s=300, order_limit_1m=1200, safety=0.9)
+        limiter.update_from_headers({'X-MBX-USED-WEIGHT-1M': '2000', 'X-MBX-ORDER-COUNT-10S': '10',
+                                     'X-MBX-ORDER-COUNT-1M': '1050'})
+        assert limiter.weight.tokens <= 2160 - 2000 + 1
+        # 分鐘額度只剩 1080 - 1050 = 30 筆
+        assert limiter.orders.tokens <= 31
+        assert limiter.get_stats()['used_weight_1m'] == 2000
+
+
+class TestQueue:
+    """優先級排隊"""
+
+    @pytest.mark.asyncio
+    async def test_close_before_entry_before_query(self):
+        limiter = RateLimiter(weight_limit=1200, safety=1.0)  # 20 weight/s
+        limiter.weight.tokens = 0
+        order = []
+
+        async def request(name, priority):
+            await limiter.acquire(1, 0, priority)
+            order.append(name)
+
+        tasks = [asyncio.create_task(request('query', PRIORITY_QUERY))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request('entry', PRIORITY_ENTRY)))
+        tasks.append(asyncio.create_task(request('close', PRIORITY_CLOSE)))
+        await asyncio.gather(*tasks)
+
+        assert order == ['close', 'entry', 'query']
+        stats = limiter.get_stats()
+        assert stats['query']['throttled'] == 1
+        assert stats['query']['max_wait_ms'] >= 100
+        assert stats['close']['max_wait_ms'] < stats['query']['max_wait_ms']
+
+    @pytest.mark.asyncio
+    async def test_order_budget_throttles_orders_only(self):
+        limiter = RateLimiter(order_limit_10s=10, order_limit_1m=600, safety=1.0)  # 10 orders/s
+        limiter.orders.tokens = 0
+        start = time.perf_counter()
+        await limiter.acquire(1, 0, PRIORITY_QUERY)
+        assert time.perf_counter() - start < 0.02
+        await limiter.acquire(1, 1, PRIORITY_ENTRY)
+        assert time.perf_counter() - start >= 0.08
+
+    @pytest.mark.asyncio
+    async def test_429_pauses_all_requests(self):
+        limiter = RateLimiter()
+        limiter.update_from_headers({'Retry-After': '0.2'}, status=429)
+        start = time.perf_counter()
+        await limiter.acquire(1, 0, PRIORITY_CLOSE)
+        assert time.perf_counter() - start >= 0.19
+        assert limiter.get_stats()['rejections'] == 1
+
+
+@pytest.mark.asyncio
+async def test_client_feeds_headers_back():
+    async def ping(request):
+        return web.json_response({}, headers={'X-MBX-USED-WEIGHT-1M': '37'})
+
+    app = web.Application()
+    app.router.add_get('/fapi/v1/ping', ping)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    client = BinanceRestClient(f"http://127.0.0.1:{port}")
+    signed = []
+    try:
+        await client.request('GET', '/fapi/v1/ping', lambda: signed.append(1) or 'x=1')
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+    assert signed == [1]
+    stats = client.get_stats()['rate_limit']
+    assert stats['used_weight_1m'] == 37
+    assert stats['query']['granted'] == 1
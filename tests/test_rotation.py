@@ -0,0 +1,115 @@
+"""
+測試倉位輪換（批量平倉 + 開倉：平倉被拒時撤銷新倉、成功時記錄平倉並同步盯市）
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.bus import EventBus, Topic
+from src.mark_to_market import MarkToMarketEngine
+
+
+def _fill(symbol, side, quantity, order_id):
+    return {'symbol': symbol, 'side': side, 'quantity': quantity, 'price': 10.0, 'cost': 10.0 * quantity,
+            'orderId': order_id, 'status': 'FILLED', 'timestamp': 1700000000000 + order_id, 'commission': 0.0}
+
+
+class _Writer:
+    def enqueue(self, row):
+        pass
+
+
+@pytest.fixture
+def rotation(monkeypatch):
+    from src import trade
+
+    async def noop(*args, **kwargs):
+        return True
+
+    async def pnl(position, symbol=None):
+        return 5.0
+
+    positions = {
+        'WEAKUSDT': {'quantity': 2.0, 'entry_price': 10.0, 'entry_confidence': 0.5, 'side': 'BUY', 'entry_time': 1},
+        'AUSDT': {'quantity': 1.0, 'entry_price': 10.0, 'entry_confidence': 0.8, 'side': 'BUY', 'entry_time': 2},
+        'BUSDT': {'quantity': 1.0, 'entry_price': 10.0, 'entry_confidence': 0.8, 'side': 'BUY', 'entry_time': 3},
+    }
+    monkeypatch.setattr(trade, '_account_state', {'balance': 100000.0, 'positions': positions, 'trades': []})
+    monkeypatch.setattr(trade, '_marks', MarkToMarketEngine())
+    trade._sync_marks()
+    monkeypatch.setattr(trade, '_failed_order_cooldown', {})
+    monkeypatch.setattr(trade, '_get_position_pnl', pnl)
+    monkeypatch.setattr(trade, 'open_virtual_position', noop)
+    monkeypatch.setattr(trade, '_sync_state_to_postgres', noop)
+    monkeypatch.setattr(trade, '_sync_state_to_redis', noop)
+    monkeypatch.setattr(trade, '_get_signal_writer', lambda: _Writer())
+
+    bus = EventBus()
+    published = []
+
+    async def on_filled(data):
+        published.append(data)
+
+    bus.subscribe(Topic.ORDER_FILLED, on_filled, sync=True)
+    monkeypatch.setattr(trade, 'bus', bus)
+
+    sent = []
+
+    def exchange(close_ok, open_ok, unwind_ok=True):
+        async def execute_orders(orders):
+            sent.append(('batch', [dict(o) for o in orders]))
+            close, order = orders
+            return [_fill(close['symbol'], close['side'], close['quantity'], 1) if close_ok else None,
+                    _fill(order['symbol'], order['side'], order['quantity'], 2) if open_ok else None]
+
+        async def execute_order_live(order):
+            sent.append(('single', dict(order)))
+            return _fill(order['symbol'], order['side'], order['quantity'], 3) if unwind_ok else None
+
+        monkeypatch.setattr(trade, 'execute_orders', execute_orders)
+        monkeypatch.setattr(trade, '_execute_order_live', execute_order_live)
+
+    signal = {'symbol': 'NEWUSDT', 'confidence': 0.9, 'entry_price': 10.0, 'order_amount': 10.0, 'signal_id': 'sig-1'}
+    return trade, exchange, signal, sent, published
+
+
+class TestRotation:
+    """輪換結果"""
+
+    @pytest.mark.asyncio
+    async def test_close_rejected_open_filled_is_unwound(self, rotation):
+        trade, exchange, signal, sent, published = rotation
+        exchange(close_ok=False, open_ok=True)
+        await trade._check_risk(signal)
+
+        kind, unwind = sent[-1]
+        assert kind == 'single'
+        assert unwind['symbol'] == 'NEWUSDT' and unwind['side'] == 'SELL' and unwind['reduce_only']
+        assert published == []  # 新倉已撤銷，不發布成交
+        assert set(trade._account_state['positions']) == {'WEAKUSDT', 'AUSDT', 'BUSDT'}
+        assert len(trade._account_state['positions']) <= trade.Config.MAX_OPEN_POSITIONS
+        assert [t['orderId'] for t in trade._account_state['trades']] == [2, 3]
+
+    @pytest.mark.asyncio
+    async def test_failed_unwind_keeps_position_tracked(self, rotation):
+        trade, exchange, signal, sent, published = rotation
+        exchange(close_ok=False, open_ok=True, unwind_ok=False)
+        await trade._check_risk(signal)
+
+        assert [p['symbol'] for p in published] == ['NEWUSDT']  # 倉位真實存在，必須記錄
+        assert 'WEAKUSDT' in trade._account_state['positions']
+
+    @pytest.mark.asyncio
+    async def test_successful_rotation_records_close(self, rotation):
+        trade, exchange, signal, sent, published = rotation
+        exchange(close_ok=True, open_ok=True)
+        await trade._check_risk(signal)
+
+        assert [kind for kind, _ in sent] == ['batch']
+        assert 'WEAKUSDT' not in trade._account_state['positions']
+        assert 'WEAKUSDT' not in trade._marks
+        assert trade._account_state['trades'][0]['symbol'] == 'WEAKUSDT'
+        assert [p['symbol'] for p in published] == ['NEWUSDT']
@@ -0,0 +1,203 @@
+"""
+測試信號寫後批量持久化（單語句批量寫入、Postgres 故障落盤、重放冪等、風控路徑不等待資料庫）
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.signal_writer import SignalWriter, SIGNAL_COLUMNS, to_columns
+
+
+def _row(signal_id: str, symbol: str = 'BTCUSDT'):
+    return (signal_id, symbol, 0.7, '{}', 0.01, 1700000000000, 50.0, 0.0, 0.0, 0.02, 0.5, 0.5)
+
+
+class _Conn:
+    """記錄 execute 呼叫的假連接（以 id 去重，模擬 ON CONFLICT DO NOTHING）"""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def execute(self, sql, *columns):
+        if self.db.fail:
+            raise ConnectionError("postgres down")
+        self.db.statements += 1
+        for signal_id in columns[0]:
+            self.db.rows.setdefault(signal_id, 0)
+            self.db.rows[signal_id] += 1
+
+    def is_closed(self):
+        return False
+
+    async def close(self):
+        pass
+
+
+class _Db:
+    def __init__(self):
+        self.fail = False
+        self.statements = 0
+        self.rows = {}
+
+    async def connect(self):
+        return _Conn(self)
+
+
+class TestColumns:
+    """行轉列"""
+
+    def test_to_columns(self):
+        columns = to_columns([_row('a'), _row('b', 'ETHUSDT')])
+        assert len(columns) == len(SIGNAL_COLUMNS)
+        assert columns[0] == ['a', 'b']
+        assert columns[1] == ['BTCUSDT', 'ETHUSDT']
+        assert to_columns([]) == [[] for _ in SIGNAL_COLUMNS]
+
+
+class TestSignalWriter:
+    """批量寫入 / 落盤 / 重放"""
+
+    @pytest.mark.asyncio
+    async def test_burst_is_one_statement(self):
+        db = _Db()
+        writer = SignalWriter(db.connect, batch_size=500, flush_interval_ms=10)
+        for i in range(300):
+            writer.enqueue(_row(f"id-{i}"))
+        assert db.statements == 0  # enqueue 不觸碰資料庫
+
+        await asyncio.sleep(0.05)
+        assert db.statements == 1
+        assert len(db.rows) == 300
+        assert writer.get_stats()['written'] == 300
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_batches_split_at_batch_size(self):
+        db = _Db()
+        writer = SignalWriter(db.connect, batch_size=100)
+        for i in range(250):
+            writer.enqueue(_row(f"id-{i}"))
+        assert await writer.flush()
+        assert db.statements == 3
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_outage_spills_then_replays_once(self, tmp_path):
+        db = _Db()
+        spill = str(tmp_path / 'spill.jsonl')
+        writer = SignalWriter(db.connect, batch_size=10, spill_path=spill)
+
+        db.fail = True
+        for i in range(25):
+            writer.enqueue(_row(f"id-{i}"))
+        assert not await writer.flush()
+        with open(spill) as f:
+            assert len(f.readlines()) == 25
+        assert writer.get_stats()['queued'] == 0
+
+        db.fail = False
+        writer.enqueue(_row('id-25'))
+        writer.enqueue(_row('id-0'))  # 重複 id：仍只有一行
+        assert await writer.flush()
+        assert not os.path.exists(spill)
+        assert len(db.rows) == 26
+        assert writer.get_stats()['replayed'] == 25
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_interrupted_replay_is_retried(self, tmp_path):
+        db = _Db()
+        spill = str(tmp_path / 'spill.jsonl')
+        with open(spill, 'w') as f:
+            for i in range(5):
+                f.write(json.dumps(_row(f"old-{i}")) + '\n')
+        writer = SignalWriter(db.connect, spill_path=spill)
+
+        db.fail = True
+        assert not await writer.flush()
+        assert os.path.exists(f"{spill}.replay")
+
+        db.fail = False
+        assert await writer.flush()
+        assert sorted(db.rows) == [f"old-{i}" for i in range(5)]
+        assert not os.path.exists(f"{spill}.replay")
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_spill_replayed_without_new_signals(self, tmp_path):
+        db = _Db()
+        spill = str(tmp_path / 'spill.jsonl')
+        writer = SignalWriter(db.connect, flush_interval_ms=1, spill_path=spill, retry_delay=0.02)
+
+        db.fail = True
+        writer.enqueue(_row('id-0'))
+        await asyncio.sleep(0.01)
+        assert os.path.exists(spill)
+
+        db.fail = False  # Postgres 恢復後不再有新信號：背景任務仍按 retry_delay 重放
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if not os.path.exists(spill):
+                break
+        assert not os.path.exists(spill)
+        assert 'id-0' in db.rows
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_start_replays_previous_run(self, tmp_path):
+        db = _Db()
+        spill = str(tmp_path / 'spill.jsonl')
+        with open(spill, 'w') as f:
+            f.write(json.dumps(_row('old-0')) + '\n')
+        writer = SignalWriter(db.connect, flush_interval_ms=1, spill_path=spill, retry_delay=0.01)
+        writer.start()
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if 'old-0' in db.rows:
+                break
+        assert 'old-0' in db.rows
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_overflow_spills_oldest(self, tmp_path):
+        db = _Db()
+        spill = str(tmp_path / 'spill.jsonl')
+        writer = SignalWriter(db.connect, batch_size=5, max_queue=10, spill_path=spill)
+        for i in range(11):
+            writer.enqueue(_row(f"id-{i}"))
+        with open(spill) as f:
+            assert [json.loads(line)[0] for line in f] == [f"id-{i}" for i in range(5)]
+        assert writer.get_stats()['queued'] == 6
+        await writer.close()
+        assert len(db.rows) == 11
+
+
+class TestRiskPath:
+    """風控路徑只入隊"""
+
+    @pytest.mark.asyncio
+    async def test_signal_row_and_enqueue(self, monkeypatch):
+        from src import trade
+        db = _Db()
+        writer = SignalWriter(db.connect)
+        monkeypatch.setattr(trade, '_signal_writer', writer)
+
+        signal = {'symbol': 'BTCUSDT', 'confidence': 0.8, 'direction': 'LONG', 'entry_price': 100.0,
+                  'timestamp': 1700000000.5, 'rsi': 30, 'features': {'atr': 0.03}}
+        row = trade._signal_row(signal, 0.5)
+        assert row[0] == signal['signal_id']  # 回寫到信號，成交記錄引用同一 id
+        assert row[1:3] == ('BTCUSDT', 0.8)
+        assert json.loads(row[3])['direction'] == 'LONG'
+        assert row[5] == 1700000000500
+        assert row[6] == 30.0 and row[9] == 0.03
+        assert len(row) == len(SIGNAL_COLUMNS)
+
+        trade._get_signal_writer().enqueue(row)
+        assert writer.get_stats()['queued'] == 1
+        await writer.close()
+        assert signal['signal_id'] in db.rows
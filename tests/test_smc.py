@@ -0,0 +1,136 @@
+"""
+測試 SMC 結構檢測（擺動點、BOS/CHOCH、訂單塊、FVG 區間）與增量模式
+"""
+
+import numpy as np
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import smc
+from src.smc import SMCTracker, detect_structure, attach_trackers
+from src.timeframe_buffer import TimeframeBuffer
+
+BASE_MS = 1_700_000_040_000
+
+
+def _bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    closes = 100.0 + rng.normal(size=n).cumsum()
+    opens = np.concatenate([[100.0], closes[:-1]])
+    highs = np.maximum(opens, closes) + rng.uniform(0.1, 1.0, n)
+    lows = np.minimum(opens, closes) - rng.uniform(0.1, 1.0, n)
+    ts = BASE_MS + np.arange(n) * 60_000.0
+    return np.stack([ts, opens, highs, lows, closes, np.ones(n)])
+
+
+def _from_path(closes):
+    """OHLC 由收盤路徑構造：開盤 = 前收，高低 = 開收 ± 0.1"""
+    closes = np.asarray(closes, dtype=np.float64)
+    opens = np.concatenate([[closes[0]], closes[:-1]])
+    return opens, np.maximum(opens, closes) + 0.1, np.minimum(opens, closes) - 0.1, closes
+
+
+class TestDetectStructure:
+    """批量檢測測試"""
+
+    def test_swing_points_are_strict_window_extremes(self):
+        ohlcv = _bars(300, seed=1)
+        highs, lows = ohlcv[2], ohlcv[3]
+        lb = 3
+        result = detect_structure(ohlcv[1], highs, lows, ohlcv[4], lookback=lb)
+
+        for j in range(lb, len(highs) - lb):
+            window = highs[j - lb:j + lb + 1]
+            expected = highs[j] == window.max() and highs[j] > highs[j - lb:j].max()
+            assert result['swing_high'][j] == expected, j
+        # 最後 lookback 根尚未確認
+        assert not result['swing_high'][-lb:].any()
+        assert not result['swing_low'][-lb:].any()
+
+    def test_bos_then_choch(self):
+        # 上升 → 回調 → 突破前高（BOS_UP）→ 跌破前低（CHOCH_DOWN）
+        path = [10, 11, 12, 13, 14, 13, 12, 11, 12, 13, 14, 15, 16, 17, 16, 15, 14, 13, 12, 11, 10, 9, 8]
+        opens, highs, lows, closes = _from_path(path)
+        result = detect_structure(opens, highs, lows, closes, lookback=2)
+
+        events = [smc.STRUCTURE_NAMES[e] for e in result['structure'] if e]
+        assert events[-2:] == ['BOS_UP', 'CHOCH_DOWN']
+        assert result['trend'][-1] == -1
+
+        # 每次結構突破都有反向 K 線作為訂單塊
+        blocks = smc.order_blocks(result)
+        assert blocks[-1]['type'] == 'bearish'
+        assert closes[blocks[-1]['index']] > opens[blocks[-1]['index']]
+
+    def test_fvg_zone_and_fill(self):
+        opens = np.array([10.0, 10.5, 12.5, 12.4, 12.0, 10.5])
+        highs = np.array([10.6, 12.6, 13.0, 12.6, 12.2, 10.8])
+        lows = np.array([9.9, 10.4, 11.5, 12.0, 11.2, 10.2])
+        closes = np.array([10.5, 12.5, 12.4, 12.1, 11.4, 10.4])
+        result = detect_structure(opens, highs, lows, closes, lookback=1, min_gap_pct=0.01)
+
+        zones = smc.fvg_zones(result)
+        assert zones[0]['index'] == 2 and zones[0]['direction'] == 'bullish'
+        assert (zones[0]['bottom'], zones[0]['top']) == (10.6, 11.5)
+        assert zones[0]['filled_at'] == 5  # low 10.2 <= 10.6
+
+    def test_empty_input(self):
+        result = detect_structure([], [], [], [])
+        assert len(result['structure']) == 0
+        structure = smc.market_structure(result['state'])
+        assert structure['trend'] == 'neutral' and not structure['structure_valid']
+
+
+class TestSMCTracker:
+    """增量模式與批量一致"""
+
+    def test_incremental_matches_batch(self):
+        ohlcv = _bars(600, seed=7)
+        lb = 4
+        batch = detect_structure(ohlcv[1], ohlcv[2], ohlcv[3], ohlcv[4], lookback=lb, ob_search=15)
+
+        tracker = SMCTracker(lookback=lb, ob_search=15)
+        tracker.seed(ohlcv[:, :100])
+        swings, structure, fvgs, blocks = [], [], [], []
+        for k in range(100, ohlcv.shape[1]):
+            events = tracker.update(tuple(ohlcv[:, k]))
+            if events['swing_high']:
+                swings.append(events['swing_high']['index'])
+            if events['structure']:
+                structure.append((k, events['structure']))
+            if events['fvg']:
+                fvgs.append(events['fvg']['index'])
+            if events['order_block']:
+                blocks.append(events['order_block']['index'])
+
+        tail = slice(100, None)
+        assert swings == [j for j in np.flatnonzero(batch['swing_high']) if j + lb >= 100]
+        assert structure == [(k, smc.STRUCTURE_NAMES[batch['structure'][k]])
+                             for k in np.flatnonzero(batch['structure'][tail]) + 100]
+        assert fvgs == list(np.flatnonzero(batch['fvg_dir'][tail]) + 100)
+        assert blocks and set(blocks) <= {b['index'] for b in smc.order_blocks(batch)}
+        assert np.array_equal(tracker.state, batch['state'], equal_nan=True)
+        assert np.array_equal(tracker.zones, batch['zones'])
+
+    def test_features(self):
+        tracker = SMCTracker(lookback=3)
+        tracker.seed(_bars(200, seed=3))
+        features = tracker.features()
+        assert features['smc_trend'] in (-1, 0, 1)
+        assert features['smc_fvg_bull'] + features['smc_fvg_bear'] == len(tracker.active_zones())
+        if features['smc_fvg_distance'] is not None:
+            assert features['smc_fvg_distance'] >= 0.0
+
+    def test_attach_trackers_follow_bar_closes(self):
+        buffer = TimeframeBuffer(max_candles_per_tf=500)
+        ohlcv = _bars(120, seed=5)
+        buffer.load_candles('BTC/USDT', '1m', [tuple(ohlcv[:, k]) for k in range(100)])
+        trackers = attach_trackers(buffer, ['BTC/USDT'], lookback=3)
+        # 預熱的最後一根視為形成中，不計入
+        assert trackers['BTC/USDT'].bar_count == 99
+
+        for k in range(100, 120):
+            buffer.add_tick('BTC/USDT', tuple(ohlcv[:, k]))
+        assert trackers['BTC/USDT'].bar_count == 119
@@ -0,0 +1,170 @@
+"""
+測試帳戶狀態合併寫入（去抖、單行 upsert、增量日誌、壓縮、重試、舊快照表遷移保留最新一行）
+"""
+
+import asyncio
+import contextlib
+import json
+import pytest
+import sqlite3
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.state_writer import (
+    AccountStateWriter, state_delta, UPSERT_SQL, HISTORY_SQL, COMPACT_SQL, SCHEMA_SQL, MIGRATE_SQL, STATE_ROW_ID
+)
+
+
+class RecordingConnection:
+    """記錄 SQL 的連接替身（接口同 asyncpg.Connection 的子集）"""
+
+    def __init__(self):
+        self.calls = []
+        self.closed = False
+
+    async def execute(self, sql, *args):
+        self.calls.append((sql, args))
+
+    @contextlib.asynccontextmanager
+    async def _transaction(self):
+        yield
+
+    def transaction(self):
+        return self._transaction()
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+    def executed(self, sql):
+        return [args for s, args in self.calls if s == sql]
+
+
+def _writer(state, conn, **kwargs):
+    async def connect():
+        return conn
+    return AccountStateWriter(lambda: json.loads(json.dumps(state)), connect, **kwargs)
+
+
+class TestDelta:
+    """增量計算"""
+
+    def test_scalars_and_positions(self):
+        old = {'balance': 100.0, 'pnl': 0.0, 'trade_count': 1,
+               'positions': {'A': {'quantity': 1}, 'B': {'quantity': 2}}}
+        new = {'balance': 99.0, 'pnl': 0.0, 'trade_count': 2,
+               'positions': {'A': {'quantity': 1}, 'B': {'quantity': 3}, 'C': {'quantity': 4}}}
+        assert state_delta(old, new) == {'balance': 99.0, 'trade_count': 2,
+                                         'positions': {'B': {'quantity': 3}, 'C': {'quantity': 4}}}
+        assert state_delta(new, {**new, 'positions': {'A': {'quantity': 1}}}) == {
+            'positions': {'B': None, 'C': None}}
+        assert state_delta(new, new) == {}
+        assert state_delta(None, new) == new
+
+
+class TestWriter:
+    """去抖寫入"""
+
+    @pytest.mark.asyncio
+    async def test_many_mutations_coalesce_into_few_upserts(self):
+        state = {'balance': 0.0, 'pnl': 0.0, 'trade_count': 0, 'positions': {}}
+        conn = RecordingConnection()
+        writer = _writer(state, conn, flush_interval_ms=50)
+
+        for i in range(200):
+            state['balance'] = float(i)
+            writer.mark_dirty()
+            if i % 20 == 0:
+                await asyncio.sleep(0.005)
+        await asyncio.sleep(0.12)
+
+        upserts = conn.executed(UPSERT_SQL)
+        assert 1 <= len(upserts) <= 4
+        assert upserts[-1][0] == 1            # 永遠是同一行
+        assert upserts[-1][1] == 199.0        # 最終狀態
+        assert len(conn.executed(HISTORY_SQL)) == len(upserts)
+        assert len(conn.executed(SCHEMA_SQL)) == 1
+        assert writer.get_stats()['marks'] == 200
+        await writer.close()
+        assert conn.closed
+
+    @pytest.mark.asyncio
+    async def test_history_deltas_and_periodic_compaction(self):
+        state = {'balance': 10.0, 'pnl': 0.0, 'trade_count': 0, 'positions': {}}
+        conn = RecordingConnection()
+        writer = _writer(state, conn, flush_interval_ms=0, compact_every=3, history_limit=500)
+
+        assert await writer.flush()
+        state['positions']['BTCUSDT'] = {'quantity': 0.1}
+        assert await writer.flush()
+        assert await writer.flush()  # 無變化：不寫
+        state['balance'] = 9.5
+        assert await writer.flush()
+
+        deltas = [json.loads(args[0]) for args in conn.executed(HISTORY_SQL)]
+        assert deltas[1] == {'positions': {'BTCUSDT': {'quantity': 0.1}}}
+        assert deltas[2] == {'balance': 9.5}
+        assert conn.executed(COMPACT_SQL) == [(500,)]
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_unavailable_database_retries_later(self):
+        state = {'balance': 1.0, 'pnl': 0.0, 'trade_count': 0, 'positions': {}}
+        conn = RecordingConnection()
+        available = {'db': False}
+
+        async def connect():
+            return conn if available['db'] else None
+
+        writer = AccountStateWriter(lambda: dict(state), connect, flush_interval_ms=10, retry_delay=0.05)
+        writer.mark_dirty()
+        await asyncio.sleep(0.02)
+        assert writer.failures == 1
+        available['db'] = True
+        await asyncio.sleep(0.08)
+        assert writer.flushes == 1
+        assert conn.executed(UPSERT_SQL)[0][1] == 1.0
+        await writer.close()
+
+
+class TestMigration:
+    """舊表（SERIAL id，每次變更 INSERT 一行）遷移：id = 1 是最舊的快照"""
+
+    @staticmethod
+    def _legacy_table():
+        db = sqlite3.connect(':memory:')
+        db.execute("""
+            CREATE TABLE account_state (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, balance REAL, pnl REAL, trade_count INTEGER,
+                positions TEXT, last_update TEXT, updated_at TEXT
+            )
+        """)
+        for i, balance in enumerate([10000.0, 9800.0, 10250.0]):
+            db.execute(
+                "INSERT INTO account_state (balance, pnl, trade_count, positions, last_update, updated_at) "
+                "VALUES (?, 0.0, ?, ?, ?, ?)",
+                (balance, i, json.dumps({'BTCUSDT': {'quantity': i}}), f"2024-01-0{i + 1}", f"2024-01-0{i + 1}")
+            )
+        return db
+
+    @staticmethod
+    def _migrate(db):
+        # asyncpg 的 $1 → sqlite 的 ?1；逐句執行，與 _ensure_schema 相同
+        for statement in MIGRATE_SQL.split(';'):
+            db.execute(statement.replace('$1', '?1'), (STATE_ROW_ID,))
+
+    def test_newest_snapshot_becomes_current_row(self):
+        db = self._legacy_table()
+        self._migrate(db)
+        rows = db.execute("SELECT id, balance, trade_count, positions FROM account_state").fetchall()
+        assert rows == [(STATE_ROW_ID, 10250.0, 2, json.dumps({'BTCUSDT': {'quantity': 2}}))]
+
+    def test_migration_is_idempotent(self):
+        db = self._legacy_table()
+        self._migrate(db)
+        self._migrate(db)
+        assert db.execute("SELECT id, balance FROM account_state").fetchall() == [(STATE_ROW_ID, 10250.0)]
@@ -0,0 +1,100 @@
+"""
+測試批次多時間框架趨勢驗證與逐個驗證結果一致
+"""
+
+import numpy as np
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.timeframe_analyzer import TimeframeAnalyzer, TREND_NAMES, VALIDATION_WEIGHTS
+from src.timeframe_buffer import TimeframeBuffer
+
+BASE_MS = 1_700_006_400_000  # 1h 對齊
+TIMEFRAMES = list(VALIDATION_WEIGHTS)
+
+
+def _trending_buffer(symbols, n_minutes=240, seed=0):
+    """部分交易對單邊上漲/下跌（必定一致），其餘隨機"""
+    rng = np.random.default_rng(seed)
+    buffer = TimeframeBuffer()
+    for k, symbol in enumerate(symbols):
+        drift = (1.0, -1.0, 0.0)[k % 3]
+        price = 100.0
+        for i in range(n_minutes):
+            price = max(1.0, price + drift * 0.1 + (0 if drift else rng.normal()))
+            buffer.add_tick(symbol, (BASE_MS + i * 60_000, price, price, price, price, 1.0))
+    return buffer
+
+
+class TestBatchValidation:
+    """批次驗證測試"""
+
+    def test_analyze_trends_matches_scalar(self):
+        analyzer = TimeframeAnalyzer()
+        rng = np.random.default_rng(1)
+        closes = 100 + rng.normal(size=(200, 3)).cumsum(axis=1)
+        closes[:20] = closes[:20, [0]] + np.arange(3)  # 保證有上漲
+        closes[20:40] = closes[20:40, [0]] - np.arange(3)  # 保證有下跌
+
+        batch = analyzer.analyze_trends(closes)
+        for i, row in enumerate(closes):
+            expected = analyzer.analyze_trend('1m', [(0, 0, 0, 0, c, 0) for c in row])
+            assert TREND_NAMES[int(batch['trend'][i])] == expected['trend']
+            assert batch['strength'][i] == pytest.approx(expected['strength'])
+            assert batch['confidence'][i] == pytest.approx(expected['confidence'])
+
+    def test_validate_setups_matches_validate_setup(self):
+        analyzer = TimeframeAnalyzer()
+        analyzer.MIN_CONFIDENCE = 0.0  # 只比較一致性判斷
+        symbols = [f"S{i}/USDT" for i in range(9)] + ['EMPTY/USDT']
+        buffer = _trending_buffer(symbols[:-1])
+
+        result = analyzer.validate_setups(analyzer.collect_closes(buffer, symbols))
+        assert result['trend'].shape == (len(symbols), len(TIMEFRAMES))
+
+        signals = {s['symbol']: s for s in analyzer.signals_from_batch(symbols, result)}
+        assert 'S0/USDT' in signals and signals['S0/USDT']['direction'] == 'UP'
+        assert 'S1/USDT' in signals and signals['S1/USDT']['direction'] == 'DOWN'
+
+        for symbol in symbols:
+            expected = analyzer.validate_setup(symbol, buffer.get_candles_by_tf(symbol))
+            if expected is None:
+                assert symbol not in signals
+            else:
+                assert signals[symbol]['direction'] == expected['direction']
+                assert signals[symbol]['confidence'] == pytest.approx(expected['confidence'])
+
+    def test_missing_data_is_ranging(self):
+        analyzer = TimeframeAnalyzer()
+        closes = np.full((2, len(TIMEFRAMES), 3), np.nan)
+        closes[1] = [1.0, 2.0, 3.0]
+
+        result = analyzer.validate_setups(closes)
+        assert result['trend'][0].tolist() == [0] * len(TIMEFRAMES)
+        assert result['composite'][0] == 0.0
+        assert result['aligned'].tolist() == [False, True]
+
+    def test_collect_closes_from_shared_store(self):
+        import uuid
+        from src.bar_store import SharedBarStore
+
+        symbols = ['S0/USDT', 'S1/USDT', 'S2/USDT']
+        store = SharedBarStore.create(symbols, TimeframeBuffer.TIMEFRAMES, capacity=500,
+                                      name=f"test_tfa_{uuid.uuid4().hex[:8]}")
+        try:
+            buffer = TimeframeBuffer()
+            buffer.attach_shared_store(store)
+            source = _trending_buffer(symbols)
+            for symbol in symbols:
+                for tf in TimeframeBuffer.TIMEFRAMES:
+                    buffer.load_candles(symbol, tf, source.get_candles(symbol, tf))
+
+            wanted = ['S2/USDT', 'MISSING/USDT', 'S0/USDT']
+            from_store = TimeframeAnalyzer.collect_closes(store, wanted)
+            from_buffer = TimeframeAnalyzer.collect_closes(buffer, wanted)
+            assert np.array_equal(from_store, from_buffer, equal_nan=True)
+        finally:
+            store.unlink()
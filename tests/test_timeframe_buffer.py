@@ -0,0 +1,173 @@
+"""
+測試陣列環形 TimeframeBuffer（O(1) 追加、零拷貝有序視圖）
+"""
+
+import numpy as np
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.timeframe_buffer import TimeframeBuffer, BarRing
+from src.data_formats import CANDLE_IDX_CLOSE, CANDLE_IDX_TIMESTAMP
+
+BASE_MS = 1_700_000_040_000  # 1m 對齊
+
+
+def _ticks(n, step_ms=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    price = 100.0
+    ticks = []
+    for i in range(n):
+        price += rng.normal()
+        ticks.append((BASE_MS + i * step_ms, price, price + 0.5, price - 0.5, price, 1.0))
+    return ticks
+
+
+class TestBarRing:
+    """環形存儲測試"""
+
+    def test_view_is_ordered_after_wraparound(self):
+        ring = BarRing(capacity=5)
+        for i in range(12):
+            ring.append(i, i, i, i, i, i)
+
+        view = ring.view()
+        assert len(ring) == 5
+        assert view[CANDLE_IDX_TIMESTAMP].tolist() == [7, 8, 9, 10, 11]
+        assert ring.view(2)[CANDLE_IDX_CLOSE].tolist() == [10, 11]
+
+    def test_views_are_zero_copy_and_contiguous(self):
+        ring = BarRing(capacity=8)
+        for i in range(20):
+            ring.append(i, i, i, i, i, i)
+
+        closes = ring.view()[CANDLE_IDX_CLOSE]
+        assert closes.flags['C_CONTIGUOUS']
+        assert closes.dtype == np.float64
+        assert np.shares_memory(closes, ring.store)
+
+    def test_update_last_keeps_mirror_in_sync(self):
+        ring = BarRing(capacity=3)
+        for i in range(4):
+            ring.append(i, 1.0, 1.0, 1.0, 1.0, 1.0)
+        ring.update_last(5.0, 0.5, 2.0, 1.0)
+
+        slot = (ring.total - 1) % ring.capacity
+        assert np.array_equal(ring.store[:, slot], ring.store[:, slot + ring.capacity])
+        assert ring.view(1)[:, 0].tolist() == [3, 1.0, 5.0, 0.5, 2.0, 2.0]
+
+
+class TestTimeframeBuffer:
+    """多時間框架緩衝區測試"""
+
+    def test_capacity_bounds_every_timeframe(self):
+        buffer = TimeframeBuffer(max_candles_per_tf=10)
+        for tick in _ticks(300, step_ms=60_000):
+            buffer.add_tick('BTC/USDT', tick)
+
+        stats = buffer.get_stats('BTC/USDT')
+        assert stats['1m'] == 10
+        assert stats['5m'] == 10
+
+    def test_candles_by_tf_rows_match_tuple_layout(self):
+        buffer = TimeframeBuffer()
+        for tick in _ticks(30):
+            buffer.add_tick('ETH/USDT', tick)
+
+        candles = buffer.get_candles_by_tf('ETH/USDT')['1m']
+        assert candles.shape == (10, 6)
+        assert candles[0][CANDLE_IDX_TIMESTAMP] == BASE_MS
+        assert candles[-1][CANDLE_IDX_CLOSE] == buffer.get_column('ETH/USDT', '1m', 'close')[-1]
+
+    def test_unknown_symbol_returns_empty_views(self):
+        buffer = TimeframeBuffer()
+        assert buffer.get_candles_by_tf('NOPE')['1h'].shape == (0, 6)
+        assert not buffer.has_sufficient_data('NOPE')
+        assert buffer.get_stats('NOPE') == {tf: 0 for tf in TimeframeBuffer.TIMEFRAMES}
+
+
+def _aggregate(ticks, tf_ms):
+    """直接從已收盤的 1m K 線內的 tick 聚合（對照組；形成中的 1m 尚未合併到上層）"""
+    last_open = ticks[-1][0] - ticks[-1][0] % 60_000
+    bars = {}
+    for ts, o, h, l, c, v in ticks:
+        if tf_ms > 60_000 and ts >= last_open:
+            break
+        bucket = ts - ts % tf_ms
+        if bucket not in bars:
+            bars[bucket] = [bucket, o, h, l, c, v]
+        else:
+            bar = bars[bucket]
+            bar[2] = max(bar[2], h)
+            bar[3] = min(bar[3], l)
+            bar[4] = c
+            bar[5] += v
+    return [tuple(bar) for _, bar in sorted(bars.items())]
+
+
+class TestHierarchicalRollup:
+    """分層 rollup 測試"""
+
+    def test_rollup_matches_direct_aggregation(self):
+        ticks = _ticks(2000, step_ms=7_000, seed=3)
+        buffer = TimeframeBuffer(max_candles_per_tf=1000)
+        for tick in ticks:
+            buffer.add_tick('BTC/USDT', tick)
+
+        for tf in ('1m', '5m', '15m', '1h'):
+            expected = np.array(_aggregate(ticks, TimeframeBuffer.TIMEFRAMES[tf] * 1000))
+            actual = buffer.get_candles('BTC/USDT', tf)
+            assert np.allclose(actual, expected), tf
+
+    def test_custom_timeframes(self):
+        timeframes = {'1m': 60, '3m': 180, '5m': 300, '15m': 900, '1h': 3600, '4h': 14400}
+        buffer = TimeframeBuffer(max_candles_per_tf=2000, timeframes=timeframes)
+
+        ticks = _ticks(3000, step_ms=10_000, seed=5)
+        for tick in ticks:
+            buffer.add_tick('ETH/USDT', tick)
+
+        for tf in ('3m', '4h'):
+            expected = np.array(_aggregate(ticks, timeframes[tf] * 1000))
+            assert np.allclose(buffer.get_candles('ETH/USDT', tf), expected), tf
+
+    def test_bar_close_callbacks_fire_once_per_closed_bar(self):
+        buffer = TimeframeBuffer()
+        closed = []
+        buffer.on_bar_close('5m', lambda symbol, tf, bar: closed.append((symbol, tf, bar[0])))
+        buffer.on_bar_close('1m', lambda symbol, tf, bar: 1 / 0)  # 錯誤不影響 rollup
+
+        for tick in _ticks(21, step_ms=60_000):
+            buffer.add_tick('BTC/USDT', tick)
+
+        # 21 根 1m：前 20 根已收盤 → 4 根 5m 收盤（第 21 根仍在形成中）
+        first_bucket = BASE_MS - BASE_MS % 300_000
+        assert [c[2] for c in closed] == [first_bucket + i * 300_000 for i in range(len(closed))]
+        assert closed[0][:2] == ('BTC/USDT', '5m')
+        assert buffer.bar_is_open['BTC/USDT']['5m']
+
+    def test_new_bar_uses_tick_open(self):
+        buffer = TimeframeBuffer()
+        buffer.add_tick('BTC/USDT', (BASE_MS, 10.0, 12.0, 9.0, 11.0, 1.0))
+        assert buffer.get_candles('BTC/USDT', '1m')[-1].tolist() == [BASE_MS, 10.0, 12.0, 9.0, 11.0, 1.0]
+
+    def test_preloaded_bar_does_not_double_count_volume(self):
+        buffer = TimeframeBuffer()
+        bucket = BASE_MS - BASE_MS % 300_000
+        buffer.load_candles('BTC/USDT', '1m', [(bucket + 60_000, 10.0, 11.0, 9.0, 10.5, 2.0)])
+        buffer.load_candles('BTC/USDT', '5m', [(bucket, 9.5, 11.0, 9.0, 10.5, 7.0)])
+
+        buffer.add_tick('BTC/USDT', (bucket + 120_000, 10.5, 10.8, 10.4, 10.6, 1.0))
+        buffer.add_tick('BTC/USDT', (bucket + 180_000, 10.6, 10.6, 10.6, 10.6, 1.0))
+
+        # 預熱的 1m 已包含在 5m 的 7.0 中，只有之後收盤的 1m 會累加
+        bar = buffer.get_candles('BTC/USDT', '5m')[-1]
+        assert bar[5] == 7.0 + 1.0
+
+    def test_invalid_timeframe_configuration(self):
+        import pytest
+        with pytest.raises(ValueError):
+            TimeframeBuffer(timeframes={'1m': 60, '90s': 90})
+        with pytest.raises(ValueError):
+            TimeframeBuffer().on_bar_close('2h', lambda *a: None)
@@ -0,0 +1,92 @@
+"""
+測試 Numba 樹集成評估器與 sklearn predict_proba 逐位一致
+"""
+
+import pytest
+import numpy as np
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+sklearn = pytest.importorskip("sklearn")
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.preprocessing import StandardScaler
+
+from src.tree_ensemble import compile_ensemble
+from src.ml_model import MLModel
+
+# 特徵尺度差異很大（與 extract_ml_features 的 8 個特徵相似）
+FEATURE_SCALE = np.array([1.0, 1.0, 1.0, 0.01, 50.0, 0.02, 5.0, 3.0])
+
+
+def _dataset(n, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 8)) * FEATURE_SCALE
+    y = (X[:, 0] + X[:, 4] / 50.0 + rng.normal(size=n) * 0.5 > 0).astype(int)
+    return X, y
+
+
+def _fit(model):
+    X, y = _dataset(600, seed=1)
+    scaler = StandardScaler().fit(X)
+    model.fit(scaler.transform(X), y)
+    return model, scaler
+
+
+class TestCompiledEnsemble:
+    """編譯後的樹集成測試"""
+
+    @pytest.mark.parametrize("model", [
+        RandomForestClassifier(n_estimators=50, max_depth=8, random_state=42, n_jobs=1),
+        GradientBoostingClassifier(n_estimators=30, learning_rate=0.1, max_depth=4, random_state=42),
+    ])
+    def test_bit_identical_batch(self, model):
+        model, scaler = _fit(model)
+        compiled = compile_ensemble(model, scaler)
+        X_test, _ = _dataset(500, seed=2)
+
+        expected = model.predict_proba(scaler.transform(X_test))
+        actual = compiled.predict_proba(X_test)
+
+        assert actual.shape == expected.shape
+        assert np.array_equal(actual, expected)
+
+    @pytest.mark.parametrize("model", [
+        RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0, n_jobs=1),
+        GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=0),
+    ])
+    def test_bit_identical_single_row(self, model):
+        model, scaler = _fit(model)
+        compiled = compile_ensemble(model, scaler)
+        X_test, _ = _dataset(50, seed=3)
+
+        for row in X_test:
+            expected = model.predict_proba(scaler.transform(row.reshape(1, -1)))[0, 1]
+            assert compiled.predict_win_probability(row.tolist()) == expected
+
+    def test_unsupported_model_returns_none(self):
+        from sklearn.linear_model import LogisticRegression
+        X, y = _dataset(100, seed=4)
+        scaler = StandardScaler().fit(X)
+        model = LogisticRegression().fit(scaler.transform(X), y)
+        assert compile_ensemble(model, scaler) is None
+
+    @pytest.mark.asyncio
+    async def test_ml_model_uses_compiled_ensemble(self):
+        X, y = _dataset(200, seed=5)
+        training_data = [
+            {'confidence': float(row[0]), 'position_size': float(row[3]) * 10000.0,
+             'features': {'fvg': float(row[1]), 'liquidity': float(row[2]), 'rsi': float(row[4]),
+                          'atr': float(row[5]), 'macd': float(row[6]), 'bb_width': float(row[7])},
+             'label': int(label), 'weight': 1.0}
+            for row, label in zip(X, y)
+        ]
+        model = MLModel()
+        assert await model.train(training_data)
+        assert model.compiled is not None
+
+        signal = training_data[0]
+        features = model._extract_features(signal)
+        expected = model.model.predict_proba(model.scaler.transform([features]))[0, 1]
+        assert model.predict_win_probability(signal) == expected
@@ -0,0 +1,169 @@
+"""
+測試用戶數據流消費者（listenKey 生命週期、增量更新、過期重連、REST 對賬），使用本地 WS/HTTP 替身
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+from aiohttp import web, WSMsgType
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.binance_rest import BinanceRestClient
+from src.reconciliation import UserDataStream, diff_positions, apply_position
+
+
+def _account_update(balance, positions):
+    return {'e': 'ACCOUNT_UPDATE', 'E': 1, 'a': {
+        'B': [{'a': 'USDT', 'wb': str(balance), 'cw': str(balance)}],
+        'P': [{'s': s, 'pa': str(pa), 'ep': str(ep), 'ps': 'BOTH'} for s, pa, ep in positions],
+    }}
+
+
+def _order_update(client_id, status, execution, filled):
+    return {'e': 'ORDER_TRADE_UPDATE', 'E': 2, 'o': {
+        's': 'BTCUSDT', 'c': client_id, 'S': 'BUY', 'X': status, 'x': execution, 'i': 7,
+        'z': str(filled), 'l': str(filled), 'L': '50000', 'ap': '50000', 'n': '0.01',
+    }}
+
+
+async def _start_stand_in(scripts, account):
+    """本地 Binance 替身：listenKey REST + 用戶數據 WebSocket + 帳戶查詢"""
+    seen = {'keys': 0, 'keepalive': 0, 'deleted': 0, 'account': 0}
+
+    async def create_key(request):
+        seen['keys'] += 1
+        return web.json_response({'listenKey': f"key{seen['keys']}"})
+
+    async def keepalive(request):
+        seen['keepalive'] += 1
+        return web.json_response({})
+
+    async def delete_key(request):
+        seen['deleted'] += 1
+        return web.json_response({})
+
+    async def get_account(request):
+        seen['account'] += 1
+        return web.json_response(account)
+
+    async def stream(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        for event in scripts.get(request.match_info['key'], []):
+            await ws.send_json(event)
+        async for message in ws:
+            if message.type == WSMsgType.CLOSE:
+                break
+        return ws
+
+    app = web.Application()
+    app.router.add_post('/fapi/v1/listenKey', create_key)
+    app.router.add_put('/fapi/v1/listenKey', keepalive)
+    app.router.add_delete('/fapi/v1/listenKey', delete_key)
+    app.router.add_get('/fapi/v2/account', get_account)
+    app.router.add_get('/ws/{key}', stream)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, port, seen
+
+
+async def _wait_for(predicate, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def _unsigned(params):
+    return lambda: "timestamp=1&signature=test"
+
+
+class TestPureHelpers:
+    """倉位對比"""
+
+    def test_diff_and_apply(self):
+        local = {'A': {'quantity': 1.0, 'side': 'BUY'}, 'B': {'quantity': 2.0, 'side': 'SELL'},
+                 'C': {'quantity': 1.0, 'side': 'BUY'}}
+        remote = {'A': 1.0, 'B': 2.0, 'D': 0.5}
+        assert diff_positions(local, remote) == {'missing': ['D'], 'stale': ['C'], 'mismatched': ['B']}
+
+        positions = {'A': {'quantity': 1.0, 'side': 'BUY', 'entry_confidence': 0.9, 'entry_time': 5}}
+        apply_position(positions, 'A', -3.0, 100.0)
+        assert positions['A']['side'] == 'SELL' and positions['A']['quantity'] == 3.0
+        assert positions['A']['entry_confidence'] == 0.9
+        apply_position(positions, 'A', 0.0, 0.0)
+        assert positions == {}
+
+
+class TestUserDataStream:
+    """數據流生命週期"""
+
+    @pytest.mark.asyncio
+    async def test_events_applied_and_expired_key_replaced(self):
+        scripts = {
+            'key1': [
+                _account_update(1500.0, [('BTCUSDT', 0.01, 50000.0)]),
+                _order_update('abc', 'PARTIALLY_FILLED', 'TRADE', 0.005),
+                _order_update('abc', 'FILLED', 'TRADE', 0.01),
+                {'e': 'listenKeyExpired', 'E': 3},
+            ],
+            'key2': [_account_update(1490.0, [('BTCUSDT', 0, 0)])],
+        }
+        account = {'totalWalletBalance': '1490.0', 'positions': [
+            {'symbol': 'BTCUSDT', 'positionAmt': '0', 'entryPrice': '0'}]}
+        runner, port, seen = await _start_stand_in(scripts, account)
+
+        state = {'balance': 0.0, 'positions': {'ETHUSDT': {'quantity': 1.0, 'side': 'BUY'}}}
+        changes, updates = [], []
+        client = BinanceRestClient(f"http://127.0.0.1:{port}", "key")
+        stream = UserDataStream(client, state, asyncio.Lock(), _unsigned,
+                                ws_url=f"ws://127.0.0.1:{port}", keepalive_interval=0.05,
+                                on_change=lambda: changes.append((state['balance'], dict(state['positions']))),
+                                on_order_update=updates.append)
+        try:
+            await stream.start()
+            # 過期 → 新 key → 重連後對賬（ETHUSDT 在交易所不存在 → 移除）
+            await _wait_for(lambda: stream.get_stats()['connects'] == 2 and len(changes) >= 3)
+            await _wait_for(lambda: seen['keepalive'] >= 1)
+        finally:
+            await stream.stop()
+            await client.close()
+            await runner.cleanup()
+
+        assert seen['keys'] == 2
+        assert seen['deleted'] == 1
+        assert stream.orders['abc']['status'] == 'FILLED'
+        assert [u['status'] for u in updates] == ['PARTIALLY_FILLED', 'FILLED']
+        balance, positions = changes[0]  # 第一個 ACCOUNT_UPDATE
+        assert balance == 1500.0
+        assert positions['BTCUSDT']['quantity'] == 0.01
+        assert state['balance'] == 1490.0
+        assert state['positions'] == {}
+        assert stream.get_stats()['reconciliations'] == 1
+
+    @pytest.mark.asyncio
+    async def test_periodic_reconciliation_restores_missing_position(self):
+        account = {'totalWalletBalance': '800.0', 'positions': [
+            {'symbol': 'SOLUSDT', 'positionAmt': '-4', 'entryPrice': '150'}]}
+        runner, port, seen = await _start_stand_in({}, account)
+        state = {'balance': 1000.0, 'positions': {}}
+        client = BinanceRestClient(f"http://127.0.0.1:{port}", "key")
+        stream = UserDataStream(client, state, asyncio.Lock(), _unsigned,
+                                ws_url=f"ws://127.0.0.1:{port}", reconcile_interval=0.05)
+        try:
+            await stream.start()
+            await _wait_for(lambda: 'SOLUSDT' in state['positions'])
+        finally:
+            await stream.stop()
+            await client.close()
+            await runner.cleanup()
+
+        assert state['positions']['SOLUSDT']['side'] == 'SELL'
+        assert state['positions']['SOLUSDT']['quantity'] == 4.0
+        assert state['balance'] == 800.0